@@ -0,0 +1,296 @@
+"""
+Background tasks for importing and exporting courses in Studio.
+
+Both operations can take far longer than a web request should, so the views in
+`contentstore.views.import_export` only queue them. Each task records which
+stage it has reached in the Django cache (celery workers have no access to the
+requesting user's session), and the status views report it back to the pages
+polling for progress.
+"""
+import logging
+import os
+import shutil
+import tarfile
+import time
+from path import path
+from tempfile import mkdtemp, NamedTemporaryFile
+
+from celery import task
+from django.conf import settings
+from django.core.cache import cache
+from django.core.exceptions import SuspiciousOperation
+from django.utils.translation import ugettext as _
+
+from extract_tar import safetar_extractall
+from xmodule.contentstore.django import contentstore
+from xmodule.exceptions import SerializationError
+from xmodule.modulestore.django import modulestore
+from xmodule.modulestore.keys import CourseKey
+from xmodule.modulestore.tar_fs import TarFS
+from xmodule.modulestore.xml_importer import import_from_xml
+from xmodule.modulestore.xml_exporter import export_to_fs
+
+from contentstore.utils import reverse_usage_url
+
+
+log = logging.getLogger(__name__)
+
+# How long, in seconds, the status of an import or export is remembered.
+TASK_STATUS_TIMEOUT = 24 * 60 * 60
+
+# Import stages. A failed import reports the negated stage it failed in.
+IMPORT_STAGE_UNKNOWN = 0
+IMPORT_STAGE_EXTRACTING = 1
+IMPORT_STAGE_VALIDATING = 2
+IMPORT_STAGE_IMPORTING = 3
+IMPORT_STAGE_DONE = 4
+
+# Export stages. A failed export reports the negated stage it failed in.
+EXPORT_STAGE_UNKNOWN = 0
+EXPORT_STAGE_EXPORTING = 1
+EXPORT_STAGE_COMPRESSING = 2
+EXPORT_STAGE_DONE = 3
+
+
+def _status_cache_key(operation, user_id, course_key_string, name=u''):
+    """
+    Returns the cache key under which the status of a user's import or export is kept.
+    """
+    return u'contentstore.{0}_status.{1}.{2}.{3}'.format(operation, user_id, course_key_string, name)
+
+
+def get_import_status(user_id, course_key_string, filename):
+    """
+    Returns a dict with the 'Stage' reached by the import of `filename`, and an
+    'ErrMsg' if it failed.
+    """
+    return cache.get(
+        _status_cache_key('import', user_id, course_key_string, filename),
+        {'Stage': IMPORT_STAGE_UNKNOWN}
+    )
+
+
+def set_import_status(user_id, course_key_string, filename, stage, **kwargs):
+    """
+    Records that the import of `filename` reached `stage`. Any keyword arguments
+    (such as an 'ErrMsg') are stored along with it.
+    """
+    kwargs['Stage'] = stage
+    cache.set(_status_cache_key('import', user_id, course_key_string, filename), kwargs, TASK_STATUS_TIMEOUT)
+
+
+def clear_import_status(user_id, course_key_string, filename):
+    """
+    Forgets the status of an earlier import of `filename`, so that a new upload
+    of it isn't reported as already finished (or failed).
+    """
+    cache.delete(_status_cache_key('import', user_id, course_key_string, filename))
+
+
+def get_export_status(user_id, course_key_string):
+    """
+    Returns a dict with the 'Stage' reached by the user's latest export of the
+    course, and an 'ErrMsg' (and 'EditUnitUrl' and 'HasUnit') if it failed.
+    """
+    return cache.get(_status_cache_key('export', user_id, course_key_string), {'Stage': EXPORT_STAGE_UNKNOWN})
+
+
+def set_export_status(user_id, course_key_string, stage, **kwargs):
+    """
+    Records that the user's export of the course reached `stage`. Any keyword
+    arguments are stored along with it.
+    """
+    kwargs['Stage'] = stage
+    cache.set(_status_cache_key('export', user_id, course_key_string), kwargs, TASK_STATUS_TIMEOUT)
+
+
+def clear_export_status(user_id, course_key_string):
+    """
+    Forgets the status of the user's latest export of the course.
+    """
+    cache.delete(_status_cache_key('export', user_id, course_key_string))
+
+
+def import_course_dir(course_key):
+    """
+    Returns the directory a course's import archive is uploaded to and extracted in.
+    """
+    return path(settings.GITHUB_REPO_ROOT) / u"{0}-{1}-{2}".format(course_key.org, course_key.course, course_key.run)
+
+
+def export_filename(course_key):
+    """
+    Returns the name a course's .tar.gz export is downloaded as.
+    """
+    return u"{0}-{1}-{2}.tar.gz".format(course_key.org, course_key.course, course_key.run)
+
+
+def export_artifact_path(course_key, user_id):
+    """
+    Returns the path of the user's finished .tar.gz export of a course. It is
+    removed once downloaded, or by a later export after TASK_STATUS_TIMEOUT.
+    """
+    return path(settings.GITHUB_REPO_ROOT) / 'exports' / u"{0}-{1}-{2}-{3}.tar.gz".format(
+        course_key.org, course_key.course, course_key.run, user_id
+    )
+
+
+def _remove_expired_exports(export_dir):
+    """
+    Removes the export artifacts (and any temporary files left behind by crashed
+    exports) in `export_dir` that are older than TASK_STATUS_TIMEOUT, as their
+    status, and so their download link, has expired along with them.
+    """
+    expired = time.time() - TASK_STATUS_TIMEOUT
+    for artifact in export_dir.files():
+        try:
+            if artifact.mtime < expired:
+                artifact.remove()
+        except OSError:
+            # already removed by a concurrent export or download
+            pass
+
+
+def _find_course_xml(directory):
+    """
+    Returns the directory of the first course.xml file found under `directory`,
+    or None if there isn't one.
+    """
+    for dirpath, _dirnames, filenames in os.walk(directory):
+        if "course.xml" in filenames:
+            return path(dirpath)
+    return None
+
+
+@task()  # pylint: disable=E1102
+def import_olx(user_id, course_key_string, archive_path, filename):
+    """
+    Extracts the uploaded course archive at `archive_path`, checks that it holds
+    a course, and imports it into `course_key_string`, recording each stage.
+
+    The archive is extracted into a directory of its own, so that another upload
+    to the same course can't be mixed into (or removed along with) this one. The
+    archive and that directory are removed once the import finishes, successfully
+    or not.
+    """
+    course_key = CourseKey.from_string(course_key_string)
+    course_dir = import_course_dir(course_key)
+    extract_dir = None
+    stage = IMPORT_STAGE_EXTRACTING
+
+    def fail(message, **kwargs):
+        """ Records that the import failed in the current stage. """
+        set_import_status(user_id, course_key_string, filename, -stage, ErrMsg=message, **kwargs)
+
+    try:
+        set_import_status(user_id, course_key_string, filename, stage)
+        extract_dir = path(mkdtemp(dir=course_dir))
+        tar_file = tarfile.open(archive_path)
+        try:
+            safetar_extractall(tar_file, (extract_dir + '/').encode('utf-8'))
+        except SuspiciousOperation as exc:
+            fail(_('Unsafe tar file. Aborting import.'), SuspiciousFileOperationMsg=exc.args[0])
+            return
+        finally:
+            tar_file.close()
+
+        stage = IMPORT_STAGE_VALIDATING
+        set_import_status(user_id, course_key_string, filename, stage)
+        dirpath = _find_course_xml(extract_dir)
+        if dirpath is None:
+            fail(_('Could not find the course.xml file in the package.'))
+            return
+
+        log.debug('found course.xml at %s', dirpath)
+        if dirpath != extract_dir:
+            for fname in os.listdir(dirpath):
+                shutil.move(dirpath / fname, extract_dir)
+
+        stage = IMPORT_STAGE_IMPORTING
+        set_import_status(user_id, course_key_string, filename, stage)
+        _module_store, course_items = import_from_xml(
+            modulestore('direct'),
+            course_dir,
+            [extract_dir.name],
+            load_error_modules=False,
+            static_content_store=contentstore(),
+            target_course_id=course_key,
+            draft_store=modulestore()
+        )
+        log.debug('new course at %s', course_items[0].location)
+
+        set_import_status(user_id, course_key_string, filename, IMPORT_STAGE_DONE)
+
+    except Exception as exception:  # pylint: disable=broad-except
+        log.exception("error importing course")
+        fail(str(exception))
+
+    finally:
+        if extract_dir is not None:
+            shutil.rmtree(extract_dir, ignore_errors=True)
+        path(archive_path).remove_p()
+
+
+def _serialization_error_details(exc):
+    """
+    Returns a dict with the url for editing the parent of the component that
+    failed to export ('EditUnitUrl') and whether that parent is a unit ('HasUnit').
+    """
+    details = {'EditUnitUrl': "", 'HasUnit': False}
+    try:
+        failed_item = modulestore().get_item(exc.location)
+        parent_locs = modulestore().get_parent_locations(failed_item.location)
+        if len(parent_locs) > 0:
+            parent = modulestore().get_item(parent_locs[0])
+            details['EditUnitUrl'] = reverse_usage_url("unit_handler", parent.location)
+            details['HasUnit'] = parent.location.category == 'vertical'
+    except:  # pylint: disable=bare-except
+        # if we have a nested exception, then we'll show the more generic error message
+        pass
+    return details
+
+
+@task()  # pylint: disable=E1102
+def export_olx(user_id, course_key_string):
+    """
+    Exports `course_key_string` as xml straight into the user's .tar.gz export
+    artifact, recording each stage.
+
+    The archive is written to a temporary file next to the artifact and renamed
+    over it, so a download never sees a partially written export.
+    """
+    course_key = CourseKey.from_string(course_key_string)
+    stage = EXPORT_STAGE_EXPORTING
+    set_export_status(user_id, course_key_string, stage)
+
+    try:
+        name = modulestore().get_course(course_key).url_name
+        artifact = export_artifact_path(course_key, user_id)
+        artifact.parent.makedirs_p()
+        _remove_expired_exports(artifact.parent)
+        out = NamedTemporaryFile(dir=artifact.parent, prefix=name + '.', suffix='.tar.gz', delete=False)
+        try:
+            tar_file = tarfile.open(fileobj=out, mode='w:gz')
+            export_to_fs(modulestore('direct'), contentstore(), course_key, TarFS(tar_file), name, modulestore())
+
+            stage = EXPORT_STAGE_COMPRESSING
+            set_export_status(user_id, course_key_string, stage)
+            tar_file.close()
+            out.close()
+            os.rename(out.name, artifact)
+        except:
+            out.close()
+            os.remove(out.name)
+            raise
+
+        set_export_status(user_id, course_key_string, EXPORT_STAGE_DONE)
+
+    except SerializationError as exc:
+        log.exception('There was an error exporting course %s', course_key)
+        set_export_status(
+            user_id, course_key_string, -stage, ErrMsg=str(exc), **_serialization_error_details(exc)
+        )
+
+    except Exception as exc:  # pylint: disable=broad-except
+        log.exception('There was an error exporting course %s', course_key)
+        set_export_status(user_id, course_key_string, -stage, ErrMsg=str(exc))
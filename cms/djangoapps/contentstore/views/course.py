@@ -16,7 +16,6 @@ from django.http import HttpResponseBadRequest, HttpResponseNotFound
 from util.json_request import JsonResponse
 from edxmako.shortcuts import render_to_response
 
-from xmodule.error_module import ErrorDescriptor
 from xmodule.modulestore.django import modulestore
 from xmodule.contentstore.content import StaticContent
 from xmodule.tabs import PDFTextbookTabs
@@ -55,6 +54,7 @@ from student.roles import CourseRole, UserBasedRole
 
 from xmodule.modulestore.keys import CourseKey
 from course_creators.views import get_course_creator_status, add_user_with_status_unrequested
+from course_summaries.summary import get_course_summaries, query_course_summaries
 from contentstore import utils
 from student.roles import CourseInstructorRole, CourseStaffRole, CourseCreatorRole, GlobalStaff
 from student import auth
@@ -154,18 +154,16 @@ def _xmodule_json(xmodule, course_id):
 
 def _accessible_courses_list(request):
     """
-    List all courses available to the logged in user by iterating through all the courses
+    List the summaries of all courses available to the logged in user by iterating
+    through the summaries of all the courses
     """
-    courses = modulestore('direct').get_courses()
+    courses = query_course_summaries()
 
     # filter out courses that we don't have access to
     def course_filter(course):
         """
         Get courses to which this user has access
         """
-        if isinstance(course, ErrorDescriptor):
-            return False
-
         if GlobalStaff().has_user(request.user):
             return course.location.course != 'templates'
 
@@ -180,23 +178,14 @@ def _accessible_courses_list(request):
 
 def _accessible_courses_list_from_groups(request):
     """
-    List all courses available to the logged in user by reversing access group names
+    List the summaries of all courses available to the logged in user by reversing access group names
     """
-    courses_list = {}
-
     instructor_courses = UserBasedRole(request.user, CourseInstructorRole.ROLE).courses_with_role()
     staff_courses = UserBasedRole(request.user, CourseStaffRole.ROLE).courses_with_role()
     all_courses = instructor_courses | staff_courses
 
-    for course_access in all_courses:
-        course_key = course_access.course_id
-        if course_key not in courses_list:
-            course = modulestore('direct').get_course(course_key)
-            if course is not None and not isinstance(course, ErrorDescriptor):
-                # ignore deleted or errored courses
-                courses_list[course_key] = course
-
-    return courses_list.values()
+    # deleted or errored courses have no summaries, so they're left out
+    return get_course_summaries(set(course_access.course_id for course_access in all_courses)).values()
 
 
 @login_required
@@ -232,7 +221,7 @@ def course_listing(request):
         )
 
     return render_to_response('index.html', {
-        'courses': [format_course_for_view(c) for c in courses if not isinstance(c, ErrorDescriptor)],
+        'courses': [format_course_for_view(c) for c in courses],
         'user': request.user,
         'request_course_creator_url': reverse('contentstore.views.request_course_creator'),
         'course_creator_status': _get_course_creator_status(request.user),
@@ -5,15 +5,10 @@ courses
 import logging
 import os
 import re
-import shutil
-import tarfile
-from path import path
-from tempfile import mkdtemp
+from tempfile import mkstemp
 
-from django.conf import settings
 from django.contrib.auth.decorators import login_required
-from django.core.exceptions import SuspiciousOperation, PermissionDenied
-from django.core.files.temp import NamedTemporaryFile
+from django.core.exceptions import PermissionDenied
 from django.core.servers.basehttp import FileWrapper
 from django.http import HttpResponse, HttpResponseNotFound
 from django.utils.translation import ugettext as _
@@ -21,24 +16,20 @@ from django.views.decorators.http import require_http_methods, require_GET
 
 from django_future.csrf import ensure_csrf_cookie
 from edxmako.shortcuts import render_to_response
-from xmodule.contentstore.django import contentstore
-from xmodule.exceptions import SerializationError
 from xmodule.modulestore.django import modulestore
 from xmodule.modulestore.keys import CourseKey
-from xmodule.modulestore.xml_importer import import_from_xml
-from xmodule.modulestore.xml_exporter import export_to_xml
 
 from .access import has_course_access
 
-from extract_tar import safetar_extractall
 from student import auth
 from student.roles import CourseInstructorRole, CourseStaffRole, GlobalStaff
 from util.json_request import JsonResponse
 
-from contentstore.utils import reverse_course_url, reverse_usage_url
+from contentstore import tasks
+from contentstore.utils import reverse_course_url
 
 
-__all__ = ['import_handler', 'import_status_handler', 'export_handler']
+__all__ = ['import_handler', 'import_status_handler', 'export_handler', 'export_status_handler']
 
 
 log = logging.getLogger(__name__)
@@ -60,7 +51,9 @@ def import_handler(request, course_key_string):
         html: return html page for import page
         json: not supported
     POST or PUT
-        json: import a course via the .tar.gz file specified in request.FILES
+        json: upload the .tar.gz file specified in request.FILES, in chunks; once the
+            last chunk arrives, the course is imported in the background and progress
+            is reported by import_status_handler
     """
     course_key = CourseKey.from_string(course_key_string)
     if not has_course_access(request.user, course_key):
@@ -71,9 +64,7 @@ def import_handler(request, course_key_string):
         if request.method == 'GET':
             raise NotImplementedError('coming soon')
         else:
-            data_root = path(settings.GITHUB_REPO_ROOT)
-            course_subdir = "{0}-{1}-{2}".format(course_key.org, course_key.course, course_key.run)
-            course_dir = data_root / course_subdir
+            course_dir = tasks.import_course_dir(course_key)
 
             filename = request.FILES['course-data'].name
             if not filename.endswith('.tar.gz'):
@@ -102,8 +93,16 @@ def import_handler(request, course_key_string):
             # stream out the uploaded files in chunks to disk
             if int(content_range['start']) == 0:
                 mode = "wb+"
+                # A new upload of the file; forget how an earlier import of it went.
+                tasks.clear_import_status(request.user.id, unicode(course_key), filename)
             else:
                 mode = "ab+"
+                # The last request sometimes comes twice. This happens because
+                # nginx sends a 499 error code when the response takes too long.
+                # By then the first one has handed the whole archive over to the
+                # import, so there is nothing left to append to.
+                if not temp_filepath.exists() and int(content_range['stop']) == int(content_range['end']) - 1:
+                    return JsonResponse({'ImportStatus': 1})
                 size = os.path.getsize(temp_filepath)
                 # Check to make sure we haven't missed a chunk
                 # This shouldn't happen, even if different instances are handling
@@ -121,10 +120,6 @@ def import_handler(request, course_key_string):
                         },
                         status=409
                     )
-                # The last request sometimes comes twice. This happens because
-                # nginx sends a 499 error code when the response takes too long.
-                elif size > int(content_range['stop']) and size == int(content_range['end']):
-                    return JsonResponse({'ImportStatus': 1})
 
             with open(temp_filepath, mode) as temp_file:
                 for chunk in request.FILES['course-data'].chunks():
@@ -146,109 +141,19 @@ def import_handler(request, course_key_string):
                 })
 
             else:   # This was the last chunk.
-
-                # Use sessions to keep info about import progress
-                session_status = request.session.setdefault("import_status", {})
-                key = unicode(course_key) + filename
-                session_status[key] = 1
-                request.session.modified = True
-
-                # Do everything from now on in a try-finally block to make sure
-                # everything is properly cleaned up.
-                try:
-
-                    tar_file = tarfile.open(temp_filepath)
-                    try:
-                        safetar_extractall(tar_file, (course_dir + '/').encode('utf-8'))
-                    except SuspiciousOperation as exc:
-                        return JsonResponse(
-                            {
-                                'ErrMsg': 'Unsafe tar file. Aborting import.',
-                                'SuspiciousFileOperationMsg': exc.args[0],
-                                'Stage': 1
-                            },
-                            status=400
-                        )
-                    finally:
-                        tar_file.close()
-
-                    session_status[key] = 2
-                    request.session.modified = True
-
-                    # find the 'course.xml' file
-                    def get_all_files(directory):
-                        """
-                        For each file in the directory, yield a 2-tuple of (file-name,
-                        directory-path)
-                        """
-                        for dirpath, _dirnames, filenames in os.walk(directory):
-                            for filename in filenames:
-                                yield (filename, dirpath)
-
-                    def get_dir_for_fname(directory, filename):
-                        """
-                        Returns the dirpath for the first file found in the directory
-                        with the given name.  If there is no file in the directory with
-                        the specified name, return None.
-                        """
-                        for fname, dirpath in get_all_files(directory):
-                            if fname == filename:
-                                return dirpath
-                        return None
-
-                    fname = "course.xml"
-
-                    dirpath = get_dir_for_fname(course_dir, fname)
-
-                    if not dirpath:
-                        return JsonResponse(
-                            {
-
-                                'ErrMsg': _('Could not find the course.xml file in the package.'),
-                                'Stage': 2
-                            },
-                            status=415
-                        )
-
-                    logging.debug('found course.xml at {0}'.format(dirpath))
-
-                    if dirpath != course_dir:
-                        for fname in os.listdir(dirpath):
-                            shutil.move(dirpath / fname, course_dir)
-
-                    _module_store, course_items = import_from_xml(
-                        modulestore('direct'),
-                        settings.GITHUB_REPO_ROOT,
-                        [course_subdir],
-                        load_error_modules=False,
-                        static_content_store=contentstore(),
-                        target_course_id=course_key,
-                        draft_store=modulestore()
-                    )
-
-                    new_location = course_items[0].location
-                    logging.debug('new course at {0}'.format(new_location))
-
-                    session_status[key] = 3
-                    request.session.modified = True
-
-                # Send errors to client with stage at which error occurred.
-                except Exception as exception:   # pylint: disable=W0703
-                    log.exception(
-                        "error importing course"
-                    )
-                    return JsonResponse(
-                        {
-                            'ErrMsg': str(exception),
-                            'Stage': session_status[key]
-                        },
-                        status=400
-                    )
-
-                finally:
-                    shutil.rmtree(course_dir)
-
-                return JsonResponse({'Status': 'OK'})
+                # Extracting and importing the course can take far longer than
+                # the request may, so hand it to a worker and let the page poll
+                # import_status_handler for progress.
+                # The archive is handed over under a name of its own, so that a
+                # new upload of the same file can't overwrite it mid-import.
+                archive_fd, archive_path = mkstemp(dir=course_dir, suffix='.tar.gz')
+                os.close(archive_fd)
+                os.rename(temp_filepath, archive_path)
+                tasks.set_import_status(
+                    request.user.id, unicode(course_key), filename, tasks.IMPORT_STAGE_EXTRACTING
+                )
+                tasks.import_olx.delay(request.user.id, unicode(course_key), archive_path, filename)
+                return JsonResponse({'ImportStatus': tasks.IMPORT_STAGE_EXTRACTING})
     elif request.method == 'GET':  # assume html
         course_module = modulestore().get_course(course_key)
         return render_to_response('import.html', {
@@ -268,117 +173,126 @@ def import_status_handler(request, course_key_string, filename=None):
     """
     Returns an integer corresponding to the status of a file import. These are:
 
-        0 : No status info found (import done or upload still in progress)
+        0 : No status info found (import not started or upload still in progress)
         1 : Extracting file
         2 : Validating.
         3 : Importing to mongo
+        4 : Import successful
 
+    A negative status means the import failed in the corresponding stage; the
+    reason is returned as "ErrMsg".
     """
     course_key = CourseKey.from_string(course_key_string)
     if not has_course_access(request.user, course_key):
         raise PermissionDenied()
 
-    try:
-        session_status = request.session["import_status"]
-        status = session_status[course_key_string + filename]
-    except KeyError:
-        status = 0
-
-    return JsonResponse({"ImportStatus": status})
+    status = tasks.get_import_status(request.user.id, course_key_string, filename)
+    response = {"ImportStatus": status.pop('Stage')}
+    response.update(status)
+    return JsonResponse(response)
 
 
 # pylint: disable=unused-argument
 @ensure_csrf_cookie
 @login_required
-@require_http_methods(("GET",))
+@require_http_methods(("GET", "POST"))
 def export_handler(request, course_key_string):
     """
     The restful handler for exporting a course.
 
     GET
-        html: return html page for import page
-        application/x-tgz: return tar.gz file containing exported course
+        html: return html page for export page
+        application/x-tgz: return the tar.gz file of the user's latest finished export of
+            the course, which can be downloaded once
         json: not supported
+    POST
+        json: start exporting the course in the background; progress is reported
+            by export_status_handler
 
     Note that there are 2 ways to request the tar.gz file. The request header can specify
     application/x-tgz via HTTP_ACCEPT, or a query parameter can be used (?_accept=application/x-tgz).
-
-    If the tar.gz file has been requested but the export operation fails, an HTML page will be returned
-    which describes the error.
     """
     course_key = CourseKey.from_string(course_key_string)
     if not has_course_access(request.user, course_key):
         raise PermissionDenied()
 
-    course_module = modulestore().get_course(course_key)
+    if request.method == 'POST':
+        tasks.set_export_status(request.user.id, course_key_string, tasks.EXPORT_STAGE_EXPORTING)
+        tasks.export_olx.delay(request.user.id, course_key_string)
+        return JsonResponse({'ExportStatus': tasks.EXPORT_STAGE_EXPORTING})
 
     # an _accept URL parameter will be preferred over HTTP_ACCEPT in the header.
     requested_format = request.REQUEST.get('_accept', request.META.get('HTTP_ACCEPT', 'text/html'))
 
-    export_url = reverse_course_url('export_handler', course_key) + '?_accept=application/x-tgz'
     if 'application/x-tgz' in requested_format:
-        name = course_module.url_name
-        export_file = NamedTemporaryFile(prefix=name + '.', suffix=".tar.gz")
-        root_dir = path(mkdtemp())
-
+        artifact = tasks.export_artifact_path(course_key, request.user.id)
         try:
-            export_to_xml(modulestore('direct'), contentstore(), course_module.id, root_dir, name, modulestore())
-
-            logging.debug('tar file being generated at {0}'.format(export_file.name))
-            with tarfile.open(name=export_file.name, mode='w:gz') as tar_file:
-                tar_file.add(root_dir / name, arcname=name)
-        except SerializationError as exc:
-            log.exception('There was an error exporting course %s', course_module.id)
-            unit = None
-            failed_item = None
-            parent = None
-            try:
-                failed_item = modulestore().get_item(exc.location)
-                parent_locs = modulestore().get_parent_locations(failed_item.location)
-
-                if len(parent_locs) > 0:
-                    parent = modulestore().get_item(parent_locs[0])
-                    if parent.location.category == 'vertical':
-                        unit = parent
-            except:  # pylint: disable=bare-except
-                # if we have a nested exception, then we'll show the more generic error message
-                pass
-
-            return render_to_response('export.html', {
-                'context_course': course_module,
-                'in_err': True,
-                'raw_err_msg': str(exc),
-                'failed_module': failed_item,
-                'unit': unit,
-                'edit_unit_url': reverse_usage_url("unit_handler", parent.location) if parent else "",
-                'course_home_url': reverse_course_url("course_handler", course_key),
-                'export_url': export_url
-            })
-        except Exception as exc:
-            log.exception('There was an error exporting course %s', course_module.id)
-            return render_to_response('export.html', {
-                'context_course': course_module,
-                'in_err': True,
-                'unit': None,
-                'raw_err_msg': str(exc),
-                'course_home_url': reverse_course_url("course_handler", course_key),
-                'export_url': export_url
-            })
-        finally:
-            shutil.rmtree(root_dir / name)
-
-        wrapper = FileWrapper(export_file)
-        response = HttpResponse(wrapper, content_type='application/x-tgz')
-        response['Content-Disposition'] = 'attachment; filename=%s' % os.path.basename(export_file.name)
-        response['Content-Length'] = os.path.getsize(export_file.name)
+            export_file = open(artifact, 'rb')
+        except IOError:
+            return HttpResponseNotFound()
+
+        response = HttpResponse(
+            _stream_export_once(export_file, artifact, request.user.id, course_key_string),
+            content_type='application/x-tgz'
+        )
+        response['Content-Disposition'] = 'attachment; filename=%s' % tasks.export_filename(course_key)
+        response['Content-Length'] = os.fstat(export_file.fileno()).st_size
         return response
 
     elif 'text/html' in requested_format:
+        course_module = modulestore().get_course(course_key)
         return render_to_response('export.html', {
             'context_course': course_module,
-            'export_url': export_url
+            'export_url': reverse_course_url('export_handler', course_key),
+            'export_status_url': reverse_course_url('export_status_handler', course_key),
+            'course_home_url': reverse_course_url("course_handler", course_key),
         })
 
     else:
         # Only HTML or x-tgz request formats are supported (no JSON).
         return HttpResponse(status=406)
+
+
+def _stream_export_once(export_file, artifact, user_id, course_key_string):
+    """
+    Yields the contents of the open export artifact, and then removes it and
+    the status offering its download, so that it is only downloaded once. If
+    the download is abandoned part way, the artifact is left to be downloaded
+    again until it expires.
+    """
+    try:
+        for chunk in FileWrapper(export_file):
+            yield chunk
+    finally:
+        export_file.close()
+    artifact.remove_p()
+    tasks.clear_export_status(user_id, course_key_string)
+
+
+# pylint: disable=unused-argument
+@require_GET
+@ensure_csrf_cookie
+@login_required
+def export_status_handler(request, course_key_string):
+    """
+    Returns an integer corresponding to the status of the user's latest export of the course:
+
+        0 : No status info found (no export started)
+        1 : Exporting the course to xml
+        2 : Compressing the exported course
+        3 : Export successful; "ExportOutput" is the url to download it from
+
+    A negative status means the export failed in the corresponding stage; the
+    reason is returned as "ErrMsg", along with "EditUnitUrl" and "HasUnit" when
+    a particular component could not be exported.
+    """
+    course_key = CourseKey.from_string(course_key_string)
+    if not has_course_access(request.user, course_key):
+        raise PermissionDenied()
+
+    status = tasks.get_export_status(request.user.id, course_key_string)
+    response = {"ExportStatus": status.pop('Stage')}
+    response.update(status)
+    if response["ExportStatus"] == tasks.EXPORT_STAGE_DONE:
+        response["ExportOutput"] = reverse_course_url('export_handler', course_key) + '?_accept=application/x-tgz'
+    return JsonResponse(response)
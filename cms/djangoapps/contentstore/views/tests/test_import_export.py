@@ -9,9 +9,11 @@ import shutil
 import tarfile
 import tempfile
 from path import path
+from StringIO import StringIO
 from pymongo import MongoClient
 from uuid import uuid4
 
+from django.core.cache import cache
 from django.test.utils import override_settings
 from django.conf import settings
 from contentstore.utils import reverse_course_url
@@ -20,6 +22,7 @@ from xmodule.contentstore.django import _CONTENTSTORE
 from xmodule.modulestore.django import loc_mapper
 from xmodule.modulestore.tests.factories import ItemFactory
 
+from contentstore.tasks import export_artifact_path, import_course_dir
 from contentstore.tests.utils import CourseTestCase
 from student import auth
 from student.roles import CourseInstructorRole, CourseStaffRole
@@ -37,8 +40,11 @@ class ImportTestCase(CourseTestCase):
     """
     def setUp(self):
         super(ImportTestCase, self).setUp()
+        # import statuses are kept in the cache
+        cache.clear()
         self.url = reverse_course_url('import_handler', self.course.id)
         self.content_dir = path(tempfile.mkdtemp())
+        self.addCleanup(shutil.rmtree, import_course_dir(self.course.id), ignore_errors=True)
 
         def touch(name):
             """ Equivalent to shell's 'touch'"""
@@ -73,9 +79,24 @@ class ImportTestCase(CourseTestCase):
         MongoClient().drop_database(TEST_DATA_CONTENTSTORE['DOC_STORE_CONFIG']['db'])
         _CONTENTSTORE.clear()
 
+    def _import_status(self, tarpath):
+        """
+        Returns the status reported by `import_status_handler` for the import
+        of the file at `tarpath`.
+        """
+        resp_status = self.client.get(
+            reverse_course_url(
+                'import_status_handler',
+                self.course.id,
+                kwargs={'filename': os.path.split(tarpath)[1]}
+            )
+        )
+        self.assertEquals(resp_status.status_code, 200)
+        return json.loads(resp_status.content)
+
     def test_no_coursexml(self):
         """
-        Check that the response for a tar.gz import without a course.xml is
+        Check that the status of a tar.gz import without a course.xml is
         correct.
         """
         with open(self.bad_tar) as btar:
@@ -85,18 +106,12 @@ class ImportTestCase(CourseTestCase):
                     "name": self.bad_tar,
                     "course-data": [btar]
                 })
-        self.assertEquals(resp.status_code, 415)
+        self.assertEquals(resp.status_code, 200)
         # Check that `import_status` returns the appropriate stage (i.e., the
         # stage at which import failed).
-        resp_status = self.client.get(
-            reverse_course_url(
-                'import_status_handler',
-                self.course.id,
-                kwargs={'filename': os.path.split(self.bad_tar)[1]}
-            )
-        )
-
-        self.assertEquals(json.loads(resp_status.content)["ImportStatus"], 2)
+        status = self._import_status(self.bad_tar)
+        self.assertEquals(status["ImportStatus"], -2)
+        self.assertIn("course.xml", status["ErrMsg"])
 
     def test_with_coursexml(self):
         """
@@ -108,6 +123,34 @@ class ImportTestCase(CourseTestCase):
             resp = self.client.post(self.url, args)
 
         self.assertEquals(resp.status_code, 200)
+        self.assertEquals(json.loads(resp.content)["ImportStatus"], 1)
+        self.assertEquals(self._import_status(self.good_tar)["ImportStatus"], 4)
+        # the uploaded archive and its extracted contents are removed
+        self.assertEquals(import_course_dir(self.course.id).listdir(), [])
+
+    def test_reupload_resets_status(self):
+        """
+        Check that uploading a file again forgets how its earlier import went,
+        rather than reporting it as finished before the new upload is complete.
+        """
+        with open(self.good_tar) as gtar:
+            args = {"name": self.good_tar, "course-data": [gtar]}
+            resp = self.client.post(self.url, args)
+        self.assertEquals(resp.status_code, 200)
+        self.assertEquals(self._import_status(self.good_tar)["ImportStatus"], 4)
+
+        # the first of several chunks
+        with open(self.good_tar) as gtar:
+            args = {"name": self.good_tar, "course-data": [gtar]}
+            resp = self.client.post(self.url, args, HTTP_CONTENT_RANGE='bytes 0-9/100000')
+        self.assertEquals(resp.status_code, 200)
+        self.assertEquals(self._import_status(self.good_tar)["ImportStatus"], 0)
+
+    def test_import_status_unknown_file(self):
+        """
+        Check that the status of a file which was never uploaded is 0.
+        """
+        self.assertEquals(self._import_status(self.good_tar), {"ImportStatus": 0})
 
     def test_import_in_existing_course(self):
         """
@@ -223,25 +266,17 @@ class ImportTestCase(CourseTestCase):
             with open(tarpath) as tar:
                 args = {"name": tarpath, "course-data": [tar]}
                 resp = self.client.post(self.url, args)
-            self.assertEquals(resp.status_code, 400)
-            self.assertTrue("SuspiciousFileOperation" in resp.content)
+            self.assertEquals(resp.status_code, 200)
+            # Check that `import_status` reports that the import failed while
+            # extracting the file.
+            status = self._import_status(tarpath)
+            self.assertEquals(status["ImportStatus"], -1)
+            self.assertIn("SuspiciousFileOperationMsg", status)
 
         try_tar(self._fifo_tar())
         try_tar(self._symlink_tar())
         try_tar(self._outside_tar())
         try_tar(self._outside_tar2())
-        # Check that `import_status` returns the appropriate stage (i.e.,
-        # either 3, indicating all previous steps are completed, or 0,
-        # indicating no upload in progress)
-        resp_status = self.client.get(
-            reverse_course_url(
-                'import_status_handler',
-                self.course.id,
-                kwargs={'filename': os.path.split(self.good_tar)[1]}
-            )
-        )
-        import_status = json.loads(resp_status.content)["ImportStatus"]
-        self.assertIn(import_status, (0, 3))
 
 
 @override_settings(CONTENTSTORE=TEST_DATA_CONTENTSTORE)
@@ -254,7 +289,11 @@ class ExportTestCase(CourseTestCase):
         Sets up the test course.
         """
         super(ExportTestCase, self).setUp()
+        # export statuses are kept in the cache
+        cache.clear()
         self.url = reverse_course_url('export_handler', self.course.id)
+        self.status_url = reverse_course_url('export_status_handler', self.course.id)
+        self.addCleanup(export_artifact_path(self.course.id, self.user.id).remove_p)
 
     def test_export_html(self):
         """
@@ -271,10 +310,24 @@ class ExportTestCase(CourseTestCase):
         resp = self.client.get(self.url, HTTP_ACCEPT='application/json')
         self.assertEquals(resp.status_code, 406)
 
+    def test_export_status_not_started(self):
+        """
+        No status is reported before an export is started.
+        """
+        self.assertEquals(self._export_status(), {"ExportStatus": 0})
+
+    def test_export_targz_not_exported(self):
+        """
+        There is no tar.gz file to download before the course has been exported.
+        """
+        resp = self.client.get(self.url, HTTP_ACCEPT='application/x-tgz')
+        self.assertEquals(resp.status_code, 404)
+
     def test_export_targz(self):
         """
         Get tar.gz file, using HTTP_ACCEPT.
         """
+        self._start_export()
         resp = self.client.get(self.url, HTTP_ACCEPT='application/x-tgz')
         self._verify_export_succeeded(resp)
 
@@ -282,20 +335,79 @@ class ExportTestCase(CourseTestCase):
         """
         Get tar.gz file, using URL parameter.
         """
-        resp = self.client.get(self.url + '?_accept=application/x-tgz')
+        status = self._start_export()
+        self.assertEquals(status["ExportOutput"], self.url + '?_accept=application/x-tgz')
+        resp = self.client.get(status["ExportOutput"])
+        self._verify_export_succeeded(resp)
+
+    def test_export_targz_downloaded_once(self):
+        """
+        The export is removed once it has been downloaded.
+        """
+        self._start_export()
+        resp = self.client.get(self.url, HTTP_ACCEPT='application/x-tgz')
         self._verify_export_succeeded(resp)
+        self.assertFalse(export_artifact_path(self.course.id, self.user.id).exists())
+        self.assertEquals(self._export_status(), {"ExportStatus": 0})
+        resp = self.client.get(self.url, HTTP_ACCEPT='application/x-tgz')
+        self.assertEquals(resp.status_code, 404)
+
+    def test_export_targz_download_abandoned(self):
+        """
+        The export is kept until it has been downloaded in full.
+        """
+        self._start_export()
+        resp = self.client.get(self.url, HTTP_ACCEPT='application/x-tgz')
+        self.assertEquals(resp.status_code, 200)
+        self.assertTrue(export_artifact_path(self.course.id, self.user.id).exists())
+        next(iter(resp))
+        resp.close()
+        self.assertTrue(export_artifact_path(self.course.id, self.user.id).exists())
+        self.assertEquals(self._export_status()["ExportStatus"], 3)
+        resp = self.client.get(self.url, HTTP_ACCEPT='application/x-tgz')
+        self._verify_export_succeeded(resp)
+
+    def test_export_targz_other_user(self):
+        """
+        Another member of the course staff can't download the user's export.
+        """
+        self._start_export()
+        client, nonstaff = self.create_non_staff_authed_user_client()
+        auth.add_users(self.user, CourseStaffRole(self.course.id), nonstaff)
+        resp = client.get(self.url, HTTP_ACCEPT='application/x-tgz')
+        self.assertEquals(resp.status_code, 404)
+
+    def _start_export(self):
+        """
+        Starts an export of the course, which runs eagerly in tests, and returns
+        its final status after checking that it succeeded.
+        """
+        resp = self.client.post(self.url, HTTP_ACCEPT='application/json')
+        self.assertEquals(resp.status_code, 200)
+        self.assertEquals(json.loads(resp.content)["ExportStatus"], 1)
+        status = self._export_status()
+        self.assertEquals(status["ExportStatus"], 3)
+        return status
+
+    def _export_status(self):
+        """ Returns the status reported by `export_status_handler`. """
+        resp = self.client.get(self.status_url, HTTP_ACCEPT='application/json')
+        self.assertEquals(resp.status_code, 200)
+        return json.loads(resp.content)
 
     def _verify_export_succeeded(self, resp):
         """ Export success helper method. """
         self.assertEquals(resp.status_code, 200)
         self.assertTrue(resp.get('Content-Disposition').startswith('attachment'))
+        with tarfile.open(fileobj=StringIO(''.join(resp))) as tar_file:
+            self.assertIn('{}/course.xml'.format(self.course.url_name), tar_file.getnames())
 
     def test_export_failure_top_level(self):
         """
         Export failure.
         """
         ItemFactory.create(parent_location=self.course.location, category='aawefawef')
-        self._verify_export_failure(u'/unit/location:MITx+999+Robot_Super_Course+course+Robot_Super_Course')
+        self._verify_export_failure(u'/unit/location:MITx+999+Robot_Super_Course+course+Robot_Super_Course', False)
 
     def test_export_failure_subsection_level(self):
         """
@@ -307,12 +419,17 @@ class ExportTestCase(CourseTestCase):
             category='aawefawef'
         )
 
-        self._verify_export_failure(u'/unit/location:MITx+999+Robot_Super_Course+vertical+foo')
+        self._verify_export_failure(u'/unit/location:MITx+999+Robot_Super_Course+vertical+foo', True)
 
-    def _verify_export_failure(self, expectedText):
+    def _verify_export_failure(self, expected_edit_url, has_unit):
         """ Export failure helper method. """
-        resp = self.client.get(self.url, HTTP_ACCEPT='application/x-tgz')
+        resp = self.client.post(self.url, HTTP_ACCEPT='application/json')
         self.assertEquals(resp.status_code, 200)
-        self.assertIsNone(resp.get('Content-Disposition'))
-        self.assertContains(resp, 'Unable to create xml for module')
-        self.assertContains(resp, expectedText)
+        status = self._export_status()
+        self.assertEquals(status["ExportStatus"], -1)
+        self.assertIn('Unable to create xml for module', status["ErrMsg"])
+        self.assertEquals(status["EditUnitUrl"], expected_edit_url)
+        self.assertEquals(status["HasUnit"], has_unit)
+        self.assertNotIn("ExportOutput", status)
+        resp = self.client.get(self.url, HTTP_ACCEPT='application/x-tgz')
+        self.assertEquals(resp.status_code, 404)
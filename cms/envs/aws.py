@@ -132,6 +132,8 @@ if 'loc_cache' not in CACHES:
 
 SESSION_COOKIE_DOMAIN = ENV_TOKENS.get('SESSION_COOKIE_DOMAIN')
 SESSION_ENGINE = ENV_TOKENS.get('SESSION_ENGINE', SESSION_ENGINE)
+MAKO_MODULE_DIR = ENV_TOKENS.get('MAKO_MODULE_DIR', MAKO_MODULE_DIR)
+MAKO_PRODUCTION_MODE = ENV_TOKENS.get('MAKO_PRODUCTION_MODE', MAKO_PRODUCTION_MODE)
 
 # allow for environments to specify what cookie name our login subsystem should use
 # this is to fix a bug regarding simultaneous logins between edx.org and edge.edx.org which can
@@ -141,6 +141,9 @@ for namespace, template_dirs in lms.envs.common.MAKO_TEMPLATES.iteritems():
 
 TEMPLATE_DIRS = MAKO_TEMPLATES['main']
 
+# See MAKO_PRODUCTION_MODE in lms/envs/common.py
+MAKO_PRODUCTION_MODE = False
+
 EDX_ROOT_URL = ''
 
 LOGIN_REDIRECT_URL = EDX_ROOT_URL + '/signin'
@@ -516,6 +519,9 @@ INSTALLED_APPS = (
     # for managing course modes
     'course_modes',
 
+    # Summaries of courses, for listing them
+    'course_summaries',
+
     # Dark-launching languages
     'dark_lang',
 
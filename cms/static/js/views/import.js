@@ -41,22 +41,32 @@ define(
 
         /**
          * Check for import status updates every `timeout` milliseconds, and update
-         * the page accordingly.
+         * the page accordingly, until the import succeeds or fails.
          * @param {string} url Url to call for status updates.
          * @param {int} timeout Number of milliseconds to wait in between ajax calls
          *     for new updates.
-         * @param {int} stage Starting stage.
+         * @param {object} status Latest status returned by the server.
+         * @param {function} onError Called with the failed stage and the server's
+         *     error message if the import fails.
          */
-        var getStatus = function (url, timeout, stage) {
-            var currentStage = stage || 0;
+        var getStatus = function (url, timeout, status, onError) {
+            var currentStage = status.ImportStatus || 0;
             if (CourseImport.stopGetStatus) { return ;}
+            if (currentStage == 4) {
+                CourseImport.displayFinishedImport();
+                return;
+            }
+            if (currentStage < 0) {
+                CourseImport.stopGetStatus = true;
+                onError(-currentStage, status.ErrMsg || "");
+                return;
+            }
             updateStage(currentStage);
-            if (currentStage == 3 ) { return ;}
             var time = timeout || 1000;
             $.getJSON(url,
                 function (data) {
                     setTimeout(function () {
-                        getStatus(url, time, data.ImportStatus);
+                        getStatus(url, time, data, onError);
                     }, time);
                 }
             );
@@ -112,12 +122,14 @@ define(
              * Entry point for server feedback. Makes status list visible and starts
              * sending requests to the server for status updates.
              * @param {string} url The url to send Ajax GET requests for updates.
+             * @param {function} onError Called with the failed stage and the server's
+             *     error message if the import fails. Defaults to `stageError`.
              */
-            startServerFeedback: function (url){
+            startServerFeedback: function (url, onError){
                 this.stopGetStatus = false;
                 $('div.wrapper-status').removeClass('is-hidden');
                 $('.status-info').show();
-                getStatus(url, 500, 0);
+                getStatus(url, 500, {ImportStatus: 0}, onError || _.bind(this.stageError, this));
             },
 
 
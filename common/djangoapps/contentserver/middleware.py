@@ -1,9 +1,13 @@
+import re
+from calendar import timegm
+
 from django.http import (HttpResponse, HttpResponseNotModified,
     HttpResponseForbidden)
+from django.utils.http import http_date, parse_http_date_safe
 from student.models import CourseEnrollment
 
 from xmodule.contentstore.django import contentstore
-from xmodule.contentstore.content import StaticContent, XASSET_LOCATION_TAG
+from xmodule.contentstore.content import StaticContent, StaticContentStream, XASSET_LOCATION_TAG
 from xmodule.modulestore import InvalidLocationError, InvalidKeyError
 from cache_toolbox.core import get_cached_content, set_cached_content
 from xmodule.exceptions import NotFoundError
@@ -11,6 +15,44 @@ from xmodule.exceptions import NotFoundError
 # TODO: Soon as we have a reasonable way to serialize/deserialize AssetKeys, we need
 # to change this file so instead of using course_id_partial, we're just using asset keys
 
+# a single range of the form "bytes=first-last", "bytes=first-" or "bytes=-suffix_length"
+BYTE_RANGE_RE = re.compile(r'^bytes=(?P<first>\d*)-(?P<last>\d*)$')
+
+
+def parse_byte_range(range_header, length):
+    """
+    Parse the value of an HTTP Range header against content of `length` bytes.
+
+    Returns a (first_byte, last_byte) tuple (both inclusive), None if the header
+    should be ignored (it is malformed or asks for several ranges, so the whole
+    content is served), or raises ValueError if the range can't be satisfied.
+    """
+    match = BYTE_RANGE_RE.match(range_header.strip().replace(' ', ''))
+    if match is None:
+        return None
+
+    first, last = match.group('first'), match.group('last')
+    if first == '':
+        if last == '':
+            return None
+        # a suffix range: the last N bytes of the content
+        suffix_length = int(last)
+        if suffix_length == 0:
+            raise ValueError(range_header)
+        return max(length - suffix_length, 0), length - 1
+
+    first_byte = int(first)
+    if last == '':
+        last_byte = length - 1
+    else:
+        last_byte = int(last)
+        if last_byte < first_byte:
+            return None
+    if first_byte >= length:
+        raise ValueError(range_header)
+    return first_byte, min(last_byte, length - 1)
+
+
 class StaticContentServer(object):
     def process_request(self, request):
         # look to see if the request is prefixed with 'c4x' tag
@@ -48,24 +90,102 @@ class StaticContentServer(object):
             # Check that user has access to content
             if getattr(content, "locked", False):
                 if not hasattr(request, "user") or not request.user.is_authenticated():
+                    self._close(content)
                     return HttpResponseForbidden('Unauthorized')
                 if not request.user.is_staff and not CourseEnrollment.is_enrolled_by_partial(
                         request.user, loc.course_key
                 ):
+                    self._close(content)
                     return HttpResponseForbidden('Unauthorized')
 
-            # convert over the DB persistent last modified timestamp to a HTTP compatible
-            # timestamp, so we can simply compare the strings
-            last_modified_at_str = content.last_modified_at.strftime("%a, %d-%b-%Y %H:%M:%S GMT")
+            # getattr b/c content cached before digests were recorded won't have the attr
+            content_digest = getattr(content, 'content_digest', None)
+            etag = '"{}"'.format(content_digest) if content_digest else None
+            last_modified = timegm(content.last_modified_at.utctimetuple())
+            # the format we used to send, which clients may still echo back to us
+            legacy_last_modified_str = content.last_modified_at.strftime("%a, %d-%b-%Y %H:%M:%S GMT")
+
+            # see if the client has cached this content, if so then return a 304 (Not Modified)
+            if self._is_not_modified(request, etag, last_modified, legacy_last_modified_str):
+                self._close(content)
+                response = HttpResponseNotModified()
+                if etag is not None:
+                    response['ETag'] = etag
+                return response
+
+            length = content.length
+            if length is None and content.data is not None:
+                length = len(content.data)
 
-            # see if the client has cached this content, if so then compare the
-            # timestamps, if they are the same then just return a 304 (Not Modified)
-            if 'HTTP_IF_MODIFIED_SINCE' in request.META:
-                if_modified_since = request.META['HTTP_IF_MODIFIED_SINCE']
-                if if_modified_since == last_modified_at_str:
-                    return HttpResponseNotModified()
+            byte_range = None
+            if length is not None and 'HTTP_RANGE' in request.META and \
+                    self._if_range_matches(request, etag, last_modified):
+                try:
+                    byte_range = parse_byte_range(request.META['HTTP_RANGE'], length)
+                except ValueError:
+                    self._close(content)
+                    response = HttpResponse(status=416)
+                    response['Content-Range'] = 'bytes */{}'.format(length)
+                    return response
+
+            if byte_range is not None:
+                first_byte, last_byte = byte_range
+                response = HttpResponse(
+                    content.stream_data_in_range(first_byte, last_byte), content_type=content.content_type
+                )
+                response.status_code = 206
+                response['Content-Range'] = 'bytes {}-{}/{}'.format(first_byte, last_byte, length)
+                response['Content-Length'] = str(last_byte - first_byte + 1)
+            else:
+                response = HttpResponse(content.stream_data(), content_type=content.content_type)
+                if length is not None:
+                    response['Content-Length'] = str(length)
 
-            response = HttpResponse(content.stream_data(), content_type=content.content_type)
-            response['Last-Modified'] = last_modified_at_str
+            response['Last-Modified'] = http_date(last_modified)
+            if etag is not None:
+                response['ETag'] = etag
+            if length is not None:
+                response['Accept-Ranges'] = 'bytes'
 
             return response
+
+    def _close(self, content):
+        """
+        Close the GridFS stream of `content` when it won't be served.
+        """
+        if isinstance(content, StaticContentStream):
+            content.close()
+
+    def _is_not_modified(self, request, etag, last_modified, legacy_last_modified_str):
+        """
+        Whether the client's cached copy, as described by its conditional
+        headers, is still current. If-None-Match takes precedence over
+        If-Modified-Since.
+        """
+        if_none_match = request.META.get('HTTP_IF_NONE_MATCH')
+        if if_none_match is not None:
+            if etag is None:
+                return False
+            client_etags = [tag.strip() for tag in if_none_match.split(',')]
+            return etag in client_etags or '*' in client_etags
+
+        if_modified_since = request.META.get('HTTP_IF_MODIFIED_SINCE')
+        if if_modified_since is not None:
+            if if_modified_since == legacy_last_modified_str:
+                return True
+            if_modified_since = parse_http_date_safe(if_modified_since)
+            return if_modified_since is not None and last_modified <= if_modified_since
+
+        return False
+
+    def _if_range_matches(self, request, etag, last_modified):
+        """
+        Whether a Range request should be honored given its If-Range header; if
+        the client's copy is stale, the whole content is served instead.
+        """
+        if_range = request.META.get('HTTP_IF_RANGE')
+        if if_range is None:
+            return True
+        if if_range.startswith('"'):
+            return etag is not None and if_range == etag
+        return parse_http_date_safe(if_range) == last_modified
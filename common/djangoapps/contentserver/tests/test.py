@@ -6,6 +6,7 @@ import logging
 from uuid import uuid4
 from path import path
 from pymongo import MongoClient
+from unittest import TestCase
 
 from django.contrib.auth.models import User
 from django.conf import settings
@@ -22,6 +23,8 @@ from xmodule.modulestore.tests.django_utils import (studio_store_config,
     ModuleStoreTestCase)
 from xmodule.modulestore.xml_importer import import_from_xml
 
+from contentserver.middleware import parse_byte_range
+
 log = logging.getLogger(__name__)
 
 TEST_DATA_CONTENTSTORE = copy.deepcopy(settings.CONTENTSTORE)
@@ -131,3 +134,66 @@ class ContentStoreToyCourseTest(ModuleStoreTestCase):
         resp = self.client.get(self.url_locked)
         self.assertEqual(resp.status_code, 200) # pylint: disable=E1103
 
+    def test_range_request(self):
+        """
+        Test that a byte range request returns just those bytes.
+        """
+        full = self.client.get(self.url_unlocked)
+        body = full.content
+        self.assertEqual(full['Accept-Ranges'], 'bytes')
+
+        resp = self.client.get(self.url_unlocked, HTTP_RANGE='bytes=2-5')
+        self.assertEqual(resp.status_code, 206)  # pylint: disable=E1103
+        self.assertEqual(resp.content, body[2:6])
+        self.assertEqual(resp['Content-Range'], 'bytes 2-5/{}'.format(len(body)))
+        self.assertEqual(resp['Content-Length'], '4')
+
+    def test_unsatisfiable_range_request(self):
+        """
+        Test that a range beginning past the end of the asset is rejected.
+        """
+        body = self.client.get(self.url_unlocked).content
+        resp = self.client.get(self.url_unlocked, HTTP_RANGE='bytes={}-'.format(len(body) + 10))
+        self.assertEqual(resp.status_code, 416)  # pylint: disable=E1103
+        self.assertEqual(resp['Content-Range'], 'bytes */{}'.format(len(body)))
+
+    def test_etag(self):
+        """
+        Test that assets are served with an ETag which can be used to
+        revalidate them.
+        """
+        resp = self.client.get(self.url_unlocked)
+        etag = resp['ETag']
+        resp = self.client.get(self.url_unlocked, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(resp.status_code, 304)  # pylint: disable=E1103
+        resp = self.client.get(self.url_unlocked, HTTP_IF_NONE_MATCH='"not-the-etag"')
+        self.assertEqual(resp.status_code, 200)  # pylint: disable=E1103
+
+    def test_if_modified_since(self):
+        """
+        Test that assets which haven't changed since the client's copy return a 304.
+        """
+        resp = self.client.get(self.url_unlocked)
+        resp = self.client.get(self.url_unlocked, HTTP_IF_MODIFIED_SINCE=resp['Last-Modified'])
+        self.assertEqual(resp.status_code, 304)  # pylint: disable=E1103
+
+
+class ParseByteRangeTest(TestCase):
+    """
+    Tests for parsing the Range header.
+    """
+    def test_ranges(self):
+        self.assertEqual(parse_byte_range('bytes=0-9', 100), (0, 9))
+        self.assertEqual(parse_byte_range('bytes=90-', 100), (90, 99))
+        self.assertEqual(parse_byte_range('bytes=90-200', 100), (90, 99))
+        self.assertEqual(parse_byte_range('bytes=-10', 100), (90, 99))
+        self.assertEqual(parse_byte_range('bytes=-200', 100), (0, 99))
+
+    def test_ignored_ranges(self):
+        for range_header in ('bytes=0-1,5-6', 'items=0-9', 'bytes=9-0', 'bytes=-'):
+            self.assertIsNone(parse_byte_range(range_header, 100))
+
+    def test_unsatisfiable_ranges(self):
+        for range_header in ('bytes=100-', 'bytes=150-200', 'bytes=-0'):
+            with self.assertRaises(ValueError):
+                parse_byte_range(range_header, 100)
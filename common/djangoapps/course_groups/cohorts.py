@@ -3,16 +3,23 @@ This file contains the logic for cohort groups, as exposed internally to the
 forums, and to the cohort admin views.
 """
 
+from django.core.cache import cache
 from django.http import Http404
 import logging
 import random
 
 from courseware import courses
 from student.models import get_user_by_username_or_email
-from .models import CourseUserGroup
+from xmodule.modulestore.django import modulestore
+from .models import CourseUserGroup, cohort_names_cache_key, user_cohort_cache_key
 
 log = logging.getLogger(__name__)
 
+# How long, in seconds, the cohort settings of a published version of a course,
+# the cohort names of a course and the cohorts of users are cached. (The latter
+# two are dropped whenever they change; see course_groups.models.)
+COHORT_CACHE_TIMEOUT = 24 * 60 * 60
+
 
 # tl;dr: global state is bad.  capa reseeds random every time a problem is loaded.  Even
 # if and when that's fixed, it's a good idea to have a local generator to avoid any other
@@ -33,6 +40,35 @@ def local_random():
     return _local_random
 
 
+def _get_course_cohort_settings(course_key):
+    """
+    Return a dict of the cohort settings of the course: 'is_cohorted',
+    'auto_cohort', 'auto_cohort_groups', 'cohorted_discussions' and
+    'top_level_discussion_topic_ids'.
+
+    They're cached for the published version of the course, so the course is
+    only loaded once each time it's changed in Studio or reimported.
+
+    Raises:
+       Http404 if the course doesn't exist.
+    """
+    version = modulestore().get_course_published_version(course_key)
+    cache_key = u'course_groups.cohort_settings.{}.{}'.format(course_key, version)
+    course_settings = cache.get(cache_key) if version is not None else None
+    if course_settings is None:
+        course = courses.get_course_by_id(course_key)
+        course_settings = {
+            'is_cohorted': course.is_cohorted,
+            'auto_cohort': course.auto_cohort,
+            'auto_cohort_groups': course.auto_cohort_groups,
+            'cohorted_discussions': course.cohorted_discussions,
+            'top_level_discussion_topic_ids': course.top_level_discussion_topic_ids,
+        }
+        if version is not None:
+            cache.set(cache_key, course_settings, COHORT_CACHE_TIMEOUT)
+    return course_settings
+
+
 def is_course_cohorted(course_key):
     """
     Given a course key, return a boolean for whether or not the course is
@@ -41,7 +77,7 @@ def is_course_cohorted(course_key):
     Raises:
        Http404 if the course doesn't exist.
     """
-    return courses.get_course_by_id(course_key).is_cohorted
+    return _get_course_cohort_settings(course_key)['is_cohorted']
 
 
 def get_cohort_id(user, course_key):
@@ -65,15 +101,15 @@ def is_commentable_cohorted(course_key, commentable_id):
     Raises:
         Http404 if the course doesn't exist.
     """
-    course = courses.get_course_by_id(course_key)
+    course_settings = _get_course_cohort_settings(course_key)
 
-    if not course.is_cohorted:
+    if not course_settings['is_cohorted']:
         # this is the easy case :)
         ans = False
-    elif commentable_id in course.top_level_discussion_topic_ids:
+    elif commentable_id in course_settings['top_level_discussion_topic_ids']:
         # top level discussions have to be manually configured as cohorted
         # (default is not)
-        ans = commentable_id in course.cohorted_discussions
+        ans = commentable_id in course_settings['cohorted_discussions']
     else:
         # inline discussions are cohorted by default
         ans = True
@@ -89,13 +125,13 @@ def get_cohorted_commentables(course_key):
     Given a course_key return a list of strings representing cohorted commentables
     """
 
-    course = courses.get_course_by_id(course_key)
+    course_settings = _get_course_cohort_settings(course_key)
 
-    if not course.is_cohorted:
+    if not course_settings['is_cohorted']:
         # this is the easy case :)
         ans = []
     else:
-        ans = course.cohorted_discussions
+        ans = course_settings['cohorted_discussions']
 
     return ans
 
@@ -119,25 +155,34 @@ def get_cohort(user, course_key):
     # First check whether the course is cohorted (users shouldn't be in a cohort
     # in non-cohorted courses, but settings can change after course starts)
     try:
-        course = courses.get_course_by_id(course_key)
+        course_settings = _get_course_cohort_settings(course_key)
     except Http404:
         raise ValueError("Invalid course_key")
 
-    if not course.is_cohorted:
+    if not course_settings['is_cohorted']:
         return None
 
+    # the user's cohort is cached in a list, so that having none can be cached too
+    cache_key = user_cohort_cache_key(user.id, course_key)
+    cached = cache.get(cache_key)
+    if cached is not None and (cached[0] is not None or not course_settings['auto_cohort']):
+        return cached[0]
+
     try:
-        return CourseUserGroup.objects.get(course_id=course_key,
-                                            group_type=CourseUserGroup.COHORT,
-                                            users__id=user.id)
+        cohort = CourseUserGroup.objects.get(course_id=course_key,
+                                             group_type=CourseUserGroup.COHORT,
+                                             users__id=user.id)
+        cache.set(cache_key, [cohort], COHORT_CACHE_TIMEOUT)
+        return cohort
     except CourseUserGroup.DoesNotExist:
         # Didn't find the group.  We'll go on to create one if needed.
         pass
 
-    if not course.auto_cohort:
+    if not course_settings['auto_cohort']:
+        cache.set(cache_key, [None], COHORT_CACHE_TIMEOUT)
         return None
 
-    choices = course.auto_cohort_groups
+    choices = course_settings['auto_cohort_groups']
     n = len(choices)
     if n == 0:
         # Nowhere to put user
@@ -175,6 +220,26 @@ def get_course_cohorts(course_key):
         group_type=CourseUserGroup.COHORT
     ))
 
+
+def get_cohort_names(course_key):
+    """
+    Get a dict of the names of the cohorts in the given course by their ids,
+    for naming the cohorts of many threads at once.
+
+    Arguments:
+        course_key: CourseKey
+
+    Returns:
+        A dict of cohort names by cohort id.  Does not check whether the course
+        is cohorted.
+    """
+    cache_key = cohort_names_cache_key(course_key)
+    names = cache.get(cache_key)
+    if names is None:
+        names = {cohort.id: cohort.name for cohort in get_course_cohorts(course_key)}
+        cache.set(cache_key, names, COHORT_CACHE_TIMEOUT)
+    return names
+
 ### Helpers for cohort management views
 
 
@@ -1,7 +1,10 @@
 import logging
 
 from django.contrib.auth.models import User
+from django.core.cache import cache
 from django.db import models
+from django.db.models.signals import m2m_changed, post_delete, post_save, pre_delete
+from django.dispatch import receiver
 from xmodule_django.models import CourseKeyField
 
 log = logging.getLogger(__name__)
@@ -32,3 +35,57 @@ class CourseUserGroup(models.Model):
     COHORT = 'cohort'
     GROUP_TYPE_CHOICES = ((COHORT, 'Cohort'),)
     group_type = models.CharField(max_length=20, choices=GROUP_TYPE_CHOICES)
+
+
+def cohort_names_cache_key(course_key):
+    """
+    Returns the cache key of the map of the ids of the cohorts of a course to their names.
+    """
+    return u'course_groups.cohort_names.{}'.format(course_key)
+
+
+def user_cohort_cache_key(user_id, course_key):
+    """
+    Returns the cache key of the cohort a user is in, in a course.
+    """
+    return u'course_groups.user_cohort.{}.{}'.format(course_key, user_id)
+
+
+@receiver(post_save, sender=CourseUserGroup, dispatch_uid='course_groups.forget_cohort_names_on_save')
+@receiver(post_delete, sender=CourseUserGroup, dispatch_uid='course_groups.forget_cohort_names_on_delete')
+def forget_cohort_names(sender, instance, **kwargs):  # pylint: disable=unused-argument
+    """
+    Drops the cached cohort names of the course of a group which was saved or deleted.
+    """
+    cache.delete(cohort_names_cache_key(instance.course_id))
+
+
+@receiver(pre_delete, sender=CourseUserGroup, dispatch_uid='course_groups.forget_members_cohorts')
+def forget_members_cohorts(sender, instance, **kwargs):  # pylint: disable=unused-argument
+    """
+    Drops the cached cohorts of the users in a group which is being deleted.
+    """
+    cache.delete_many([
+        user_cohort_cache_key(user_id, instance.course_id)
+        for user_id in instance.users.values_list('id', flat=True)
+    ])
+
+
+@receiver(m2m_changed, sender=CourseUserGroup.users.through, dispatch_uid='course_groups.forget_user_cohorts')
+def forget_user_cohorts(sender, instance, action, reverse, pk_set, **kwargs):  # pylint: disable=unused-argument
+    """
+    Drops the cached cohorts of the users who were added to or removed from
+    groups, from whichever side of the relation they were changed.
+    """
+    if action not in ('post_add', 'post_remove', 'pre_clear'):
+        return
+
+    if reverse:
+        # instance is a User, pk_set the ids of the groups (or None, if all are being removed)
+        groups = CourseUserGroup.objects.filter(pk__in=pk_set) if pk_set is not None else instance.course_groups.all()
+        keys = [user_cohort_cache_key(instance.id, group.course_id) for group in groups]
+    else:
+        # instance is a CourseUserGroup, pk_set the ids of the users (or None, if all are being removed)
+        user_ids = pk_set if pk_set is not None else instance.users.values_list('id', flat=True)
+        keys = [user_cohort_cache_key(user_id, instance.course_id) for user_id in user_ids]
+    cache.delete_many(keys)
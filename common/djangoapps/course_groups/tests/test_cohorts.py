@@ -1,12 +1,13 @@
 import django.test
 from django.contrib.auth.models import User
 from django.conf import settings
+from django.core.cache import cache
 
 from django.test.utils import override_settings
 
 from course_groups.models import CourseUserGroup
-from course_groups.cohorts import (get_cohort, get_course_cohorts,
-                                   is_commentable_cohorted, get_cohort_by_name)
+from course_groups.cohorts import (get_cohort, get_course_cohorts, get_cohort_names, add_cohort,
+                                   add_user_to_cohort, is_commentable_cohorted, get_cohort_by_name)
 
 from xmodule.modulestore.django import modulestore, clear_existing_modulestores
 from xmodule.modulestore.locations import SlashSeparatedCourseKey
@@ -85,6 +86,8 @@ class TestCohorts(django.test.TestCase):
         Make sure that course is reloaded every time--clear out the modulestore.
         """
         clear_existing_modulestores()
+        # cohorts are cached by user id, and ids are reused from test to test
+        cache.clear()
         self.toy_course_key = SlashSeparatedCourseKey("edX", "toy", "2012_Fall")
 
     def test_get_cohort(self):
@@ -193,6 +196,44 @@ class TestCohorts(django.test.TestCase):
             self.assertGreater(num_users, 1)
             self.assertLess(num_users, 50)
 
+    def test_get_cohort_after_add_user_to_cohort(self):
+        """
+        Make sure get_cohort() doesn't return a cached cohort once the user is moved.
+        """
+        course = modulestore().get_course(self.toy_course_key)
+        self.config_course_cohorts(course, [], cohorted=True)
+        user = User.objects.create(username="test", email="a@b.com")
+        cohort1 = add_cohort(course.id, "TestCohort1")
+        cohort2 = add_cohort(course.id, "TestCohort2")
+
+        self.assertIsNone(get_cohort(user, course.id))
+
+        add_user_to_cohort(cohort1, user.username)
+        self.assertEquals(get_cohort(user, course.id).id, cohort1.id)
+
+        add_user_to_cohort(cohort2, user.username)
+        self.assertEquals(get_cohort(user, course.id).id, cohort2.id)
+
+        cohort2.users.remove(user)
+        self.assertIsNone(get_cohort(user, course.id))
+
+    def test_get_cohort_names(self):
+        course_key = SlashSeparatedCourseKey('a', 'b', 'c')
+        self.assertEqual(get_cohort_names(course_key), {})
+
+        cohort1 = add_cohort(course_key, "TestCohort1")
+        cohort2 = add_cohort(course_key, "TestCohort2")
+        with self.assertNumQueries(1):
+            self.assertEqual(
+                get_cohort_names(course_key),
+                {cohort1.id: "TestCohort1", cohort2.id: "TestCohort2"}
+            )
+        with self.assertNumQueries(0):
+            get_cohort_names(course_key)
+
+        cohort2.delete()
+        self.assertEqual(get_cohort_names(course_key), {cohort1.id: "TestCohort1"})
+
     def test_get_course_cohorts(self):
         course1_key = SlashSeparatedCourseKey('a', 'b', 'c')
         course2_key = SlashSeparatedCourseKey('e', 'f', 'g')
@@ -0,0 +1,4 @@
+"""
+Summaries of courses: the few fields of a course which pages listing courses
+need, available without loading the course's descriptor.
+"""
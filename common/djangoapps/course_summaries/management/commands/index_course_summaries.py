@@ -0,0 +1,29 @@
+"""
+Builds the course summary index.
+"""
+from django.core.management.base import BaseCommand
+
+from course_summaries.summary import index_course_summaries
+from xmodule.modulestore.locations import SlashSeparatedCourseKey
+
+
+class Command(BaseCommand):
+    args = '[<course_id> ...]'
+    help = """
+    Rebuilds the summaries which course listings are made from, for the given
+    courses or, if none are given, for every course (deleting the summaries of
+    courses which no longer exist).
+
+    Courses are indexed in the background when they're published or imported,
+    when courses are listed while the index is empty, and (for xml courses)
+    when a process first lists courses, so this is only needed to repair the
+    index, or to fill it before the site is first used.
+
+    example:
+        manage.py ... index_course_summaries edX/Open_DemoX/edx_demo_course
+    """
+
+    def handle(self, *args, **options):
+        course_keys = [SlashSeparatedCourseKey.from_deprecated_string(arg) for arg in args] or None
+        count = index_course_summaries(course_keys)
+        self.stdout.write('Indexed {} courses\n'.format(count))
@@ -0,0 +1,78 @@
+# -*- coding: utf-8 -*-
+import datetime
+from south.db import db
+from south.v2 import SchemaMigration
+from django.db import models
+
+
+class Migration(SchemaMigration):
+
+    def forwards(self, orm):
+        # Adding model 'CourseSummary'
+        db.create_table('course_summaries_coursesummary', (
+            ('course_id', self.gf('xmodule_django.models.CourseKeyField')(max_length=255, primary_key=True)),
+            ('stale', self.gf('django.db.models.fields.BooleanField')(default=False, db_index=True)),
+            ('org', self.gf('django.db.models.fields.CharField')(max_length=255, db_index=True)),
+            ('number', self.gf('django.db.models.fields.CharField')(max_length=255, db_index=True)),
+            ('display_name', self.gf('django.db.models.fields.TextField')(null=True)),
+            ('display_name_with_default', self.gf('django.db.models.fields.TextField')()),
+            ('display_number_with_default', self.gf('django.db.models.fields.TextField')()),
+            ('display_org_with_default', self.gf('django.db.models.fields.TextField')()),
+            ('start', self.gf('django.db.models.fields.DateTimeField')(null=True)),
+            ('end', self.gf('django.db.models.fields.DateTimeField')(null=True)),
+            ('advertised_start', self.gf('django.db.models.fields.TextField')(null=True)),
+            ('enrollment_start', self.gf('django.db.models.fields.DateTimeField')(null=True)),
+            ('enrollment_end', self.gf('django.db.models.fields.DateTimeField')(null=True)),
+            ('announcement', self.gf('django.db.models.fields.DateTimeField')(null=True)),
+            ('days_early_for_beta', self.gf('django.db.models.fields.FloatField')(null=True)),
+            ('enrollment_domain', self.gf('django.db.models.fields.TextField')(null=True)),
+            ('ispublic', self.gf('django.db.models.fields.NullBooleanField')(null=True, blank=True)),
+            ('is_new', self.gf('django.db.models.fields.NullBooleanField')(null=True, blank=True)),
+            ('certificates_show_before_end', self.gf('django.db.models.fields.BooleanField')(default=False)),
+            ('end_of_course_survey_url', self.gf('django.db.models.fields.TextField')(null=True)),
+            ('cert_name_short', self.gf('django.db.models.fields.TextField')()),
+            ('cert_name_long', self.gf('django.db.models.fields.TextField')()),
+            ('lowest_passing_grade', self.gf('django.db.models.fields.FloatField')(null=True)),
+            ('course_image_url', self.gf('django.db.models.fields.TextField')()),
+            ('short_description', self.gf('django.db.models.fields.TextField')()),
+        ))
+        db.send_create_signal('course_summaries', ['CourseSummary'])
+
+
+    def backwards(self, orm):
+        # Deleting model 'CourseSummary'
+        db.delete_table('course_summaries_coursesummary')
+
+
+    models = {
+        'course_summaries.coursesummary': {
+            'Meta': {'object_name': 'CourseSummary'},
+            'advertised_start': ('django.db.models.fields.TextField', [], {'null': 'True'}),
+            'announcement': ('django.db.models.fields.DateTimeField', [], {'null': 'True'}),
+            'cert_name_long': ('django.db.models.fields.TextField', [], {}),
+            'cert_name_short': ('django.db.models.fields.TextField', [], {}),
+            'certificates_show_before_end': ('django.db.models.fields.BooleanField', [], {'default': 'False'}),
+            'course_id': ('xmodule_django.models.CourseKeyField', [], {'max_length': '255', 'primary_key': 'True'}),
+            'course_image_url': ('django.db.models.fields.TextField', [], {}),
+            'days_early_for_beta': ('django.db.models.fields.FloatField', [], {'null': 'True'}),
+            'display_name': ('django.db.models.fields.TextField', [], {'null': 'True'}),
+            'display_name_with_default': ('django.db.models.fields.TextField', [], {}),
+            'display_number_with_default': ('django.db.models.fields.TextField', [], {}),
+            'display_org_with_default': ('django.db.models.fields.TextField', [], {}),
+            'end': ('django.db.models.fields.DateTimeField', [], {'null': 'True'}),
+            'end_of_course_survey_url': ('django.db.models.fields.TextField', [], {'null': 'True'}),
+            'enrollment_domain': ('django.db.models.fields.TextField', [], {'null': 'True'}),
+            'enrollment_end': ('django.db.models.fields.DateTimeField', [], {'null': 'True'}),
+            'enrollment_start': ('django.db.models.fields.DateTimeField', [], {'null': 'True'}),
+            'is_new': ('django.db.models.fields.NullBooleanField', [], {'null': 'True', 'blank': 'True'}),
+            'ispublic': ('django.db.models.fields.NullBooleanField', [], {'null': 'True', 'blank': 'True'}),
+            'lowest_passing_grade': ('django.db.models.fields.FloatField', [], {'null': 'True'}),
+            'number': ('django.db.models.fields.CharField', [], {'max_length': '255', 'db_index': 'True'}),
+            'org': ('django.db.models.fields.CharField', [], {'max_length': '255', 'db_index': 'True'}),
+            'short_description': ('django.db.models.fields.TextField', [], {}),
+            'stale': ('django.db.models.fields.BooleanField', [], {'default': 'False', 'db_index': 'True'}),
+            'start': ('django.db.models.fields.DateTimeField', [], {'null': 'True'})
+        }
+    }
+
+    complete_apps = ['course_summaries']
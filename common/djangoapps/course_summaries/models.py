@@ -0,0 +1,196 @@
+"""
+The course summary index: a row per course holding the fields of the course
+which pages listing courses need, so that they can be listed, filtered and
+sorted without loading any course descriptors.
+
+A course's row is marked stale whenever its published content changes (see
+xmodule.modulestore.django.course_published), and rebuilt from its descriptor
+in the background (see course_summaries.tasks), or the next time it's asked
+for by id if that hasn't happened yet (see course_summaries.summary).
+"""
+from datetime import datetime
+from math import exp
+
+import dateutil.parser
+from django.db import models
+from django.dispatch import receiver
+from django.utils.timezone import UTC
+from django.utils.translation import ugettext as _
+
+from util.date_utils import strftime_localized
+from xblock.fields import Date
+from xmodule.course_module import CourseFields
+from xmodule.modulestore.django import course_published
+from xmodule_django.models import CourseKeyField
+
+
+class CourseSummary(models.Model):
+    """
+    The fields of a course which are needed to list it, and the methods of
+    CourseDescriptor which only depend on them.
+    """
+    course_id = CourseKeyField(max_length=255, primary_key=True)
+
+    # set when the published content of the course has changed since the row was built
+    stale = models.BooleanField(default=False, db_index=True)
+
+    org = models.CharField(max_length=255, db_index=True)
+    number = models.CharField(max_length=255, db_index=True)
+    display_name = models.TextField(null=True)
+    display_name_with_default = models.TextField()
+    display_number_with_default = models.TextField()
+    display_org_with_default = models.TextField()
+
+    start = models.DateTimeField(null=True)
+    end = models.DateTimeField(null=True)
+    advertised_start = models.TextField(null=True)
+    enrollment_start = models.DateTimeField(null=True)
+    enrollment_end = models.DateTimeField(null=True)
+    announcement = models.DateTimeField(null=True)
+    days_early_for_beta = models.FloatField(null=True)
+    enrollment_domain = models.TextField(null=True)
+    ispublic = models.NullBooleanField()
+    is_new = models.NullBooleanField()
+
+    certificates_show_before_end = models.BooleanField(default=False)
+    end_of_course_survey_url = models.TextField(null=True)
+    cert_name_short = models.TextField()
+    cert_name_long = models.TextField()
+    lowest_passing_grade = models.FloatField(null=True)
+
+    course_image_url = models.TextField()
+    # the html of the course's short_description about page, with its urls rewritten as on the about page
+    short_description = models.TextField()
+
+    def __unicode__(self):
+        return unicode(self.course_id)
+
+    @property
+    def id(self):  # pylint: disable=invalid-name
+        return self.course_id
+
+    @property
+    def location(self):
+        return self.course_id.make_usage_key('course', self.course_id.run)
+
+    def has_started(self):
+        return datetime.now(UTC()) > self.start
+
+    def has_ended(self):
+        """
+        Returns True if the current time is after the specified course end date.
+        Returns False if there is no end date specified.
+        """
+        if self.end is None:
+            return False
+
+        return datetime.now(UTC()) > self.end
+
+    def may_certify(self):
+        """
+        Return True if it is acceptable to show the student a certificate download link
+        """
+        return self.certificates_show_before_end or self.has_ended()
+
+    @property
+    def start_date_is_still_default(self):
+        """
+        Checks if the start date set for the course is still default, i.e. .start has not been modified,
+        and .advertised_start has not been set.
+        """
+        return self.advertised_start is None and self.start == CourseFields.start.default
+
+    @property
+    def start_date_text(self):
+        """
+        Returns the desired text corresponding the course's start date, in the
+        current language. Prefers .advertised_start, then falls back to .start
+        """
+        if isinstance(self.advertised_start, basestring):
+            try:
+                advertised_start = Date().from_json(self.advertised_start)
+            except ValueError:
+                advertised_start = None
+            if advertised_start is None:
+                return self.advertised_start.title()
+            return strftime_localized(advertised_start, "SHORT_DATE")
+        elif self.start_date_is_still_default:
+            # Translators: TBD stands for 'To Be Determined' and is used when a course
+            # does not yet have an announced start date.
+            return _('TBD')
+        else:
+            return strftime_localized(self.start, "SHORT_DATE")
+
+    @property
+    def end_date_text(self):
+        """
+        Returns the end date for the course formatted as a string, in the current
+        language, or an empty string if the course has no end date.
+        """
+        if self.end is None:
+            return ''
+        return strftime_localized(self.end, "SHORT_DATE")
+
+    @property
+    def is_newish(self):
+        """
+        Returns if the course has been flagged as new. If
+        there is no flag, return a heuristic value considering the
+        announcement and the start dates.
+        """
+        if self.is_new is not None:
+            return self.is_new
+
+        # Use a heuristic if the course has not been flagged
+        announcement, start, now = self._sorting_dates()
+        if announcement and (now - announcement).days < 30:
+            # The course has been announced for less that month
+            return True
+        # or the course has not started yet
+        return (now - start).days < 1
+
+    @property
+    def sorting_score(self):
+        """
+        Returns a number that can be used to sort the courses according
+        the how "new" they are; see CourseDescriptor.sorting_score.
+
+        The lower the number the "newer" the course.
+        """
+        announcement, start, now = self._sorting_dates()
+        scale = 300.0  # about a year
+        if announcement:
+            days = (now - announcement).days
+            score = -exp(-days / scale)
+        else:
+            days = (now - start).days
+            score = exp(days / scale)
+        return score
+
+    def _sorting_dates(self):
+        """
+        Returns the announcement date, the (advertised) start date and the
+        current time, for computing is_newish and sorting_score.
+        """
+        try:
+            start = dateutil.parser.parse(self.advertised_start)
+            if start.tzinfo is None:
+                start = start.replace(tzinfo=UTC())
+        except (ValueError, AttributeError):
+            start = self.start
+
+        return self.announcement, start, datetime.now(UTC())
+
+
+@receiver(course_published, dispatch_uid='course_summaries.mark_course_summary_stale')
+def mark_course_summary_stale(sender, course_key, **kwargs):  # pylint: disable=unused-argument
+    """
+    Marks the summary of the course stale once its published content changes,
+    and has it rebuilt in the background. A course without a summary yet gets
+    one once it's rebuilt.
+    """
+    # imported here, as the task imports this module
+    from course_summaries.tasks import rebuild_course_summary
+
+    CourseSummary.objects.filter(course_id=course_key).update(stale=True)
+    rebuild_course_summary.delay(unicode(course_key))
@@ -0,0 +1,233 @@
+"""
+The functions for getting and querying summaries of courses.
+
+Summaries are kept in the CourseSummary table. A course's summary is rebuilt
+from its descriptor in the background whenever its published content changes
+(see course_summaries.tasks), or when it's asked for by id and is missing or
+stale. Listings never load courses: they show the summaries as they are, and
+queue the indexing of the courses which can't announce themselves by
+publishing (every course when the table is empty, such as right after it's
+created, and the courses loaded from xml).
+"""
+from django.core.cache import cache
+
+from static_replace import UrlRewriter
+from xmodule.contentstore.content import StaticContent
+from xmodule.error_module import ErrorDescriptor
+from xmodule.modulestore import XML_MODULESTORE_TYPE
+from xmodule.modulestore.django import modulestore
+from xmodule.modulestore.exceptions import ItemNotFoundError
+from xmodule.modulestore.xml import XMLModuleStore
+
+from course_summaries.models import CourseSummary
+
+# The fields of a CourseSummary which are copied from the course's descriptor
+DESCRIPTOR_FIELDS = (
+    'display_name', 'display_name_with_default', 'display_number_with_default', 'display_org_with_default',
+    'start', 'end', 'advertised_start', 'enrollment_start', 'enrollment_end', 'announcement',
+    'days_early_for_beta', 'enrollment_domain', 'ispublic', 'is_new', 'certificates_show_before_end',
+    'end_of_course_survey_url', 'cert_name_short', 'cert_name_long', 'lowest_passing_grade',
+)
+
+
+def _course_image_url(course):
+    """
+    Returns the url of the course's image. This is courseware.courses.course_image_url,
+    which Studio can't import.
+    """
+    if course.static_asset_path or modulestore().get_modulestore_type(course.id) == XML_MODULESTORE_TYPE:
+        url = '/static/' + (course.static_asset_path or getattr(course, 'data_dir', ''))
+        if hasattr(course, 'course_image') and course.course_image != course.fields['course_image'].default:
+            url += '/' + course.course_image
+        else:
+            url += '/images/course_image.jpg'
+    else:
+        loc = StaticContent.compute_location(course.id, course.course_image)
+        url = loc.to_deprecated_string()
+    return url
+
+
+def _short_description(store, course):
+    """
+    Returns the html of the course's short_description about page, or '' if it
+    doesn't have one. Its /static/, /course/ and /jump_to_id/ urls are rewritten
+    as the LMS does when it renders the about page (see
+    courseware.module_render.get_module_system_for_user), so that they work
+    from a course listing too.
+    """
+    try:
+        about = store.get_item(course.id.make_usage_key('about', 'short_description'))
+    except ItemNotFoundError:
+        return ''
+    return UrlRewriter(
+        getattr(course, 'data_dir', None),
+        course.id,
+        course.static_asset_path,
+        # the LMS's jump_to_id url, which Studio (where summaries are also built) can't reverse
+        jump_to_id_base_url=u'/courses/{}/jump_to_id/'.format(course.id.to_deprecated_string()),
+    ).rewrite(about.data)
+
+
+def _summary_fields(store, course):
+    """
+    Returns a dict of the values of the CourseSummary fields for the CourseDescriptor `course`.
+    """
+    fields = {field: getattr(course, field) for field in DESCRIPTOR_FIELDS}
+    fields.update(
+        org=course.location.org,
+        number=course.location.course,
+        course_image_url=_course_image_url(course),
+        short_description=_short_description(store, course),
+    )
+    return fields
+
+
+def refresh_course_summary(course_key):
+    """
+    Rebuilds the summary of the course from its descriptor, and returns it.
+
+    Returns None, leaving the course unlisted, if the course doesn't exist (its
+    summary is deleted) or fails to load (its summary is left stale, so that it's
+    tried again next time).
+    """
+    store = modulestore()
+    rows = CourseSummary.objects.filter(course_id=course_key)
+    # clear the stale flag before reading the course, so that a change published
+    # while the summary is being built marks it stale again
+    existed = rows.update(stale=False)
+
+    course = store.get_course(course_key, depth=0)
+    if course is None:
+        rows.delete()
+        return None
+    if isinstance(course, ErrorDescriptor):
+        rows.update(stale=True)
+        return None
+
+    fields = _summary_fields(store, course)
+    if existed:
+        rows.update(**fields)
+    else:
+        CourseSummary.objects.get_or_create(course_id=course_key, defaults=fields)
+    return CourseSummary(course_id=course_key, **fields)
+
+
+# The cache key held while an index_unannounced_courses task is queued or running, so that
+# listings don't queue another, and how long it's held for if the task never finishes
+INDEXING_QUEUED_KEY = 'course_summaries.indexing_queued'
+INDEXING_QUEUED_TIMEOUT = 60 * 60
+
+# Whether this process has had the courses of its xml modulestores reindexed
+_xml_courses_queued = False
+
+
+def xml_course_keys():
+    """
+    Returns the keys of the courses loaded from xml, which are already in memory.
+    """
+    store = modulestore()
+    stores = getattr(store, 'modulestores', {'default': store}).values()
+    return set(
+        course.id
+        for xml_store in stores if isinstance(xml_store, XMLModuleStore)
+        for course in xml_store.get_courses() if not isinstance(course, ErrorDescriptor)
+    )
+
+
+def _queue_unannounced_courses():
+    """
+    Has the courses which publishing doesn't index indexed in the background
+    (see course_summaries.tasks.index_unannounced_courses), if the table is
+    empty, if courses loaded from xml are missing from it, or once per process
+    for the courses it loaded from xml, in case their files changed.
+    """
+    global _xml_courses_queued  # pylint: disable=global-statement
+    if CourseSummary.objects.exists() and _xml_courses_queued:
+        course_keys = list(xml_course_keys())
+        if not course_keys or CourseSummary.objects.filter(course_id__in=course_keys).count() == len(course_keys):
+            return
+
+    _xml_courses_queued = True
+    if cache.add(INDEXING_QUEUED_KEY, True, INDEXING_QUEUED_TIMEOUT):
+        # imported here, as the task imports this module
+        from course_summaries.tasks import index_unannounced_courses
+        index_unannounced_courses.delay()
+
+
+def get_course_summaries(course_keys):
+    """
+    Returns a dict mapping each of `course_keys` to the summary of the course,
+    leaving out courses which don't exist or fail to load.
+
+    Summaries which are up to date take a single query; the rest are rebuilt
+    from the course's descriptor.
+    """
+    course_keys = list(course_keys)
+    summaries = {}
+    if course_keys:
+        for summary in CourseSummary.objects.filter(course_id__in=course_keys, stale=False):
+            summaries[summary.course_id] = summary
+
+    for course_key in course_keys:
+        if course_key not in summaries:
+            summary = refresh_course_summary(course_key)
+            if summary is not None:
+                summaries[course_key] = summary
+    return summaries
+
+
+def get_course_summary(course_key):
+    """
+    Returns the summary of the course, or None if it doesn't exist or fails to load.
+    """
+    return get_course_summaries([course_key]).get(course_key)
+
+
+def query_course_summaries(org=None, exclude_orgs=None, course_keys=None, order_by=('number',), offset=0, limit=None):
+    """
+    Returns a list of the summaries of the indexed courses, for listing them.
+
+    org: if given, only the courses in this org are returned.
+    exclude_orgs: if given, the courses in these orgs are left out.
+    course_keys: if given, only these courses are returned.
+    order_by: the CourseSummary fields to sort by, as for QuerySet.order_by.
+    offset, limit: return the `limit` summaries (or all the rest, if limit is
+        None) starting with the `offset`th one, for paging.
+
+    No courses are loaded: the summaries of courses published since they were
+    last built are listed as they are until they're rebuilt in the background,
+    and courses which haven't been indexed yet are left out until they are
+    (see _queue_unannounced_courses).
+    """
+    _queue_unannounced_courses()
+
+    summaries = CourseSummary.objects.all()
+    if org is not None:
+        summaries = summaries.filter(org=org)
+    if exclude_orgs:
+        summaries = summaries.exclude(org__in=list(exclude_orgs))
+    if course_keys is not None:
+        course_keys = list(course_keys)
+        if not course_keys:
+            return []
+        summaries = summaries.filter(course_id__in=course_keys)
+    summaries = summaries.order_by(*order_by)
+
+    if limit is None:
+        return list(summaries[offset:])
+    return list(summaries[offset:offset + limit])
+
+
+def index_course_summaries(course_keys=None):
+    """
+    Rebuilds the summaries of the courses in `course_keys`, or of every course
+    in the modulestore (deleting the summaries of courses which no longer exist)
+    if course_keys is None. Returns the number of courses indexed.
+    """
+    if course_keys is None:
+        course_keys = set(course.id for course in modulestore().get_courses())
+        for summary in CourseSummary.objects.all():
+            if summary.course_id not in course_keys:
+                summary.delete()
+
+    return len([key for key in course_keys if refresh_course_summary(key) is not None])
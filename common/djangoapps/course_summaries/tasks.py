@@ -0,0 +1,36 @@
+"""
+Background tasks for keeping the course summary index up to date.
+"""
+from celery import task
+from django.core.cache import cache
+
+from xmodule.modulestore.keys import CourseKey
+
+from course_summaries.models import CourseSummary
+from course_summaries.summary import (
+    INDEXING_QUEUED_KEY, index_course_summaries, refresh_course_summary, xml_course_keys
+)
+
+
+@task()  # pylint: disable=E1102
+def rebuild_course_summary(course_key_string):
+    """
+    Rebuilds the summary of the course from its descriptor, once its published
+    content has changed.
+    """
+    refresh_course_summary(CourseKey.from_string(course_key_string))
+
+
+@task()  # pylint: disable=E1102
+def index_unannounced_courses():
+    """
+    Indexes the courses which publishing doesn't: every course if the index is
+    empty, or else the courses loaded from xml.
+    """
+    try:
+        if CourseSummary.objects.exists():
+            index_course_summaries(xml_course_keys())
+        else:
+            index_course_summaries()
+    finally:
+        cache.delete(INDEXING_QUEUED_KEY)
@@ -0,0 +1,169 @@
+"""
+Tests for course summaries.
+"""
+from datetime import datetime
+
+from django.conf import settings
+from django.core.cache import cache
+from django.test.utils import override_settings
+from django.utils.timezone import UTC
+from mock import patch
+
+from course_summaries.models import CourseSummary
+from course_summaries.summary import (
+    INDEXING_QUEUED_KEY, get_course_summaries, get_course_summary, query_course_summaries, index_course_summaries
+)
+from xmodule.modulestore.django import modulestore
+from xmodule.modulestore.locations import SlashSeparatedCourseKey
+from xmodule.modulestore.tests.django_utils import ModuleStoreTestCase, studio_store_config
+from xmodule.modulestore.tests.factories import CourseFactory
+
+TEST_MODULESTORE = studio_store_config(settings.TEST_ROOT / "data")
+
+
+@override_settings(MODULESTORE=TEST_MODULESTORE)
+class CourseSummaryTestCase(ModuleStoreTestCase):
+    """
+    Tests for CourseSummary, get_course_summaries and query_course_summaries.
+    """
+    def setUp(self):
+        self.course = CourseFactory.create(
+            org='TestX', number='Summary101', display_name='Summaries',
+            start=datetime(2013, 2, 3, tzinfo=UTC()), end=datetime(2013, 5, 3, tzinfo=UTC()),
+            modulestore=modulestore('direct'),
+        )
+
+    def test_matches_descriptor(self):
+        summary = get_course_summary(self.course.id)
+        for field in ('id', 'display_name_with_default', 'display_number_with_default', 'number', 'org',
+                      'start_date_text', 'end_date_text', 'start_date_is_still_default', 'lowest_passing_grade',
+                      'is_newish', 'sorting_score'):
+            self.assertEqual(getattr(summary, field), getattr(self.course, field), field)
+        for method in ('has_started', 'has_ended', 'may_certify'):
+            self.assertEqual(getattr(summary, method)(), getattr(self.course, method)(), method)
+        self.assertEqual(summary.course_image_url, '/c4x/TestX/Summary101/asset/images_course_image.jpg')
+
+    def test_cached(self):
+        summary = get_course_summary(self.course.id)
+        with patch.object(modulestore(), 'get_course') as get_course:
+            self.assertEqual(get_course_summary(self.course.id), summary)
+            self.assertFalse(get_course.called)
+
+    def test_rebuilt_after_change(self):
+        get_course_summary(self.course.id)
+        self.course.display_name = 'Summaries, revised'
+        modulestore('direct').update_item(self.course, '**replace_user**')
+        self.assertEqual(get_course_summary(self.course.id).display_name_with_default, 'Summaries, revised')
+
+    def test_missing_course(self):
+        missing = SlashSeparatedCourseKey('TestX', 'Missing', 'Run')
+        summaries = get_course_summaries([self.course.id, missing])
+        self.assertEqual(summaries.keys(), [self.course.id])
+        self.assertIsInstance(summaries[self.course.id], CourseSummary)
+        self.assertIsNone(get_course_summary(missing))
+
+    def _create_courses(self):
+        """
+        Creates three more courses, in two more orgs.
+        """
+        for org, number in (('OrgA', 'Zeta'), ('OrgA', 'Alpha'), ('OrgB', 'Beta')):
+            CourseFactory.create(org=org, number=number, display_name=number, modulestore=modulestore('direct'))
+
+    def test_query(self):
+        self._create_courses()
+        numbers = lambda summaries: [summary.number for summary in summaries]
+
+        self.assertEqual(numbers(query_course_summaries()), ['Alpha', 'Beta', 'Summary101', 'Zeta'])
+        self.assertEqual(numbers(query_course_summaries(org='OrgA')), ['Alpha', 'Zeta'])
+        self.assertEqual(numbers(query_course_summaries(exclude_orgs=['OrgA', 'TestX'])), ['Beta'])
+        self.assertEqual(numbers(query_course_summaries(course_keys=[self.course.id])), ['Summary101'])
+        self.assertEqual(query_course_summaries(course_keys=[]), [])
+        self.assertEqual(
+            numbers(query_course_summaries(order_by=('org', '-number'))), ['Zeta', 'Alpha', 'Beta', 'Summary101']
+        )
+        self.assertEqual(numbers(query_course_summaries(offset=1, limit=2)), ['Beta', 'Summary101'])
+        self.assertEqual(numbers(query_course_summaries(offset=3)), ['Zeta'])
+
+    def test_publish_rebuilds_only_changed_course(self):
+        self._create_courses()
+        query_course_summaries()
+        with patch.object(modulestore(), 'get_course', wraps=modulestore().get_course) as get_course:
+            query_course_summaries()
+            self.assertFalse(get_course.called)
+
+            # the rebuild runs eagerly in tests
+            self.course.display_name = 'Summaries, revised'
+            modulestore('direct').update_item(self.course, '**replace_user**')
+            get_course.assert_called_once_with(self.course.id, depth=0)
+
+            summaries = query_course_summaries(course_keys=[self.course.id])
+            self.assertEqual(get_course.call_count, 1)
+        self.assertEqual(summaries[0].display_name, 'Summaries, revised')
+        self.assertFalse(summaries[0].stale)
+
+    def test_query_lists_stale_summaries(self):
+        with patch('course_summaries.tasks.rebuild_course_summary.delay') as rebuild:
+            self.course.display_name = 'Summaries, revised'
+            modulestore('direct').update_item(self.course, '**replace_user**')
+            rebuild.assert_called_with(unicode(self.course.id))
+
+        with patch.object(modulestore(), 'get_course') as get_course:
+            summaries = query_course_summaries()
+            self.assertFalse(get_course.called)
+        self.assertEqual([summary.display_name for summary in summaries], ['Summaries'])
+        self.assertTrue(summaries[0].stale)
+
+        # asking for the course by id rebuilds it
+        self.assertEqual(get_course_summary(self.course.id).display_name, 'Summaries, revised')
+
+    def test_short_description(self):
+        modulestore('direct').create_and_save_xmodule(
+            self.course.id.make_usage_key('about', 'short_description'),
+            '<a href="/jump_to_id/intro">Intro</a> <a href="/course/info">Info</a>',
+        )
+        self.assertEqual(
+            get_course_summary(self.course.id).short_description,
+            '<a href="/courses/{0}/jump_to_id/intro">Intro</a> <a href="/courses/{0}/info">Info</a>'.format(
+                self.course.id.to_deprecated_string()
+            )
+        )
+
+    def test_summaries_in_one_query(self):
+        self._create_courses()
+        course_keys = [summary.id for summary in query_course_summaries()]
+        with patch.object(modulestore(), 'get_course') as get_course:
+            with self.assertNumQueries(1):
+                self.assertEqual(len(get_course_summaries(course_keys)), 4)
+            self.assertFalse(get_course.called)
+
+    def test_deleted_course(self):
+        query_course_summaries()
+        modulestore('direct').delete_course(self.course.id)
+        self.assertEqual(query_course_summaries(), [])
+        self.assertFalse(CourseSummary.objects.exists())
+
+    def test_index(self):
+        self._create_courses()
+        CourseSummary.objects.exclude(course_id=self.course.id).delete()
+        self.assertEqual(len(query_course_summaries()), 1)
+
+        self.assertEqual(index_course_summaries(), 4)
+        self.assertEqual(len(query_course_summaries()), 4)
+
+    def test_index_empty_table(self):
+        self._create_courses()
+        CourseSummary.objects.all().delete()
+        # the indexing runs eagerly in tests
+        self.assertEqual(len(query_course_summaries()), 4)
+
+    def test_empty_table_indexed_in_background(self):
+        self._create_courses()
+        CourseSummary.objects.all().delete()
+        self.addCleanup(cache.delete, INDEXING_QUEUED_KEY)
+        with patch('course_summaries.tasks.index_unannounced_courses.delay') as index:
+            with patch.object(modulestore(), 'get_courses') as get_courses:
+                self.assertEqual(query_course_summaries(), [])
+                self.assertEqual(query_course_summaries(), [])
+                self.assertFalse(get_courses.called)
+            # queued once, until it has run
+            index.assert_called_once_with()
@@ -0,0 +1,23 @@
+"""
+Compile the mako templates, ready for production mode.
+"""
+from django.conf import settings
+from django.core.management.base import NoArgsCommand
+
+from edxmako import precompile_templates
+
+
+class Command(NoArgsCommand):
+    """
+    Compiles every mako template into MAKO_MODULE_DIR.
+    """
+
+    help = """
+    Compiles every mako template in the MAKO_TEMPLATES directories into
+    MAKO_MODULE_DIR, so that processes sharing that directory only need to load
+    the compiled templates when they start (see MAKO_PRODUCTION_MODE).
+    """
+
+    def handle_noargs(self, **options):
+        count = precompile_templates()
+        self.stdout.write('Compiled {} templates into {}\n'.format(count, settings.MAKO_MODULE_DIR))
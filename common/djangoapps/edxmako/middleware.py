@@ -15,12 +15,19 @@
 from django.template import RequestContext
 from util.request import safe_get_host
 requestcontext = None
+# requestcontext collapsed to a single dictionary for mako, once per request
+# rather than once for each of the many templates a page can render
+requestcontext_dict = None
 
 
 class MakoMiddleware(object):
 
     def process_request(self, request):
-        global requestcontext
+        global requestcontext, requestcontext_dict
         requestcontext = RequestContext(request)
         requestcontext['is_secure'] = request.is_secure()
         requestcontext['site'] = safe_get_host(request)
+
+        requestcontext_dict = {}
+        for d in requestcontext:
+            requestcontext_dict.update(d)
@@ -1,6 +1,7 @@
 """
 Set up lookup paths for mako templates.
 """
+import logging
 import os
 import pkg_resources
 
@@ -9,6 +10,12 @@ from mako.lookup import TemplateLookup
 
 from . import LOOKUP
 
+log = logging.getLogger(__name__)
+
+# The extensions of the files in the lookup directories which are mako
+# templates (the others, such as .underscore, are rendered client side)
+TEMPLATE_EXTENSIONS = ('.html', '.txt', '.xml', '.js')
+
 
 class DynamicTemplateLookup(TemplateLookup):
     """
@@ -48,12 +55,42 @@ def add_lookup(namespace, directory, package=None, prepend=False):
             input_encoding='utf-8',
             default_filters=['decode.utf8'],
             encoding_errors='replace',
+            # in production mode, templates are compiled once and never checked for changes
+            filesystem_checks=not getattr(settings, 'MAKO_PRODUCTION_MODE', False),
         )
     if package:
         directory = pkg_resources.resource_filename(package, directory)
     templates.add_directory(directory, prepend=prepend)
 
 
+def precompile_templates(namespace=None):
+    """
+    Compiles every template in the lookup directories of `namespace`, or of all
+    namespaces, so that no template is compiled while rendering a request.
+
+    Files which don't compile as mako templates are logged and skipped.
+
+    Returns the number of templates compiled.
+    """
+    count = 0
+    for name, templates in LOOKUP.items():
+        if namespace is not None and name != namespace:
+            continue
+        for directory in templates.directories:
+            for dirpath, _dirnames, filenames in os.walk(directory):
+                for filename in filenames:
+                    if os.path.splitext(filename)[1] not in TEMPLATE_EXTENSIONS:
+                        continue
+                    uri = os.path.relpath(os.path.join(dirpath, filename), directory).replace(os.sep, '/')
+                    try:
+                        templates.get_template(uri)
+                    except Exception:  # pylint: disable=broad-except
+                        log.debug("Not precompiling %s in the %s lookup", uri, name, exc_info=True)
+                    else:
+                        count += 1
+    return count
+
+
 def lookup_template(namespace, name):
     """
     Look up a Mako template by namespace and name.
@@ -92,9 +92,8 @@ def render_to_string(template_name, dictionary, context=None, namespace='main'):
     context_instance['marketing_link'] = marketing_link
 
     # In various testing contexts, there might not be a current request context.
-    if edxmako.middleware.requestcontext is not None:
-        for d in edxmako.middleware.requestcontext:
-            context_dictionary.update(d)
+    if edxmako.middleware.requestcontext_dict is not None:
+        context_dictionary.update(edxmako.middleware.requestcontext_dict)
     for d in context_instance:
         context_dictionary.update(d)
     if context:
@@ -2,7 +2,7 @@
 Initialize the mako template lookup
 """
 from django.conf import settings
-from . import add_lookup, clear_lookups
+from . import add_lookup, clear_lookups, precompile_templates
 
 
 def run():
@@ -17,3 +17,6 @@ def run():
         clear_lookups(namespace)
         for directory in directories:
             add_lookup(namespace, directory)
+
+    if getattr(settings, 'MAKO_PRODUCTION_MODE', False):
+        precompile_templates()
@@ -48,9 +48,8 @@ class Template(MakoTemplate):
         context_dictionary = {}
 
         # In various testing contexts, there might not be a current request context.
-        if edxmako.middleware.requestcontext is not None:
-            for d in edxmako.middleware.requestcontext:
-                context_dictionary.update(d)
+        if edxmako.middleware.requestcontext_dict is not None:
+            context_dictionary.update(edxmako.middleware.requestcontext_dict)
         for d in context_instance:
             context_dictionary.update(d)
         context_dictionary['settings'] = settings
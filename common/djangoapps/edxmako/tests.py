@@ -1,7 +1,11 @@
+import os
+import shutil
+import tempfile
+
 from django.test import TestCase
 from django.test.utils import override_settings
 from django.core.urlresolvers import reverse
-from edxmako import add_lookup, LOOKUP
+from edxmako import add_lookup, clear_lookups, precompile_templates, LOOKUP
 from edxmako.shortcuts import marketing_link
 from mock import patch
 from util.testing import UrlResetMixin
@@ -37,3 +41,35 @@ class AddLookupTests(TestCase):
         dirs = LOOKUP['test'].directories
         self.assertEqual(len(dirs), 1)
         self.assertTrue(dirs[0].endswith('management'))
+
+
+class PrecompileTemplatesTests(TestCase):
+    """
+    Test the `precompile_templates` function.
+    """
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.directory)
+        os.mkdir(os.path.join(self.directory, 'nested'))
+        templates = {
+            'good.html': 'Hello ${name}',
+            'nested/good.txt': 'Hello again ${name}',
+            'bad.html': 'Hello ${name',
+            'client.underscore': 'Hello <%= name %>',
+        }
+        for name, content in templates.items():
+            with open(os.path.join(self.directory, name), 'w') as template_file:
+                template_file.write(content)
+        add_lookup('test', self.directory)
+        self.addCleanup(clear_lookups, 'test')
+
+    def test_precompile(self):
+        self.assertEqual(precompile_templates('test'), 2)
+        self.assertTrue(LOOKUP['test'].has_template('good.html'))
+        self.assertTrue(LOOKUP['test'].has_template('nested/good.txt'))
+
+    @override_settings(MAKO_PRODUCTION_MODE=True)
+    def test_production_mode(self):
+        clear_lookups('test')
+        add_lookup('test', self.directory)
+        self.assertFalse(LOOKUP['test'].filesystem_checks)
@@ -0,0 +1,117 @@
+"""
+Benchmark of checking ip addresses against large embargo ip filters.
+"""
+import random
+import timeit
+from optparse import make_option
+
+import ipaddr
+from django.core.management.base import BaseCommand
+
+from embargo.middleware import IPDecisionCache
+from embargo.models import IPFilter
+
+# scanning every network is slow, so it's only timed over this many lookups
+SCAN_LOOKUPS = 200
+
+
+def random_networks(version, count, rand):
+    """
+    Returns `count` random networks of ip `version`, of a mix of prefix lengths
+    """
+    if version == 4:
+        max_prefixlen, prefixlens = 32, (32, 32, 24, 16, 8)
+    else:
+        max_prefixlen, prefixlens = 128, (128, 128, 64, 48, 32)
+    networks = []
+    for _ in xrange(count):
+        address = ipaddr.IPAddress(rand.getrandbits(max_prefixlen), version=version)
+        networks.append(ipaddr.IPNetwork('{}/{}'.format(address, rand.choice(prefixlens))).masked())
+    return networks
+
+
+def random_addresses(networks, count, rand):
+    """
+    Returns `count` random addresses, half of them inside `networks`
+    """
+    addresses = []
+    for i in xrange(count):
+        network = rand.choice(networks)
+        if i % 2:
+            address = ipaddr.IPAddress(
+                int(network.network) + rand.randint(0, network.numhosts - 1), version=network.version
+            )
+        else:
+            address = ipaddr.IPAddress(rand.getrandbits(network.max_prefixlen), version=network.version)
+        addresses.append(str(address))
+    return addresses
+
+
+class Command(BaseCommand):
+    help = """
+    Times checking random addresses against random IPv4 and IPv6 filter lists:
+    with a scan of every network (as the lists used to be checked), with the
+    compiled IPFilterList, and through the middleware's cache of decisions.
+
+    example:
+        manage.py ... benchmark_ip_filters --entries 5000 --lookups 10000
+    """
+
+    option_list = BaseCommand.option_list + (
+        make_option('--entries',
+                    type='int',
+                    dest='entries',
+                    default=5000,
+                    help='The number of networks in each filter list'),
+        make_option('--lookups',
+                    type='int',
+                    dest='lookups',
+                    default=10000,
+                    help='The number of addresses to check against each list'),
+        make_option('--seed',
+                    type='int',
+                    dest='seed',
+                    default=0,
+                    help='The seed of the random networks and addresses'),
+    )
+
+    def handle(self, *args, **options):
+        rand = random.Random(options['seed'])
+        entries, lookups = options['entries'], options['lookups']
+
+        for version in (4, 6):
+            networks = random_networks(version, entries, rand)
+            addresses = random_addresses(networks, lookups, rand)
+            ip_filter_list = IPFilter.IPFilterList([str(network) for network in networks])
+            decisions = IPDecisionCache(max_size=lookups)
+            configuration = (version,)
+
+            def scan():
+                """ The way filter lists used to be checked """
+                for address in addresses[:SCAN_LOOKUPS]:
+                    address = ipaddr.IPAddress(address)
+                    any(network.Contains(address) for network in networks)
+
+            def compiled():
+                """ Checks against the compiled list """
+                for address in addresses:
+                    address in ip_filter_list  # pylint: disable=pointless-statement
+
+            def cached():
+                """ Checks through the decision cache, as the middleware does """
+                for address in addresses:
+                    if decisions.get(configuration, address) is None:
+                        decisions.set(configuration, address, (address in ip_filter_list, None))
+
+            # time the cache once it holds every address
+            cached()
+
+            for name, check, count in (
+                ('scan', scan, min(lookups, SCAN_LOOKUPS)),
+                ('compiled', compiled, lookups),
+                ('cached', cached, lookups),
+            ):
+                seconds = timeit.timeit(check, number=1)
+                self.stdout.write('IPv{} {:>8}: {:>10.2f} us per lookup ({} networks)\n'.format(
+                    version, name, seconds * 1e6 / count, entries
+                ))
@@ -31,6 +31,9 @@ EMBARGO_SITE_REDIRECT_URL = 'https://www.edx.org/'
 
 """
 import logging
+import threading
+from collections import OrderedDict
+
 import pygeoip
 
 from django.core.exceptions import MiddlewareNotUsed
@@ -44,6 +47,68 @@ from embargo.models import EmbargoedCourse, EmbargoedState, IPFilter
 
 log = logging.getLogger(__name__)
 
+# the number of ip addresses whose embargo decisions each process remembers
+IP_DECISION_CACHE_SIZE = 10000
+
+# the reasons for restricting an ip address
+BLACKLISTED = 'blacklisted'
+EMBARGOED_COUNTRY = 'embargoed_country'
+
+_GEOIP = None
+_GEOIP_LOCK = threading.Lock()
+
+
+def geoip():
+    """
+    Returns the process-wide GeoIP reader, which memory maps the database
+    """
+    global _GEOIP  # pylint: disable=global-statement
+    if _GEOIP is None:
+        with _GEOIP_LOCK:
+            if _GEOIP is None:
+                _GEOIP = pygeoip.GeoIP(settings.GEOIP_PATH, pygeoip.MMAP_CACHE)
+    return _GEOIP
+
+
+class IPDecisionCache(object):
+    """
+    A size bounded LRU of the embargo decisions made for ip addresses. The
+    decisions are all forgotten whenever the embargo configuration they were
+    made under changes.
+    """
+    def __init__(self, max_size=IP_DECISION_CACHE_SIZE):
+        self.max_size = max_size
+        self._configuration = None
+        self._decisions = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, configuration, ip_addr):
+        """
+        Returns the decision made for `ip_addr` under `configuration`, or None
+        """
+        with self._lock:
+            if configuration != self._configuration:
+                self._configuration = configuration
+                self._decisions.clear()
+                return None
+            decision = self._decisions.pop(ip_addr, None)
+            if decision is not None:
+                # re-insert to mark as most recently used
+                self._decisions[ip_addr] = decision
+            return decision
+
+    def set(self, configuration, ip_addr, decision):
+        """
+        Remembers the decision made for `ip_addr` under `configuration`,
+        evicting the least recently used decisions
+        """
+        with self._lock:
+            if configuration != self._configuration:
+                return
+            self._decisions[ip_addr] = decision
+            while len(self._decisions) > self.max_size:
+                self._decisions.popitem(last=False)
+
 
 class EmbargoMiddleware(object):
     """
@@ -58,6 +123,31 @@ class EmbargoMiddleware(object):
         if not settings.FEATURES.get('EMBARGO', False) and \
            not self.site_enabled:
             raise MiddlewareNotUsed()
+        self.decisions = IPDecisionCache()
+
+    def embargo_decision(self, ip_addr):
+        """
+        Returns why `ip_addr` is restricted (BLACKLISTED, EMBARGOED_COUNTRY or
+        None if it isn't) and the country code of the address (None if it's
+        blacklisted).
+        """
+        ip_filter = IPFilter.current()
+        embargoed_state = EmbargoedState.current()
+        configuration = (ip_filter.blacklist, ip_filter.whitelist, embargoed_state.embargoed_countries)
+
+        decision = self.decisions.get(configuration, ip_addr)
+        if decision is None:
+            if ip_addr in ip_filter.blacklist_ips:
+                decision = (BLACKLISTED, None)
+            else:
+                country_code = geoip().country_code_by_addr(ip_addr)
+                if country_code in embargoed_state.embargoed_countries_list and \
+                   ip_addr not in ip_filter.whitelist_ips:
+                    decision = (EMBARGOED_COUNTRY, country_code)
+                else:
+                    decision = (None, country_code)
+            self.decisions.set(configuration, ip_addr, decision)
+        return decision
 
     def process_request(self, request):
         """
@@ -76,11 +166,11 @@ class EmbargoMiddleware(object):
                 response = HttpResponseRedirect(redirect_url) if redirect_url \
                            else HttpResponseForbidden('Access Denied')
 
-            # If we're having performance issues, add caching here
             ip_addr = get_ip(request)
+            reason, country_code_from_ip = self.embargo_decision(ip_addr)
 
             # if blacklisted, immediately fail
-            if ip_addr in IPFilter.current().blacklist_ips:
+            if reason == BLACKLISTED:
                 if course_is_embargoed:
                     msg = "Embargo: Restricting IP address %s to course %s because IP is blacklisted." % \
                           (ip_addr, course_id)
@@ -90,10 +180,8 @@ class EmbargoMiddleware(object):
                 log.info(msg)
                 return response
 
-            country_code_from_ip = pygeoip.GeoIP(settings.GEOIP_PATH).country_code_by_addr(ip_addr)
-            is_embargoed = country_code_from_ip in EmbargoedState.current().embargoed_countries_list
             # Fail if country is embargoed and the ip address isn't explicitly whitelisted
-            if is_embargoed and ip_addr not in IPFilter.current().whitelist_ips:
+            if reason == EMBARGOED_COUNTRY:
                 if course_is_embargoed:
                     msg = "Embargo: Restricting IP address %s to course %s because IP is from country %s." % \
                           (ip_addr, course_id, country_code_from_ip)
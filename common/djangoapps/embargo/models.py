@@ -89,11 +89,25 @@ class IPFilter(ConfigurationModel):
     class IPFilterList(object):
         """
         Represent a list of IP addresses with support of networks.
+
+        The networks are compiled into sets of prefixes, one per ip version and
+        prefix length, so checking an address takes a set lookup for each
+        distinct prefix length in the list rather than a scan of every network.
         """
 
         def __init__(self, ips):
             self.networks = [ipaddr.IPNetwork(ip) for ip in ips]
 
+            prefixes = {}
+            for network in self.networks:
+                shift = network.max_prefixlen - network.prefixlen
+                prefixes.setdefault(network.version, {}).setdefault(shift, set()).add(int(network.network) >> shift)
+            # {ip version: [(bits to drop from an address, prefixes of networks of that length)]}
+            self._prefixes = {
+                version: sorted(by_shift.items())
+                for version, by_shift in prefixes.items()
+            }
+
         def __iter__(self):
             for network in self.networks:
                 yield network
@@ -104,12 +118,31 @@ class IPFilter(ConfigurationModel):
             except ValueError:
                 return False
 
-            for network in self.networks:
-                if network.Contains(ip):
+            address = int(ip)
+            for shift, prefixes in self._prefixes.get(ip.version, ()):
+                if address >> shift in prefixes:
                     return True
 
             return False
 
+    # The IPFilterLists compiled from each whitelist and blacklist, so that a list
+    # is only compiled again when the configuration changes.
+    _compiled_lists = {}
+    _MAX_COMPILED_LISTS = 8
+
+    @classmethod
+    def _ip_filter_list(cls, addresses):
+        """
+        Return the IPFilterList of the comma-separated `addresses`
+        """
+        ip_filter_list = cls._compiled_lists.get(addresses)
+        if ip_filter_list is None:
+            ip_filter_list = cls.IPFilterList([addr.strip() for addr in addresses.split(',')])
+            if len(cls._compiled_lists) >= cls._MAX_COMPILED_LISTS:
+                cls._compiled_lists.clear()
+            cls._compiled_lists[addresses] = ip_filter_list
+        return ip_filter_list
+
     @property
     def whitelist_ips(self):
         """
@@ -117,7 +150,7 @@ class IPFilter(ConfigurationModel):
         """
         if self.whitelist == '':
             return []
-        return self.IPFilterList([addr.strip() for addr in self.whitelist.split(',')])  # pylint: disable=no-member
+        return self._ip_filter_list(self.whitelist)
 
     @property
     def blacklist_ips(self):
@@ -126,4 +159,4 @@ class IPFilter(ConfigurationModel):
         """
         if self.blacklist == '':
             return []
-        return self.IPFilterList([addr.strip() for addr in self.blacklist.split(',')])  # pylint: disable=no-member
+        return self._ip_filter_list(self.blacklist)
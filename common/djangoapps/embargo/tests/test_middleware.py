@@ -16,6 +16,7 @@ from xmodule.modulestore.tests.factories import CourseFactory
 
 # Explicitly import the cache from ConfigurationModel so we can reset it after each test
 from config_models.models import cache
+from embargo.middleware import IPDecisionCache
 from embargo.models import EmbargoedCourse, EmbargoedState, IPFilter
 
 
@@ -235,3 +236,30 @@ class EmbargoMiddlewareTests(TestCase):
         # denied, and redirected to EMBARGO_SITE_REDIRECT_URL rather than returning a 403.
         response = self.client.get(self.regular_page, HTTP_X_FORWARDED_FOR='1.0.0.0', REMOTE_ADDR='1.0.0.0')
         self.assertEqual(response.status_code, 302)
+
+
+class IPDecisionCacheTests(unittest.TestCase):
+    """
+    Tests of the LRU of embargo decisions
+    """
+    def test_lru(self):
+        decisions = IPDecisionCache(max_size=2)
+        configuration = ('5.0.0.0', '1.0.0.0', 'CU')
+        self.assertIsNone(decisions.get(configuration, '1.0.0.0'))
+        decisions.set(configuration, '1.0.0.0', (None, 'CU'))
+        decisions.set(configuration, '2.0.0.0', (None, 'IR'))
+        # using 1.0.0.0 makes 2.0.0.0 the least recently used
+        self.assertEqual(decisions.get(configuration, '1.0.0.0'), (None, 'CU'))
+        decisions.set(configuration, '3.0.0.0', (None, 'SY'))
+        self.assertIsNone(decisions.get(configuration, '2.0.0.0'))
+        self.assertEqual(decisions.get(configuration, '1.0.0.0'), (None, 'CU'))
+        self.assertEqual(decisions.get(configuration, '3.0.0.0'), (None, 'SY'))
+
+    def test_configuration_change(self):
+        decisions = IPDecisionCache()
+        decisions.set(None, '1.0.0.0', (None, 'CU'))
+        self.assertEqual(decisions.get(None, '1.0.0.0'), (None, 'CU'))
+        self.assertIsNone(decisions.get(('', '', 'CU'), '1.0.0.0'))
+        # decisions made under the old configuration aren't remembered
+        decisions.set(None, '1.0.0.0', (None, 'CU'))
+        self.assertIsNone(decisions.get(('', '', 'CU'), '1.0.0.0'))
@@ -1,4 +1,5 @@
 """Test of models for embargo middleware app"""
+import ipaddr
 from django.test import TestCase
 
 from xmodule.modulestore.locations import SlashSeparatedCourseKey
@@ -95,3 +96,31 @@ class EmbargoModelsTest(TestCase):
         self.assertTrue('1.1.0.1' in cblacklist)
         self.assertTrue('1.1.1.0' in cblacklist)
         self.assertFalse('1.2.0.0' in cblacklist)
+
+    def test_ipv6_network_blocking(self):
+        IPFilter(blacklist='2001:db8::/32, 2001:db9::1, 1.1.0.0/16').save()
+
+        cblacklist = IPFilter.current().blacklist_ips
+        self.assertTrue('2001:db8::1' in cblacklist)
+        self.assertTrue('2001:db8:ffff::' in cblacklist)
+        self.assertTrue('2001:db9::1' in cblacklist)
+        self.assertFalse('2001:db9::2' in cblacklist)
+        self.assertFalse('2001:dba::' in cblacklist)
+        self.assertTrue('1.1.2.3' in cblacklist)
+        # IPv4 addresses don't match IPv6 networks with the same bits, and vice versa
+        self.assertFalse('::1.1.2.3' in cblacklist)
+        self.assertFalse('not an address' in cblacklist)
+
+    def test_large_ip_filter_list(self):
+        networks = ['10.{}.{}.0/24'.format(i / 256, i % 256) for i in range(0, 4096, 2)]
+        networks += ['2001:db8:{:x}::/48'.format(i) for i in range(0, 4096, 2)]
+        networks += ['172.16.{}.{}'.format(i / 256, i % 256) for i in range(0, 4096, 3)]
+        ip_filter_list = IPFilter.IPFilterList(networks)
+        parsed = [ipaddr.IPNetwork(network) for network in networks]
+
+        addresses = ['10.{}.{}.7'.format(i / 256, i % 256) for i in range(0, 4096, 5)]
+        addresses += ['2001:db8:{:x}::7'.format(i) for i in range(0, 4096, 5)]
+        addresses += ['172.16.{}.{}'.format(i / 256, i % 256) for i in range(0, 4096, 5)]
+        for address in addresses:
+            expected = any(network.Contains(ipaddr.IPAddress(address)) for network in parsed)
+            self.assertEqual(address in ip_filter_list, expected, address)
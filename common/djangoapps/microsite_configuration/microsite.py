@@ -14,6 +14,10 @@ from django.conf import settings
 CURRENT_REQUEST_CONFIGURATION = threading.local()
 CURRENT_REQUEST_CONFIGURATION.data = {}
 
+# Whether each microsite template override exists, remembered when templates
+# don't change while the process runs (see MAKO_PRODUCTION_MODE)
+TEMPLATE_OVERRIDE_EXISTS = {}
+
 
 def has_configuration_set():
     """
@@ -62,7 +66,7 @@ def get_template_path(relative_path):
     if microsite_template_path:
         search_path = os.path.join(microsite_template_path, relative_path)
 
-        if os.path.isfile(search_path):
+        if _template_override_exists(search_path):
             path = '{0}/templates/{1}'.format(
                 get_value('microsite_name'),
                 relative_path
@@ -72,6 +76,20 @@ def get_template_path(relative_path):
     return relative_path
 
 
+def _template_override_exists(search_path):
+    """
+    Returns whether there is a microsite template at `search_path`, only
+    checking the filesystem once per path in production template mode
+    """
+    if not getattr(settings, 'MAKO_PRODUCTION_MODE', False):
+        return os.path.isfile(search_path)
+
+    exists = TEMPLATE_OVERRIDE_EXISTS.get(search_path)
+    if exists is None:
+        exists = TEMPLATE_OVERRIDE_EXISTS[search_path] = os.path.isfile(search_path)
+    return exists
+
+
 def get_value_for_org(org, val_name, default=None):
     """
     This returns a configuration value for a microsite which has an org_filter that matches
@@ -3,7 +3,10 @@ Some additional unit tests for Microsite logic. The LMS covers some of the Micro
 some additional coverage
 """
 import django.test
+from django.test.utils import override_settings
+from mock import patch
 
+from microsite_configuration import microsite
 from microsite_configuration.microsite import get_value_for_org
 
 
@@ -24,3 +27,16 @@ class TestMicrosites(django.test.TestCase):
         # now test when we call in a value Microsite ORG, note this is defined in test.py configuration
         value = get_value_for_org("TestMicrositeX", "university", "default_value")
         self.assertEquals(value, "test_microsite")
+
+    @override_settings(MAKO_PRODUCTION_MODE=True)
+    @patch.dict(microsite.TEMPLATE_OVERRIDE_EXISTS, clear=True)
+    def test_template_override_lookup_remembered(self):
+        """
+        Make sure production template mode only looks for a Microsite template override once
+        """
+        configuration = {'template_dir': '/microsite/templates', 'microsite_name': 'test_microsite'}
+        with patch.object(microsite.CURRENT_REQUEST_CONFIGURATION, 'data', configuration):
+            with patch('os.path.isfile', return_value=True) as isfile:
+                self.assertEquals(microsite.get_template_path('index.html'), 'test_microsite/templates/index.html')
+                self.assertEquals(microsite.get_template_path('index.html'), 'test_microsite/templates/index.html')
+            self.assertEquals(isfile.call_count, 1)
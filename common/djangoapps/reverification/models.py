@@ -53,3 +53,14 @@ class MidcourseReverificationWindow(ValidateOnSaveMixin, models.Model):
             return cls.objects.get(course_id=course_id, start_date__lte=date, end_date__gte=date)
         except cls.DoesNotExist:
             return None
+
+    @classmethod
+    def get_windows(cls, course_ids, date):
+        """
+        Returns a dict mapping those of the given course ids which have a window
+        open on a particular date to that window, with a single query.
+        """
+        return dict(
+            (window.course_id, window)
+            for window in cls.objects.filter(course_id__in=course_ids, start_date__lte=date, end_date__gte=date)
+        )
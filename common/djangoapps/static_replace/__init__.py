@@ -1,5 +1,6 @@
 import logging
 import re
+from collections import OrderedDict
 
 from staticfiles.storage import staticfiles_storage
 from staticfiles import finders
@@ -11,6 +12,9 @@ from xmodule.contentstore.content import StaticContent
 
 log = logging.getLogger(__name__)
 
+# How many resolved static urls each UrlRewriter remembers
+STATIC_URL_CACHE_SIZE = 1000
+
 
 def _url_replace_regex(prefix):
     """
@@ -43,6 +47,167 @@ def try_staticfiles_lookup(path):
     return url
 
 
+class UrlRewriter(object):
+    """
+    Rewrites the /static/, /course/ and /jump_to_id/ urls of the content of a
+    course, applying all the rules in a single scan of the text.
+
+    The urls that /static/ paths resolve to are remembered (up to
+    STATIC_URL_CACHE_SIZE of them), so that the staticfiles storage and the
+    modulestore are only consulted once per path. Since the answer may change
+    when the course or the static files do, a rewriter should only be kept for
+    the duration of a request.
+
+    data_directory: The directory in which course data is stored
+    course_id: The course in which the rewrite happens. /course/ urls are only
+        rewritten if it is given
+    static_asset_path: Path for static assets, which overrides data_directory and course_id, if nonempty
+    jump_to_id_base_url: The base url of the handler that redirects to a piece of
+        courseware given its id (see replace_jump_to_id_urls). /jump_to_id/ urls
+        are only rewritten if it is given
+    """
+    def __init__(self, data_directory, course_id=None, static_asset_path='', jump_to_id_base_url=None):
+        self.data_directory = data_directory
+        self.course_id = course_id
+        self.static_asset_path = static_asset_path
+        self.jump_to_id_base_url = jump_to_id_base_url
+
+        # (prefix, path) -> url, or None if the url should be left alone
+        self._static_urls = OrderedDict()
+        self._regexes = {}
+        self._uses_xml_modulestore = None
+
+    def rewrite(self, text):
+        """
+        Apply every rule that this rewriter has the information for to `text`.
+        """
+        rules = ['static']
+        if self.course_id is not None:
+            rules.append('course')
+        if self.jump_to_id_base_url is not None:
+            rules.append('jump_to_id')
+        return self._sub(tuple(rules), text)
+
+    def replace_static_urls(self, text):
+        """
+        Only rewrite the /static/ urls of `text`; see static_replace.replace_static_urls.
+        """
+        return self._sub(('static',), text)
+
+    def replace_course_urls(self, text):
+        """
+        Only rewrite the /course/ urls of `text`; see static_replace.replace_course_urls.
+        """
+        return self._sub(('course',), text)
+
+    def replace_jump_to_id_urls(self, text):
+        """
+        Only rewrite the /jump_to_id/ urls of `text`; see static_replace.replace_jump_to_id_urls.
+        """
+        return self._sub(('jump_to_id',), text)
+
+    def _sub(self, rules, text):
+        """
+        Rewrite the urls of `text` matched by any of `rules`, in a single pass.
+        """
+        if rules not in self._regexes:
+            prefixes = {
+                'static': u'(?:{static_url}|/static/)(?!{data_dir})'.format(
+                    static_url=settings.STATIC_URL,
+                    data_dir=self.static_asset_path or self.data_directory
+                ),
+                'course': u'/course/',
+                'jump_to_id': u'/jump_to_id/',
+            }
+            self._regexes[rules] = re.compile(_url_replace_regex(u'|'.join(
+                u'(?P<{rule}>{prefix})'.format(rule=rule, prefix=prefixes[rule]) for rule in rules
+            )))
+        return self._regexes[rules].sub(self._replace_url, text)
+
+    def _replace_url(self, match):
+        """
+        Return the replacement of a url matched by one of the rules.
+        """
+        groups = match.groupdict()
+        quote = match.group('quote')
+        rest = match.group('rest')
+
+        if groups.get('jump_to_id') is not None:
+            return "".join([quote, self.jump_to_id_base_url + rest, quote])
+        elif groups.get('course') is not None:
+            return "".join([quote, '/courses/' + self.course_id.to_deprecated_string() + '/', rest, quote])
+
+        # Don't mess with things that end in '?raw'
+        if rest.endswith('?raw'):
+            return match.group(0)
+
+        prefix = match.group('prefix')
+        if (prefix, rest) in self._static_urls:
+            url = self._static_urls.pop((prefix, rest))
+        else:
+            url = self._static_url(prefix, rest)
+            if len(self._static_urls) >= STATIC_URL_CACHE_SIZE:
+                self._static_urls.popitem(last=False)
+        # (Re)insert the url, so that it is now the most recently used
+        self._static_urls[(prefix, rest)] = url
+
+        if url is None:
+            return match.group(0)
+        return "".join([quote, url, quote])
+
+    def _static_url(self, prefix, rest):
+        """
+        Resolve the path `rest` of a /static/ url starting with `prefix`, either
+        to its correct url as generated by collectstatic (/static/$md5_hashed_stuff),
+        to the course-specific content static url (/static/$course_data_dir/$stuff),
+        or to the url in the contentstore (c4x://) for courses that are not
+        stored in XML. Return None if the url should be left as it is.
+        """
+        # In debug mode, if we can find the url as is,
+        if settings.DEBUG and finders.find(rest, True):
+            return None
+        # if we're running with a MongoBacked store course_namespace is not None, then use studio style urls
+        elif (not self.static_asset_path) and self.course_id and not self._is_xml_course():
+            # first look in the static file pipeline and see if we are trying to reference
+            # a piece of static content which is in the edx-platform repo (e.g. JS associated with an xmodule)
+
+            exists_in_staticfiles_storage = False
+            try:
+                exists_in_staticfiles_storage = staticfiles_storage.exists(rest)
+            except Exception as err:
+                log.warning("staticfiles_storage couldn't find path {0}: {1}".format(
+                    rest, str(err)))
+
+            if exists_in_staticfiles_storage:
+                return staticfiles_storage.url(rest)
+            else:
+                # if not, then assume it's courseware specific content and then look in the
+                # Mongo-backed database
+                return StaticContent.convert_legacy_static_url_with_course_id(rest, self.course_id)
+        # Otherwise, look the file up in staticfiles_storage, and append the data directory if needed
+        else:
+            course_path = "/".join((self.static_asset_path or self.data_directory, rest))
+
+            try:
+                if staticfiles_storage.exists(rest):
+                    return staticfiles_storage.url(rest)
+                else:
+                    return staticfiles_storage.url(course_path)
+            # And if that fails, assume that it's course content, and add manually data directory
+            except Exception as err:
+                log.warning("staticfiles_storage couldn't find path {0}: {1}".format(
+                    rest, str(err)))
+                return "".join([prefix, course_path])
+
+    def _is_xml_course(self):
+        """
+        Whether the course is stored in an XML modulestore.
+        """
+        if self._uses_xml_modulestore is None:
+            self._uses_xml_modulestore = modulestore().get_modulestore_type(self.course_id) == XML_MODULESTORE_TYPE
+        return self._uses_xml_modulestore
+
+
 def replace_jump_to_id_urls(text, course_id, jump_to_id_base_url):
     """
     This will replace a link to another piece of courseware to a 'jump_to'
@@ -63,13 +228,7 @@ def replace_jump_to_id_urls(text, course_id, jump_to_id_base_url):
 
     output: <text> after the link rewriting rules are applied
     """
-
-    def replace_jump_to_id_url(match):
-        quote = match.group('quote')
-        rest = match.group('rest')
-        return "".join([quote, jump_to_id_base_url + rest, quote])
-
-    return re.sub(_url_replace_regex('/jump_to_id/'), replace_jump_to_id_url, text)
+    return UrlRewriter(None, course_id, jump_to_id_base_url=jump_to_id_base_url).replace_jump_to_id_urls(text)
 
 
 def replace_course_urls(text, course_key):
@@ -81,15 +240,7 @@ def replace_course_urls(text, course_key):
 
     returns: text with the links replaced
     """
-
-    course_id = course_key.to_deprecated_string()
-
-    def replace_course_url(match):
-        quote = match.group('quote')
-        rest = match.group('rest')
-        return "".join([quote, '/courses/' + course_id + '/', rest, quote])
-
-    return re.sub(_url_replace_regex('/course/'), replace_course_url, text)
+    return UrlRewriter(None, course_key).replace_course_urls(text)
 
 
 def replace_static_urls(text, data_directory, course_id=None, static_asset_path=''):
@@ -104,60 +255,4 @@ def replace_static_urls(text, data_directory, course_id=None, static_asset_path=
     course_id: The course identifier used to distinguish static content for this course in studio
     static_asset_path: Path for static assets, which overrides data_directory and course_namespace, if nonempty
     """
-
-    def replace_static_url(match):
-        original = match.group(0)
-        prefix = match.group('prefix')
-        quote = match.group('quote')
-        rest = match.group('rest')
-
-        # Don't mess with things that end in '?raw'
-        if rest.endswith('?raw'):
-            return original
-
-        # In debug mode, if we can find the url as is,
-        if settings.DEBUG and finders.find(rest, True):
-            return original
-        # if we're running with a MongoBacked store course_namespace is not None, then use studio style urls
-        elif (not static_asset_path) and course_id and modulestore().get_modulestore_type(course_id) != XML_MODULESTORE_TYPE:
-            # first look in the static file pipeline and see if we are trying to reference
-            # a piece of static content which is in the edx-platform repo (e.g. JS associated with an xmodule)
-
-            exists_in_staticfiles_storage = False
-            try:
-                exists_in_staticfiles_storage = staticfiles_storage.exists(rest)
-            except Exception as err:
-                log.warning("staticfiles_storage couldn't find path {0}: {1}".format(
-                    rest, str(err)))
-
-            if exists_in_staticfiles_storage:
-                url = staticfiles_storage.url(rest)
-            else:
-                # if not, then assume it's courseware specific content and then look in the
-                # Mongo-backed database
-                url = StaticContent.convert_legacy_static_url_with_course_id(rest, course_id)
-        # Otherwise, look the file up in staticfiles_storage, and append the data directory if needed
-        else:
-            course_path = "/".join((static_asset_path or data_directory, rest))
-
-            try:
-                if staticfiles_storage.exists(rest):
-                    url = staticfiles_storage.url(rest)
-                else:
-                    url = staticfiles_storage.url(course_path)
-            # And if that fails, assume that it's course content, and add manually data directory
-            except Exception as err:
-                log.warning("staticfiles_storage couldn't find path {0}: {1}".format(
-                    rest, str(err)))
-                url = "".join([prefix, course_path])
-
-        return "".join([quote, url, quote])
-
-    return re.sub(
-        _url_replace_regex(u'(?:{static_url}|/static/)(?!{data_dir})'.format(
-            static_url=settings.STATIC_URL,
-            data_dir=static_asset_path or data_directory
-        )),
-        replace_static_url,
-        text
-    )
+    return UrlRewriter(data_directory, course_id, static_asset_path).replace_static_urls(text)
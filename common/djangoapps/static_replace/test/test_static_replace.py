@@ -2,7 +2,7 @@ import re
 
 from nose.tools import assert_equals, assert_true, assert_false  # pylint: disable=E0611
 from static_replace import (replace_static_urls, replace_course_urls,
-                            _url_replace_regex)
+                            _url_replace_regex, UrlRewriter)
 from mock import patch, Mock
 
 from xmodule.modulestore.locations import SlashSeparatedCourseKey
@@ -123,3 +123,40 @@ def test_regex():
     for s in no:
         print 'Should not match: {0!r}'.format(s)
         assert_false(re.match(regex, s))
+
+
+@patch('static_replace.staticfiles_storage')
+@patch('static_replace.modulestore')
+def test_url_rewriter_single_pass(mock_modulestore, mock_storage):
+    """
+    Make sure UrlRewriter applies all the rules at once, and only resolves each static path once
+    """
+    mock_storage.exists.return_value = False
+    mock_modulestore.return_value = Mock(MongoModuleStore)
+
+    rewriter = UrlRewriter(DATA_DIRECTORY, COURSE_KEY, jump_to_id_base_url='/courses/org/course/run/jump_to_id/')
+    text = STATIC_SOURCE + STATIC_SOURCE + "'/course/file.png'" + '"/jump_to_id/abc"' + '"/static/foo.png?raw"'
+    assert_equals(
+        '"/c4x/org/course/asset/file.png"' * 2 +
+        "'/courses/org/course/run/file.png'" +
+        '"/courses/org/course/run/jump_to_id/abc"' +
+        '"/static/foo.png?raw"',
+        rewriter.rewrite(text)
+    )
+    # Rewriting again comes from the rewriter's cache
+    rewriter.rewrite(text)
+    mock_storage.exists.assert_called_once_with('file.png')
+    assert_equals(mock_modulestore.return_value.get_modulestore_type.call_count, 1)
+
+
+def test_url_rewriter_rules():
+    """
+    Make sure UrlRewriter only applies the rules it's asked to
+    """
+    text = '"/course/file.png" "/jump_to_id/abc"'
+    rewriter = UrlRewriter(DATA_DIRECTORY, COURSE_KEY, jump_to_id_base_url='/jump_to_id_base/')
+    assert_equals(replace_course_urls(text, COURSE_KEY), rewriter.replace_course_urls(text))
+    assert_equals('"/course/file.png" "/jump_to_id_base/abc"', rewriter.replace_jump_to_id_urls(text))
+
+    # Without the information they need, the course and jump_to_id rules are skipped
+    assert_equals(text, UrlRewriter(DATA_DIRECTORY).rewrite(text))
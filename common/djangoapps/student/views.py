@@ -46,7 +46,10 @@ from student.models import (
 from student.forms import PasswordResetFormNoActive
 
 from verify_student.models import SoftwareSecurePhotoVerification, MidcourseReverificationWindow
-from certificates.models import CertificateStatuses, certificate_status_for_student
+from certificates.models import (
+    CertificateStatuses, certificate_status_for_student, certificate_statuses_for_student
+)
+from course_summaries.summary import get_course_summaries
 from dark_lang.models import DarkLangConfig
 
 from xmodule.course_module import CourseDescriptor
@@ -85,7 +88,6 @@ from util.password_policy_validators import (
 )
 
 from third_party_auth import pipeline, provider
-from xmodule.error_module import ErrorDescriptor
 
 log = logging.getLogger("edx.student")
 AUDIT_LOG = logging.getLogger("audit")
@@ -160,10 +162,12 @@ def process_survey_link(survey_link, user):
     return survey_link.format(UNIQUE_ID=unique_id_for_user(user))
 
 
-def cert_info(user, course):
+def cert_info(user, course, cert_status=None):
     """
     Get the certificate info needed to render the dashboard section for the given
-    student and course.  Returns a dictionary with keys:
+    student and course (a descriptor or CourseSummary). cert_status is the student's
+    certificate status, as returned by certificate_status_for_student, if it has
+    already been fetched.  Returns a dictionary with keys:
 
     'status': one of 'generating', 'ready', 'notpassing', 'processing', 'restricted'
     'show_download_url': bool
@@ -176,7 +180,9 @@ def cert_info(user, course):
     if not course.may_certify():
         return {}
 
-    return _cert_info(user, course, certificate_status_for_student(user, course.id))
+    if cert_status is None:
+        cert_status = certificate_status_for_student(user, course.id)
+    return _cert_info(user, course, cert_status)
 
 
 def reverification_info(course_enrollment_pairs, user, statuses):
@@ -196,8 +202,11 @@ def reverification_info(course_enrollment_pairs, user, statuses):
             dict["must_reverify"] = [some information]
     """
     reverifications = defaultdict(list)
+    windows = MidcourseReverificationWindow.get_windows(
+        [course.id for course, _enrollment in course_enrollment_pairs], datetime.datetime.now(UTC)
+    )
     for (course, enrollment) in course_enrollment_pairs:
-        info = single_course_reverification_info(user, course, enrollment)
+        info = _reverification_info_for_window(user, course, enrollment, windows.get(course.id))
         if info:
             reverifications[info.status].append(info)
 
@@ -224,7 +233,14 @@ def single_course_reverification_info(user, course, enrollment):  # pylint: disa
         OR, None: None if there is no re-verification info for this enrollment
     """
     window = MidcourseReverificationWindow.get_window(course.id, datetime.datetime.now(UTC))
+    return _reverification_info_for_window(user, course, enrollment, window)
 
+
+def _reverification_info_for_window(user, course, enrollment, window):
+    """
+    Implements single_course_reverification_info for the course's open
+    reverification window (None if there isn't one).
+    """
     # If there's no window OR the user is not verified, we don't get reverification info
     if (not window) or (enrollment.mode != "verified"):
         return None
@@ -238,12 +254,14 @@ def single_course_reverification_info(user, course, enrollment):  # pylint: disa
 
 def get_course_enrollment_pairs(user, course_org_filter, org_filter_out_set):
     """
-    Get the relevant set of (Course, CourseEnrollment) pairs to be displayed on
+    Get the relevant set of (CourseSummary, CourseEnrollment) pairs to be displayed on
     a student's dashboard.
     """
-    for enrollment in CourseEnrollment.enrollments_for_user(user):
-        course = course_from_id(enrollment.course_id)
-        if course and not isinstance(course, ErrorDescriptor):
+    enrollments = list(CourseEnrollment.enrollments_for_user(user))
+    courses = get_course_summaries([enrollment.course_id for enrollment in enrollments])
+    for enrollment in enrollments:
+        course = courses.get(enrollment.course_id)
+        if course is not None:
 
             # if we are in a Microsite, then filter out anything that is not
             # attributed (by ORG) to that Microsite
@@ -256,8 +274,8 @@ def get_course_enrollment_pairs(user, course_org_filter, org_filter_out_set):
 
             yield (course, enrollment)
         else:
-            log.error("User {0} enrolled in {2} course {1}".format(
-                        user.username, enrollment.course_id, "broken" if course else "non-existent"
+            log.error("User {0} enrolled in broken or non-existent course {1}".format(
+                        user.username, enrollment.course_id
                      ))
 
 
@@ -400,16 +418,17 @@ def register_user(request, extra_context=None):
     return render_to_response('register.html', context)
 
 
-def complete_course_mode_info(course_id, enrollment):
+def complete_course_mode_info(course_id, enrollment, modes=None):
     """
     We would like to compute some more information from the given course modes
-    and the user's current enrollment
+    (by slug; they're looked up if not given) and the user's current enrollment
 
     Returns the given information:
         - whether to show the course upsell information
         - numbers of days until they can't upsell anymore
     """
-    modes = CourseMode.modes_for_course_dict(course_id)
+    if modes is None:
+        modes = CourseMode.modes_for_course_dict(course_id)
     mode_info = {'show_upsell': False, 'days_for_upsell': None}
     # we want to know if the user is already verified and if verified is an
     # option
@@ -462,17 +481,30 @@ def dashboard(request):
     show_courseware_links_for = frozenset(course.id for course, _enrollment in course_enrollment_pairs
                                           if has_access(request.user, 'load', course))
 
-    course_modes = {course.id: complete_course_mode_info(course.id, enrollment) for course, enrollment in course_enrollment_pairs}
-    cert_statuses = {course.id: cert_info(request.user, course) for course, _enrollment in course_enrollment_pairs}
+    # fetch the modes, certificates and email authorizations of all the courses at once,
+    # rather than with queries for each course
+    course_ids = [course.id for course, _enrollment in course_enrollment_pairs]
+    all_modes = {
+        course_id: {mode.slug: mode for mode in modes}
+        for course_id, modes in CourseMode.modes_for_courses(course_ids).iteritems()
+    }
+    course_modes = {
+        course.id: complete_course_mode_info(course.id, enrollment, all_modes[course.id])
+        for course, enrollment in course_enrollment_pairs
+    }
+    all_cert_statuses = certificate_statuses_for_student(user, course_ids)
+    cert_statuses = {
+        course.id: cert_info(request.user, course, all_cert_statuses[course.id])
+        for course, _enrollment in course_enrollment_pairs
+    }
 
     # only show email settings for Mongo course and when bulk email is turned on
-    show_email_settings_for = frozenset(
-        course.id for course, _enrollment in course_enrollment_pairs if (
-            settings.FEATURES['ENABLE_INSTRUCTOR_EMAIL'] and
-            modulestore().get_modulestore_type(course.id) != XML_MODULESTORE_TYPE and
-            CourseAuthorization.instructor_email_enabled(course.id)
+    show_email_settings_for = frozenset()
+    if settings.FEATURES['ENABLE_INSTRUCTOR_EMAIL']:
+        show_email_settings_for = frozenset(
+            course_id for course_id in CourseAuthorization.instructor_email_enabled_courses(course_ids)
+            if modulestore().get_modulestore_type(course_id) != XML_MODULESTORE_TYPE
         )
-    )
 
     # Verification Attempts
     # Used to generate the "you must reverify for course x" banner
@@ -482,8 +514,8 @@ def dashboard(request):
     statuses = ["approved", "denied", "pending", "must_reverify"]
     reverifications = reverification_info(course_enrollment_pairs, user, statuses)
 
-    show_refund_option_for = frozenset(course.id for course, _enrollment in course_enrollment_pairs
-                                       if _enrollment.refundable())
+    # the same test as CourseEnrollment.refundable, on the modes fetched above
+    show_refund_option_for = frozenset(course_id for course_id in course_ids if 'verified' in all_modes[course_id])
 
     # get info w.r.t ExternalAuthMap
     external_auth_map = None
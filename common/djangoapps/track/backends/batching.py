@@ -0,0 +1,219 @@
+"""
+Event tracker backend that queues events in memory and hands them to
+another backend in batches, from a background thread.
+
+It wraps any other backend, configured as in `TRACKING_BACKENDS`::
+
+  TRACKING_BACKENDS = {
+      'mongo': {
+          'ENGINE': 'track.backends.batching.BatchingBackend',
+          'OPTIONS': {
+              'backend': {
+                  'ENGINE': 'track.backends.mongodb.MongoBackend',
+                  'OPTIONS': {...}
+              },
+              'batch_size': 100,
+              'flush_interval': 1,
+          }
+      }
+  }
+
+"""
+
+from __future__ import absolute_import
+
+import atexit
+import logging
+import os
+import threading
+import time
+import Queue
+
+from dogapi import dog_stats_api
+
+from track.backends import BaseBackend
+
+
+log = logging.getLogger(__name__)
+
+# Drop policies, for when the queue is full
+DROP_NEWEST = 'newest'
+DROP_OLDEST = 'oldest'
+
+
+class BatchingBackend(BaseBackend):
+    """
+    Event tracker backend that queues events and sends them to another
+    backend in batches.
+
+    `send` never blocks: a background thread sends a batch whenever
+    `batch_size` events are queued, or `flush_interval` seconds after
+    the first event of a batch was queued. If events arrive faster than
+    the wrapped backend can take them and the queue holds
+    `max_queue_size` events, events are dropped according to
+    `drop_policy` and counted in `dropped`. Queued events are flushed
+    when the process exits.
+
+    The thread is started by the first `send` of each process rather
+    than when the backend is created: the tracker creates its backends
+    when it is imported, which may be before the web server forks its
+    workers, and a forked process doesn't inherit its parent's threads.
+
+    """
+
+    def __init__(self, backend, max_queue_size=10000, batch_size=100, flush_interval=1.0,
+                 drop_policy=DROP_NEWEST, **kwargs):
+        """
+        :Parameters:
+          - `backend`: the configuration of the wrapped backend, a dict
+            with an 'ENGINE' and optional 'OPTIONS'
+          - `max_queue_size`: the most events that are held in memory
+          - `batch_size`: the most events sent to the wrapped backend at once
+          - `flush_interval`: the most seconds an event is held before
+            it is sent
+          - `drop_policy`: `DROP_NEWEST` to discard the events that
+            arrive while the queue is full, or `DROP_OLDEST` to discard
+            the oldest queued event to make room for them
+
+        """
+        super(BatchingBackend, self).__init__(**kwargs)
+
+        # imported here, as the tracker instantiates the backends when imported
+        from track.tracker import _instantiate_backend_from_name
+        self.backend = _instantiate_backend_from_name(backend['ENGINE'], backend.get('OPTIONS', {}))
+
+        if drop_policy not in (DROP_NEWEST, DROP_OLDEST):
+            raise ValueError('Invalid drop policy %s' % drop_policy)
+        self.drop_policy = drop_policy
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+
+        self.max_queue_size = max_queue_size
+        self.sent = 0
+        self.dropped = 0
+
+        self._stopped = threading.Event()
+        self._start_lock = threading.Lock()
+        self._reset()
+
+        atexit.register(self.close)
+
+    def _reset(self):
+        """
+        Start this process off with an empty queue and no flusher thread.
+        The queue and locks of a parent process may be in use by its
+        threads at the time of the fork, and its queued events are its
+        own to send.
+        """
+        self.queue = Queue.Queue(self.max_queue_size)
+        self._counter_lock = threading.Lock()
+        self._flusher = None
+        self._pid = os.getpid()
+
+    def _start_flusher(self):
+        """Start the flusher thread, unless this process already has one"""
+        if self._pid != os.getpid():
+            # forked since the flusher was started (or the backend created)
+            with self._start_lock:
+                if self._pid != os.getpid():
+                    self._reset()
+
+        if self._flusher is None:
+            with self._start_lock:
+                if self._flusher is None:
+                    flusher = threading.Thread(target=self._run, name='track-batching-flusher')
+                    flusher.daemon = True
+                    flusher.start()
+                    self._flusher = flusher
+
+    def send(self, event):
+        """Queue the event to be sent with the next batch"""
+        self._start_flusher()
+        try:
+            self.queue.put_nowait(event)
+            return
+        except Queue.Full:
+            pass
+
+        if self.drop_policy == DROP_OLDEST:
+            try:
+                self.queue.get_nowait()
+            except Queue.Empty:
+                pass
+            try:
+                self.queue.put_nowait(event)
+            except Queue.Full:
+                pass
+
+        with self._counter_lock:
+            self.dropped += 1
+            if self.dropped == 1:
+                log.warning('Event tracking queue is full, dropping events')
+        dog_stats_api.increment('track.backends.batching.dropped')
+
+    def _next_batch(self, timeout):
+        """
+        Returns the next batch of queued events: as many as are queued, up
+        to `batch_size`, waiting at most `timeout` seconds for the first one
+        and `flush_interval` seconds after it for the rest.
+        """
+        try:
+            batch = [self.queue.get(timeout=timeout)]
+        except Queue.Empty:
+            return []
+
+        deadline = time.time() + self.flush_interval
+        while len(batch) < self.batch_size:
+            remaining = deadline - time.time()
+            try:
+                if remaining > 0:
+                    batch.append(self.queue.get(timeout=remaining))
+                else:
+                    batch.append(self.queue.get_nowait())
+            except Queue.Empty:
+                break
+        return batch
+
+    def _send_batch(self, batch):
+        """Send the batch to the wrapped backend"""
+        try:
+            self.backend.send_batch(batch)
+        except Exception:  # pylint: disable=broad-except
+            # Like a failing backend called directly, lose the events
+            # rather than the flusher thread.
+            log.exception('Error sending a batch of %d events to the event tracker backend', len(batch))
+            return
+
+        with self._counter_lock:
+            self.sent += len(batch)
+        dog_stats_api.increment('track.backends.batching.sent', len(batch))
+
+    def _run(self):
+        """Send batches of events until the backend is closed"""
+        while not self._stopped.is_set():
+            batch = self._next_batch(self.flush_interval)
+            if batch:
+                self._send_batch(batch)
+
+    def flush(self):
+        """Send all queued events, in the calling thread"""
+        while True:
+            batch = []
+            try:
+                while len(batch) < self.batch_size:
+                    batch.append(self.queue.get_nowait())
+            except Queue.Empty:
+                pass
+            if not batch:
+                return
+            self._send_batch(batch)
+
+    def close(self):
+        """Stop the background thread and send all queued events"""
+        self._stopped.set()
+        if self._pid != os.getpid():
+            # the events queued before the fork are the parent's to send
+            self._reset()
+        elif self._flusher is not None:
+            self._flusher.join(self.flush_interval * 2)
+        self.flush()
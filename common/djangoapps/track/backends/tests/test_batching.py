@@ -0,0 +1,140 @@
+from __future__ import absolute_import
+
+import time
+
+from mock import patch, Mock
+
+from django.test import TestCase
+
+from track.backends.batching import BatchingBackend, DROP_OLDEST
+
+
+WRAPPED_BACKEND = {'ENGINE': 'track.backends.mongodb.MongoBackend'}
+
+
+class TestBatchingBackend(TestCase):
+    def setUp(self):
+        self.wrapped = Mock()
+        patcher = patch('track.tracker._instantiate_backend_from_name', return_value=self.wrapped)
+        self.addCleanup(patcher.stop)
+        self.instantiate = patcher.start()
+
+        patcher = patch('track.backends.batching.atexit')
+        self.addCleanup(patcher.stop)
+        self.atexit = patcher.start()
+
+    def _backend(self, start_flusher=False, **kwargs):
+        """Returns a BatchingBackend, whose flusher thread is only started if `start_flusher`"""
+        if start_flusher:
+            backend = BatchingBackend(WRAPPED_BACKEND, **kwargs)
+            self.addCleanup(backend.close)
+            return backend
+        patcher = patch('track.backends.batching.threading.Thread')
+        self.addCleanup(patcher.stop)
+        self.thread = patcher.start()
+        return BatchingBackend(WRAPPED_BACKEND, **kwargs)
+
+    def sent_batches(self):
+        return [call[0][0] for call in self.wrapped.send_batch.call_args_list]
+
+    def test_wrapped_backend(self):
+        backend = self._backend()
+        self.instantiate.assert_called_once_with('track.backends.mongodb.MongoBackend', {})
+        self.atexit.register.assert_called_once_with(backend.close)
+
+    def test_flush_in_batches(self):
+        backend = self._backend(batch_size=2)
+        events = [{'test': i} for i in range(5)]
+        for event in events:
+            backend.send(event)
+
+        backend.flush()
+
+        self.assertEqual(self.sent_batches(), [events[0:2], events[2:4], events[4:]])
+        self.assertEqual(backend.sent, 5)
+        self.assertEqual(backend.dropped, 0)
+
+    def test_close_flushes(self):
+        backend = self._backend()
+        backend.send({'test': 1})
+        backend.close()
+        self.assertEqual(self.sent_batches(), [[{'test': 1}]])
+
+    def test_drop_newest(self):
+        backend = self._backend(max_queue_size=2)
+        for i in range(3):
+            backend.send({'test': i})
+
+        backend.flush()
+
+        self.assertEqual(self.sent_batches(), [[{'test': 0}, {'test': 1}]])
+        self.assertEqual(backend.dropped, 1)
+
+    def test_drop_oldest(self):
+        backend = self._backend(max_queue_size=2, drop_policy=DROP_OLDEST)
+        for i in range(3):
+            backend.send({'test': i})
+
+        backend.flush()
+
+        self.assertEqual(self.sent_batches(), [[{'test': 1}, {'test': 2}]])
+        self.assertEqual(backend.dropped, 1)
+
+    def test_invalid_drop_policy(self):
+        with self.assertRaises(ValueError):
+            self._backend(drop_policy='random')
+
+    def test_backend_error(self):
+        self.wrapped.send_batch.side_effect = Exception
+        backend = self._backend()
+        backend.send({'test': 1})
+
+        backend.flush()
+
+        self.assertEqual(backend.sent, 0)
+
+    def test_background_flush(self):
+        backend = self._backend(start_flusher=True, flush_interval=0.01)
+        backend.send({'test': 1})
+        backend.send({'test': 2})
+
+        for _ in range(100):
+            if backend.sent == 2:
+                break
+            time.sleep(0.01)
+
+        self.assertEqual(sum(self.sent_batches(), []), [{'test': 1}, {'test': 2}])
+
+    def test_flusher_started_by_send(self):
+        backend = self._backend()
+        self.assertFalse(self.thread.called)
+
+        backend.send({'test': 1})
+        backend.send({'test': 2})
+
+        self.assertEqual(self.thread.call_count, 1)
+        self.thread.return_value.start.assert_called_once_with()
+
+    @patch('track.backends.batching.os.getpid', return_value=1)
+    def test_flusher_started_after_fork(self, getpid):
+        backend = self._backend()
+        backend.send({'test': 1})
+
+        # the web server forks a worker
+        getpid.return_value = 2
+        backend.send({'test': 2})
+
+        self.assertEqual(self.thread.call_count, 2)
+        backend.flush()
+        self.assertEqual(self.sent_batches(), [[{'test': 2}]])
+
+    @patch('track.backends.batching.os.getpid', return_value=1)
+    def test_close_after_fork(self, getpid):
+        backend = self._backend()
+        backend.send({'test': 1})
+
+        getpid.return_value = 2
+        backend.close()
+
+        self.assertFalse(self.thread.return_value.join.called)
+        self.assertEqual(self.sent_batches(), [])
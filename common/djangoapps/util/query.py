@@ -6,4 +6,22 @@ def use_read_replica_if_available(queryset):
     """
     If there is a database called 'read_replica', use that database for the queryset.
     """
-    return queryset.using("read_replica") if "read_replica" in settings.DATABASES else queryset
\ No newline at end of file
+    return queryset.using("read_replica") if "read_replica" in settings.DATABASES else queryset
+
+
+def iterate_in_chunks(queryset, chunk_size):
+    """
+    Yield the objects of `queryset` in order of primary key, fetching `chunk_size` of them at a time,
+    so that the whole result set is never held in memory at once.
+    """
+    last_pk = None
+    while True:
+        chunk = queryset.order_by('pk')
+        if last_pk is not None:
+            chunk = chunk.filter(pk__gt=last_pk)
+        chunk = list(chunk[:chunk_size])
+        for obj in chunk:
+            yield obj
+        if len(chunk) < chunk_size:
+            return
+        last_pk = chunk[-1].pk
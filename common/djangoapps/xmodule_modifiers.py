@@ -89,6 +89,18 @@ def wrap_xblock(runtime_class, block, view, frag, context, usage_id_serializer,
     return wrap_fragment(frag, render_to_string('xblock_wrapper.html', template_context))
 
 
+def rewrite_urls(url_rewriter, block, view, frag, context):  # pylint: disable=unused-argument
+    """
+    Substitutes the /static/..., /course/... and /jump_to_id/... urls of the
+    output of the supplied module in a single pass, using `url_rewriter` (a
+    static_replace.UrlRewriter).
+
+    output: a new :class:`~xblock.fragment.Fragment` that modifies `frag` with
+        content that has had its urls rewritten
+    """
+    return wrap_fragment(frag, url_rewriter.rewrite(frag.content))
+
+
 def replace_jump_to_id_urls(course_id, jump_to_id_base_url, block, view, frag, context):  # pylint: disable=unused-argument
     """
     This will replace a link between courseware in the format
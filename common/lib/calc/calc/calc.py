@@ -7,6 +7,9 @@ Uses pyparsing to parse. Main function as of now is evaluator().
 import math
 import operator
 import numbers
+import threading
+from collections import OrderedDict
+
 import numpy
 import scipy.constants
 import functions
@@ -73,6 +76,10 @@ SUFFIXES = {
 }
 
 
+# Maximum number of parsed expressions kept by `parse_algebra_cached`.
+PARSE_CACHE_SIZE = 1024
+
+
 class UndefinedVariable(Exception):
     """
     Indicate when a student inputs a variable which was not expected.
@@ -224,19 +231,23 @@ def evaluator(variables, functions, math_expr, case_sensitive=False):
      python numbers.
     -Unary functions are passed as a dictionary from string to function.
     """
+    return evaluate_samples([variables], functions, math_expr, case_sensitive)[0]
+
+
+def evaluate_samples(variables_list, functions, math_expr, case_sensitive=False):
+    """
+    Evaluate an expression once for each dictionary of variables in
+    `variables_list`, and return the list of results.
+
+    The expression is only parsed once (see `parse_algebra_cached`), so this
+    is the way to evaluate the same formula at many sample points.
+    """
     # No need to go further.
     if math_expr.strip() == "":
-        return float('nan')
+        return [float('nan') for _ in variables_list]
 
     # Parse the tree.
-    math_interpreter = ParseAugmenter(math_expr, case_sensitive)
-    math_interpreter.parse_algebra()
-
-    # Get our variables together.
-    all_variables, all_functions = add_defaults(variables, functions, case_sensitive)
-
-    # ...and check them
-    math_interpreter.check_variables(all_variables, all_functions)
+    math_interpreter = parse_algebra_cached(math_expr, case_sensitive)
 
     # Create a recursion to evaluate the tree.
     if case_sensitive:
@@ -244,18 +255,125 @@ def evaluator(variables, functions, math_expr, case_sensitive=False):
     else:
         casify = lambda x: x.lower()  # Lowercase for case insens.
 
-    evaluate_actions = {
-        'number': eval_number,
-        'variable': lambda x: all_variables[casify(x[0])],
-        'function': lambda x: all_functions[casify(x[0])](x[1]),
-        'atom': eval_atom,
-        'power': eval_power,
-        'parallel': eval_parallel,
-        'product': eval_product,
-        'sum': eval_sum
-    }
+    results = []
+    for variables in variables_list:
+        # Get our variables together.
+        all_variables, all_functions = add_defaults(variables, functions, case_sensitive)
+
+        # ...and check them
+        math_interpreter.check_variables(all_variables, all_functions)
+
+        evaluate_actions = {
+            'number': eval_number,
+            'variable': lambda x: all_variables[casify(x[0])],
+            'function': lambda x: all_functions[casify(x[0])](x[1]),
+            'atom': eval_atom,
+            'power': eval_power,
+            'parallel': eval_parallel,
+            'product': eval_product,
+            'sum': eval_sum
+        }
+
+        results.append(math_interpreter.reduce_tree(evaluate_actions))
+    return results
+
+
+_PARSE_CACHE = OrderedDict()
+_PARSE_CACHE_LOCK = threading.Lock()
+
+
+def parse_algebra_cached(math_expr, case_sensitive=False):
+    """
+    Return a `ParseAugmenter` for `math_expr` that has already been parsed.
+
+    The most recently used PARSE_CACHE_SIZE parses are kept, keyed by the
+    expression text, so the same formula is never parsed twice in a row. The
+    returned object is shared, and must not be modified.
+
+    Raises the same exceptions as `ParseAugmenter.parse_algebra` when
+    `math_expr` does not parse; those are not cached.
+    """
+    key = (math_expr, case_sensitive)
+    with _PARSE_CACHE_LOCK:
+        math_interpreter = _PARSE_CACHE.pop(key, None)
+        if math_interpreter is not None:
+            # Re-insert it to mark it as the most recently used.
+            _PARSE_CACHE[key] = math_interpreter
+            return math_interpreter
+
+    math_interpreter = ParseAugmenter(math_expr, case_sensitive)
+    math_interpreter.parse_algebra()
+
+    with _PARSE_CACHE_LOCK:
+        _PARSE_CACHE[key] = math_interpreter
+        while len(_PARSE_CACHE) > PARSE_CACHE_SIZE:
+            _PARSE_CACHE.popitem(last=False)
+    return math_interpreter
 
-    return math_interpreter.reduce_tree(evaluate_actions)
+
+_ALGEBRA_GRAMMAR = []
+
+
+def algebra_grammar():
+    """
+    Return the pyparsing grammar for algebraic expressions.
+
+    It is only built once; pyparsing grammars can be reused for any number of
+    parses as long as they don't carry per-parse state in parse actions.
+    """
+    if _ALGEBRA_GRAMMAR:
+        return _ALGEBRA_GRAMMAR[0]
+
+    # 0.33 or 7 or .34 or 16.
+    number_part = Word(nums)
+    inner_number = (number_part + Optional("." + Optional(number_part))) | ("." + number_part)
+    # pyparsing allows spaces between tokens--`Combine` prevents that.
+    inner_number = Combine(inner_number)
+
+    # SI suffixes and percent.
+    number_suffix = MatchFirst(Literal(k) for k in SUFFIXES.keys())
+
+    # 0.33k or 17
+    plus_minus = Literal('+') | Literal('-')
+    number = Group(
+        Optional(plus_minus) +
+        inner_number +
+        Optional(CaselessLiteral("E") + Optional(plus_minus) + number_part) +
+        Optional(number_suffix)
+    )
+    number = number("number")
+
+    # Predefine recursive variables.
+    expr = Forward()
+
+    # Handle variables passed in. They must start with letters/underscores
+    # and may contain numbers afterward.
+    inner_varname = Word(alphas + "_", alphanums + "_")
+    varname = Group(inner_varname)("variable")
+
+    # Same thing for functions.
+    function = Group(inner_varname + Suppress("(") + expr + Suppress(")"))("function")
+
+    atom = number | function | varname | "(" + expr + ")"
+    atom = Group(atom)("atom")
+
+    # Do the following in the correct order to preserve order of operation.
+    pow_term = atom + ZeroOrMore("^" + atom)
+    pow_term = Group(pow_term)("power")
+
+    par_term = pow_term + ZeroOrMore('||' + pow_term)  # 5k || 4k
+    par_term = Group(par_term)("parallel")
+
+    prod_term = par_term + ZeroOrMore((Literal('*') | Literal('/')) + par_term)  # 7 * 5 / 4
+    prod_term = Group(prod_term)("product")
+
+    sum_term = Optional(plus_minus) + prod_term + ZeroOrMore(plus_minus + prod_term)  # -5 + 4 - 3
+    sum_term = Group(sum_term)("sum")
+
+    # Finish the recursion.
+    expr << sum_term  # pylint: disable=W0104
+    _ALGEBRA_GRAMMAR.append(expr + stringEnd)
+    return _ALGEBRA_GRAMMAR[0]
 
 
 class ParseAugmenter(object):
@@ -278,23 +396,6 @@ class ParseAugmenter(object):
         self.variables_used = set()
         self.functions_used = set()
 
-        def vpa(tokens):
-            """
-            When a variable is recognized, store it in `variables_used`.
-            """
-            varname = tokens[0][0]
-            self.variables_used.add(varname)
-
-        def fpa(tokens):
-            """
-            When a function is recognized, store it in `functions_used`.
-            """
-            varname = tokens[0][0]
-            self.functions_used.add(varname)
-
-        self.variable_parse_action = vpa
-        self.function_parse_action = fpa
-
     def parse_algebra(self):
         """
         Parse an algebraic expression into a tree.
@@ -302,62 +403,30 @@ class ParseAugmenter(object):
         Store a `pyparsing.ParseResult` in `self.tree` with proper groupings to
         reflect parenthesis and order of operations. Leave all operators in the
         tree and do not parse any strings of numbers into their float versions.
+        Also record the names of the variables and functions used in the
+        expression in `self.variables_used` and `self.functions_used`.
 
         Adding the groups and result names makes the `repr()` of the result
         really gross. For debugging, use something like
           print OBJ.tree.asXML()
         """
-        # 0.33 or 7 or .34 or 16.
-        number_part = Word(nums)
-        inner_number = (number_part + Optional("." + Optional(number_part))) | ("." + number_part)
-        # pyparsing allows spaces between tokens--`Combine` prevents that.
-        inner_number = Combine(inner_number)
-
-        # SI suffixes and percent.
-        number_suffix = MatchFirst(Literal(k) for k in SUFFIXES.keys())
-
-        # 0.33k or 17
-        plus_minus = Literal('+') | Literal('-')
-        number = Group(
-            Optional(plus_minus) +
-            inner_number +
-            Optional(CaselessLiteral("E") + Optional(plus_minus) + number_part) +
-            Optional(number_suffix)
-        )
-        number = number("number")
-
-        # Predefine recursive variables.
-        expr = Forward()
-
-        # Handle variables passed in. They must start with letters/underscores
-        # and may contain numbers afterward.
-        inner_varname = Word(alphas + "_", alphanums + "_")
-        varname = Group(inner_varname)("variable")
-        varname.setParseAction(self.variable_parse_action)
-
-        # Same thing for functions.
-        function = Group(inner_varname + Suppress("(") + expr + Suppress(")"))("function")
-        function.setParseAction(self.function_parse_action)
-
-        atom = number | function | varname | "(" + expr + ")"
-        atom = Group(atom)("atom")
-
-        # Do the following in the correct order to preserve order of operation.
-        pow_term = atom + ZeroOrMore("^" + atom)
-        pow_term = Group(pow_term)("power")
-
-        par_term = pow_term + ZeroOrMore('||' + pow_term)  # 5k || 4k
-        par_term = Group(par_term)("parallel")
-
-        prod_term = par_term + ZeroOrMore((Literal('*') | Literal('/')) + par_term)  # 7 * 5 / 4
-        prod_term = Group(prod_term)("product")
-
-        sum_term = Optional(plus_minus) + prod_term + ZeroOrMore(plus_minus + prod_term)  # -5 + 4 - 3
-        sum_term = Group(sum_term)("sum")
-
-        # Finish the recursion.
-        expr << sum_term  # pylint: disable=W0104
-        self.tree = (expr + stringEnd).parseString(self.math_expr)[0]
+        self.tree = algebra_grammar().parseString(self.math_expr)[0]
+
+        def find_names(node):
+            """
+            Record the variables and functions used in `node` and its children.
+            """
+            if not isinstance(node, ParseResults):
+                return
+            node_name = node.getName()
+            if node_name == 'variable':
+                self.variables_used.add(node[0])
+            elif node_name == 'function':
+                self.functions_used.add(node[0])
+            for child in node:
+                find_names(child)
+
+        find_names(self.tree)
 
     def reduce_tree(self, handle_actions, terminal_converter=None):
         """
@@ -8,7 +8,7 @@ Because intermediate values of the render contain more data than simply the
 string of latex, store it in a custom class `LatexRendered`.
 """
 
-from calc import ParseAugmenter, DEFAULT_VARIABLES, DEFAULT_FUNCTIONS, SUFFIXES
+from calc import parse_algebra_cached, DEFAULT_VARIABLES, DEFAULT_FUNCTIONS, SUFFIXES
 
 
 class LatexRendered(object):
@@ -364,8 +364,7 @@ def latex_preview(math_expr, variables=(), functions=(), case_sensitive=False):
         return ""
 
     # Parse tree
-    latex_interpreter = ParseAugmenter(math_expr, case_sensitive)
-    latex_interpreter.parse_algebra()
+    latex_interpreter = parse_algebra_cached(math_expr, case_sensitive)
 
     # Get our variables together.
     variables, functions = add_defaults(variables, functions, case_sensitive)
@@ -558,3 +558,31 @@ class EvaluatorTest(unittest.TestCase):
             calc.evaluator({'r1': 5}, {}, "r1+r2")
         with self.assertRaisesRegexp(calc.UndefinedVariable, 'r1 r3'):
             calc.evaluator(variables, {}, "r1*r3", case_sensitive=True)
+
+    def test_evaluate_samples(self):
+        """
+        Evaluating at several sample points should match `evaluator`.
+        """
+        samples = [{'x': 1.0, 'y': 2.0}, {'x': -3.0, 'y': 0.5}, {'x': 0.0, 'y': 7.0}]
+        functions = {'f': lambda z: 2 * z}
+        expr = "f(x) + y^2 - sin(x*y)"
+        expected = [calc.evaluator(sample, functions, expr) for sample in samples]
+        self.assertEqual(expected, calc.evaluate_samples(samples, functions, expr))
+
+        with self.assertRaisesRegexp(calc.UndefinedVariable, 'y'):
+            calc.evaluate_samples([{'x': 1.0, 'y': 1.0}, {'x': 1.0}], {}, "x+y")
+
+    def test_parse_is_cached(self):
+        """
+        The same expression should only be parsed once, and case sensitivity
+        should be part of the cache key.
+        """
+        parsed = calc.parse_algebra_cached("2*x + y", case_sensitive=False)
+        self.assertIs(parsed, calc.parse_algebra_cached("2*x + y", case_sensitive=False))
+        self.assertIsNot(parsed, calc.parse_algebra_cached("2*x + y", case_sensitive=True))
+        self.assertEqual(parsed.variables_used, set(['x', 'y']))
+
+        # Parse errors are not cached.
+        for _ in range(2):
+            with self.assertRaises(ParseException):
+                calc.parse_algebra_cached("2*x +")
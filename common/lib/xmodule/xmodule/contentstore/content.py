@@ -3,6 +3,7 @@ XASSET_LOCATION_TAG = 'c4x'
 XASSET_SRCREF_PREFIX = 'xasset:'
 
 XASSET_THUMBNAIL_TAIL_NAME = '.jpg'
+STREAM_DATA_CHUNK_SIZE = 1024
 
 import os
 import logging
@@ -16,7 +17,7 @@ from PIL import Image
 
 class StaticContent(object):
     def __init__(self, loc, name, content_type, data, last_modified_at=None, thumbnail_location=None, import_path=None,
-                 length=None, locked=False):
+                 length=None, locked=False, content_digest=None):
         self.location = loc
         self.name = name  # a display string which can be edited, and thus not part of the location which needs to be fixed
         self.content_type = content_type
@@ -28,6 +29,8 @@ class StaticContent(object):
         # cycles
         self.import_path = import_path
         self.locked = locked
+        # the md5 of the data, as computed by the contentstore; used as the ETag when serving the content
+        self.content_digest = content_digest
 
     @property
     def is_thumbnail(self):
@@ -129,20 +132,40 @@ class StaticContent(object):
     def stream_data(self):
         yield self._data
 
+    def stream_data_in_range(self, first_byte, last_byte):
+        """
+        Yield the data from `first_byte` up to and including `last_byte`.
+        """
+        yield self._data[first_byte:last_byte + 1]
+
 
 class StaticContentStream(StaticContent):
     def __init__(self, loc, name, content_type, stream, last_modified_at=None, thumbnail_location=None, import_path=None,
-                 length=None, locked=False):
+                 length=None, locked=False, content_digest=None):
         super(StaticContentStream, self).__init__(loc, name, content_type, None, last_modified_at=last_modified_at,
                                                   thumbnail_location=thumbnail_location, import_path=import_path,
-                                                  length=length, locked=locked)
+                                                  length=length, locked=locked, content_digest=content_digest)
         self._stream = stream
 
     def stream_data(self):
         while True:
-            chunk = self._stream.read(1024)
+            chunk = self._stream.read(STREAM_DATA_CHUNK_SIZE)
+            if len(chunk) == 0:
+                break
+            yield chunk
+
+    def stream_data_in_range(self, first_byte, last_byte):
+        """
+        Yield the data from `first_byte` up to and including `last_byte`,
+        seeking past the rest of the stream rather than reading it.
+        """
+        self._stream.seek(first_byte)
+        position = first_byte
+        while position <= last_byte:
+            chunk = self._stream.read(min(STREAM_DATA_CHUNK_SIZE, last_byte - position + 1))
             if len(chunk) == 0:
                 break
+            position += len(chunk)
             yield chunk
 
     def close(self):
@@ -152,7 +175,8 @@ class StaticContentStream(StaticContent):
         self._stream.seek(0)
         content = StaticContent(self.location, self.name, self.content_type, self._stream.read(),
                                 last_modified_at=self.last_modified_at, thumbnail_location=self.thumbnail_location,
-                                import_path=self.import_path, length=self.length, locked=self.locked)
+                                import_path=self.import_path, length=self.length, locked=self.locked,
+                                content_digest=self.content_digest)
         return content
 
 
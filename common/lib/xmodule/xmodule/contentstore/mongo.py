@@ -88,7 +88,8 @@ class MongoContentStore(ContentStore):
                     location, fp.displayname, fp.content_type, fp, last_modified_at=fp.uploadDate,
                     thumbnail_location=thumbnail_location,
                     import_path=getattr(fp, 'import_path', None),
-                    length=fp.length, locked=getattr(fp, 'locked', False)
+                    length=fp.length, locked=getattr(fp, 'locked', False),
+                    content_digest=getattr(fp, 'md5', None),
                 )
             else:
                 with self.fs.get(content_id) as fp:
@@ -99,7 +100,8 @@ class MongoContentStore(ContentStore):
                         location, fp.displayname, fp.content_type, fp.read(), last_modified_at=fp.uploadDate,
                         thumbnail_location=thumbnail_location,
                         import_path=getattr(fp, 'import_path', None),
-                        length=fp.length, locked=getattr(fp, 'locked', False)
+                        length=fp.length, locked=getattr(fp, 'locked', False),
+                        content_digest=getattr(fp, 'md5', None),
                     )
         except NoFile:
             if throw_on_not_found:
@@ -125,17 +127,25 @@ class MongoContentStore(ContentStore):
             pass
 
     def export(self, location, output_directory):
-        content = self.find(location)
-
-        if content.import_path is not None:
-            output_directory = output_directory + '/' + os.path.dirname(content.import_path)
-
         if not os.path.exists(output_directory):
             os.makedirs(output_directory)
+        self.export_to_fs(location, OSFS(output_directory))
+
+    def export_to_fs(self, location, output_fs):
+        """
+        Export the asset at `location` into the filesystem `output_fs`, under the
+        directory it was imported from, if any.
+        """
+        content = self.find(location)
 
-        disk_fs = OSFS(output_directory)
+        output_path = content.name
+        if content.import_path is not None:
+            output_dir = os.path.dirname(content.import_path)
+            if output_dir:
+                output_fs.makedir(output_dir, recursive=True, allow_recreate=True)
+                output_path = output_dir + '/' + content.name
 
-        with disk_fs.open(content.name, 'wb') as asset_file:
+        with output_fs.open(output_path, 'wb') as asset_file:
             asset_file.write(content.data)
 
     def export_all_for_course(self, course_key, output_directory, assets_policy_file):
@@ -149,18 +159,38 @@ class MongoContentStore(ContentStore):
             assets_policy_file: the filename for the policy file which should be in the same
                 directory as the other policy files.
         """
+        if not os.path.exists(output_directory):
+            os.makedirs(output_directory)
+        policy = self._export_assets(course_key, OSFS(output_directory))
+
+        with open(assets_policy_file, 'w') as f:
+            json.dump(policy, f)
+
+    def export_all_for_course_to_fs(self, course_key, static_fs, policies_fs):
+        """
+        Export all of this course's assets into the filesystem static_fs, and all of the
+        assets' attributes to assets.json in the filesystem policies_fs.
+        """
+        policy = self._export_assets(course_key, static_fs)
+
+        with policies_fs.open('assets.json', 'w') as f:
+            f.write(json.dumps(policy))
+
+    def _export_assets(self, course_key, output_fs):
+        """
+        Export all of this course's assets into the filesystem output_fs, and return the
+        policy of their attributes.
+        """
         policy = {}
         assets, __ = self.get_all_content_for_course(course_key)
 
         for asset in assets:
             asset_location = AssetLocation._from_deprecated_son(asset['_id'], course_key.run)  # pylint: disable=protected-access
-            self.export(asset_location, output_directory)
+            self.export_to_fs(asset_location, output_fs)
             for attr, value in asset.iteritems():
                 if attr not in ['_id', 'md5', 'uploadDate', 'length', 'chunkSize']:
                     policy.setdefault(asset_location.name, {})[attr] = value
-
-        with open(assets_policy_file, 'w') as f:
-            json.dump(policy, f)
+        return policy
 
     def get_all_content_thumbnails_for_course(self, course_key):
         return self._get_all_content_for_course(course_key, get_thumbnails=True)[0]
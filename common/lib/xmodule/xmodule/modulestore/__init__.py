@@ -297,7 +297,7 @@ class ModuleStoreReadBase(ModuleStoreRead):
         self,
         doc_store_config=None,  # ignore if passed up
         metadata_inheritance_cache_subsystem=None, request_cache=None,
-        xblock_mixins=(), xblock_select=None,
+        xblock_mixins=(), xblock_select=None, course_published_callback=None,
         # temporary parms to enable backward compatibility. remove once all envs migrated
         db=None, collection=None, host=None, port=None, tz_aware=True, user=None, password=None,
         # allow lower level init args to pass harmlessly
@@ -305,12 +305,16 @@ class ModuleStoreReadBase(ModuleStoreRead):
     ):
         '''
         Set up the error-tracking logic.
+
+        course_published_callback, if given, is called with the course_key of a
+        course whenever the published content of the course changes.
         '''
         self._course_errors = defaultdict(make_error_tracker)  # location -> ErrorLog
         self.metadata_inheritance_cache_subsystem = metadata_inheritance_cache_subsystem
         self.request_cache = request_cache
         self.xblock_mixins = xblock_mixins
         self.xblock_select = xblock_select
+        self.course_published_callback = course_published_callback
 
     def get_course_errors(self, course_key):
         """
@@ -362,6 +366,21 @@ class ModuleStoreReadBase(ModuleStoreRead):
         else:
             return any(c.id == course_id for c in self.get_courses())
 
+    def get_course_published_version(self, course_key):
+        """
+        Returns an opaque token which changes whenever the published content of the
+        course changes, for keying caches of data derived from it, or None if this
+        modulestore doesn't keep track.
+        """
+        return None
+
+    def get_child_position(self, parent_location, child_location):
+        """
+        Returns the index of child_location among the children of the block at parent_location.
+        Raises ValueError if it isn't one of them.
+        """
+        return self.get_item(parent_location).children.index(child_location)
+
 
 class ModuleStoreWriteBase(ModuleStoreReadBase, ModuleStoreWrite):
     '''
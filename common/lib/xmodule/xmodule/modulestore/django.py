@@ -10,6 +10,7 @@ import re
 
 from django.conf import settings
 from django.core.cache import get_cache, InvalidCacheBackendError
+from django.dispatch import Signal
 import django.utils
 
 from xmodule.modulestore.loc_mapper_store import LocMapperStore
@@ -27,6 +28,10 @@ _MODULESTORES = {}
 
 FUNCTION_KEYS = ['render_template']
 
+# Sent whenever the published content of a course changes: when it's published,
+# imported or deleted, or when a change is saved straight to the published version.
+course_published = Signal(providing_args=['course_key'])
+
 
 def load_function(path):
     """
@@ -39,6 +44,13 @@ def load_function(path):
     return getattr(import_module(module_path), name)
 
 
+def _send_course_published(course_key):
+    """
+    The course_published_callback of the modulestores: sends course_published.
+    """
+    course_published.send(sender=None, course_key=course_key)
+
+
 def create_modulestore_instance(engine, doc_store_config, options, i18n_service=None):
     """
     This will return a new instance of a modulestore given an engine and options
@@ -62,13 +74,20 @@ def create_modulestore_instance(engine, doc_store_config, options, i18n_service=
     except InvalidCacheBackendError:
         metadata_inheritance_cache = get_cache('default')
 
+    try:
+        course_structure_cache = get_cache('course_structure_cache')
+    except InvalidCacheBackendError:
+        course_structure_cache = get_cache('default')
+
     return class_(
         metadata_inheritance_cache_subsystem=metadata_inheritance_cache,
+        course_structure_cache=course_structure_cache,
         request_cache=request_cache,
         xblock_mixins=getattr(settings, 'XBLOCK_MIXINS', ()),
         xblock_select=getattr(settings, 'XBLOCK_SELECT_FUNCTION', None),
         doc_store_config=doc_store_config,
         i18n_service=i18n_service or ModuleI18nService(),
+        course_published_callback=_send_course_published,
         **_options
     )
 
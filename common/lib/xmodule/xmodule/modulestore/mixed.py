@@ -199,6 +199,13 @@ class MixedModuleStore(ModuleStoreWriteBase):
         store = self._get_modulestore_for_courseid(location.course_key)
         return store.get_parent_locations(location)
 
+    def get_child_position(self, parent_location, child_location):
+        """
+        See ModuleStoreReadBase.get_child_position
+        """
+        store = self._get_modulestore_for_courseid(parent_location.course_key)
+        return store.get_child_position(parent_location, child_location)
+
     def get_modulestore_type(self, course_id):
         """
         Returns a type which identifies which modulestore is servicing the given course_id.
@@ -209,6 +216,13 @@ class MixedModuleStore(ModuleStoreWriteBase):
         """
         return self._get_modulestore_for_courseid(course_id).get_modulestore_type(course_id)
 
+    def get_course_published_version(self, course_key):
+        """
+        See ModuleStoreReadBase.get_course_published_version
+        """
+        store = self._get_modulestore_for_courseid(course_key)
+        return store.get_course_published_version(course_key)
+
     def get_orphans(self, course_key):
         """
         Get all of the xblocks in the given course which have no parents and are not of types which are
@@ -15,8 +15,8 @@ structure:
 import pymongo
 import sys
 import logging
-import copy
 import re
+from uuid import uuid4
 
 from bson.son import SON
 from fs.osfs import OSFS
@@ -40,6 +40,9 @@ from xmodule.modulestore.locations import SlashSeparatedCourseKey
 
 log = logging.getLogger(__name__)
 
+# The most seconds a write holds the lock on patching the cached metadata inheritance tree of a course
+METADATA_INHERITANCE_LOCK_TIMEOUT = 10
+
 
 class InvalidWriteError(Exception):
     """
@@ -108,6 +111,193 @@ class MongoKeyValueStore(InheritanceKeyValueStore):
             return False
 
 
+def _block_types_with_children():
+    """
+    The categories of the blocks which can have children
+    """
+    return set(name for name, class_ in XBlock.load_classes() if getattr(class_, 'has_children', False))
+
+
+class MetadataInheritanceTree(object):
+    """
+    The structure and inheritable metadata of a course. Rather than a deep copy of the metadata each block
+    inherits, it keeps each container's own inheritable metadata and children, and computes (and memoizes)
+    what a block inherits by merging down its chain of ancestors. The parent map derived from it (see
+    `parent_map`) serves get_parent_locations() and path_to_location() without querying the db.
+    """
+    def __init__(self, root=None, own_metadata=None, children=None, draft_children=None):
+        """
+        root: the url of the course
+        own_metadata: a dict of container url -> the inheritable metadata set on that container
+        children: a dict of container url -> the urls of its children, in order
+        draft_children: the same as children, for the draft versions of the containers
+        """
+        self.root = root
+        self.own_metadata = own_metadata or {}
+        self.children = children or {}
+        self.draft_children = draft_children or {}
+        # a dict of block url -> the urls of its parents (in either version)
+        self.parents = {}
+        for container_children in (self.children, self.draft_children):
+            for url, child_urls in container_children.iteritems():
+                self._add_parent_pointers(url, child_urls)
+        self._merged = {}
+
+    def to_cacheable(self):
+        """
+        The compact, plain data form of this tree to put in the cache
+        """
+        return {
+            'root': self.root,
+            'own_metadata': self.own_metadata,
+            'children': self.children,
+            'draft_children': self.draft_children,
+        }
+
+    @classmethod
+    def from_cacheable(cls, data):
+        """
+        Recreate the tree from the output of `to_cacheable` or return None if data isn't in that
+        form (e.g., it was cached in an older format)
+        """
+        if not isinstance(data, dict) or 'children' not in data:
+            return None
+        return cls(data['root'], data['own_metadata'], data['children'], data['draft_children'])
+
+    def update_container(self, location, metadata, children):
+        """
+        Record the inheritable metadata and children of the container at location
+        """
+        # parent container pointers don't differentiate between draft and non-draft
+        url = location.replace(revision=None).to_deprecated_string()
+        inheritable = {
+            field_name: value for field_name, value in metadata.iteritems()
+            if field_name in InheritanceMixin.fields
+        }
+        if inheritable:
+            self.own_metadata[url] = inheritable
+        else:
+            self.own_metadata.pop(url, None)
+
+        container_children = self.children if location.revision is None else self.draft_children
+        self._remove_parent_pointers(url, container_children.get(url, []))
+        container_children[url] = list(children)
+        # the other version of the container may still point at some of the removed children
+        self._add_parent_pointers(url, self.children.get(url, []) + self.draft_children.get(url, []))
+
+        if location.category == 'course':
+            self.root = url
+        self._merged = {}
+
+    def _add_parent_pointers(self, url, child_urls):
+        """
+        Record that the container at url is a parent of each of child_urls
+        """
+        for child_url in child_urls:
+            parent_urls = self.parents.setdefault(child_url, [])
+            if url not in parent_urls:
+                parent_urls.append(url)
+
+    def _remove_parent_pointers(self, url, child_urls):
+        """
+        Forget that the container at url is a parent of each of child_urls
+        """
+        for child_url in child_urls:
+            parent_urls = self.parents.get(child_url, [])
+            if url in parent_urls:
+                parent_urls.remove(url)
+            if not parent_urls:
+                self.parents.pop(child_url, None)
+
+    def remove_container(self, location):
+        """
+        Forget the version of the container at location (e.g., because it was deleted)
+        """
+        url = location.replace(revision=None).to_deprecated_string()
+        container_children = self.children if location.revision is None else self.draft_children
+        self._remove_parent_pointers(url, container_children.pop(url, []))
+        # the other version of the container, if any, still points at its children
+        self._add_parent_pointers(url, self.children.get(url, []) + self.draft_children.get(url, []))
+        if url not in self.children and url not in self.draft_children:
+            self.own_metadata.pop(url, None)
+        self._merged = {}
+
+    def get_parents(self, url):
+        """
+        Return the urls of the containers which have the block at url as a child
+        """
+        return list(self.parents.get(url, []))
+
+    def parent_map(self):
+        """
+        Return a dict of block url -> a [parent url, position] pair for each of the block's parents, where
+        position is the index of the block among the parent's children (in the published version of the
+        parent, where that has the block as a child). Unlike the tree, it's plain data which doesn't need
+        rebuilding once it's read back from the cache.
+        """
+        parent_map = {}
+        for container_children in (self.children, self.draft_children):
+            for url, child_urls in container_children.iteritems():
+                for position, child_url in enumerate(child_urls):
+                    entries = parent_map.setdefault(child_url, [])
+                    if url not in [parent_url for parent_url, __ in entries]:
+                        entries.append([url, position])
+        return parent_map
+
+    def _merged_metadata(self, url):
+        """
+        The metadata set on the container at url merged over what it inherits, or None if the container
+        isn't connected to the course root
+        """
+        if url in self._merged:
+            return self._merged[url]
+
+        # find the nearest ancestor whose merged metadata we know
+        chain = []
+        merged = None
+        while url is not None and url not in chain:
+            if url in self._merged:
+                merged = self._merged[url]
+                break
+            chain.append(url)
+            if url == self.root:
+                merged = {}
+                break
+            url = self._parent(url)
+
+        if merged is not None:
+            if chain and chain[-1] == self.root:
+                # the root's merged metadata is just its own
+                chain.pop()
+                merged = self.own_metadata.get(self.root, {})
+                self._merged[self.root] = merged
+            for ancestor_url in reversed(chain):
+                merged = dict(merged, **self.own_metadata.get(ancestor_url, {}))
+                self._merged[ancestor_url] = merged
+        return merged
+
+    def _parent(self, url):
+        """
+        The url of the parent which the block at url inherits from, or None if it has none
+        """
+        parent_urls = self.parents.get(url)
+        return parent_urls[0] if parent_urls else None
+
+    def get(self, url, default=None):
+        """
+        Return the metadata which the block at url inherits
+        """
+        parent = self._parent(url)
+        if parent is None:
+            return default
+        inherited = self._merged_metadata(parent)
+        if inherited is None:
+            return default
+        if url in self.own_metadata:
+            inherited = dict(inherited, **self.own_metadata[url])
+        return inherited
+
+
 class CachingDescriptorSystem(MakoDescriptorSystem):
     """
     A system that has a cache of module json that it will use to load modules
@@ -330,14 +520,11 @@ class MongoModuleStore(ModuleStoreWriteBase):
         # get all collections in the course, this query should not return any leaf nodes
         # note this is a bit ugly as when we add new categories of containers, we have to add it here
 
-        block_types_with_children = set(
-            name for name, class_ in XBlock.load_classes() if getattr(class_, 'has_children', False)
-        )
         query = SON([
             ('_id.tag', 'i4x'),
             ('_id.org', course_id.org),
             ('_id.course', course_id.course),
-            ('_id.category', {'$in': list(block_types_with_children)})
+            ('_id.category', {'$in': list(_block_types_with_children())})
         ])
         # we just want the Location, children, and inheritable metadata
         record_filter = {'_id': 1, 'definition.children': 1}
@@ -352,80 +539,123 @@ class MongoModuleStore(ModuleStoreWriteBase):
 
         # it's ok to keep these as urls b/c the overall cache is indexed by course_key and this
         # is a dictionary relative to that course
-        results_by_url = {}
-        root = None
+        tree = MetadataInheritanceTree()
 
-        # now go through the results and order them by the location url
         for result in resultset:
             # manually pick it apart b/c the db has tag and we want revision = None regardless
-            location = Location._from_deprecated_son(result['_id'], course_id.run).replace(revision=None)
-
-            location_url = location.to_deprecated_string()
-            if location_url in results_by_url:
-                # found either draft or live to complement the other revision
-                existing_children = results_by_url[location_url].get('definition', {}).get('children', [])
-                additional_children = result.get('definition', {}).get('children', [])
-                total_children = existing_children + additional_children
-                results_by_url[location_url].setdefault('definition', {})['children'] = total_children
-            results_by_url[location_url] = result
-            if location.category == 'course':
-                root = location_url
-
-        # now traverse the tree and compute down the inherited metadata
-        metadata_to_inherit = {}
-
-        def _compute_inherited_metadata(url):
-            """
-            Helper method for computing inherited metadata for a specific location url
-            """
-            my_metadata = results_by_url[url].get('metadata', {})
-
-            # go through all the children and recurse, but only if we have
-            # in the result set. Remember results will not contain leaf nodes
-            for child in results_by_url[url].get('definition', {}).get('children', []):
-                if child in results_by_url:
-                    new_child_metadata = copy.deepcopy(my_metadata)
-                    new_child_metadata.update(results_by_url[child].get('metadata', {}))
-                    results_by_url[child]['metadata'] = new_child_metadata
-                    metadata_to_inherit[child] = new_child_metadata
-                    _compute_inherited_metadata(child)
-                else:
-                    # this is likely a leaf node, so let's record what metadata we need to inherit
-                    metadata_to_inherit[child] = my_metadata
-
-        if root is not None:
-            _compute_inherited_metadata(root)
+            location = Location._from_deprecated_son(result['_id'], course_id.run)
+            tree.update_container(
+                location,
+                result.get('metadata', {}),
+                result.get('definition', {}).get('children', [])
+            )
 
-        return metadata_to_inherit
+        return tree
 
     def _get_cached_metadata_inheritance_tree(self, course_id, force_refresh=False):
         '''
         TODO (cdodge) This method can be deleted when the 'split module store' work has been completed
         '''
-        tree = {}
-
-        if not force_refresh:
-            # see if we are first in the request cache (if present)
-            if self.request_cache is not None and course_id in self.request_cache.data.get('metadata_inheritance', {}):
-                return self.request_cache.data['metadata_inheritance'][course_id]
-
-            # then look in any caching subsystem (e.g. memcached)
-            if self.metadata_inheritance_cache_subsystem is not None:
-                tree = self.metadata_inheritance_cache_subsystem.get(course_id, {})
-            else:
-                logging.warning('Running MongoModuleStore without a metadata_inheritance_cache_subsystem. This is OK in localdev and testing environment. Not OK in production.')
+        tree = None
+
+        # see if we are first in the request cache (if present)
+        if not force_refresh and self.request_cache is not None and \
+                course_id in self.request_cache.data.get('metadata_inheritance', {}):
+            return self.request_cache.data['metadata_inheritance'][course_id]
+
+        tree_key = None
+        if self.metadata_inheritance_cache_subsystem is not None:
+            # the key is read before any computing, so that a tree computed from data which a
+            # concurrent write changes is cached under the generation that write ends
+            tree_key = self._metadata_inheritance_tree_key(course_id)
+            if not force_refresh:
+                # then look in the caching subsystem (e.g. memcached)
+                tree = MetadataInheritanceTree.from_cacheable(
+                    self.metadata_inheritance_cache_subsystem.get(tree_key, None)
+                )
+        else:
+            logging.warning('Running MongoModuleStore without a metadata_inheritance_cache_subsystem. This is OK in localdev and testing environment. Not OK in production.')
 
-        if not tree:
+        if tree is None:
             # if not in subsystem, or we are on force refresh, then we have to compute
             tree = self._compute_metadata_inheritance_tree(course_id)
 
-            # now write out computed tree to caching subsystem (e.g. memcached), if available
-            if self.metadata_inheritance_cache_subsystem is not None:
-                self.metadata_inheritance_cache_subsystem.set(course_id, tree)
+            # now write out computed tree to caching subsystem (e.g. memcached), if available. Unless
+            # refreshing, it's only added: a tree patched by a write since this one was computed wins
+            if tree_key is not None:
+                if force_refresh:
+                    self.metadata_inheritance_cache_subsystem.set(tree_key, tree.to_cacheable())
+                else:
+                    self.metadata_inheritance_cache_subsystem.add(tree_key, tree.to_cacheable())
+
+        self._set_request_cached_metadata_inheritance_tree(course_id, tree)
+        return tree
+
+    def _metadata_inheritance_tree_key(self, course_id):
+        """
+        Returns the key the metadata inheritance tree of the course is cached under in the
+        metadata_inheritance_cache_subsystem. It includes a generation token which every write to the
+        tree replaces, so trees cached before a write are never read again.
+        """
+        generation_key = self._metadata_inheritance_generation_key(course_id)
+        generation = self.metadata_inheritance_cache_subsystem.get(generation_key)
+        if generation is None:
+            # if another process got there first, use its token
+            self.metadata_inheritance_cache_subsystem.add(generation_key, uuid4().hex)
+            generation = self.metadata_inheritance_cache_subsystem.get(generation_key)
+        return u'{}.metadata_inheritance.{}'.format(course_id, generation)
+
+    @staticmethod
+    def _parent_map_key(tree_key):
+        """
+        Returns the key the parent map of the tree cached under tree_key is cached under, so that it
+        belongs to the same generation as the tree.
+        """
+        return u'{}.parent_map'.format(tree_key)
 
-        # now populate a request_cache, if available. NOTE, we are outside of the
-        # scope of the above if: statement so that after a memcache hit, it'll get
-        # put into the request_cache
+    def _get_cached_parent_map(self, course_id):
+        """
+        Returns the parent map (see MetadataInheritanceTree.parent_map) of the course from the
+        metadata_inheritance_cache_subsystem, deriving it from the shared tree (computing that if
+        it's missing too) and caching it if it isn't there. It's always read from the shared cache,
+        rather than the request's tree, as writes patch it along with the shared tree, so it's
+        current without being confirmed against the db.
+        """
+        cache = self.metadata_inheritance_cache_subsystem
+        tree_key = self._metadata_inheritance_tree_key(course_id)
+        parent_map = cache.get(self._parent_map_key(tree_key))
+        if parent_map is None:
+            tree = MetadataInheritanceTree.from_cacheable(cache.get(tree_key))
+            if tree is None:
+                tree = self._compute_metadata_inheritance_tree(course_id)
+                cache.add(tree_key, tree.to_cacheable())
+            parent_map = tree.parent_map()
+            # only added: a map patched by a write since the tree was read wins
+            cache.add(self._parent_map_key(tree_key), parent_map)
+        return parent_map
+
+    def _uses_cached_parent_map(self, course_id):
+        """
+        Returns whether the parents of the course's blocks are looked up in its cached parent map
+        rather than in the db: not without a shared cache to keep it current for every process, nor
+        while writes to the course aren't being tracked (e.g., during an import).
+        """
+        return (
+            self.metadata_inheritance_cache_subsystem is not None and
+            course_id not in self.ignore_write_events_on_courses
+        )
+
+    @staticmethod
+    def _metadata_inheritance_generation_key(course_id):
+        """
+        Returns the key the generation token of the course's metadata inheritance tree is kept under.
+        """
+        return u'{}.metadata_inheritance_generation'.format(course_id)
+
+    def _set_request_cached_metadata_inheritance_tree(self, course_id, tree):
+        """
+        Put the tree in the request_cache, if available.
+        """
         if self.request_cache is not None:
             # we can't assume the 'metadatat_inheritance' part of the request cache dict has been
             # defined
@@ -433,8 +663,6 @@ class MongoModuleStore(ModuleStoreWriteBase):
                 self.request_cache.data['metadata_inheritance'] = {}
             self.request_cache.data['metadata_inheritance'][course_id] = tree
 
-        return tree
-
     def refresh_cached_metadata_inheritance_tree(self, course_id, runtime=None):
         """
         Refresh the cached metadata inheritance tree for the org/course combination
@@ -444,9 +672,108 @@ class MongoModuleStore(ModuleStoreWriteBase):
         a runtime may mean that some objects report old values for inherited data.
         """
         if course_id not in self.ignore_write_events_on_courses:
+            if self.metadata_inheritance_cache_subsystem is not None:
+                self.metadata_inheritance_cache_subsystem.delete(self._metadata_inheritance_generation_key(course_id))
             cached_metadata = self._get_cached_metadata_inheritance_tree(course_id, force_refresh=True)
             if runtime:
                 runtime.cached_metadata = cached_metadata
+            self._published_content_changed(course_id)
+
+    @staticmethod
+    def _published_version_key(course_id):
+        """
+        Returns the key the published version of the course is kept under in the
+        metadata inheritance cache subsystem.
+        """
+        return u'{}.published_version'.format(course_id)
+
+    def get_course_published_version(self, course_key):
+        """
+        Returns an opaque token which changes whenever the published content of the
+        course changes, or None if there's no metadata_inheritance_cache_subsystem to
+        keep it in. The token lives there (rather than in the db) so that it's shared by
+        every process using the modulestore; if it's evicted, a new one is made.
+        """
+        if self.metadata_inheritance_cache_subsystem is None:
+            return None
+        key = self._published_version_key(course_key)
+        version = self.metadata_inheritance_cache_subsystem.get(key)
+        if version is None:
+            # if another process got there first, use its token
+            self.metadata_inheritance_cache_subsystem.add(key, uuid4().hex)
+            version = self.metadata_inheritance_cache_subsystem.get(key)
+        return version
+
+    def _published_content_changed(self, course_id):
+        """
+        Gives the course a new published version, and tells the course_published_callback.
+        """
+        if course_id in self.ignore_write_events_on_courses:
+            return
+        if self.metadata_inheritance_cache_subsystem is not None:
+            self.metadata_inheritance_cache_subsystem.delete(self._published_version_key(course_id))
+        if self.course_published_callback is not None:
+            self.course_published_callback(course_id)
+
+    def _update_cached_metadata_inheritance_tree(self, location, metadata, children, runtime=None):
+        """
+        Update the metadata inheritance tree for a change to the metadata or children of the container
+        at location. The trees this request and the runtime hold are patched rather than recomputed; see
+        `_change_cached_metadata_inheritance_tree`.
+        """
+        self._change_cached_metadata_inheritance_tree(
+            location.course_key,
+            lambda tree: tree.update_container(location, metadata, children),
+            runtime
+        )
+
+    def _change_cached_metadata_inheritance_tree(self, course_id, change, runtime=None):
+        """
+        Apply `change` (a function of the tree) to the metadata inheritance trees of course_id which
+        this request (and the given runtime) already hold, and to the tree cached for all processes
+        (whose parent map is rederived from the patched tree).
+
+        The shared tree is patched and put back while holding a lock in the cache subsystem, so that
+        concurrent writes can't each patch their own copy and lose the other's change. If the lock is
+        held by another write, or there's no shared tree to patch (one may be being computed from data
+        which predates this write), the tree gets a new generation instead, and is recomputed the next
+        time it's read.
+        """
+        if course_id in self.ignore_write_events_on_courses:
+            return
+        if self.metadata_inheritance_cache_subsystem is not None:
+            self._change_shared_metadata_inheritance_tree(course_id, change)
+
+        trees = []
+        if self.request_cache is not None:
+            trees.append(self.request_cache.data.get('metadata_inheritance', {}).get(course_id))
+        if runtime is not None:
+            trees.append(runtime.cached_metadata)
+        changed = set()
+        for tree in trees:
+            if isinstance(tree, MetadataInheritanceTree) and id(tree) not in changed:
+                change(tree)
+                changed.add(id(tree))
+
+    def _change_shared_metadata_inheritance_tree(self, course_id, change):
+        """
+        Apply `change` to the tree of course_id in the metadata_inheritance_cache_subsystem, or start
+        a new generation of it if it can't be patched safely; see `_change_cached_metadata_inheritance_tree`.
+        """
+        cache = self.metadata_inheritance_cache_subsystem
+        lock_key = u'{}.metadata_inheritance_lock'.format(course_id)
+        if cache.add(lock_key, True, METADATA_INHERITANCE_LOCK_TIMEOUT):
+            try:
+                tree_key = self._metadata_inheritance_tree_key(course_id)
+                tree = MetadataInheritanceTree.from_cacheable(cache.get(tree_key))
+                if tree is not None:
+                    change(tree)
+                    cache.set(tree_key, tree.to_cacheable())
+                    cache.set(self._parent_map_key(tree_key), tree.parent_map())
+                    return
+            finally:
+                cache.delete(lock_key)
+        cache.delete(self._metadata_inheritance_generation_key(course_id))
 
     def _clean_item_data(self, item):
         """
@@ -467,14 +794,25 @@ class MongoModuleStore(ModuleStoreWriteBase):
         }
         return list(self.collection.find(query))
 
+    def _query_course_items(self, course_key):
+        """
+        Return the payloads for all of the items in the course in a single round-trip
+        """
+        query = self._course_key_to_son(course_key)
+        query['_id.revision'] = None
+        return list(self.collection.find(query))
+
     def _cache_children(self, course_key, items, depth=0):
         """
         Returns a dictionary mapping Location -> item data, populated with json data
         for all descendents of items up to the specified depth.
         (0 = no descendents, 1 = children, 2 = grandchildren, etc)
         If depth is None, will load all the children.
-        This will make a number of queries that is linear in the depth.
+        This will make a number of queries that is linear in the depth, except when
+        loading all of a course, which takes one query.
         """
+        if depth is None and any(item['_id']['category'] == 'course' for item in items):
+            return self._cache_children_of_course(course_key, items)
 
         data = {}
         to_process = list(items)
@@ -501,12 +839,40 @@ class MongoModuleStore(ModuleStoreWriteBase):
 
         return data
 
-    def _load_item(self, course_key, item, data_cache, apply_cached_metadata=True):
+    def _cache_children_of_course(self, course_key, items):
+        """
+        Same as _cache_children w/ depth=None, but gets every item in the course in one
+        query and then walks down from items to pick out their descendants.
+        """
+        course_items = {}
+        for item in self._query_course_items(course_key):
+            location = Location._from_deprecated_son(item['_id'], course_key.run).replace(revision=None)
+            course_items[location] = item
+
+        data = {}
+        to_process = list(items)
+        for item in to_process:
+            course_items.pop(Location._from_deprecated_son(item['_id'], course_key.run).replace(revision=None), None)
+        while to_process:
+            children = []
+            for item in to_process:
+                self._clean_item_data(item)
+                children.extend(item.get('definition', {}).get('children', []))
+                data[Location._from_deprecated_son(item['location'], course_key.run)] = item
+
+            # pop so that each item is only processed once
+            to_process = []
+            for child in children:
+                child_item = course_items.pop(course_key.make_usage_key_from_deprecated_string(child), None)
+                if child_item is not None:
+                    to_process.append(child_item)
+
+        return data
+
+    def _get_descriptor_system(self, course_key, data_cache, data_dir, apply_cached_metadata=True):
         """
-        Load an XModuleDescriptor from item, using the children stored in data_cache
+        Create a CachingDescriptorSystem for loading items from data_cache
         """
-        location = Location._from_deprecated_son(item['location'], course_key.run)
-        data_dir = getattr(item, 'data_dir', location.course)
         root = self.fs_root / data_dir
 
         root.makedirs_p()  # create directory if it doesn't exist
@@ -521,7 +887,7 @@ class MongoModuleStore(ModuleStoreWriteBase):
         if self.i18n_service:
             services["i18n"] = self.i18n_service
 
-        system = CachingDescriptorSystem(
+        return CachingDescriptorSystem(
             modulestore=self,
             course_key=course_key,
             module_data=data_cache,
@@ -534,24 +900,30 @@ class MongoModuleStore(ModuleStoreWriteBase):
             select=self.xblock_select,
             services=services,
         )
-        return system.load_item(location)
 
     def _load_items(self, course_key, items, depth=0):
         """
         Load a list of xmodules from the data in items, with children cached up
-        to specified depth
+        to specified depth. The items share descriptor systems (and so resource
+        filesystems) wherever they can.
         """
         data_cache = self._cache_children(course_key, items, depth)
 
-        # if we are loading a course object, if we're not prefetching children (depth != 0) then don't
-        # bother with the metadata inheritance
-        return [
-            self._load_item(
-                course_key, item, data_cache,
-                apply_cached_metadata=(item['location']['category'] != 'course' or depth != 0)
-            )
-            for item in items
-        ]
+        systems = {}
+        modules = []
+        for item in items:
+            location = Location._from_deprecated_son(item['location'], course_key.run)
+            # if we are loading a course object, if we're not prefetching children (depth != 0) then don't
+            # bother with the metadata inheritance
+            apply_cached_metadata = location.category != 'course' or depth != 0
+            data_dir = location.course
+            system_key = (data_dir, apply_cached_metadata)
+            if system_key not in systems:
+                systems[system_key] = self._get_descriptor_system(
+                    course_key, data_cache, data_dir, apply_cached_metadata
+                )
+            modules.append(systems[system_key].load_item(location))
+        return modules
 
     def get_courses(self):
         '''
@@ -771,6 +1143,7 @@ class MongoModuleStore(ModuleStoreWriteBase):
         """
         course_query = self._course_key_to_son(course_key)
         self.collection.remove(course_query, multi=True)
+        self._published_content_changed(course_key)
 
     def create_xmodule(self, location, definition_data=None, metadata=None, system=None, fields={}):
         """
@@ -916,8 +1289,15 @@ class MongoModuleStore(ModuleStoreWriteBase):
                     static_tab['name'] = xblock.display_name
                     self.update_item(course, user_id)
 
-            # recompute (and update) the metadata inheritance tree which is cached
-            self.refresh_cached_metadata_inheritance_tree(xblock.scope_ids.usage_id.course_key, xblock.runtime)
+            # update the metadata inheritance tree which is cached. Only containers' metadata and
+            # children are in it; so, saving a leaf doesn't change it.
+            if xblock.has_children:
+                self._update_cached_metadata_inheritance_tree(
+                    xblock.scope_ids.usage_id, payload['metadata'], payload['definition.children'], xblock.runtime
+                )
+            # drafts aren't published content
+            if xblock.scope_ids.usage_id.revision is None:
+                self._published_content_changed(xblock.scope_ids.usage_id.course_key)
             # fire signal that we've written to DB
         except ItemNotFoundError:
             if not allow_not_found:
@@ -966,13 +1346,31 @@ class MongoModuleStore(ModuleStoreWriteBase):
         # Must include this to avoid the django debug toolbar (which defines the deprecated "safe=False")
         # from overriding our default value set in the init method.
         self.collection.remove({'_id': location.to_deprecated_son()}, safe=self.collection.safe)
-        # recompute (and update) the metadata inheritance tree which is cached
-        self.refresh_cached_metadata_inheritance_tree(location.course_key)
+        # the metadata inheritance tree which is cached only needs updating for containers: their
+        # children no longer have them as a parent
+        if location.category in _block_types_with_children():
+            self._change_cached_metadata_inheritance_tree(
+                location.course_key,
+                lambda tree: tree.remove_container(location)
+            )
+        if location.revision is None:
+            self._published_content_changed(location.course_key)
 
     def get_parent_locations(self, location):
         '''Find all locations that are the parents of this location in this
         course.  Needed for path_to_location().
+
+        The parents are looked up in the course's cached parent map, rather than by searching the
+        whole course for them, unless it can't be kept current (see `_uses_cached_parent_map`).
         '''
+        course_key = location.course_key
+        if self._uses_cached_parent_map(course_key):
+            parent_map = self._get_cached_parent_map(course_key)
+            return [
+                course_key.make_usage_key_from_deprecated_string(parent_url)
+                for parent_url, __ in parent_map.get(location.replace(revision=None).to_deprecated_string(), [])
+            ]
+
         query = self._course_key_to_son(location.course_key)
         query['definition.children'] = location.to_deprecated_string()
         items = self.collection.find(query, {'_id': True})
@@ -981,6 +1379,21 @@ class MongoModuleStore(ModuleStoreWriteBase):
             for i in items
         ]
 
+    def get_child_position(self, parent_location, child_location):
+        """
+        See ModuleStoreReadBase.get_child_position. The position is looked up in the course's cached
+        parent map, if it's used; it's the position in the published version of the parent, where
+        that has the child.
+        """
+        course_key = parent_location.course_key
+        if self._uses_cached_parent_map(course_key):
+            parent_url = parent_location.replace(revision=None).to_deprecated_string()
+            child_url = child_location.replace(revision=None).to_deprecated_string()
+            for url, position in self._get_cached_parent_map(course_key).get(child_url, []):
+                if url == parent_url:
+                    return position
+        return super(MongoModuleStore, self).get_child_position(parent_location, child_location)
+
     def get_modulestore_type(self, course_id):
         """
         Returns an enumeration-like type reflecting the type of this modulestore
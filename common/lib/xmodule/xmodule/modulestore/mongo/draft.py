@@ -153,7 +153,8 @@ class DraftModuleStore(MongoModuleStore):
         except pymongo.errors.DuplicateKeyError:
             raise DuplicateItemError(original['_id'])
 
-        self.refresh_cached_metadata_inheritance_tree(draft_location.course_key)
+        # the draft is a copy of the published version; so, the metadata inheritance tree (which doesn't
+        # differentiate between draft and non-draft) doesn't change
 
         return wrap_draft(self._load_items(source_location.course_key, [original])[0])
 
@@ -231,6 +232,26 @@ class DraftModuleStore(MongoModuleStore):
         self.convert_to_draft(location)
         super(DraftModuleStore, self).delete_item(location)
 
+    def _query_course_items(self, course_key):
+        # get both draft and non-draft in a single round-trip
+        items = self.collection.find(self._course_key_to_son(course_key))
+
+        non_drafts = {}
+        drafts = []
+        for item in items:
+            if item['_id'].get('revision') == DRAFT:
+                drafts.append(item)
+            else:
+                non_drafts[Location._from_deprecated_son(item['_id'], course_key.run)] = item
+
+        # as w/ _query_children_for_cache_children, the draft replaces the non-draft if it exists
+        for draft in drafts:
+            draft_as_non_draft_loc = Location._from_deprecated_son(draft['_id'], course_key.run).replace(revision=None)
+            if draft_as_non_draft_loc in non_drafts:
+                non_drafts[draft_as_non_draft_loc] = draft
+
+        return non_drafts.values()
+
     def _query_children_for_cache_children(self, course_key, items):
         # first get non-draft in a round-trip
         to_process_non_drafts = super(DraftModuleStore, self)._query_children_for_cache_children(course_key, items)
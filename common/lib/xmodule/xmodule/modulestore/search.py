@@ -98,11 +98,9 @@ def path_to_location(modulestore, usage_key):
         for path_index in range(2, n - 1):
             category = path[path_index].definition_key.block_type
             if category == 'sequential' or category == 'videosequence':
-                section_desc = modulestore.get_item(path[path_index])
-                child_locs = [c.location for c in section_desc.get_children()]
                 # positions are 1-indexed, and should be strings to be consistent with
                 # url parsing.
-                position_list.append(str(child_locs.index(path[path_index + 1]) + 1))
+                position_list.append(str(modulestore.get_child_position(path[path_index], path[path_index + 1]) + 1))
         position = "_".join(position_list)
 
     return (course_id, chapter, section, position)
@@ -2,18 +2,162 @@
 Segregation of pymongo functions from the data modeling mechanisms for split modulestore.
 """
 import re
+import threading
+import time
+import zlib
+from collections import OrderedDict
+from uuid import uuid4
+
 import pymongo
-from bson import son
+from bson import son, BSON
+
+# the number of structures each process keeps in memory
+STRUCTURE_CACHE_SIZE = 64
+# the number of seconds a structure kept in memory is served before its edit token is checked again
+STRUCTURE_TOKEN_TTL = 5
+
+
+class StructureCache(object):
+    """
+    A cache of structure documents by their version guid. Structures never change once created, except
+    through the few low level methods which rewrite the head structure of a course in place.
+
+    Entries are kept as compressed BSON in a size-bounded, in-process LRU and, if given, in a shared
+    (django style) cache so that other threads and processes don't have to refetch them from mongo. Each
+    get decodes a fresh copy of the document, so callers may modify what they get back.
+
+    To keep other processes from serving a structure that was rewritten in place from their own LRU, the
+    shared cache also holds an edit token per structure, which `rewritten` replaces. Entries are tagged
+    with the token current when they were read from mongo, and are only served while it still matches
+    (if the token was evicted, the structure is refetched). So that the in-process LRU spares the round
+    trip to the shared cache, its entries are served for `token_ttl` seconds after their token was last
+    checked; a structure rewritten by another process may be served that much longer. Without a shared
+    cache, entries are only valid for the process which rewrites the structures.
+    """
+    def __init__(self, shared_cache=None, max_size=STRUCTURE_CACHE_SIZE, tz_aware=True,
+                 token_ttl=STRUCTURE_TOKEN_TTL):
+        """
+        :param shared_cache: an object w/ the django cache get/set/add api or None to only cache in process
+        :param max_size: the number of structures to keep in process
+        :param token_ttl: the seconds an in process entry is served before its edit token is checked again
+        """
+        self.shared_cache = shared_cache
+        self.max_size = max_size
+        self.token_ttl = token_ttl
+        self.tz_aware = tz_aware
+        self._local = OrderedDict()
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _shared_key(version_guid):
+        """
+        The key for the structure in the shared cache
+        """
+        return 'split_structure.{}'.format(version_guid)
+
+    @staticmethod
+    def _edit_token_key(version_guid):
+        """
+        The key for the edit token of the structure in the shared cache
+        """
+        return 'split_structure_edit.{}'.format(version_guid)
+
+    def edit_token(self, version_guid):
+        """
+        Get the current edit token of the structure, making one if there is none, or None if it can't be
+        kept. Read it before reading the structure from mongo, so that a rewrite in between makes the
+        cached copy invalid rather than tagging a stale copy w/ the new token.
+        """
+        if self.shared_cache is None:
+            return None
+        key = self._edit_token_key(version_guid)
+        token = self.shared_cache.get(key)
+        if token is None:
+            # if another process got there first, use its token
+            self.shared_cache.add(key, uuid4().hex)
+            token = self.shared_cache.get(key)
+        return token
+
+    def get(self, version_guid):
+        """
+        Get the structure whose id is version_guid or None if it's not cached (or may be stale)
+        """
+        now = time.time()
+        with self._lock:
+            entry = self._local.get(version_guid)
+            if entry is not None:
+                # re-insert to mark as most recently used
+                del self._local[version_guid]
+                self._local[version_guid] = entry
+        if entry is not None and (self.shared_cache is None or now - entry[2] < self.token_ttl):
+            return self._decode(entry[1])
+        if self.shared_cache is None:
+            return None
+
+        token = self.shared_cache.get(self._edit_token_key(version_guid))
+        if token is None:
+            return None
+        if entry is None or entry[0] != token:
+            entry = self.shared_cache.get(self._shared_key(version_guid))
+            if entry is None or entry[0] != token:
+                return None
+        self._set_local(version_guid, (token, entry[1], now))
+        return self._decode(entry[1])
+
+    def _decode(self, data):
+        """
+        Decode a fresh copy of the serialized structure
+        """
+        return BSON(zlib.decompress(data)).decode(as_class=son.SON, tz_aware=self.tz_aware)
+
+    def set(self, structure, edit_token=None):
+        """
+        Cache the structure (replacing any existing entry w/ the same id) as of the given `edit_token`.
+        W/ a shared cache, structures without a token aren't cached.
+        """
+        if self.shared_cache is not None and edit_token is None:
+            return
+        data = zlib.compress(BSON.encode(structure))
+        self._set_local(structure['_id'], (edit_token, data, time.time()))
+        if self.shared_cache is not None:
+            self.shared_cache.set(self._shared_key(structure['_id']), (edit_token, data))
+
+    def rewritten(self, structure):
+        """
+        Record that the structure was rewritten in place (after the db write), invalidating every cached
+        copy of its old content, and cache the new content.
+        """
+        edit_token = None
+        if self.shared_cache is not None:
+            edit_token = uuid4().hex
+            self.shared_cache.set(self._edit_token_key(structure['_id']), edit_token)
+        self.set(structure, edit_token)
+
+    def _set_local(self, version_guid, entry):
+        """
+        Put the (edit token, serialized structure, time the token was checked) entry into the in process
+        cache evicting the least recently used entries
+        """
+        with self._lock:
+            self._local.pop(version_guid, None)
+            self._local[version_guid] = entry
+            while len(self._local) > self.max_size:
+                self._local.popitem(last=False)
+
 
 class MongoConnection(object):
     """
     Segregation of pymongo functions from the data modeling mechanisms for split modulestore.
     """
     def __init__(
-        self, db, collection, host, port=27017, tz_aware=True, user=None, password=None, **kwargs
+        self, db, collection, host, port=27017, tz_aware=True, user=None, password=None,
+        structure_cache=None, **kwargs
     ):
         """
         Create & open the connection, authenticate, and provide pointers to the collections
+
+        :param structure_cache: a shared (django style) cache in which to keep structures so that other
+        processes don't have to refetch them
         """
         self.database = pymongo.database.Database(
             pymongo.MongoClient(
@@ -41,11 +185,19 @@ class MongoConnection(object):
         self.structures.write_concern = {'w': 1}
         self.definitions.write_concern = {'w': 1}
 
+        self.structure_cache = StructureCache(structure_cache, tz_aware=tz_aware)
+
     def get_structure(self, key):
         """
         Get the structure from the persistence mechanism whose id is the given key
         """
-        return self.structures.find_one({'_id': key})
+        structure = self.structure_cache.get(key)
+        if structure is None:
+            edit_token = self.structure_cache.edit_token(key)
+            structure = self.structures.find_one({'_id': key})
+            if structure is not None:
+                self.structure_cache.set(structure, edit_token)
+        return structure
 
     def find_matching_structures(self, query):
         """
@@ -59,12 +211,14 @@ class MongoConnection(object):
         Create the structure in the db
         """
         self.structures.insert(structure)
+        self.structure_cache.set(structure, self.structure_cache.edit_token(structure['_id']))
 
     def update_structure(self, structure):
         """
         Update the db record for structure
         """
         self.structures.update({'_id': structure['_id']}, structure)
+        self.structure_cache.rewritten(structure)
 
     def get_course_index(self, key, ignore_case=False):
         """
@@ -107,15 +107,17 @@ class SplitMongoModuleStore(ModuleStoreWriteBase):
                  error_tracker=null_error_tracker,
                  loc_mapper=None,
                  i18n_service=None,
+                 course_structure_cache=None,
                  **kwargs):
         """
         :param doc_store_config: must have a host, db, and collection entries. Other common entries: port, tz_aware.
+        :param course_structure_cache: a django style cache shared by all processes for course structures
         """
 
         super(SplitMongoModuleStore, self).__init__(**kwargs)
         self.loc_mapper = loc_mapper
 
-        self.db_connection = MongoConnection(**doc_store_config)
+        self.db_connection = MongoConnection(structure_cache=course_structure_cache, **doc_store_config)
         self.db = self.db_connection.database
 
         # Code review question: How should I expire entries?
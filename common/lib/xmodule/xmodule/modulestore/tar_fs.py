@@ -0,0 +1,162 @@
+"""
+A write-only filesystem which writes its files straight into a tar archive, so
+that a course can be exported into an archive without first being written out
+to a directory on disk.
+"""
+import posixpath
+import tarfile
+import time
+from tempfile import SpooledTemporaryFile
+
+from fs.errors import DestinationExistsError, ResourceInvalidError, ResourceNotFoundError, UnsupportedError
+
+# the most bytes of a file being written which are kept in memory before it spills to disk
+SPOOL_SIZE = 1024 * 1024
+
+
+class TarFS(object):
+    """
+    The part of the pyfilesystem API which exporting a course uses (`open` for
+    writing, `makedir`, `makeopendir`, `opendir` and the existence checks),
+    writing each file into the open, writable `tar_file` as a member once it's
+    closed. Directories are added as members when they're made. Files can't
+    be read back, and files written twice are added twice (extracting the
+    archive keeps the last).
+    """
+    def __init__(self, tar_file, root=u'', _dirs=None, _files=None):
+        """
+        :param tar_file: a TarFile opened for writing
+        :param root: the directory, within the archive, that this filesystem is rooted at
+        """
+        self.tar_file = tar_file
+        self.root = root
+        # the paths, within the archive, of the directories and files written so far
+        self._dirs = _dirs if _dirs is not None else set([u''])
+        self._files = _files if _files is not None else set()
+
+    def _member_name(self, path):
+        """
+        Returns the name within the archive of `path`, relative to this filesystem's root.
+        """
+        name = posixpath.normpath(posixpath.join(self.root, path.lstrip('/')))
+        return u'' if name == '.' else name
+
+    def isdir(self, path):
+        return self._member_name(path) in self._dirs
+
+    def isfile(self, path):
+        return self._member_name(path) in self._files
+
+    def exists(self, path):
+        return self.isdir(path) or self.isfile(path)
+
+    def makedir(self, path, recursive=False, allow_recreate=False):
+        """
+        Adds the directory to the archive. Unlike on disk, missing parent
+        directories are added whether or not `recursive` is set.
+        """
+        name = self._member_name(path)
+        if name in self._dirs:
+            if not allow_recreate:
+                raise DestinationExistsError(path)
+            return
+        if name in self._files:
+            raise ResourceInvalidError(path, msg="Can't make a directory where there is a file: %(path)s")
+        self._add_dir(name)
+
+    def _add_dir(self, name):
+        """
+        Adds the directory `name`, and any of its parents that are missing, to the archive.
+        """
+        if name in self._dirs:
+            return
+        self._add_dir(posixpath.dirname(name))
+        info = tarfile.TarInfo(name)
+        info.type = tarfile.DIRTYPE
+        info.mode = 0755
+        info.mtime = time.time()
+        self.tar_file.addfile(info)
+        self._dirs.add(name)
+
+    def opendir(self, path):
+        """
+        Returns a filesystem rooted at the directory `path`.
+        """
+        name = self._member_name(path)
+        if name not in self._dirs:
+            raise ResourceNotFoundError(path)
+        return TarFS(self.tar_file, name, self._dirs, self._files)
+
+    def makeopendir(self, path, recursive=False):
+        """
+        Makes the directory `path`, if it doesn't exist, and returns a filesystem rooted at it.
+        """
+        self.makedir(path, recursive=recursive, allow_recreate=True)
+        return self.opendir(path)
+
+    def open(self, path, mode='r', **kwargs):  # pylint: disable=unused-argument
+        """
+        Returns a file to write `path` to, which is added to the archive when it's closed.
+        """
+        if 'r' in mode or 'a' in mode or '+' in mode:
+            raise UnsupportedError('read from or append to a file in a tar archive')
+        name = self._member_name(path)
+        if name in self._dirs:
+            raise ResourceInvalidError(path, msg="Can't write to a directory: %(path)s")
+        self._add_dir(posixpath.dirname(name))
+        return _TarMemberFile(self, name)
+
+    def _add_file(self, name, data):
+        """
+        Adds the contents of the file `data`, positioned at its end, to the archive as `name`.
+        """
+        info = tarfile.TarInfo(name)
+        info.size = data.tell()
+        info.mode = 0644
+        info.mtime = time.time()
+        data.seek(0)
+        self.tar_file.addfile(info, data)
+        self._files.add(name)
+
+
+class _TarMemberFile(object):
+    """
+    A file being written to a TarFS: its contents are spooled (in memory, or on
+    disk once they're large) until it's closed, as a member's size has to be
+    known before it's added.
+    """
+    def __init__(self, tar_fs, name):
+        self._tar_fs = tar_fs
+        self._name = name
+        self._data = SpooledTemporaryFile(SPOOL_SIZE)
+        self.closed = False
+
+    def write(self, data):
+        if isinstance(data, unicode):
+            data = data.encode('utf-8')
+        self._data.write(data)
+
+    def writelines(self, lines):
+        for line in lines:
+            self.write(line)
+
+    def flush(self):
+        pass
+
+    def close(self):
+        """
+        Adds the file to the archive.
+        """
+        if self.closed:
+            return
+        self.closed = True
+        try:
+            self._tar_fs._add_file(self._name, self._data)  # pylint: disable=protected-access
+        finally:
+            self._data.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
@@ -12,6 +12,7 @@ from uuid import uuid4
 import unittest
 import bson.son
 from xblock.core import XBlock
+from mock import patch, Mock
 
 from xblock.fields import Scope, Reference, ReferenceList, ReferenceValueDict
 from xblock.runtime import KeyValueStore
@@ -21,6 +22,7 @@ from xblock.plugin import Plugin
 from xmodule.tests import DATA_DIR
 from xmodule.modulestore import Location, MONGO_MODULESTORE_TYPE
 from xmodule.modulestore.mongo import MongoModuleStore, MongoKeyValueStore
+from xmodule.modulestore.mongo.base import MetadataInheritanceTree
 from xmodule.modulestore.draft import DraftModuleStore
 from xmodule.modulestore.locations import SlashSeparatedCourseKey, AssetLocation
 from xmodule.modulestore.xml_exporter import export_to_xml
@@ -171,6 +173,101 @@ class TestMongoModuleStore(unittest.TestCase):
             self.store.get_item(Location('edX', 'toy', '2012_Fall', 'video', 'Welcome')),
         )
 
+    def test_get_course_all_descendants(self):
+        """
+        Loading a whole course gets its descendants in one query and matches loading them level by level
+        """
+        course_key = SlashSeparatedCourseKey('edX', 'toy', '2012_Fall')
+        course_location = course_key.make_usage_key('course', '2012_Fall')
+        item = self.store.collection.find_one({'_id': course_location.to_deprecated_son()})
+        with patch.object(self.store, '_query_children_for_cache_children') as mock_query:
+            course_data = self.store._cache_children(course_key, [item], depth=None)  # pylint: disable=protected-access
+        assert_false(mock_query.called)
+
+        item = self.store.collection.find_one({'_id': course_location.to_deprecated_son()})
+        # pylint: disable=protected-access
+        level_data = self.store._cache_children(course_key, [item], depth=100)
+        assert_equals(set(level_data.keys()), set(course_data.keys()))
+
+        course = self.store.get_course(course_key, depth=None)
+        assert_true(all(child.runtime is course.runtime for child in course.get_children()))
+
+    def _inheritance_cache_store(self):
+        """
+        Returns a store w/ a stand-in for a shared django cache as its metadata_inheritance_cache_subsystem
+        """
+        class DictCache(dict):
+            """
+            A minimal stand-in for a shared django cache
+            """
+            def set(self, key, value, timeout=None):  # pylint: disable=unused-argument
+                self[key] = value
+
+            def add(self, key, value, timeout=None):  # pylint: disable=unused-argument
+                if key in self:
+                    return False
+                self[key] = value
+                return True
+
+            def delete(self, key):
+                self.pop(key, None)
+
+        return MongoModuleStore(
+            {'host': HOST, 'db': DB, 'collection': COLLECTION},
+            FS_ROOT, RENDER_TEMPLATE, default_class=DEFAULT_CLASS,
+            metadata_inheritance_cache_subsystem=DictCache(),
+        )
+
+    def test_inheritance_tree_patched(self):
+        """
+        A change to the tree patches the copy in the shared cache
+        """
+        store = self._inheritance_cache_store()
+        cache = store.metadata_inheritance_cache_subsystem
+        course_key = SlashSeparatedCourseKey('edX', 'toy', '2012_Fall')
+        chapter = course_key.make_usage_key('chapter', 'Overview')
+        # pylint: disable=protected-access
+        tree_key = store._metadata_inheritance_tree_key(course_key)
+        store._get_cached_metadata_inheritance_tree(course_key)
+        assert_in(tree_key, cache)
+
+        store._change_cached_metadata_inheritance_tree(
+            course_key, lambda tree: tree.update_container(chapter, {}, [])
+        )
+        assert_equals(store._metadata_inheritance_tree_key(course_key), tree_key)
+        assert_equals(cache[tree_key]['children'][chapter.to_deprecated_string()], [])
+        assert_false(any(key.endswith('metadata_inheritance_lock') for key in cache))
+
+    def test_inheritance_tree_generation(self):
+        """
+        A change to the tree starts a new generation of it in the shared cache, rather than patching the
+        shared copy, if another change holds the lock on it or there's no shared copy
+        """
+        store = self._inheritance_cache_store()
+        cache = store.metadata_inheritance_cache_subsystem
+        course_key = SlashSeparatedCourseKey('edX', 'toy', '2012_Fall')
+        chapter_url = course_key.make_usage_key('chapter', 'Overview').to_deprecated_string()
+        # pylint: disable=protected-access
+        tree_key = store._metadata_inheritance_tree_key(course_key)
+        store._get_cached_metadata_inheritance_tree(course_key)
+
+        lock_key = u'{}.metadata_inheritance_lock'.format(course_key)
+        cache.add(lock_key, True)
+        store._change_cached_metadata_inheritance_tree(course_key, lambda tree: None)
+        new_tree_key = store._metadata_inheritance_tree_key(course_key)
+        assert_not_equals(tree_key, new_tree_key)
+        assert_false(new_tree_key in cache)
+        assert_in(lock_key, cache)
+        cache.delete(lock_key)
+
+        # there's no tree in the new generation to patch
+        store._change_cached_metadata_inheritance_tree(course_key, lambda tree: None)
+        assert_not_equals(store._metadata_inheritance_tree_key(course_key), new_tree_key)
+        assert_equals(
+            store._get_cached_metadata_inheritance_tree(course_key).get_parents(chapter_url),
+            [course_key.make_usage_key('course', '2012_Fall').to_deprecated_string()]
+        )
+
     def test_unicode_loads(self):
         """
         Test that getting items from the test_unicode course works
@@ -207,6 +304,66 @@ class TestMongoModuleStore(unittest.TestCase):
         '''Make sure that path_to_location works'''
         check_path_to_location(self.store)
 
+    def test_get_parent_locations(self):
+        '''Make sure that the parents come from the cached parent map, and match the db'''
+        course_key = SlashSeparatedCourseKey('edX', 'toy', '2012_Fall')
+        location = course_key.make_usage_key('video', 'Welcome')
+        expected = [course_key.make_usage_key('chapter', 'Overview')]
+        # without a shared cache for the parent map, the db is queried
+        assert_equals(self.store.get_parent_locations(location), expected)
+
+        store = self._inheritance_cache_store()
+        course = course_key.make_usage_key('course', '2012_Fall')
+        # populate the cached parent map
+        assert_equals(store.get_parent_locations(location), expected)
+        with patch.object(store, 'collection', wraps=store.collection) as mock_collection:
+            assert_equals(store.get_parent_locations(location), expected)
+            assert_equals(store.get_parent_locations(expected[0]), [course])
+            assert_equals(store.get_parent_locations(course), [])
+            assert_false(mock_collection.find.called)
+
+            # while writes aren't tracked, the db is queried
+            store.ignore_write_events_on_courses.add(course_key)
+            try:
+                assert_equals(store.get_parent_locations(location), expected)
+            finally:
+                store.ignore_write_events_on_courses.remove(course_key)
+            assert_true(mock_collection.find.called)
+
+    def test_parent_map_patched(self):
+        '''
+        A change to the tree patches the parent map in the shared cache, so the parents of another
+        process's request are current without querying the db
+        '''
+        store = self._inheritance_cache_store()
+        course_key = SlashSeparatedCourseKey('edX', 'toy', '2012_Fall')
+        location = course_key.make_usage_key('video', 'Welcome')
+        overview = course_key.make_usage_key('chapter', 'Overview')
+        poll_test = course_key.make_usage_key('chapter', 'poll_test')
+        assert_equals(store.get_parent_locations(location), [overview])
+
+        # pylint: disable=protected-access
+        poll_test_children = ['i4x://edX/toy/html/x', location.to_deprecated_string()]
+        store._change_cached_metadata_inheritance_tree(
+            course_key, lambda tree: tree.update_container(poll_test, {}, poll_test_children)
+        )
+        with patch.object(store, 'collection', wraps=store.collection) as mock_collection:
+            assert_equals(store.get_parent_locations(location), [overview, poll_test])
+            assert_equals(store.get_child_position(poll_test, location), 1)
+            assert_false(mock_collection.find.called)
+
+    def test_get_child_position(self):
+        '''The positions from the cached parent map match the children of the parent'''
+        store = self._inheritance_cache_store()
+        course_key = SlashSeparatedCourseKey('edX', 'toy', '2012_Fall')
+        chapter = course_key.make_usage_key('chapter', 'Overview')
+        children = self.store.get_item(chapter).children
+        for position, child in enumerate(children):
+            assert_equals(self.store.get_child_position(chapter, child), position)
+            assert_equals(store.get_child_position(chapter, child), position)
+        with assert_raises(ValueError):
+            store.get_child_position(course_key.make_usage_key('chapter', 'poll_test'), children[0])
+
     def test_xlinter(self):
         '''
         Run through the xlinter, we know the 'toy' course has violations, but the
@@ -513,3 +670,101 @@ class TestMongoKeyValueStore(object):
         for scope in (Scope.preferences, Scope.user_info, Scope.user_state, Scope.parent):
             with assert_raises(InvalidScopeError):
                 self.kvs.delete(KeyValueStore.Key(scope, None, None, 'foo'))
+
+
+class TestMetadataInheritanceTree(object):
+    """
+    Tests for MetadataInheritanceTree.
+    """
+
+    def setUp(self):
+        self.course_id = SlashSeparatedCourseKey('org', 'course', 'run')
+        self.course = self.course_id.make_usage_key('course', 'run')
+        self.chapter = self.course_id.make_usage_key('chapter', 'ch')
+        self.sequential = self.course_id.make_usage_key('sequential', 'seq')
+        self.problem = self.course_id.make_usage_key('problem', 'prob')
+        self.tree = MetadataInheritanceTree()
+        self.tree.update_container(
+            self.course, {'graceperiod': '1 day', 'display_name': 'Course'}, [self.chapter.to_deprecated_string()]
+        )
+        self.tree.update_container(self.chapter, {'due': '2014-01-01'}, [self.sequential.to_deprecated_string()])
+        self.tree.update_container(self.sequential, {'graded': True}, [self.problem.to_deprecated_string()])
+
+    def test_inherited(self):
+        assert_equals(
+            {'graceperiod': '1 day', 'due': '2014-01-01', 'graded': True},
+            self.tree.get(self.problem.to_deprecated_string(), {})
+        )
+        # the course inherits nothing; only inheritable fields are kept
+        assert_equals({}, self.tree.get(self.course.to_deprecated_string(), {}))
+        # as in the deep copy form, containers get their own inheritable metadata merged in
+        assert_equals(
+            {'graceperiod': '1 day', 'due': '2014-01-01'},
+            self.tree.get(self.chapter.to_deprecated_string(), {})
+        )
+
+    def test_update(self):
+        self.tree.get(self.problem.to_deprecated_string())
+        self.tree.update_container(self.chapter, {}, [self.sequential.to_deprecated_string()])
+        assert_equals(
+            {'graceperiod': '1 day', 'graded': True},
+            self.tree.get(self.problem.to_deprecated_string(), {})
+        )
+
+    def test_disconnected(self):
+        orphan = self.course_id.make_usage_key('vertical', 'orphan')
+        self.tree.update_container(orphan, {'graded': True}, ['i4x://org/course/html/h1'])
+        assert_equals({}, self.tree.get('i4x://org/course/html/h1', {}))
+
+    def test_parents(self):
+        problem_url = self.problem.to_deprecated_string()
+        assert_equals([self.sequential.to_deprecated_string()], self.tree.get_parents(problem_url))
+
+        # removing a child removes its parent pointer
+        self.tree.update_container(self.sequential, {'graded': True}, [])
+        assert_equals([], self.tree.get_parents(problem_url))
+
+    def test_draft_children(self):
+        problem_url = self.problem.to_deprecated_string()
+        sequential_url = self.sequential.to_deprecated_string()
+        html_url = 'i4x://org/course/html/h1'
+        draft_sequential = self.sequential.replace(revision='draft')
+        self.tree.update_container(draft_sequential, {}, [html_url])
+
+        # both versions' children have the container as a parent, but the published children come first
+        assert_equals([sequential_url], self.tree.get_parents(problem_url))
+        assert_equals([sequential_url], self.tree.get_parents(html_url))
+
+        self.tree.remove_container(draft_sequential)
+        assert_equals([], self.tree.get_parents(html_url))
+        assert_equals([sequential_url], self.tree.get_parents(problem_url))
+
+        self.tree.remove_container(self.sequential)
+        assert_equals([], self.tree.get_parents(problem_url))
+        assert_equals({}, self.tree.get(problem_url, {}))
+
+    def test_parent_map(self):
+        problem_url = self.problem.to_deprecated_string()
+        sequential_url = self.sequential.to_deprecated_string()
+        html_url = 'i4x://org/course/html/h1'
+        self.tree.update_container(self.sequential.replace(revision='draft'), {}, [html_url, problem_url])
+
+        parent_map = self.tree.parent_map()
+        assert_equals([[self.chapter.to_deprecated_string(), 0]], parent_map[sequential_url])
+        # the position is the one in the published version of the parent, where it has the block
+        assert_equals([[sequential_url, 0]], parent_map[problem_url])
+        assert_equals([[sequential_url, 0]], parent_map[html_url])
+        assert_false(self.course.to_deprecated_string() in parent_map)
+
+    def test_cacheable(self):
+        tree = MetadataInheritanceTree.from_cacheable(self.tree.to_cacheable())
+        assert_equals(
+            self.tree.get(self.problem.to_deprecated_string()),
+            tree.get(self.problem.to_deprecated_string())
+        )
+        assert_equals(
+            self.tree.get_parents(self.problem.to_deprecated_string()),
+            tree.get_parents(self.problem.to_deprecated_string())
+        )
+        # trees cached in the old format are ignored
+        assert_equals(None, MetadataInheritanceTree.from_cacheable({'i4x://org/course/html/h1': {}}))
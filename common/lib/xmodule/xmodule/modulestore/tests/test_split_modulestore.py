@@ -8,6 +8,8 @@ from importlib import import_module
 from path import path
 import re
 import random
+import time
+from mock import patch
 
 from xblock.fields import Scope
 from xmodule.course_module import CourseDescriptor
@@ -18,6 +20,7 @@ from xmodule.modulestore.inheritance import InheritanceMixin
 from xmodule.x_module import XModuleMixin
 from xmodule.fields import Date, Timedelta
 from xmodule.modulestore.split_mongo.split import SplitMongoModuleStore
+from xmodule.modulestore.split_mongo.mongo_connection import StructureCache
 from xmodule.modulestore.tests.test_modulestore import check_has_course_method
 
 
@@ -1653,6 +1656,89 @@ class TestSchema(SplitModuleTest):
                 "{0.name} has records with wrong schema_version".format(collection)
             )
 
+
+class TestStructureCache(unittest.TestCase):
+    """
+    Test the cache of structure documents
+    """
+    class DictCache(dict):
+        """
+        A minimal stand-in for a shared django cache
+        """
+        def set(self, key, value):
+            self[key] = value
+
+        def add(self, key, value):
+            self.setdefault(key, value)
+
+    def _structure(self, structure_id):
+        return {
+            '_id': structure_id,
+            'root': 'head12345',
+            'blocks': {'head12345': {'category': 'course', 'fields': {'children': []}}},
+        }
+
+    def test_get_returns_copies(self):
+        cache = StructureCache()
+        cache.set(self._structure('a'))
+        fetched = cache.get('a')
+        self.assertEqual(fetched['root'], 'head12345')
+        fetched['blocks']['head12345']['fields']['children'].append('chapter1')
+        self.assertEqual(cache.get('a')['blocks']['head12345']['fields']['children'], [])
+        self.assertIsNone(cache.get('b'))
+
+    def test_lru_eviction(self):
+        cache = StructureCache(max_size=2)
+        cache.set(self._structure('a'))
+        cache.set(self._structure('b'))
+        cache.get('a')
+        cache.set(self._structure('c'))
+        self.assertIsNotNone(cache.get('a'))
+        self.assertIsNone(cache.get('b'))
+        self.assertIsNotNone(cache.get('c'))
+
+    def test_shared_cache(self):
+        shared = self.DictCache()
+        cache = StructureCache(shared)
+        cache.set(self._structure('a'), cache.edit_token('a'))
+        # another process w/ an empty local cache finds it in the shared one
+        self.assertEqual(StructureCache(shared).get('a')['_id'], 'a')
+
+    def test_rewritten_in_other_process(self):
+        shared = self.DictCache()
+        reader = StructureCache(shared, token_ttl=0)
+        reader.set(self._structure('a'), reader.edit_token('a'))
+        self.assertEqual(reader.get('a')['blocks']['head12345']['fields']['children'], [])
+
+        structure = self._structure('a')
+        structure['blocks']['head12345']['fields']['children'].append('chapter1')
+        StructureCache(shared).rewritten(structure)
+        # the reader's own copy is stale, so it gets the rewritten one
+        self.assertEqual(reader.get('a')['blocks']['head12345']['fields']['children'], ['chapter1'])
+
+    def test_edit_token_evicted(self):
+        shared = self.DictCache()
+        cache = StructureCache(shared, token_ttl=0)
+        cache.set(self._structure('a'), cache.edit_token('a'))
+        del shared['split_structure_edit.a']
+        self.assertIsNone(cache.get('a'))
+
+    def test_token_checked_after_ttl(self):
+        shared = self.DictCache()
+        reader = StructureCache(shared, token_ttl=60)
+        reader.set(self._structure('a'), reader.edit_token('a'))
+
+        structure = self._structure('a')
+        structure['blocks']['head12345']['fields']['children'].append('chapter1')
+        StructureCache(shared).rewritten(structure)
+        with patch.object(shared, 'get') as shared_get:
+            # within the ttl, the local copy is served without asking the shared cache
+            self.assertEqual(reader.get('a')['blocks']['head12345']['fields']['children'], [])
+            self.assertFalse(shared_get.called)
+
+        with patch('xmodule.modulestore.split_mongo.mongo_connection.time.time', return_value=time.time() + 61):
+            self.assertEqual(reader.get('a')['blocks']['head12345']['fields']['children'], ['chapter1'])
+
 #===========================================
 def modulestore():
     """
@@ -0,0 +1,116 @@
+"""
+Tests for TarFS, the filesystem which writes straight into a tar archive.
+"""
+import os
+import shutil
+import tarfile
+import unittest
+from StringIO import StringIO
+from tempfile import mkdtemp
+
+from fs.errors import DestinationExistsError, ResourceNotFoundError, UnsupportedError
+
+from xmodule.modulestore.locations import SlashSeparatedCourseKey
+from xmodule.modulestore.tar_fs import TarFS
+from xmodule.modulestore.xml import XMLModuleStore
+from xmodule.modulestore.xml_exporter import export_to_fs, export_to_xml
+from xmodule.tests import DATA_DIR
+
+
+class TestTarFS(unittest.TestCase):
+    """
+    Tests for TarFS
+    """
+    def setUp(self):
+        self.buf = StringIO()
+        self.tar_file = tarfile.open(fileobj=self.buf, mode='w')
+        self.tar_fs = TarFS(self.tar_file)
+
+    def members(self):
+        """
+        Closes the archive and returns a dict of its members by name.
+        """
+        self.tar_file.close()
+        self.buf.seek(0)
+        archive = tarfile.open(fileobj=self.buf)
+        return {member.name: member for member in archive.getmembers()}, archive
+
+    def test_write_file(self):
+        with self.tar_fs.open('course/course.xml', 'w') as course_xml:
+            course_xml.write('<course/>')
+        self.assertTrue(self.tar_fs.isdir('course'))
+        self.assertTrue(self.tar_fs.isfile('course/course.xml'))
+        members, archive = self.members()
+        self.assertEqual(sorted(members), ['course', 'course/course.xml'])
+        self.assertTrue(members['course'].isdir())
+        self.assertEqual(archive.extractfile(members['course/course.xml']).read(), '<course/>')
+
+    def test_write_unicode(self):
+        with self.tar_fs.open('about.html', 'w') as about:
+            about.write(u'caf\xe9')
+        members, archive = self.members()
+        self.assertEqual(archive.extractfile(members['about.html']).read(), 'caf\xc3\xa9')
+
+    def test_opendir(self):
+        course_fs = self.tar_fs.makeopendir('course')
+        policies_fs = course_fs.makeopendir('policies')
+        with policies_fs.open('/assets.json', 'w') as assets:
+            assets.write('{}')
+        policies_fs.makedir('2012_Fall/nested', recursive=True, allow_recreate=True)
+        self.assertTrue(self.tar_fs.isdir('course/policies/2012_Fall'))
+        self.assertTrue(course_fs.exists('policies/assets.json'))
+        self.assertIs(course_fs.makeopendir('policies').tar_file, self.tar_file)
+        members, _archive = self.members()
+        self.assertEqual(
+            sorted(members),
+            ['course', 'course/policies', 'course/policies/2012_Fall', 'course/policies/2012_Fall/nested',
+             'course/policies/assets.json']
+        )
+
+    def test_makedir_exists(self):
+        self.tar_fs.makedir('course')
+        with self.assertRaises(DestinationExistsError):
+            self.tar_fs.makedir('course')
+        self.tar_fs.makedir('course', allow_recreate=True)
+        members, _archive = self.members()
+        self.assertEqual(list(members), ['course'])
+
+    def test_opendir_missing(self):
+        with self.assertRaises(ResourceNotFoundError):
+            self.tar_fs.opendir('course')
+
+    def test_read_unsupported(self):
+        for mode in ('r', 'rb', 'a', 'w+'):
+            with self.assertRaises(UnsupportedError):
+                self.tar_fs.open('course.xml', mode)
+
+
+class TestExportToTarFS(unittest.TestCase):
+    """
+    Tests exporting a course into a TarFS
+    """
+    def test_same_as_export_to_xml(self):
+        course_key = SlashSeparatedCourseKey('edX', 'toy', '2012_Fall')
+        store = XMLModuleStore(DATA_DIR, course_dirs=['toy'])
+
+        root_dir = mkdtemp()
+        self.addCleanup(shutil.rmtree, root_dir)
+        export_to_xml(store, None, course_key, root_dir, 'toy')
+        expected = {}
+        for dirpath, dirnames, filenames in os.walk(root_dir):
+            for name in dirnames + filenames:
+                member = os.path.relpath(os.path.join(dirpath, name), root_dir)
+                expected[member] = None if name in dirnames else open(os.path.join(dirpath, name), 'rb').read()
+
+        # both exports set the modules' export_fs, so export again from a fresh store
+        store = XMLModuleStore(DATA_DIR, course_dirs=['toy'])
+        buf = StringIO()
+        with tarfile.open(fileobj=buf, mode='w:gz') as tar_file:
+            export_to_fs(store, None, course_key, TarFS(tar_file), 'toy')
+        buf.seek(0)
+        archive = tarfile.open(fileobj=buf)
+        exported = {
+            member.name: archive.extractfile(member).read() if member.isfile() else None
+            for member in archive.getmembers()
+        }
+        self.assertEqual(exported, expected)
@@ -59,11 +59,18 @@ def export_to_xml(modulestore, contentstore, course_key, root_dir, course_dir, d
     `draft_modulestore`: An optional `DraftModuleStore` that contains draft content, which will be exported
         alongside the public content in the course.
     """
+    export_to_fs(modulestore, contentstore, course_key, OSFS(root_dir), course_dir, draft_modulestore)
+
+
+def export_to_fs(modulestore, contentstore, course_key, root_fs, course_dir, draft_modulestore=None):
+    """
+    Export the course as `export_to_xml` does, but into the filesystem `root_fs` (such as a
+    `xmodule.modulestore.tar_fs.TarFS`, to export straight into an archive) rather than a directory.
+    """
 
     course = modulestore.get_course(course_key)
 
-    fsm = OSFS(root_dir)
-    export_fs = course.runtime.export_fs = fsm.makeopendir(course_dir)
+    export_fs = course.runtime.export_fs = root_fs.makeopendir(course_dir)
 
     root = lxml.etree.Element('unknown')
     course.add_xml_to_node(root)
@@ -74,11 +81,8 @@ def export_to_xml(modulestore, contentstore, course_key, root_dir, course_dir, d
     # export the static assets
     policies_dir = export_fs.makeopendir('policies')
     if contentstore:
-        contentstore.export_all_for_course(
-            course_key,
-            root_dir + '/' + course_dir + '/static/',
-            root_dir + '/' + course_dir + '/policies/assets.json',
-        )
+        static_dir = export_fs.makeopendir('static')
+        contentstore.export_all_for_course_to_fs(course_key, static_dir, policies_dir)
 
         # If we are using the default course image, export it to the
         # legacy location to support backwards compatibility.
@@ -93,10 +97,7 @@ def export_to_xml(modulestore, contentstore, course_key, root_dir, course_dir, d
             except NotFoundError:
                 pass
             else:
-                output_dir = root_dir + '/' + course_dir + '/static/images/'
-                if not os.path.isdir(output_dir):
-                    os.makedirs(output_dir)
-                with OSFS(output_dir).open('course_image.jpg', 'wb') as course_image_file:
+                with static_dir.makeopendir('images').open('course_image.jpg', 'wb') as course_image_file:
                     course_image_file.write(course_image.data)
 
     # export the static tabs
@@ -1,6 +1,8 @@
+import hashlib
 import logging
 import os
 import mimetypes
+from multiprocessing.pool import ThreadPool
 from path import path
 import json
 
@@ -20,10 +22,111 @@ from xmodule.modulestore.exceptions import InvalidLocationError
 log = logging.getLogger(__name__)
 
 
+# Number of threads uploading static assets (and generating their thumbnails) at once
+STATIC_CONTENT_IMPORT_WORKERS = 4
+
+# Static assets larger than this are streamed to the contentstore in chunks of
+# this many bytes rather than read into memory whole
+STATIC_CONTENT_IMPORT_CHUNK_SIZE = 1024 * 1024
+
+
+def _read_in_chunks(content_path):
+    """
+    Yields the content of the file at `content_path`, STATIC_CONTENT_IMPORT_CHUNK_SIZE
+    bytes at a time.
+    """
+    with open(content_path, 'rb') as content_file:
+        while True:
+            chunk = content_file.read(STATIC_CONTENT_IMPORT_CHUNK_SIZE)
+            if not chunk:
+                return
+            yield chunk
+
+
+def _file_md5(content_path):
+    """
+    Returns the hex md5 digest of the file at `content_path`, as GridFS records it,
+    without reading the file into memory whole.
+    """
+    md5 = hashlib.md5()
+    for chunk in _read_in_chunks(content_path):
+        md5.update(chunk)
+    return md5.hexdigest()
+
+
+def _import_static_file(static_content_store, content_path, fullname_with_subpath, asset_key,
+                        displayname, mime_type, locked, existing_asset):
+    """
+    Saves the file at `content_path` to `static_content_store` as `asset_key`,
+    along with its thumbnail, unless `existing_asset` (the asset's current
+    record in the contentstore, or None) already holds the same bytes and
+    attributes.
+
+    Returns the (fullname_with_subpath, asset_key) pair to remap references to
+    the file with, or None if the file couldn't be read but can be ignored.
+    """
+    try:
+        md5 = _file_md5(content_path)
+    except IOError:
+        if os.path.basename(content_path).startswith('._'):
+            # OS X "companion files". See
+            # http://www.diigo.com/annotated/0c936fda5da4aa1159c189cea227e174
+            return None
+        # Not a 'hidden file', then re-raise exception
+        raise
+
+    if existing_asset is not None and (
+            existing_asset.get('md5') == md5 and
+            existing_asset.get('displayname') == displayname and
+            existing_asset.get('contentType') == mime_type and
+            existing_asset.get('import_path') == fullname_with_subpath and
+            existing_asset.get('locked', False) == locked
+    ):
+        log.debug('static content %s is unchanged, skipping', content_path)
+        return fullname_with_subpath, asset_key
+
+    if os.path.getsize(content_path) > STATIC_CONTENT_IMPORT_CHUNK_SIZE:
+        data = _read_in_chunks(content_path)
+    else:
+        with open(content_path, 'rb') as content_file:
+            data = content_file.read()
+    content = StaticContent(
+        asset_key, displayname, mime_type, data,
+        import_path=fullname_with_subpath, locked=locked
+    )
+
+    # first let's save a thumbnail so we can get back a thumbnail location;
+    # the thumbnail is made from the file on disk, as the data may be a stream
+    thumbnail_content, thumbnail_location = static_content_store.generate_thumbnail(
+        content, tempfile_path=content_path
+    )
+
+    if thumbnail_content is not None:
+        content.thumbnail_location = thumbnail_location
+
+    # then commit the content
+    try:
+        static_content_store.save(content)
+    except Exception as err:
+        log.exception('Error importing {0}, error={1}'.format(
+            fullname_with_subpath, err
+        ))
+    return fullname_with_subpath, asset_key
+
+
 def import_static_content(
         course_data_path, static_content_store,
         target_course_id, subpath='static', verbose=False):
-
+    """
+    Imports the files under `course_data_path`/`subpath` as static assets of
+    `target_course_id`, and returns a dict mapping each file's path (relative
+    to the static directory) to its asset key.
+
+    Files whose bytes and attributes match the asset already stored for the
+    course (as when a course is re-imported after a small edit) are skipped.
+    The others are uploaded, and their thumbnails generated, by a pool of
+    STATIC_CONTENT_IMPORT_WORKERS threads.
+    """
     remap_dict = {}
 
     # now import all static assets
@@ -42,6 +145,11 @@ def import_static_content(
     mimetypes.add_type('application/octet-stream', '.srt')
     mimetypes_list = mimetypes.types_map.values()
 
+    # the course's current assets, so unchanged files needn't be uploaded again
+    existing_assets, __ = static_content_store.get_all_content_for_course(target_course_id)
+    existing_assets = {asset['_id']['name']: asset for asset in existing_assets}
+
+    static_files = []
     for dirname, _, filenames in os.walk(static_dir):
         for filename in filenames:
 
@@ -55,17 +163,6 @@ def import_static_content(
             if verbose:
                 log.debug('importing static content %s...', content_path)
 
-            try:
-                with open(content_path, 'rb') as f:
-                    data = f.read()
-            except IOError:
-                if filename.startswith('._'):
-                    # OS X "companion files". See
-                    # http://www.diigo.com/annotated/0c936fda5da4aa1159c189cea227e174
-                    continue
-                # Not a 'hidden file', then re-raise exception
-                raise
-
             # strip away leading path from the name
             fullname_with_subpath = content_path.replace(static_dir, '')
             if fullname_with_subpath.startswith('/'):
@@ -80,27 +177,24 @@ def import_static_content(
             # Check extracted contentType in list of all valid mimetypes
             if not mime_type or mime_type not in mimetypes_list:
                 mime_type = mimetypes.guess_type(filename)[0]   # Assign guessed mimetype
-            content = StaticContent(
-                asset_key, displayname, mime_type, data,
-                import_path=fullname_with_subpath, locked=locked
-            )
 
-            # first let's save a thumbnail so we can get back a thumbnail location
-            thumbnail_content, thumbnail_location = static_content_store.generate_thumbnail(content)
+            static_files.append((
+                static_content_store, content_path, fullname_with_subpath, asset_key,
+                displayname, mime_type, locked, existing_assets.get(asset_key.name)
+            ))
 
-            if thumbnail_content is not None:
-                content.thumbnail_location = thumbnail_location
-
-            # then commit the content
-            try:
-                static_content_store.save(content)
-            except Exception as err:
-                log.exception('Error importing {0}, error={1}'.format(
-                    fullname_with_subpath, err
-                ))
+    pool = ThreadPool(STATIC_CONTENT_IMPORT_WORKERS)
+    try:
+        imported = pool.map(lambda args: _import_static_file(*args), static_files)
+    finally:
+        pool.close()
+        pool.join()
 
+    for remap in imported:
+        if remap is not None:
             # store the remapping information which will be needed
             # to subsitute in the module data
+            fullname_with_subpath, asset_key = remap
             remap_dict[fullname_with_subpath] = asset_key
 
     return remap_dict
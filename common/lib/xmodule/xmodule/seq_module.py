@@ -70,6 +70,17 @@ class SequenceModule(SequenceFields, XModule):
         if dispatch == 'goto_position':
             self.position = int(data['position'])
             return json.dumps({'success': True})
+        if dispatch == 'render_position':
+            # the content of a tab which student_view left unrendered
+            position = int(data['position'])
+            tabs = self._display_tabs()
+            if not 1 <= position <= len(tabs):
+                raise NotFoundError('Position {0} is out of range'.format(position))
+            child = self._tab_module(*tabs[position - 1])
+            if child is None:
+                raise NotFoundError('Position {0} is not available'.format(position))
+            rendered_child = child.render('student_view', {})
+            return json.dumps({'success': True, 'html': rendered_child.content})
         raise NotFoundError('Unexpected dispatch type')
 
     def student_view(self, context):
@@ -78,28 +89,33 @@ class SequenceModule(SequenceFields, XModule):
         if self.position is None:
             self.position = 1
 
+        # If the runtime sets lazy_sequence_neighbors, only the tabs within that
+        # many places of the current one are rendered; the rest are fetched with
+        # render_position when they're shown.
+        neighbors = getattr(self.system, 'lazy_sequence_neighbors', None)
+        if neighbors is None:
+            tabs = [(child, child) for child in self.get_display_items()]
+        else:
+            tabs = self._display_tabs()
+
         ## Returns a set of all types of all sub-children
         contents = []
 
         fragment = Fragment()
 
-        for child in self.get_display_items():
-            progress = child.get_progress()
-            rendered_child = child.render('student_view', context)
-            fragment.add_frag_resources(rendered_child)
-
-            titles = child.get_content_titles()
-            childinfo = {
-                'content': rendered_child.content,
-                'title': "\n".join(titles),
-                'page_title': titles[0] if titles else '',
-                'progress_status': Progress.to_js_status_str(progress),
-                'progress_detail': Progress.to_js_detail_str(progress),
-                'type': child.get_icon_class(),
-                'id': child.scope_ids.usage_id.to_deprecated_string(),
-            }
-            if childinfo['title'] == '':
-                childinfo['title'] = child.display_name_with_default
+        for position, (item, child) in enumerate(tabs, start=1):
+            if neighbors is None or abs(position - self.position) <= neighbors:
+                child = self._tab_module(item, child)
+                if child is None:
+                    continue
+                progress = child.get_progress()
+                rendered_child = child.render('student_view', context)
+                fragment.add_frag_resources(rendered_child)
+                childinfo = self._child_info(
+                    child, rendered_child.content, child.get_content_titles(), progress, child.get_icon_class()
+                )
+            else:
+                childinfo = self._unrendered_child_info(item)
             contents.append(childinfo)
 
         params = {'items': contents,
@@ -114,6 +130,63 @@ class SequenceModule(SequenceFields, XModule):
 
         return fragment
 
+    def _display_tabs(self):
+        """
+        Returns an (item, module) pair for each of the tabs of the sequence, as
+        get_display_items would, but from the child descriptors: only the
+        children with dynamic children, which pick the items they display, are
+        created as modules. The other items are their descriptors, with a module
+        of None, and are left out if the runtime's can_load(descriptor) says the
+        user may not see them (without that, their modules are created to check).
+        """
+        can_load = getattr(self.system, 'can_load', None)
+        tabs = []
+        for descriptor in self.descriptor.get_children():
+            if can_load is None or descriptor.has_dynamic_children():
+                module = self.system.get_module(descriptor)
+                if module is not None:
+                    tabs.extend((item, item) for item in module.displayable_items())
+            elif can_load(descriptor):
+                tabs.append((descriptor, None))
+        return tabs
+
+    def _tab_module(self, item, module):
+        """
+        Returns the module to render for the tab `item`, creating it if
+        _display_tabs didn't.
+        """
+        return module if module is not None else self.system.get_module(item)
+
+    def _child_info(self, child, content, titles, progress, icon_class):
+        """
+        Returns the dict describing the tab of `child` to seq_module.html. A
+        `content` of None means the tab is left for the client to fetch.
+        """
+        return {
+            'content': content or '',
+            'lazy': content is None,
+            'title': "\n".join(titles) or child.display_name_with_default,
+            'page_title': titles[0] if titles else '',
+            'progress_status': Progress.to_js_status_str(progress),
+            'progress_detail': Progress.to_js_detail_str(progress),
+            'type': icon_class,
+            'id': child.scope_ids.usage_id.to_deprecated_string(),
+        }
+
+    def _unrendered_child_info(self, child):
+        """
+        Returns the dict describing the tab of `child` (a module or a descriptor)
+        without rendering it, or creating the modules of its children: its titles
+        and icon come from the descriptors, and its progress from the runtime's
+        progress_summary (a function of the child's descriptor), if it has one.
+        """
+        descriptor = getattr(child, 'descriptor', child)
+        progress_summary = getattr(self.system, 'progress_summary', None)
+        progress = progress_summary(descriptor) if progress_summary is not None else None
+        return self._child_info(
+            child, None, descriptor.get_content_titles(), progress, _descriptor_icon_class(descriptor)
+        )
+
     def get_icon_class(self):
         child_classes = set(child.get_icon_class()
                             for child in self.get_children())
@@ -124,6 +197,22 @@ class SequenceModule(SequenceFields, XModule):
         return new_class
 
 
+def _descriptor_icon_class(descriptor):
+    """
+    Returns the icon class of the module of `descriptor` as the get_icon_class of
+    sequences, verticals and leaf modules works it out, but from the descriptors,
+    so that no modules are created.
+    """
+    if descriptor.has_children:
+        child_classes = set(_descriptor_icon_class(child) for child in descriptor.get_children())
+        new_class = 'other'
+        for c in class_priority:
+            if c in child_classes:
+                new_class = c
+        return new_class
+    return getattr(getattr(descriptor, 'module_class', descriptor), 'icon_class', 'other')
+
+
 class SequenceDescriptor(SequenceFields, MakoModuleDescriptor, XmlDescriptor):
     mako_template = 'widgets/sequence-edit.html'
     module_class = SequenceModule
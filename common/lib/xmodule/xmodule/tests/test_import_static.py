@@ -1,8 +1,9 @@
 """
 Tests that check that we ignore the appropriate files when importing courses.
 """
+import hashlib
 import unittest
-from mock import Mock
+from mock import Mock, patch
 from xmodule.modulestore.xml_importer import import_static_content
 from xmodule.modulestore.locations import SlashSeparatedCourseKey
 from xmodule.tests import DATA_DIR
@@ -15,9 +16,61 @@ class IgnoredFilesTestCase(unittest.TestCase):
         course_id = SlashSeparatedCourseKey("edX", "tilde", "Fall_2012")
         content_store = Mock()
         content_store.generate_thumbnail.return_value = ("content", "location")
+        content_store.get_all_content_for_course.return_value = ([], 0)
         import_static_content(course_dir, content_store, course_id)
         saved_static_content = [call[0][0] for call in content_store.save.call_args_list]
         name_val = {sc.name: sc.data for sc in saved_static_content}
         self.assertIn("example.txt", name_val)
         self.assertNotIn("example.txt~", name_val)
         self.assertIn("GREEN", name_val["example.txt"])
+
+
+class StaticContentImportTestCase(unittest.TestCase):
+    "Tests for importing static content into a contentstore"
+    def setUp(self):
+        self.course_dir = DATA_DIR / "tilde"
+        self.course_id = SlashSeparatedCourseKey("edX", "tilde", "Fall_2012")
+        self.content_store = Mock()
+        self.content_store.generate_thumbnail.return_value = (None, "location")
+        self.content_store.get_all_content_for_course.return_value = ([], 0)
+
+    def _saved_static_content(self):
+        "Returns the saved StaticContent, keyed by name"
+        return {call[0][0].name: call[0][0] for call in self.content_store.save.call_args_list}
+
+    def test_skip_unchanged_static_files(self):
+        with open(self.course_dir / "static" / "example.txt", 'rb') as example:
+            md5 = hashlib.md5(example.read()).hexdigest()
+        self.content_store.get_all_content_for_course.return_value = ([{
+            '_id': {'name': 'example.txt'},
+            'md5': md5,
+            'displayname': 'example.txt',
+            'contentType': 'text/plain',
+            'import_path': 'example.txt',
+        }], 1)
+        remap = import_static_content(self.course_dir, self.content_store, self.course_id)
+        self.assertNotIn("example.txt", self._saved_static_content())
+        self.assertFalse(self.content_store.generate_thumbnail.called)
+        # references to the file are still remapped to the existing asset
+        self.assertEqual(remap["example.txt"].name, "example.txt")
+
+    def test_import_changed_static_files(self):
+        self.content_store.get_all_content_for_course.return_value = ([{
+            '_id': {'name': 'example.txt'},
+            'md5': hashlib.md5("stale").hexdigest(),
+            'displayname': 'example.txt',
+            'contentType': 'text/plain',
+            'import_path': 'example.txt',
+        }], 1)
+        import_static_content(self.course_dir, self.content_store, self.course_id)
+        self.assertIn("GREEN", self._saved_static_content()["example.txt"].data)
+
+    @patch('xmodule.modulestore.xml_importer.STATIC_CONTENT_IMPORT_CHUNK_SIZE', 4)
+    def test_stream_large_static_files(self):
+        import_static_content(self.course_dir, self.content_store, self.course_id)
+        data = self._saved_static_content()["example.txt"].data
+        self.assertNotIsInstance(data, basestring)
+        chunks = list(data)
+        self.assertTrue(all(len(chunk) <= 4 for chunk in chunks))
+        with open(self.course_dir / "static" / "example.txt", 'rb') as example:
+            self.assertEqual(''.join(chunks), example.read())
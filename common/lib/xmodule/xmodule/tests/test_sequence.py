@@ -0,0 +1,77 @@
+"""
+Tests for sequence module.
+"""
+import json
+
+from xmodule.exceptions import NotFoundError
+from xmodule.tests import get_test_system
+from xmodule.tests.xml import XModuleXmlImportTest
+from xmodule.tests.xml import factories as xml
+
+
+class SequenceModuleTestCase(XModuleXmlImportTest):
+    test_html_1 = 'Test HTML 1'
+    test_html_2 = 'Test HTML 2'
+
+    def setUp(self):
+        # construct module
+        course = xml.CourseFactory.build()
+        sequence = xml.SequenceFactory.build(parent=course)
+        vertical_1 = xml.VerticalFactory.build(parent=sequence)
+        vertical_2 = xml.VerticalFactory.build(parent=sequence)
+        xml.HtmlFactory(parent=vertical_1, url_name='test-html-1', text=self.test_html_1)
+        xml.HtmlFactory(parent=vertical_2, url_name='test-html-2', text=self.test_html_2)
+
+        self.course = self.process_xml(course)
+        self.module_system = get_test_system()
+        self.loaded = []
+
+        def get_module(descriptor):
+            """Mocks module_system get_module function"""
+            self.loaded.append(descriptor.location)
+            descriptor.bind_for_student(self.module_system, descriptor._field_data)  # pylint: disable=protected-access
+            return descriptor
+
+        self.module_system.get_module = get_module
+        self.module_system.descriptor_system = self.course.runtime
+
+        self.sequence = self.course.get_children()[0]
+        self.sequence.xmodule_runtime = self.module_system
+
+    def test_render_student_view(self):
+        html = self.module_system.render(self.sequence, 'student_view', {}).content
+        self.assertIn(self.test_html_1, html)
+        self.assertIn(self.test_html_2, html)
+
+    def test_render_lazy_student_view(self):
+        self.module_system.lazy_sequence_neighbors = 0
+        html = self.module_system.render(self.sequence, 'student_view', {}).content
+        self.assertIn(self.test_html_1, html)
+        self.assertNotIn(self.test_html_2, html)
+
+    def test_render_lazy_student_view_from_descriptors(self):
+        self.module_system.lazy_sequence_neighbors = 0
+        self.module_system.can_load = lambda descriptor: True
+        html = self.module_system.render(self.sequence, 'student_view', {}).content
+        self.assertIn(self.test_html_1, html)
+        self.assertEqual(html.count("'lazy': True"), 1)
+        # only the shown unit (and its content) is loaded
+        verticals = [vertical.location for vertical in self.sequence.get_children()]
+        self.assertIn(verticals[0], self.loaded)
+        self.assertNotIn(verticals[1], self.loaded)
+
+    def test_render_lazy_student_view_without_access(self):
+        self.module_system.lazy_sequence_neighbors = 0
+        hidden = self.sequence.get_children()[1].location
+        self.module_system.can_load = lambda descriptor: descriptor.location != hidden
+        html = self.module_system.render(self.sequence, 'student_view', {}).content
+        self.assertIn(self.test_html_1, html)
+        self.assertNotIn("'lazy': True", html)
+        with self.assertRaises(NotFoundError):
+            self.sequence.handle_ajax('render_position', {'position': '2'})
+
+    def test_render_position(self):
+        response = json.loads(self.sequence.handle_ajax('render_position', {'position': '2'}))
+        self.assertIn(self.test_html_2, response['html'])
+        with self.assertRaises(NotFoundError):
+            self.sequence.handle_ajax('render_position', {'position': '3'})
@@ -4,6 +4,7 @@ Utility functions for transcripts.
 """
 import os
 import copy
+import hashlib
 import json
 import requests
 import logging
@@ -18,6 +19,11 @@ from xmodule.contentstore.django import contentstore
 
 log = logging.getLogger(__name__)
 
+# How long, in seconds, converted transcripts are cached for. They're cached
+# under the md5 of the asset they were converted from, so they never go stale
+# and only expire to make room.
+TRANSCRIPT_CACHE_TIMEOUT = 24 * 60 * 60
+
 
 class TranscriptException(Exception):  # pylint disable=C0111
     pass
@@ -508,6 +514,49 @@ class Transcript(object):
             elif output_format == 'srt':
                 return generate_srt_from_sjson(json.loads(content), speed=1.0)
 
+    @staticmethod
+    def cached_convert(cache, location, filename, input_format, output_format):
+        """
+        Return the transcript asset `filename` converted from `input_format` to
+        `output_format`, caching the conversion in `cache`.
+
+        Conversions are cached under the md5 of the asset, as computed by the
+        contentstore, so saving the asset with new content (through
+        save_subs_to_store, manage_video_subtitles_save, an upload or an import)
+        makes the next request convert it again, and a cache hit only reads the
+        asset's metadata.
+
+        Raises NotFoundError if there is no such asset, and whatever `convert`
+        raises for malformed content.
+
+        `location` is module location.
+        """
+        asset_location = Transcript.asset_location(location, filename)
+        stream = contentstore().find(asset_location, as_stream=True)
+        stream.close()
+        content = None
+        if stream.content_digest:
+            content = cache.get(Transcript._cache_key(asset_location, stream.content_digest, output_format))
+        if content is None:
+            asset = contentstore().find(asset_location)
+            content = Transcript.convert(asset.data, input_format, output_format)
+            if asset.content_digest:
+                cache.set(
+                    Transcript._cache_key(asset_location, asset.content_digest, output_format),
+                    content,
+                    TRANSCRIPT_CACHE_TIMEOUT
+                )
+        return content
+
+    @staticmethod
+    def _cache_key(asset_location, content_digest, output_format):
+        """
+        Return the cache key of the conversion to `output_format` of the asset
+        at `asset_location` with md5 `content_digest`.
+        """
+        key = u'{0}.{1}.{2}'.format(asset_location.to_deprecated_string(), content_digest, output_format)
+        return u'transcripts.{0}'.format(hashlib.md5(key.encode('utf8')).hexdigest())
+
     @staticmethod
     def asset(location, subs_id, lang='en', filename=None):
         """
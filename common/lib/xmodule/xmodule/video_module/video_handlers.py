@@ -6,6 +6,7 @@ StudioViewHandlers are handlers for video descriptor instance.
 """
 import os
 import json
+import hashlib
 import logging
 from webob import Response
 
@@ -105,17 +106,20 @@ class VideoStudentViewHandlers(object):
 
         Raises:
             NotFoundError if for 'en' subtitles no asset is uploaded.
+
+        Transcripts are read through the runtime's cache (see Transcript.cached_convert).
         """
         if youtube_id:
             # Youtube case:
             if self.transcript_language == 'en':
-                return Transcript.asset(self.location, youtube_id).data
+                return self._cached_transcript(subs_filename(youtube_id))
 
             youtube_ids = youtube_speed_dict(self)
             assert youtube_id in youtube_ids
 
+            sjson_filename = subs_filename(youtube_id, self.transcript_language)
             try:
-                sjson_transcript = Transcript.asset(self.location, youtube_id, self.transcript_language).data
+                sjson_transcript = self._cached_transcript(sjson_filename)
             except (NotFoundError):
                 log.info("Can't find content in storage for %s transcript: generating.", youtube_id)
                 generate_sjson_for_all_speeds(
@@ -124,15 +128,19 @@ class VideoStudentViewHandlers(object):
                     {speed: youtube_id for youtube_id, speed in youtube_ids.iteritems()},
                     self.transcript_language
                 )
-                sjson_transcript = Transcript.asset(self.location, youtube_id, self.transcript_language).data
+                sjson_transcript = self._cached_transcript(sjson_filename)
 
             return sjson_transcript
         else:
             # HTML5 case
             if self.transcript_language == 'en':
-                return Transcript.asset(self.location, self.sub).data
+                return self._cached_transcript(subs_filename(self.sub))
             else:
-                return get_or_create_sjson(self)
+                user_subs_id = os.path.splitext(self.transcripts[self.transcript_language])[0]
+                try:
+                    return self._cached_transcript(subs_filename(user_subs_id, self.transcript_language))
+                except NotFoundError:
+                    return get_or_create_sjson(self)
 
     def get_transcript(self, transcript_format='srt'):
         """
@@ -159,13 +167,11 @@ class VideoStudentViewHandlers(object):
                 log.debug("No subtitles for 'en' language")
                 raise ValueError
 
-            data = Transcript.asset(self.location, transcript_name, lang).data
             filename = u'{}.{}'.format(transcript_name, transcript_format)
-            content = Transcript.convert(data, 'sjson', transcript_format)
+            content = self._cached_transcript(subs_filename(transcript_name, lang), 'sjson', transcript_format)
         else:
-            data = Transcript.asset(self.location, None, None, self.transcripts[lang]).data
             filename = u'{}.{}'.format(os.path.splitext(self.transcripts[lang])[0], transcript_format)
-            content = Transcript.convert(data, 'srt', transcript_format)
+            content = self._cached_transcript(self.transcripts[lang], 'srt', transcript_format)
 
         if not content:
             log.debug('no subtitles produced in get_transcript')
@@ -173,6 +179,13 @@ class VideoStudentViewHandlers(object):
 
         return content, filename, Transcript.mime_types[transcript_format]
 
+    def _cached_transcript(self, filename, input_format='sjson', output_format='sjson'):
+        """
+        Returns the transcript asset `filename` of this video in `output_format`,
+        from the runtime's cache if it has been converted before.
+        """
+        return Transcript.cached_convert(self.runtime.cache, self.location, filename, input_format, output_format)
+
     def get_static_transcript(self, request):
         """
         Courses that are imported with the --nostatic flag do not show
@@ -264,8 +277,9 @@ class VideoStudentViewHandlers(object):
                 log.info(ex.message)
                 response = Response(status=404)
             else:
-                response = Response(transcript, headerlist=[('Content-Language', language)])
-                response.content_type = Transcript.mime_types['sjson']
+                response = _validated_response(
+                    request, transcript, [('Content-Language', language)], Transcript.mime_types['sjson']
+                )
 
         elif dispatch == 'download':
             try:
@@ -274,14 +288,15 @@ class VideoStudentViewHandlers(object):
                 log.debug("Video@download exception")
                 return Response(status=404)
             else:
-                response = Response(
+                response = _validated_response(
+                    request,
                     transcript_content,
-                    headerlist=[
+                    [
                         ('Content-Disposition', 'attachment; filename="{}"'.format(transcript_filename.encode('utf8'))),
                         ('Content-Language', self.transcript_language),
-                    ]
+                    ],
+                    transcript_mime_type
                 )
-                response.content_type = transcript_mime_type
 
         elif dispatch == 'available_translations':
             available_translations = []
@@ -310,6 +325,21 @@ class VideoStudentViewHandlers(object):
         return response
 
 
+def _validated_response(request, content, headerlist, content_type):
+    """
+    Returns a response with `content` and an ETag of its md5, or an empty
+    304 (Not Modified) response if the request says the client has that content.
+    """
+    etag = hashlib.md5(content.encode('utf8') if isinstance(content, unicode) else content).hexdigest()
+    if etag in request.if_none_match:
+        response = Response(status=304, headerlist=headerlist)
+    else:
+        response = Response(content, headerlist=headerlist)
+        response.content_type = content_type
+    response.etag = etag
+    return response
+
+
 class VideoStudioViewHandlers(object):
     """
     Handlers for Studio view.
@@ -1,20 +1,15 @@
-from xmodule.modulestore.django import modulestore
-from xmodule.course_module import CourseDescriptor
 from django.conf import settings
 
+from course_summaries.summary import query_course_summaries
 from microsite_configuration import microsite
+from xmodule.modulestore.locations import SlashSeparatedCourseKey
 
 
 def get_visible_courses():
     """
-    Return the set of CourseDescriptors that should be visible in this branded instance
+    Return the list of CourseSummaries of the courses that should be visible in
+    this branded instance, sorted by number
     """
-    _courses = modulestore().get_courses()
-
-    courses = [c for c in _courses
-               if isinstance(c, CourseDescriptor)]
-    courses = sorted(courses, key=lambda course: course.number)
-
     subdomain = microsite.get_value('subdomain', 'default')
 
     # See if we have filtered course listings in this domain
@@ -27,14 +22,15 @@ def get_visible_courses():
     filtered_by_org = microsite.get_value('course_org_filter')
 
     if filtered_by_org:
-        return [course for course in courses if course.location.org == filtered_by_org]
+        return query_course_summaries(org=filtered_by_org)
     if filtered_visible_ids:
-        return [course for course in courses if course.id in filtered_visible_ids]
+        return query_course_summaries(course_keys=[
+            SlashSeparatedCourseKey.from_deprecated_string(course_id) for course_id in filtered_visible_ids
+        ])
     else:
         # Let's filter out any courses in an "org" that has been declared to be
         # in a Microsite
-        org_filter_out_set = microsite.get_all_orgs()
-        return [course for course in courses if course.location.org not in org_filter_out_set]
+        return query_course_summaries(exclude_orgs=microsite.get_all_orgs())
 
 
 def get_university_for_request():
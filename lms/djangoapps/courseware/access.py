@@ -14,6 +14,7 @@ from xmodule.x_module import XModule
 
 from xblock.core import XBlock
 
+from course_summaries.models import CourseSummary
 from student.models import CourseEnrollmentAllowed
 from external_auth.models import ExternalAuthMap
 from courseware.masquerade import is_masquerading_as_student
@@ -72,6 +73,9 @@ def has_access(user, action, obj, course_key=None):
     if isinstance(obj, CourseDescriptor):
         return _has_access_course_desc(user, action, obj)
 
+    if isinstance(obj, CourseSummary):
+        return _has_access_course_summary(user, action, obj)
+
     if isinstance(obj, ErrorDescriptor):
         return _has_access_error_desc(user, action, obj, course_key)
 
@@ -134,69 +138,15 @@ def _has_access_course_desc(user, action, course):
 
     def can_enroll():
         """
-        First check if restriction of enrollment by login method is enabled, both
-            globally and by the course.
-        If it is, then the user must pass the criterion set by the course, e.g. that ExternalAuthMap
-            was set by 'shib:https://idp.stanford.edu/", in addition to requirements below.
-        Rest of requirements:
-        Enrollment can only happen in the course enrollment period, if one exists.
-            or
-
-        (CourseEnrollmentAllowed always overrides)
-        (staff can always enroll)
+        Can this user enroll in this course? See _can_enroll.
         """
-        # if using registration method to restrict (say shibboleth)
-        if settings.FEATURES.get('RESTRICT_ENROLL_BY_REG_METHOD') and course.enrollment_domain:
-            if user is not None and user.is_authenticated() and \
-                ExternalAuthMap.objects.filter(user=user, external_domain=course.enrollment_domain):
-                debug("Allow: external_auth of " + course.enrollment_domain)
-                reg_method_ok = True
-            else:
-                reg_method_ok = False
-        else:
-            reg_method_ok = True #if not using this access check, it's always OK.
-
-        now = datetime.now(UTC())
-        start = course.enrollment_start
-        end = course.enrollment_end
-
-        if reg_method_ok and (start is None or now > start) and (end is None or now < end):
-            # in enrollment period, so any user is allowed to enroll.
-            debug("Allow: in enrollment period")
-            return True
-
-        # if user is in CourseEnrollmentAllowed with right course key then can also enroll
-        # (note that course.id actually points to a CourseKey)
-        # (the filter call uses course_id= since that's the legacy database schema)
-        # (sorry that it's confusing :( )
-        if user is not None and user.is_authenticated() and CourseEnrollmentAllowed:
-            if CourseEnrollmentAllowed.objects.filter(email=user.email, course_id=course.id):
-                return True
-
-        # otherwise, need staff access
-        return _has_staff_access_to_descriptor(user, course, course.id)
+        return _can_enroll(user, course)
 
     def see_exists():
         """
-        Can see if can enroll, but also if can load it: if user enrolled in a course and now
-        it's past the enrollment period, they should still see it.
-
-        TODO (vshnayder): This means that courses with limited enrollment periods will not appear
-        to non-staff visitors after the enrollment period is over.  If this is not what we want, will
-        need to change this logic.
+        Can this user see that this course exists? See _can_see_exists.
         """
-        # VS[compat] -- this setting should go away once all courses have
-        # properly configured enrollment_start times (if course should be
-        # staff-only, set enrollment_start far in the future.)
-        if settings.FEATURES.get('ACCESS_REQUIRE_STAFF_FOR_COURSE'):
-            # if this feature is on, only allow courses that have ispublic set to be
-            # seen by non-staff
-            if course.ispublic:
-                debug("Allow: ACCESS_REQUIRE_STAFF_FOR_COURSE and ispublic")
-                return True
-            return _has_staff_access_to_descriptor(user, course, course.id)
-
-        return can_enroll() or can_load()
+        return _can_see_exists(user, course, can_load)
 
     checkers = {
         'load': can_load,
@@ -210,6 +160,75 @@ def _has_access_course_desc(user, action, course):
     return _dispatch(checkers, action, user, course)
 
 
+def _can_enroll(user, course):
+    """
+    First check if restriction of enrollment by login method is enabled, both
+        globally and by the course.
+    If it is, then the user must pass the criterion set by the course, e.g. that ExternalAuthMap
+        was set by 'shib:https://idp.stanford.edu/", in addition to requirements below.
+    Rest of requirements:
+    Enrollment can only happen in the course enrollment period, if one exists.
+        or
+
+    (CourseEnrollmentAllowed always overrides)
+    (staff can always enroll)
+    """
+    # if using registration method to restrict (say shibboleth)
+    if settings.FEATURES.get('RESTRICT_ENROLL_BY_REG_METHOD') and course.enrollment_domain:
+        if user is not None and user.is_authenticated() and \
+            ExternalAuthMap.objects.filter(user=user, external_domain=course.enrollment_domain):
+            debug("Allow: external_auth of " + course.enrollment_domain)
+            reg_method_ok = True
+        else:
+            reg_method_ok = False
+    else:
+        reg_method_ok = True #if not using this access check, it's always OK.
+
+    now = datetime.now(UTC())
+    start = course.enrollment_start
+    end = course.enrollment_end
+
+    if reg_method_ok and (start is None or now > start) and (end is None or now < end):
+        # in enrollment period, so any user is allowed to enroll.
+        debug("Allow: in enrollment period")
+        return True
+
+    # if user is in CourseEnrollmentAllowed with right course key then can also enroll
+    # (note that course.id actually points to a CourseKey)
+    # (the filter call uses course_id= since that's the legacy database schema)
+    # (sorry that it's confusing :( )
+    if user is not None and user.is_authenticated() and CourseEnrollmentAllowed:
+        if CourseEnrollmentAllowed.objects.filter(email=user.email, course_id=course.id):
+            return True
+
+    # otherwise, need staff access
+    return _has_staff_access_to_descriptor(user, course, course.id)
+
+
+def _can_see_exists(user, course, can_load):
+    """
+    Can see if can enroll, but also if can load it (can_load is a function telling
+    whether the user can load the course): if user enrolled in a course and now
+    it's past the enrollment period, they should still see it.
+
+    TODO (vshnayder): This means that courses with limited enrollment periods will not appear
+    to non-staff visitors after the enrollment period is over.  If this is not what we want, will
+    need to change this logic.
+    """
+    # VS[compat] -- this setting should go away once all courses have
+    # properly configured enrollment_start times (if course should be
+    # staff-only, set enrollment_start far in the future.)
+    if settings.FEATURES.get('ACCESS_REQUIRE_STAFF_FOR_COURSE'):
+        # if this feature is on, only allow courses that have ispublic set to be
+        # seen by non-staff
+        if course.ispublic:
+            debug("Allow: ACCESS_REQUIRE_STAFF_FOR_COURSE and ispublic")
+            return True
+        return _has_staff_access_to_descriptor(user, course, course.id)
+
+    return _can_enroll(user, course) or can_load()
+
+
 def _has_access_error_desc(user, action, descriptor, course_key):
     """
     Only staff should see error descriptors.
@@ -248,29 +267,10 @@ def _has_access_descriptor(user, action, descriptor, course_key=None):
         students to see modules.  If not, views should check the course, so we
         don't have to hit the enrollments table on every module load.
         """
-        # If start dates are off, can always load
-        if settings.FEATURES['DISABLE_START_DATES'] and not is_masquerading_as_student(user):
-            debug("Allow: DISABLE_START_DATES")
+        if 'detached' in descriptor._class_tags:
+            debug("Allow: detached")
             return True
-
-        # Check start date
-        if 'detached' not in descriptor._class_tags and descriptor.start is not None:
-            now = datetime.now(UTC())
-            effective_start = _adjust_start_date_for_beta_testers(
-                user,
-                descriptor,
-                course_key=course_key
-            )
-            if now > effective_start:
-                # after start date, everyone can see it
-                debug("Allow: now > effective start date")
-                return True
-            # otherwise, need staff access
-            return _has_staff_access_to_descriptor(user, descriptor, course_key)
-
-        # No start date, so can always load.
-        debug("Allow: no start date")
-        return True
+        return _can_load_by_start_date(user, descriptor, course_key)
 
     checkers = {
         'load': can_load,
@@ -280,6 +280,66 @@ def _has_access_descriptor(user, action, descriptor, course_key=None):
     return _dispatch(checkers, action, user, descriptor)
 
 
+def _can_load_by_start_date(user, descriptor, course_key):
+    """
+    Whether the user can load descriptor (or anything with its start,
+    days_early_for_beta and location) given its start date.
+    """
+    # If start dates are off, can always load
+    if settings.FEATURES['DISABLE_START_DATES'] and not is_masquerading_as_student(user):
+        debug("Allow: DISABLE_START_DATES")
+        return True
+
+    # Check start date
+    if descriptor.start is not None:
+        now = datetime.now(UTC())
+        effective_start = _adjust_start_date_for_beta_testers(
+            user,
+            descriptor,
+            course_key=course_key
+        )
+        if now > effective_start:
+            # after start date, everyone can see it
+            debug("Allow: now > effective start date")
+            return True
+        # otherwise, need staff access
+        return _has_staff_access_to_descriptor(user, descriptor, course_key)
+
+    # No start date, so can always load.
+    debug("Allow: no start date")
+    return True
+
+
+def _has_access_course_summary(user, action, summary):
+    """
+    Check if user has access to the course summarized by summary (a
+    CourseSummary), giving the same answer as for the course's descriptor.
+
+    Valid actions:
+
+    'load' -- load the courseware, see inside the course
+    'enroll' -- enroll.  Checks for enrollment window,
+                  ACCESS_REQUIRE_STAFF_FOR_COURSE,
+    'see_exists' -- can see that the course exists.
+    'staff' -- staff access to course.
+    """
+    def can_load():
+        """
+        Can this user load the course? Courses aren't detached, so this is just
+        the start date check.
+        """
+        return _can_load_by_start_date(user, summary, summary.id)
+
+    checkers = {
+        'load': can_load,
+        'enroll': lambda: _can_enroll(user, summary),
+        'see_exists': lambda: _can_see_exists(user, summary, can_load),
+        'staff': lambda: _has_staff_access_to_descriptor(user, summary, summary.id),
+    }
+
+    return _dispatch(checkers, action, user, summary)
+
+
 def _has_access_xmodule(user, action, xmodule, course_key):
     """
     Check if user has access to this xmodule.
@@ -1,16 +1,19 @@
 # Compute grades using real division, with no integer truncation
 from __future__ import division
 from collections import defaultdict
+import hashlib
 import json
 import random
 import logging
 
 from contextlib import contextmanager
 from django.conf import settings
+from django.core.cache import cache
 from django.db import transaction
 from django.test.client import RequestFactory
 
 from dogapi import dog_stats_api
+from xblock.fields import Scope
 
 from courseware import courses
 from courseware.model_data import FieldDataCache
@@ -21,12 +24,19 @@ from xmodule.graders import Score
 from xmodule.modulestore.django import modulestore
 from xmodule.modulestore.exceptions import ItemNotFoundError
 from xmodule.util.duedate import get_extended_due_date
-from .models import StudentModule
+from util.query import iterate_in_chunks
+from .models import StudentModule, StudentSectionGrade
 from .module_render import get_module_for_descriptor
 from opaque_keys import InvalidKeyError
 
 log = logging.getLogger("edx.courseware")
 
+# How many StudentModule rows answer_distributions() reads from the database at a time
+ANSWER_DISTRIBUTION_MODULES_PER_QUERY = 1000
+
+# How long, in seconds, the section structure hashes of a published version of a course are cached
+SECTION_STRUCTURE_HASHES_CACHE_TIMEOUT = 24 * 60 * 60
+
 
 def yield_dynamic_descriptor_descendents(descriptor, module_creator):
     """
@@ -51,6 +61,219 @@ def yield_dynamic_descriptor_descendents(descriptor, module_creator):
         yield next_descriptor
 
 
+class StudentModuleScoresCache(object):
+    """
+    An in-memory map of a student's StudentModule grades for a single course.
+
+    All of the rows are fetched up front in one query, loading only the
+    columns needed for grading, so that grading a course doesn't cost one
+    query per scored problem.
+    """
+    def __init__(self, course_key, student):
+        self.course_key = course_key
+        self._student_modules = {}
+
+        if student.is_authenticated():
+            student_modules = StudentModule.objects.filter(
+                student=student,
+                course_id=course_key,
+            ).only('module_state_key', 'grade', 'max_grade')
+            for student_module in student_modules:
+                self._student_modules[self._key(student_module.module_state_key)] = student_module
+
+    def _key(self, location):
+        """
+        Return the dictionary key to use for `location`
+        """
+        return location.map_into_course(self.course_key).to_deprecated_string()
+
+    def get(self, location):
+        """
+        Return the StudentModule for `location`, or None if the student has
+        never interacted with it. Only the `grade` and `max_grade` fields of
+        the returned object are loaded.
+        """
+        return self._student_modules.get(self._key(location))
+
+    def __contains__(self, location):
+        return self._key(location) in self._student_modules
+
+
+def _content_digest(descriptor):
+    """
+    Return a digest of the explicitly set content scoped fields of
+    `descriptor` (for problems, their xml), which is what their max score is
+    computed from.
+    """
+    content = dict(
+        (field.name, field.read_json(descriptor))
+        for field in descriptor.fields.values()
+        if field.scope == Scope.content and field.is_set_on(descriptor)
+    )
+    return hashlib.md5(json.dumps(content, sort_keys=True)).hexdigest()
+
+
+def section_structure_hash(section):
+    """
+    Return a hash of everything other than the student's own scores that the
+    grade of `section` depends on. `section` is one of the entries of
+    `course.grading_context['graded_sections']`.
+
+    Persisted section grades are only used while this hash still matches, so
+    changing the structure of a section, or the content, weight or graded
+    status of any of its problems invalidates them.
+    """
+    section_descriptor = section['section_descriptor']
+    parts = [section_descriptor.location.to_deprecated_string(), section_descriptor.display_name_with_default]
+    for descriptor in section['xmoduledescriptors']:
+        parts.append([
+            descriptor.location.to_deprecated_string(),
+            descriptor.weight,
+            descriptor.graded,
+            descriptor.display_name_with_default,
+            _content_digest(descriptor),
+        ])
+    return hashlib.md5(json.dumps(parts)).hexdigest()
+
+
+def section_structure_hashes(course):
+    """
+    Return a dict mapping the location (as a string) of each graded section of
+    `course` to its section_structure_hash.
+
+    They're cached for the published version of the course, so the content of
+    its problems is only digested once each time it's changed in Studio or
+    reimported.
+    """
+    version = modulestore().get_course_published_version(course.id)
+    cache_key = u'courseware.section_structure_hashes.{}.{}'.format(course.id, version)
+    hashes = cache.get(cache_key) if version is not None else None
+    if hashes is None:
+        hashes = dict(
+            (section['section_descriptor'].location.to_deprecated_string(), section_structure_hash(section))
+            for sections in course.grading_context['graded_sections'].itervalues()
+            for section in sections
+        )
+        if version is not None:
+            cache.set(cache_key, hashes, SECTION_STRUCTURE_HASHES_CACHE_TIMEOUT)
+    return hashes
+
+
+class SectionGradesCache(object):
+    """
+    The persisted StudentSectionGrades of a student in a course, loaded in a
+    single query.
+    """
+    def __init__(self, course, student):
+        self.course = course
+        self.course_key = course.id
+        self.student = student
+        self._section_grades = {}
+        self._structure_hashes = None
+
+        if student.is_authenticated():
+            for section_grade in StudentSectionGrade.objects.filter(student=student, course_id=self.course_key):
+                self._section_grades[section_grade.section_key.to_deprecated_string()] = section_grade
+
+    def _structure_hash(self, section):
+        """
+        Return the section_structure_hash of `section`, from section_structure_hashes.
+        """
+        if self._structure_hashes is None:
+            self._structure_hashes = section_structure_hashes(self.course)
+        location = section['section_descriptor'].location.to_deprecated_string()
+        if location not in self._structure_hashes:
+            # a section the cached hashes don't know of, if the course was loaded after they were computed
+            self._structure_hashes[location] = section_structure_hash(section)
+        return self._structure_hashes[location]
+
+    def get_scores(self, section):
+        """
+        Return the persisted list of Scores for `section`, or None if there
+        are none or they were computed for a different version of the section.
+        """
+        section_grade = self._section_grades.get(section['section_descriptor'].location.to_deprecated_string())
+        if section_grade is None or section_grade.structure_hash != self._structure_hash(section):
+            return None
+        return [Score(earned, possible, graded, name) for _, earned, possible, graded, name in json.loads(section_grade.scores)]
+
+    def set_scores(self, section, scored_modules):
+        """
+        Persist the scores of `section`. `scored_modules` is a list of
+        (module location, Score) tuples.
+
+        The scores may already be stale, so once this has been committed the
+        caller must check them with `discard_stale_scores`.
+        """
+        section_key = section['section_descriptor'].location
+        fields = {
+            'structure_hash': self._structure_hash(section),
+            'scores': json.dumps([
+                [location.to_deprecated_string(), score.earned, score.possible, score.graded, score.section]
+                for location, score in scored_modules
+            ]),
+        }
+        section_grade, created = StudentSectionGrade.objects.get_or_create(
+            student=self.student,
+            course_id=self.course_key,
+            section_key=section_key,
+            defaults=fields,
+        )
+        if not created:
+            for name, value in fields.items():
+                setattr(section_grade, name, value)
+            section_grade.save()
+        self._section_grades[section_key.to_deprecated_string()] = section_grade
+
+    def discard_stale_scores(self, section, scored_modules, student_module_cache):
+        """
+        Delete the persisted scores of `section` if the student got a new score
+        in it after `student_module_cache`, which they were computed from, was
+        loaded.
+
+        This has to run after `set_scores` has been committed: a grade event
+        which this check misses happens after the row was written, and then
+        its own invalidation deletes the row.
+        """
+        section_key = section['section_descriptor'].location
+        locations = set(location for location, _ in scored_modules)
+        locations.update(descriptor.location for descriptor in section['xmoduledescriptors'])
+        current_student_modules = StudentModule.objects.filter(
+            student=self.student,
+            course_id=self.course_key,
+            module_state_key__in=list(locations),
+        ).only('module_state_key', 'grade', 'max_grade')
+        for current in current_student_modules:
+            loaded = student_module_cache.get(current.module_state_key)
+            loaded_grade = (loaded.grade, loaded.max_grade) if loaded is not None else (None, None)
+            if (current.grade, current.max_grade) != loaded_grade:
+                StudentSectionGrade.objects.filter(
+                    student=self.student, course_id=self.course_key, section_key=section_key
+                ).delete()
+                self._section_grades.pop(section_key.to_deprecated_string(), None)
+                return
+
+
+def _section_has_external_scores(section, submissions_scores):
+    """
+    Return True if any score in `section` can change without a grade event
+    being written to StudentModule, which means the section must be regraded
+    every time rather than read from its persisted grade.
+    """
+    # some problems have state that is updated independently of interaction
+    # with the LMS, so they need to always be scored. (E.g. foldit.,
+    # combinedopenended)
+    if any(descriptor.always_recalculate_grades for descriptor in section['xmoduledescriptors']):
+        return True
+
+    # Scores registered with the submissions API (e.g. openassessment) are
+    # also kept outside of StudentModule.
+    return any(
+        descriptor.location.to_deprecated_string() in submissions_scores
+        for descriptor in section['xmoduledescriptors']
+    )
+
+
 def answer_distributions(course_key):
     """
     Given a course_key, return answer distributions in the form of a dictionary
@@ -79,9 +302,18 @@ def answer_distributions(course_key):
     generate the report.
 
     This method will try to use a read-replica database if one is available.
+    The submissions are read ANSWER_DISTRIBUTION_MODULES_PER_QUERY at a time,
+    loading only the columns we need, so memory use depends on the number of
+    distinct answers rather than on the number of students.
     """
-    # dict: { module.module_state_key : (url_name, display_name) }
-    state_keys_to_problem_info = {}  # For caching, used by url_and_display_name
+    # dict: { problem usage_key : (url_name, display_name) }, with every
+    # problem in the course fetched up front in a single modulestore call.
+    # Keys that turn out not to exist map to None, so that we only look for
+    # each deleted problem once.
+    state_keys_to_problem_info = {
+        problem.location: (problem.url_name, problem.display_name_with_default)
+        for problem in modulestore().get_items(course_key, category='problem')
+    }
 
     def url_and_display_name(usage_key):
         """
@@ -93,18 +325,26 @@ def answer_distributions(course_key):
             ItemNotFoundError: if there is no content that corresponds
                 to this usage_key.
         """
-        problem_store = modulestore()
         if usage_key not in state_keys_to_problem_info:
-            problem = problem_store.get_item(usage_key)
-            problem_info = (problem.url_name, problem.display_name_with_default)
-            state_keys_to_problem_info[usage_key] = problem_info
-
-        return state_keys_to_problem_info[usage_key]
+            try:
+                problem = modulestore().get_item(usage_key)
+                state_keys_to_problem_info[usage_key] = (problem.url_name, problem.display_name_with_default)
+            except ItemNotFoundError:
+                state_keys_to_problem_info[usage_key] = None
+
+        problem_info = state_keys_to_problem_info[usage_key]
+        if problem_info is None:
+            raise ItemNotFoundError(usage_key)
+        return problem_info
+
+    submitted_problems = StudentModule.all_submitted_problems_read_only(course_key).only(
+        'id', 'student', 'module_state_key', 'state'
+    )
 
     # Iterate through all problems submitted for this course in no particular
     # order, and build up our answer_counts dict that we will eventually return
     answer_counts = defaultdict(lambda: defaultdict(int))
-    for module in StudentModule.all_submitted_problems_read_only(course_key):
+    for module in iterate_in_chunks(submitted_problems, ANSWER_DISTRIBUTION_MODULES_PER_QUERY):
         try:
             state_dict = json.loads(module.state) if module.state else {}
             raw_answers = state_dict.get("student_answers", {})
@@ -141,16 +381,16 @@ def answer_distributions(course_key):
     return answer_counts
 
 @transaction.commit_manually
-def grade(student, request, course, keep_raw_scores=False):
+def grade(student, request, course, keep_raw_scores=False, persist_section_grades=False):
     """
     Wraps "_grade" with the manual_transaction context manager just in case
     there are unanticipated errors.
     """
     with manual_transaction():
-        return _grade(student, request, course, keep_raw_scores)
+        return _grade(student, request, course, keep_raw_scores, persist_section_grades)
 
 
-def _grade(student, request, course, keep_raw_scores):
+def _grade(student, request, course, keep_raw_scores, persist_section_grades):
     """
     Unwrapped version of "grade"
 
@@ -168,6 +408,10 @@ def _grade(student, request, course, keep_raw_scores):
       make up the final grade. (For display)
     - keep_raw_scores : if True, then value for key 'raw_scores' contains scores
       for every graded module
+    - persist_section_grades : if True, the sections that had to be regraded
+      are written back to StudentSectionGrade. Persisted grades are always
+      read; only batch grading (e.g. grade reports) should write them, so that
+      viewing a grade doesn't write to the database.
 
     More information on the format is in the docstring for CourseGrader.
     """
@@ -181,6 +425,24 @@ def _grade(student, request, course, keep_raw_scores):
         course.id.to_deprecated_string(), anonymous_id_for_user(student, course.id)
     )
 
+    # Load the grades of every StudentModule this student has in the course
+    # with a single query, rather than one query per problem.
+    with manual_transaction():
+        student_module_cache = StudentModuleScoresCache(course.id, student)
+        section_grades_cache = SectionGradesCache(course, student)
+
+    # A single FieldDataCache is shared by every module we have to instantiate,
+    # and only gets populated for the descriptors that are actually created.
+    field_data_cache = FieldDataCache([], course.id, student)
+
+    def create_module(descriptor):
+        '''creates an XModule instance given a descriptor'''
+        # TODO: We need the request to pass into here. If we could forego that, our arguments
+        # would be simpler
+        with manual_transaction():
+            field_data_cache.add_descriptors([descriptor])
+        return get_module_for_descriptor(student, request, descriptor, field_data_cache, course.id)
+
     totaled_scores = {}
     # This next complicated loop is just to collect the totaled_scores, which is
     # passed to the grader
@@ -190,64 +452,57 @@ def _grade(student, request, course, keep_raw_scores):
             section_descriptor = section['section_descriptor']
             section_name = section_descriptor.display_name_with_default
 
-            # some problems have state that is updated independently of interaction
-            # with the LMS, so they need to always be scored. (E.g. foldit.,
-            # combinedopenended)
-            should_grade_section = any(
-                descriptor.always_recalculate_grades for descriptor in section['xmoduledescriptors']
-            )
+            # Sections with scores kept outside of StudentModule always have to
+            # be graded, and can't be served from their persisted grade.
+            should_grade_section = _section_has_external_scores(section, submissions_scores)
+            use_persisted_grade = not should_grade_section and not settings.GENERATE_PROFILE_SCORES
 
-            # If there are no problems that always have to be regraded, check to
-            # see if any of our locations are in the scores from the submissions
-            # API. If scores exist, we have to calculate grades for this section.
             if not should_grade_section:
                 should_grade_section = any(
-                    descriptor.location.to_deprecated_string() in submissions_scores
+                    descriptor.location in student_module_cache
                     for descriptor in section['xmoduledescriptors']
                 )
 
-            if not should_grade_section:
-                with manual_transaction():
-                    should_grade_section = StudentModule.objects.filter(
-                        student=student,
-                        module_state_key__in=[
-                            descriptor.location for descriptor in section['xmoduledescriptors']
-                        ]
-                    ).exists()
-
             # If we haven't seen a single problem in the section, we don't have
             # to grade it at all! We can assume 0%
             if should_grade_section:
-                scores = []
-
-                def create_module(descriptor):
-                    '''creates an XModule instance given a descriptor'''
-                    # TODO: We need the request to pass into here. If we could forego that, our arguments
-                    # would be simpler
-                    with manual_transaction():
-                        field_data_cache = FieldDataCache([descriptor], course.id, student)
-                    return get_module_for_descriptor(student, request, descriptor, field_data_cache, course.id)
-
-                for module_descriptor in yield_dynamic_descriptor_descendents(section_descriptor, create_module):
-
-                    (correct, total) = get_score(
-                        course.id, student, module_descriptor, create_module, scores_cache=submissions_scores
-                    )
-                    if correct is None and total is None:
-                        continue
-
-                    if settings.GENERATE_PROFILE_SCORES:  	# for debugging!
-                        if total > 1:
-                            correct = random.randrange(max(total - 2, 1), total + 1)
-                        else:
-                            correct = total
-
-                    graded = module_descriptor.graded
-                    if not total > 0:
-                        #We simply cannot grade a problem that is 12/0, because we might need it as a percentage
-                        graded = False
-
-                    scores.append(Score(correct, total, graded, module_descriptor.display_name_with_default))
+                scores = section_grades_cache.get_scores(section) if use_persisted_grade else None
+
+                if scores is None:
+                    scored_modules = []
+
+                    for module_descriptor in yield_dynamic_descriptor_descendents(section_descriptor, create_module):
+
+                        (correct, total) = get_score(
+                            course.id, student, module_descriptor, create_module,
+                            scores_cache=submissions_scores,
+                            student_module_cache=student_module_cache,
+                        )
+                        if correct is None and total is None:
+                            continue
+
+                        if settings.GENERATE_PROFILE_SCORES:  	# for debugging!
+                            if total > 1:
+                                correct = random.randrange(max(total - 2, 1), total + 1)
+                            else:
+                                correct = total
+
+                        graded = module_descriptor.graded
+                        if not total > 0:
+                            #We simply cannot grade a problem that is 12/0, because we might need it as a percentage
+                            graded = False
+
+                        scored_modules.append((
+                            module_descriptor.location,
+                            Score(correct, total, graded, module_descriptor.display_name_with_default)
+                        ))
+
+                    scores = [score for _, score in scored_modules]
+                    if use_persisted_grade and persist_section_grades:
+                        with manual_transaction():
+                            section_grades_cache.set_scores(section, scored_modules)
+                        with manual_transaction():
+                            section_grades_cache.discard_stale_scores(section, scored_modules, student_module_cache)
 
                 _, graded_total = graders.aggregate_scores(scores, section_name)
                 if keep_raw_scores:
@@ -347,6 +602,17 @@ def _progress_summary(student, request, course):
             return None
 
     submissions_scores = sub_api.get_scores(course.id.to_deprecated_string(), anonymous_id_for_user(student, course.id))
+    with manual_transaction():
+        student_module_cache = StudentModuleScoresCache(course.id, student)
+        section_grades_cache = SectionGradesCache(course, student)
+
+    # Graded sections that can be served from their persisted grades, keyed by location
+    persisted_sections = {
+        section['section_descriptor'].location: section
+        for sections in course.grading_context['graded_sections'].itervalues()
+        for section in sections
+        if not _section_has_external_scores(section, submissions_scores)
+    }
 
     chapters = []
     # Don't include chapters that aren't displayable (e.g. due to error)
@@ -364,19 +630,29 @@ def _progress_summary(student, request, course):
                     continue
 
                 graded = section_module.graded
-                scores = []
+                scores = None
+
+                if section_module.location in persisted_sections:
+                    scores = section_grades_cache.get_scores(persisted_sections[section_module.location])
 
-                module_creator = section_module.xmodule_runtime.get_module
+                if scores is not None:
+                    scores = [score._replace(graded=graded) for score in scores]
+                else:
+                    scores = []
 
-                for module_descriptor in yield_dynamic_descriptor_descendents(section_module, module_creator):
-                    course_id = course.id
-                    (correct, total) = get_score(
-                        course_id, student, module_descriptor, module_creator, scores_cache=submissions_scores
-                    )
-                    if correct is None and total is None:
-                        continue
+                    module_creator = section_module.xmodule_runtime.get_module
 
-                    scores.append(Score(correct, total, graded, module_descriptor.display_name_with_default))
+                    for module_descriptor in yield_dynamic_descriptor_descendents(section_module, module_creator):
+                        course_id = course.id
+                        (correct, total) = get_score(
+                            course_id, student, module_descriptor, module_creator,
+                            scores_cache=submissions_scores,
+                            student_module_cache=student_module_cache,
+                        )
+                        if correct is None and total is None:
+                            continue
+
+                        scores.append(Score(correct, total, graded, module_descriptor.display_name_with_default))
 
                 scores.reverse()
                 section_total, _ = graders.aggregate_scores(
@@ -403,7 +679,7 @@ def _progress_summary(student, request, course):
     return chapters
 
 
-def get_score(course_id, user, problem_descriptor, module_creator, scores_cache=None):
+def get_score(course_id, user, problem_descriptor, module_creator, scores_cache=None, student_module_cache=None):
     """
     Return the score for a user on a problem, as a tuple (correct, total).
     e.g. (5,7) if you got 5 out of 7 points.
@@ -417,6 +693,9 @@ def get_score(course_id, user, problem_descriptor, module_creator, scores_cache=
            Can return None if user doesn't have access, or if something else went wrong.
     scores_cache: A dict of location names to (earned, possible) point tuples.
            If an entry is found in this cache, it takes precedence.
+    student_module_cache: A StudentModuleScoresCache for this user and course.
+           If given, the StudentModule is looked up there rather than queried
+           from the database.
     """
     scores_cache = scores_cache or {}
 
@@ -443,14 +722,17 @@ def get_score(course_id, user, problem_descriptor, module_creator, scores_cache=
         # These are not problems, and do not have a score
         return (None, None)
 
-    try:
-        student_module = StudentModule.objects.get(
-            student=user,
-            course_id=course_id,
-            module_state_key=problem_descriptor.location
-        )
-    except StudentModule.DoesNotExist:
-        student_module = None
+    if student_module_cache is not None:
+        student_module = student_module_cache.get(problem_descriptor.location)
+    else:
+        try:
+            student_module = StudentModule.objects.get(
+                student=user,
+                course_id=course_id,
+                module_state_key=problem_descriptor.location
+            )
+        except StudentModule.DoesNotExist:
+            student_module = None
 
     if student_module is not None and student_module.max_grade is not None:
         correct = student_module.grade if student_module.grade is not None else 0
@@ -475,7 +757,7 @@ def get_score(course_id, user, problem_descriptor, module_creator, scores_cache=
     weight = problem_descriptor.weight
     if weight is not None:
         if total == 0:
-            log.exception("Cannot reweight a problem with zero total points. Problem: " + str(student_module))
+            log.exception("Cannot reweight a problem with zero total points. Problem: " + str(problem_descriptor.location))
             return (correct, total)
         correct = correct * weight / total
         total = weight
@@ -530,7 +812,7 @@ def iterate_grades_for(course_id, students):
                 # It's not pretty, but untangling that is currently beyond the
                 # scope of this feature.
                 request.session = {}
-                gradeset = grade(student, request, course)
+                gradeset = grade(student, request, course, persist_section_grades=True)
                 yield student, gradeset, ""
             except Exception as exc:  # pylint: disable=broad-except
                 # Keep marching on even if this student couldn't be graded for
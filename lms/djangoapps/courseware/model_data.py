@@ -58,17 +58,39 @@ class FieldDataCache(object):
         select_for_update: True if rows should be locked until end of transaction
         '''
         self.cache = {}
-        self.descriptors = descriptors
+        self.descriptors = []
+        self._known_usage_ids = set()
         self.select_for_update = select_for_update
 
         assert isinstance(course_id, SlashSeparatedCourseKey)
         self.course_id = course_id
         self.user = user
 
-        if user.is_authenticated():
-            for scope, fields in self._fields_to_cache().items():
-                for field_object in self._retrieve_fields(scope, fields):
-                    self.cache[self._cache_key_from_field_object(scope, field_object)] = field_object
+        self.add_descriptors(descriptors)
+
+    def add_descriptors(self, descriptors):
+        """
+        Add all of the data needed by `descriptors` to this cache. Descriptors
+        that are already in the cache are skipped, so this can be called
+        repeatedly as modules are created without re-querying their data.
+
+        Data that is already cached is never overwritten.
+        """
+        new_descriptors = []
+        for descriptor in descriptors:
+            usage_id = descriptor.scope_ids.usage_id
+            if usage_id not in self._known_usage_ids:
+                self._known_usage_ids.add(usage_id)
+                new_descriptors.append(descriptor)
+        if not new_descriptors:
+            return
+
+        self.descriptors.extend(new_descriptors)
+
+        if self.user.is_authenticated():
+            for scope, fields in self._fields_to_cache(new_descriptors).items():
+                for field_object in self._retrieve_fields(scope, fields, new_descriptors):
+                    self.cache.setdefault(self._cache_key_from_field_object(scope, field_object), field_object)
 
     @classmethod
     def cache_for_descriptor_descendents(cls, course_id, user, descriptor, depth=None,
@@ -137,15 +159,16 @@ class FieldDataCache(object):
         )
         return res
 
-    def _retrieve_fields(self, scope, fields):
+    def _retrieve_fields(self, scope, fields, descriptors):
         """
         Queries the database for all of the fields in the specified scope
+        that are needed by `descriptors`
         """
         if scope == Scope.user_state:
             return self._chunked_query(
                 StudentModule,
                 'module_state_key__in',
-                (descriptor.scope_ids.usage_id for descriptor in self.descriptors),
+                (descriptor.scope_ids.usage_id for descriptor in descriptors),
                 course_id=self.course_id,
                 student=self.user.pk,
             )
@@ -153,14 +176,14 @@ class FieldDataCache(object):
             return self._chunked_query(
                 XModuleUserStateSummaryField,
                 'usage_id__in',
-                (descriptor.scope_ids.usage_id for descriptor in self.descriptors),
+                (descriptor.scope_ids.usage_id for descriptor in descriptors),
                 field_name__in=set(field.name for field in fields),
             )
         elif scope == Scope.preferences:
             return self._chunked_query(
                 XModuleStudentPrefsField,
                 'module_type__in',
-                set(descriptor.scope_ids.block_type for descriptor in self.descriptors),
+                set(descriptor.scope_ids.block_type for descriptor in descriptors),
                 student=self.user.pk,
                 field_name__in=set(field.name for field in fields),
             )
@@ -173,12 +196,13 @@ class FieldDataCache(object):
         else:
             return []
 
-    def _fields_to_cache(self):
+    def _fields_to_cache(self, descriptors):
         """
         Returns a map of scopes to fields in that scope that should be cached
+        for `descriptors`
         """
         scope_map = defaultdict(set)
-        for descriptor in self.descriptors:
+        for descriptor in descriptors:
             for field in descriptor.fields.values():
                 scope_map[field.scope].add(field)
         return scope_map
@@ -225,6 +249,13 @@ class FieldDataCache(object):
 
         return self.cache.get(self._cache_key_from_kvs_key(key))
 
+    def student_module(self, location):
+        '''
+        Returns the cached StudentModule of the user for the module at `location`,
+        or None if it isn't cached (or the user has never interacted with the module)
+        '''
+        return self.cache.get((Scope.user_state, location))
+
     def find_or_create(self, key):
         '''
         Find a model data object in this cache, or create it if it doesn't
@@ -12,10 +12,12 @@ file and check it in at the same time as your model changes. To do that,
 ASSUMPTIONS: modules have unique IDs, even across different module_types
 
 """
+import json
+
 from django.contrib.auth.models import User
 from django.conf import settings
 from django.db import models
-from django.db.models.signals import post_save
+from django.db.models.signals import post_save, post_delete
 from django.dispatch import receiver
 
 from xmodule_django.models import CourseKeyField, LocationKeyField
@@ -129,6 +131,92 @@ class StudentModuleHistory(models.Model):
             history_entry.save()
 
 
+class StudentSectionGrade(models.Model):
+    """
+    The persisted grade of a single graded section (subsection) of a course
+    for a student, so that grading doesn't have to walk the whole course.
+
+    A row is only valid while `structure_hash` matches the current structure
+    of the section. It's updated whenever the student gets a new score on any
+    of the modules it covers, and deleted when their state for one is.
+    """
+    class Meta:
+        unique_together = (('student', 'course_id', 'section_key'),)
+
+    student = models.ForeignKey(User, db_index=True)
+    course_id = CourseKeyField(max_length=255, db_index=True)
+    section_key = LocationKeyField(max_length=255, db_index=True)
+
+    # Hash of the section's scored modules and their grading settings at the
+    # time this grade was computed.
+    structure_hash = models.CharField(max_length=32)
+
+    # The scores of each scored module in the section, stored as JSON:
+    # [[module location, earned, possible, graded, display_name], ...]
+    scores = models.TextField(default='[]')
+
+    created = models.DateTimeField(auto_now_add=True, db_index=True)
+    modified = models.DateTimeField(auto_now=True, db_index=True)
+
+    @classmethod
+    def invalidate(cls, student_id, course_id, module_state_key):
+        """
+        Delete the persisted grades of any section in `course_id` whose score
+        depends on `module_state_key` for the given student.
+        """
+        # The quoted location is matched against the scores json in the
+        # database, so no row has to be loaded and parsed to find them.
+        cls.objects.filter(
+            student_id=student_id,
+            course_id=course_id,
+            scores__contains=json.dumps(module_state_key.to_deprecated_string()),
+        ).delete()
+
+    @classmethod
+    def update_module_score(cls, student_id, course_id, module_state_key, earned, possible, graded):
+        """
+        Replace the score of `module_state_key` in the persisted grades of the
+        sections in `course_id` whose score depends on it for the given
+        student, so that a new score keeps them current rather than making
+        them be regraded.
+
+        The rows are locked until the transaction ends, so that concurrent
+        new scores in the same section are each kept.
+        """
+        location = module_state_key.to_deprecated_string()
+        section_grades = cls.objects.select_for_update().filter(
+            student_id=student_id,
+            course_id=course_id,
+            scores__contains=json.dumps(location),
+        )
+        for section_grade in section_grades:
+            scores = json.loads(section_grade.scores)
+            for score in scores:
+                if score[0] == location:
+                    score[1:4] = [earned, possible, graded]
+            section_grade.scores = json.dumps(scores)
+            section_grade.save()
+
+    @receiver(post_delete, sender=StudentModule)
+    def invalidate_for_deleted_state(sender, instance, **kwargs):  # pylint: disable=no-self-argument, unused-argument
+        """
+        Resetting a student's state for a module can change their score, so
+        any section grade depending on it must be recomputed.
+        """
+        StudentSectionGrade.invalidate(instance.student_id, instance.course_id, instance.module_state_key)
+
+    def __repr__(self):
+        return 'StudentSectionGrade<%r>' % ({
+            'course_id': self.course_id,
+            'student': self.student_id,
+            'section_key': self.section_key,
+            'scores': self.scores[:20],
+        },)
+
+    def __unicode__(self):
+        return unicode(repr(self))
+
+
 class XModuleUserStateSummaryField(models.Model):
     """
     Stores data set in the Scope.user_state_summary scope by an xmodule field
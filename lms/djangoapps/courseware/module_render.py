@@ -1,10 +1,12 @@
 import json
 import logging
 import mimetypes
+import weakref
 
 import static_replace
 
 from functools import partial
+from lazy import lazy
 from requests.auth import HTTPBasicAuth
 from dogapi import dog_stats_api
 from opaque_keys import InvalidKeyError
@@ -21,6 +23,7 @@ from capa.xqueue_interface import XQueueInterface
 from courseware.access import has_access, get_user_role
 from courseware.masquerade import setup_masquerade
 from courseware.model_data import FieldDataCache, DjangoKeyValueStore
+from courseware.models import StudentSectionGrade
 from lms.lib.xblock.field_data import LmsFieldData
 from lms.lib.xblock.runtime import LmsModuleSystem, unquote_slashes, quote_slashes
 from edxmako.shortcuts import render_to_string
@@ -37,8 +40,9 @@ from xmodule.exceptions import NotFoundError, ProcessingError
 from xmodule.modulestore.locations import SlashSeparatedCourseKey
 from xmodule.modulestore.django import modulestore, ModuleI18nService
 from xmodule.modulestore.exceptions import ItemNotFoundError
+from xmodule.progress import Progress
 from xmodule.util.duedate import get_extended_due_date
-from xmodule_modifiers import replace_course_urls, replace_jump_to_id_urls, replace_static_urls, add_staff_markup, wrap_xblock
+from xmodule_modifiers import rewrite_urls, add_staff_markup, wrap_xblock
 from xmodule.lti_module import LTIModule
 from xmodule.x_module import XModuleDescriptor
 
@@ -221,6 +225,177 @@ def get_module_for_descriptor(user, request, descriptor, field_data_cache, cours
                                               static_asset_path)
 
 
+class ModuleSystemPrototype(object):
+    """
+    The parts of an LmsModuleSystem that only depend on the user and the course.
+
+    A page renders many modules for the same user and course, so these are
+    computed (lazily) once and shared by the module systems of all of them,
+    instead of being recomputed for every module. Use
+    `get_module_system_prototype` to get the prototype for a FieldDataCache.
+    """
+    def __init__(self, user, course_id):
+        self.user = user
+        self.course_id = course_id
+        self._anonymous_student_ids = {}
+        self._url_rewriters = {}
+
+    @lazy
+    def jump_to_id_base_url(self):
+        """
+        The base url of intra-courseware links (/jump_to_id/<id>).
+
+        NOTE: module_id is empty string here. The 'module_id' will get assigned in the replacement
+        function, we just need to specify something to get the reverse() to work.
+        """
+        return reverse('jump_to_id', kwargs={'course_id': self.course_id.to_deprecated_string(), 'module_id': ''})
+
+    @lazy
+    def user_is_staff(self):
+        """Whether the user has staff access to the course."""
+        return has_access(self.user, u'staff', self.course_id)
+
+    @lazy
+    def user_is_admin(self):
+        """Whether the user is global staff."""
+        return has_access(self.user, u'staff', 'global')
+
+    def anonymous_student_id(self, per_course):
+        """
+        The anonymized id of the user, either specific to the course (if `per_course`)
+        or the same for all courses.
+        """
+        if per_course not in self._anonymous_student_ids:
+            self._anonymous_student_ids[per_course] = anonymous_id_for_user(
+                self.user, self.course_id if per_course else None
+            )
+        return self._anonymous_student_ids[per_course]
+
+    @lazy
+    def open_ended_grading_interface(self):
+        """The settings needed by modules that use the open ended grading interface."""
+        open_ended_grading_interface = settings.OPEN_ENDED_GRADING_INTERFACE
+        open_ended_grading_interface['mock_peer_grading'] = settings.MOCK_PEER_GRADING
+        open_ended_grading_interface['mock_staff_grading'] = settings.MOCK_STAFF_GRADING
+        return open_ended_grading_interface
+
+    @lazy
+    def s3_interface(self):
+        """The settings needed by modules that upload files to S3."""
+        return {
+            'access_key': getattr(settings, 'AWS_ACCESS_KEY_ID', ''),
+            'secret_access_key': getattr(settings, 'AWS_SECRET_ACCESS_KEY', ''),
+            'storage_bucket_name': getattr(settings, 'AWS_STORAGE_BUCKET_NAME', 'openended')
+        }
+
+    @lazy
+    def xmodule_display_wrapper(self):
+        """
+        Wraps the output display in a single div to allow for the XModule
+        javascript to be bound correctly.
+        """
+        return partial(
+            wrap_xblock, 'LmsRuntime',
+            extra_data={'course-id': self.course_id.to_deprecated_string()},
+            usage_id_serializer=lambda usage_id: quote_slashes(usage_id.to_deprecated_string())
+        )
+
+    def url_rewriter(self, data_directory, static_asset_path):
+        """
+        The UrlRewriter of the modules of the course stored in `data_directory`
+        with `static_asset_path`, which remembers the static urls it resolves.
+        """
+        key = (data_directory, static_asset_path)
+        if key not in self._url_rewriters:
+            self._url_rewriters[key] = static_replace.UrlRewriter(
+                data_directory,
+                course_id=self.course_id,
+                static_asset_path=static_asset_path,
+                jump_to_id_base_url=self.jump_to_id_base_url,
+            )
+        return self._url_rewriters[key]
+
+    @lazy
+    def course_block_wrappers(self):
+        """
+        The wrapping functions applied to the output of every module of the course,
+        after the ones that are specific to each module.
+        """
+        block_wrappers = []
+        if settings.FEATURES.get('DISPLAY_DEBUG_INFO_TO_STAFF') and self.user_is_staff:
+            block_wrappers.append(partial(add_staff_markup, self.user))
+        return block_wrappers
+
+
+# The ModuleSystemPrototypes of each FieldDataCache. A FieldDataCache is
+# created for a single user, course and request, so the prototypes go away
+# along with it.
+_MODULE_SYSTEM_PROTOTYPES = weakref.WeakKeyDictionary()
+
+
+def get_module_system_prototype(user, field_data_cache, course_id):
+    """
+    Return the ModuleSystemPrototype of `user` and `course_id` that is shared
+    by all the modules bound with `field_data_cache`.
+    """
+    prototypes = _MODULE_SYSTEM_PROTOTYPES.setdefault(field_data_cache, {})
+    key = (user.id, course_id)
+    if key not in prototypes:
+        prototypes[key] = ModuleSystemPrototype(user, course_id)
+    return prototypes[key]
+
+
+def unit_progress(unit_descriptor, module_creator, field_data_cache):
+    """
+    Returns the Progress of the user through the scored modules in `unit_descriptor`,
+    as recorded in their StudentModules in `field_data_cache`, or None if it has none.
+
+    Unlike the get_progress() of the unit's module, this doesn't load the scored
+    modules: the ones the user hasn't been graded on yet count as 0 out of their
+    weight (or out of 1), which gives the same progress status.
+    """
+    progress = None
+    descriptors = [unit_descriptor]
+    while descriptors:
+        descriptor = descriptors.pop()
+        if descriptor.has_dynamic_children():
+            module = module_creator(descriptor)
+            descriptors.extend(module.get_child_descriptors() if module is not None else [])
+        else:
+            descriptors.extend(descriptor.get_children())
+
+        if not descriptor.has_score:
+            continue
+        weight = getattr(descriptor, 'weight', None)
+        if weight == 0:
+            continue
+
+        student_module = field_data_cache.student_module(descriptor.location)
+        if student_module is not None and student_module.max_grade:
+            score, total = student_module.grade or 0, student_module.max_grade
+            if weight is not None:
+                score, total = float(score) * weight / total, weight
+        else:
+            score, total = 0, weight or 1
+        progress = Progress.add_counts(progress, Progress(score, total))
+    return progress
+
+
+def _weighted_score(descriptor, grade, max_grade):
+    """
+    Returns the (earned, possible, graded) score that grading gives the module
+    of `descriptor` for a StudentModule with `grade` out of `max_grade` (see
+    courseware.grades.get_score), or None if it has no max_grade.
+    """
+    if max_grade is None:
+        return None
+    earned, possible = grade or 0, max_grade
+    weight = descriptor.weight
+    if weight is not None and possible != 0:
+        earned, possible = float(earned) * weight / possible, weight
+    return earned, possible, bool(descriptor.graded and possible > 0)
+
+
 def get_module_system_for_user(user, field_data_cache,
                                # Arguments preceding this comment have user binding, those following don't
                                descriptor, course_id, track_function, xqueue_callback_url_prefix,
@@ -241,9 +416,14 @@ def get_module_system_for_user(user, field_data_cache,
     Arguments:
         see arguments for get_module()
 
+    The parts of the module system that only depend on the user and the course are shared by all the modules
+    bound with `field_data_cache` (see `ModuleSystemPrototype`), so only the descriptor specific parts are
+    computed here.
+
     Returns:
         (LmsModuleSystem, KvsFieldData):  (module system, student_data) bound to, primarily, the user and descriptor
     """
+    prototype = get_module_system_prototype(user, field_data_cache, course_id)
     student_data = KvsFieldData(DjangoKeyValueStore(field_data_cache))
 
     def make_xqueue_callback(dispatch='score_update'):
@@ -280,21 +460,9 @@ def get_module_system_for_user(user, field_data_cache,
     needs_open_ended_interface = getattr(descriptor, "needs_open_ended_interface", False)
     needs_s3_interface = getattr(descriptor, "needs_s3_interface", False)
 
-    # Initialize interfaces to None
-    open_ended_grading_interface = None
-    s3_interface = None
-
     # Create interfaces if needed
-    if needs_open_ended_interface:
-        open_ended_grading_interface = settings.OPEN_ENDED_GRADING_INTERFACE
-        open_ended_grading_interface['mock_peer_grading'] = settings.MOCK_PEER_GRADING
-        open_ended_grading_interface['mock_staff_grading'] = settings.MOCK_STAFF_GRADING
-    if needs_s3_interface:
-        s3_interface = {
-            'access_key': getattr(settings, 'AWS_ACCESS_KEY_ID', ''),
-            'secret_access_key': getattr(settings, 'AWS_SECRET_ACCESS_KEY', ''),
-            'storage_bucket_name': getattr(settings, 'AWS_STORAGE_BUCKET_NAME', 'openended')
-        }
+    open_ended_grading_interface = prototype.open_ended_grading_interface if needs_open_ended_interface else None
+    s3_interface = prototype.s3_interface if needs_s3_interface else None
 
     def inner_get_module(descriptor):
         """
@@ -309,6 +477,12 @@ def get_module_system_for_user(user, field_data_cache,
                                                   position, wrap_xmodule_display, grade_bucket_type,
                                                   static_asset_path)
 
+    def can_load(descriptor):
+        """
+        Returns whether the user may see the module of `descriptor`, as inner_get_module checks.
+        """
+        return not getattr(user, 'known', True) or has_access(user, 'load', descriptor, course_id)
+
     def handle_grade_event(block, event_type, event):
         user_id = event.get('user_id', user.id)
 
@@ -327,6 +501,14 @@ def get_module_system_for_user(user, field_data_cache,
         # Save all changes to the underlying KeyValueStore
         student_module.save()
 
+        # Keep the persisted grades of the sections containing this module
+        # current, so they're not regraded the next time this student is graded
+        score = _weighted_score(descriptor, student_module.grade, student_module.max_grade)
+        if score is None:
+            StudentSectionGrade.invalidate(user_id, course_id, descriptor.location)
+        else:
+            StudentSectionGrade.update_module_score(user_id, course_id, descriptor.location, *score)
+
         # Bin score into range and increment stats
         score_bucket = get_score_bucket(student_module.grade, student_module.max_grade)
 
@@ -398,42 +580,25 @@ def get_module_system_for_user(user, field_data_cache,
     # Wrap the output display in a single div to allow for the XModule
     # javascript to be bound correctly
     if wrap_xmodule_display is True:
-        block_wrappers.append(partial(
-            wrap_xblock, 'LmsRuntime',
-            extra_data={'course-id': course_id.to_deprecated_string()},
-            usage_id_serializer=lambda usage_id: quote_slashes(usage_id.to_deprecated_string())
-        ))
+        block_wrappers.append(prototype.xmodule_display_wrapper)
 
     # TODO (cpennington): When modules are shared between courses, the static
     # prefix is going to have to be specific to the module, not the directory
     # that the xml was loaded from
 
-    # Rewrite urls beginning in /static to point to course-specific content
-    block_wrappers.append(partial(
-        replace_static_urls,
+    url_rewriter = prototype.url_rewriter(
         getattr(descriptor, 'data_dir', None),
-        course_id=course_id,
-        static_asset_path=static_asset_path or descriptor.static_asset_path
-    ))
-
-    # Allow URLs of the form '/course/' refer to the root of multicourse directory
-    #   hierarchy of this course
-    block_wrappers.append(partial(replace_course_urls, course_id))
-
-    # this will rewrite intra-courseware links (/jump_to_id/<id>). This format
-    # is an improvement over the /course/... format for studio authored courses,
-    # because it is agnostic to course-hierarchy.
-    # NOTE: module_id is empty string here. The 'module_id' will get assigned in the replacement
-    # function, we just need to specify something to get the reverse() to work.
-    block_wrappers.append(partial(
-        replace_jump_to_id_urls,
-        course_id,
-        reverse('jump_to_id', kwargs={'course_id': course_id.to_deprecated_string(), 'module_id': ''}),
-    ))
+        static_asset_path or descriptor.static_asset_path
+    )
 
-    if settings.FEATURES.get('DISPLAY_DEBUG_INFO_TO_STAFF'):
-        if has_access(user, 'staff', descriptor, course_id):
-            block_wrappers.append(partial(add_staff_markup, user))
+    # Rewrite, in a single pass, urls beginning in /static to point to course-specific content,
+    # urls of the form '/course/' to the root of multicourse directory hierarchy of this course,
+    # and intra-courseware links (/jump_to_id/<id>). The latter format is an improvement over the
+    # /course/... format for studio authored courses, because it is agnostic to course-hierarchy.
+    block_wrappers.append(partial(rewrite_urls, url_rewriter))
+
+    # Add the staff debug info
+    block_wrappers.extend(prototype.course_block_wrappers)
 
     # These modules store data using the anonymous_student_id as a key.
     # To prevent loss of data, we will continue to provide old modules with
@@ -444,10 +609,7 @@ def get_module_system_for_user(user, field_data_cache,
     is_pure_xblock = isinstance(descriptor, XBlock) and not isinstance(descriptor, XModuleDescriptor)
     module_class = getattr(descriptor, 'module_class', None)
     is_lti_module = not is_pure_xblock and issubclass(module_class, LTIModule)
-    if is_pure_xblock or is_lti_module:
-        anonymous_student_id = anonymous_id_for_user(user, course_id)
-    else:
-        anonymous_student_id = anonymous_id_for_user(user, None)
+    anonymous_student_id = prototype.anonymous_student_id(per_course=is_pure_xblock or is_lti_module)
 
     system = LmsModuleSystem(
         track_function=track_function,
@@ -463,21 +625,9 @@ def get_module_system_for_user(user, field_data_cache,
         # TODO (cpennington): This should be removed when all html from
         # a module is coming through get_html and is therefore covered
         # by the replace_static_urls code below
-        replace_urls=partial(
-            static_replace.replace_static_urls,
-            data_directory=getattr(descriptor, 'data_dir', None),
-            course_id=course_id,
-            static_asset_path=static_asset_path or descriptor.static_asset_path,
-        ),
-        replace_course_urls=partial(
-            static_replace.replace_course_urls,
-            course_key=course_id
-        ),
-        replace_jump_to_id_urls=partial(
-            static_replace.replace_jump_to_id_urls,
-            course_id=course_id,
-            jump_to_id_base_url=reverse('jump_to_id', kwargs={'course_id': course_id.to_deprecated_string(), 'module_id': ''})
-        ),
+        replace_urls=url_rewriter.replace_static_urls,
+        replace_course_urls=url_rewriter.replace_course_urls,
+        replace_jump_to_id_urls=url_rewriter.replace_jump_to_id_urls,
         node_path=settings.NODE_PATH,
         publish=publish,
         anonymous_student_id=anonymous_student_id,
@@ -506,11 +656,19 @@ def get_module_system_for_user(user, field_data_cache,
             make_psychometrics_data_update_handler(course_id, user, descriptor.location)
         )
 
-    system.set(u'user_is_staff', has_access(user, u'staff', descriptor.location, course_id))
-    system.set(u'user_is_admin', has_access(user, u'staff', 'global'))
+    if settings.FEATURES.get('ENABLE_LAZY_SEQUENCE_TABS'):
+        system.set('lazy_sequence_neighbors', settings.LAZY_SEQUENCE_NEIGHBORS)
+        system.set(
+            'progress_summary',  # progress of the units a sequence doesn't render, without loading them
+            partial(unit_progress, module_creator=inner_get_module, field_data_cache=field_data_cache)
+        )
+        system.set('can_load', can_load)  # whether a sequence shows a unit, without loading it
+
+    system.set(u'user_is_staff', prototype.user_is_staff)
+    system.set(u'user_is_admin', prototype.user_is_admin)
 
     # make an ErrorDescriptor -- assuming that the descriptor's system is ok
-    if has_access(user, u'staff', descriptor.location, course_id):
+    if prototype.user_is_staff:
         system.error_descriptor_class = ErrorDescriptor
     else:
         system.error_descriptor_class = NonStaffErrorDescriptor
@@ -1,12 +1,15 @@
 import courseware.access as access
 import datetime
 
-from mock import Mock
+from mock import Mock, patch
 
+from django.conf import settings
 from django.test import TestCase
 from django.test.utils import override_settings
 
+from course_summaries.models import CourseSummary
 from courseware.tests.factories import UserFactory, StaffFactory, InstructorFactory
+from student.roles import CourseBetaTesterRole
 from student.tests.factories import AnonymousUserFactory, CourseEnrollmentAllowedFactory
 from courseware.tests.tests import TEST_DATA_MIXED_MODULESTORE
 import pytz
@@ -129,6 +132,29 @@ class AccessTestCase(TestCase):
         # TODO:
         # Non-staff cannot enroll outside the open enrollment period if not specifically allowed
 
+    @patch.dict(settings.FEATURES, {'DISABLE_START_DATES': False})
+    def test__has_access_course_summaries_roles_query(self):
+        """
+        The beta tester and staff checks of any number of course summaries
+        share the user's roles, which take a single query.
+        """
+        start = datetime.datetime.now(pytz.utc) + datetime.timedelta(days=1)
+        summaries = [
+            CourseSummary(
+                course_id=SlashSeparatedCourseKey('edX', 'course{}'.format(i), 'Run'),
+                start=start, days_early_for_beta=2
+            )
+            for i in range(5)
+        ]
+        user = UserFactory()
+        CourseBetaTesterRole(summaries[0].id).add_users(user)
+
+        with self.assertNumQueries(1):
+            self.assertTrue(access.has_access(user, 'load', summaries[0]))
+            for summary in summaries[1:]:
+                self.assertFalse(access.has_access(user, 'load', summary))
+                self.assertFalse(access.has_access(user, 'staff', summary))
+
     def test__user_passed_as_none(self):
         """Ensure has_access handles a user being passed as null"""
         access.has_access(None, 'staff', 'global', None)
@@ -1,20 +1,27 @@
 """
 Test grade calculation.
 """
+import json
+
+from django.contrib.auth.models import AnonymousUser
+from django.core.cache import cache as django_cache
 from django.http import Http404
+from django.test import TestCase
 from django.test.utils import override_settings
-from mock import patch
+from mock import Mock, patch
 
+from courseware.tests.factories import StudentModuleFactory, course_id, location
 from courseware.tests.modulestore_config import TEST_DATA_MIXED_MODULESTORE
 from student.tests.factories import UserFactory
 from xmodule.modulestore.tests.factories import CourseFactory
 from xmodule.modulestore.tests.django_utils import ModuleStoreTestCase
 from xmodule.modulestore.locations import SlashSeparatedCourseKey
 
-from courseware.grades import grade, iterate_grades_for
+from courseware.grades import grade, iterate_grades_for, section_structure_hashes, StudentModuleScoresCache
+from courseware.models import StudentSectionGrade
 
 
-def _grade_with_errors(student, request, course, keep_raw_scores=False):
+def _grade_with_errors(student, request, course, keep_raw_scores=False, persist_section_grades=False):
     """This fake grade method will throw exceptions for student3 and
     student4, but allow any other students to go through normal grading.
 
@@ -25,7 +32,9 @@ def _grade_with_errors(student, request, course, keep_raw_scores=False):
     if student.username in ['student3', 'student4']:
         raise Exception("I don't like {}".format(student.username))
 
-    return grade(student, request, course, keep_raw_scores=keep_raw_scores)
+    return grade(
+        student, request, course, keep_raw_scores=keep_raw_scores, persist_section_grades=persist_section_grades
+    )
 
 
 @override_settings(MODULESTORE=TEST_DATA_MIXED_MODULESTORE)
@@ -121,3 +130,125 @@ class TestGradeIteration(ModuleStoreTestCase):
                 students_to_errors[student] = err_msg
 
         return students_to_gradesets, students_to_errors
+
+
+class TestStudentModuleScoresCache(TestCase):
+    """
+    Test the prefetched map of StudentModule grades used while grading.
+    """
+    def setUp(self):
+        self.student = UserFactory.create()
+        StudentModuleFactory.create(
+            student=self.student, course_id=course_id, module_state_key=location('graded'),
+            grade=3, max_grade=5,
+        )
+        StudentModuleFactory.create(
+            student=self.student, course_id=course_id, module_state_key=location('ungraded'),
+            grade=None, max_grade=None,
+        )
+        # Rows for other students must not leak into the cache
+        StudentModuleFactory.create(
+            student=UserFactory.create(), course_id=course_id, module_state_key=location('other'),
+            grade=1, max_grade=1,
+        )
+
+    def test_single_query(self):
+        with self.assertNumQueries(1):
+            cache = StudentModuleScoresCache(course_id, self.student)
+
+        with self.assertNumQueries(0):
+            student_module = cache.get(location('graded'))
+            self.assertEqual((student_module.grade, student_module.max_grade), (3, 5))
+            self.assertIn(location('ungraded'), cache)
+            self.assertNotIn(location('other'), cache)
+            self.assertIsNone(cache.get(location('other')))
+
+    def test_anonymous_user(self):
+        with self.assertNumQueries(0):
+            cache = StudentModuleScoresCache(course_id, AnonymousUser())
+        self.assertNotIn(location('graded'), cache)
+
+
+class TestStudentSectionGradeInvalidation(TestCase):
+    """
+    Test that persisted section grades are updated when one of their scores
+    changes, and dropped when the state it came from is deleted.
+    """
+    def setUp(self):
+        self.student = UserFactory.create()
+        self.section_grade = StudentSectionGrade.objects.create(
+            student=self.student,
+            course_id=course_id,
+            section_key=location('section'),
+            structure_hash='hash',
+            scores=json.dumps([[location('problem').to_deprecated_string(), 1.0, 2.0, True, 'Problem']]),
+        )
+
+    def test_unrelated_module(self):
+        StudentSectionGrade.invalidate(self.student.id, course_id, location('other_problem'))
+        self.assertTrue(StudentSectionGrade.objects.filter(id=self.section_grade.id).exists())
+
+    def test_module_with_same_prefix(self):
+        StudentSectionGrade.invalidate(self.student.id, course_id, location('problem_2'))
+        self.assertTrue(StudentSectionGrade.objects.filter(id=self.section_grade.id).exists())
+
+    def test_scored_module(self):
+        StudentSectionGrade.invalidate(self.student.id, course_id, location('problem'))
+        self.assertFalse(StudentSectionGrade.objects.filter(id=self.section_grade.id).exists())
+
+    def test_deleted_student_module(self):
+        student_module = StudentModuleFactory.create(
+            student=self.student, course_id=course_id, module_state_key=location('problem'),
+        )
+        student_module.delete()
+        self.assertFalse(StudentSectionGrade.objects.filter(id=self.section_grade.id).exists())
+
+    def test_update_module_score(self):
+        StudentSectionGrade.update_module_score(self.student.id, course_id, location('problem'), 2.0, 2.0, True)
+        self.assertEqual(
+            json.loads(StudentSectionGrade.objects.get(id=self.section_grade.id).scores),
+            [[location('problem').to_deprecated_string(), 2.0, 2.0, True, 'Problem']]
+        )
+
+    def test_update_unrelated_module_score(self):
+        StudentSectionGrade.update_module_score(self.student.id, course_id, location('problem_2'), 2.0, 2.0, True)
+        self.assertEqual(StudentSectionGrade.objects.get(id=self.section_grade.id).scores, self.section_grade.scores)
+
+
+class TestSectionStructureHashes(TestCase):
+    """
+    Test that section structure hashes are computed once per published version of a course.
+    """
+    def setUp(self):
+        self.sections = [
+            {'section_descriptor': Mock(location=location(name)), 'xmoduledescriptors': []}
+            for name in ('section_1', 'section_2')
+        ]
+        self.course = Mock(id=course_id, grading_context={'graded_sections': {'Homework': self.sections}})
+        self.store = Mock()
+        self.store.get_course_published_version.return_value = 'v1'
+        patcher = patch('courseware.grades.modulestore', return_value=self.store)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.addCleanup(django_cache.clear)
+
+    @patch('courseware.grades.section_structure_hash', side_effect=lambda section: 'hash')
+    def test_cached_for_version(self, structure_hash):
+        expected = {
+            location('section_1').to_deprecated_string(): 'hash',
+            location('section_2').to_deprecated_string(): 'hash',
+        }
+        self.assertEqual(section_structure_hashes(self.course), expected)
+        self.assertEqual(section_structure_hashes(self.course), expected)
+        self.assertEqual(structure_hash.call_count, 2)
+
+        self.store.get_course_published_version.return_value = 'v2'
+        self.assertEqual(section_structure_hashes(self.course), expected)
+        self.assertEqual(structure_hash.call_count, 4)
+
+    @patch('courseware.grades.section_structure_hash', side_effect=lambda section: 'hash')
+    def test_uncached_without_version(self, structure_hash):
+        self.store.get_course_published_version.return_value = None
+        section_structure_hashes(self.course)
+        section_structure_hashes(self.course)
+        self.assertEqual(structure_hash.call_count, 4)
@@ -339,3 +339,23 @@ class TestStudentInfoStorage(OtherUserFailureTestMixin, StorageTestBase, TestCas
     storage_class = XModuleStudentInfoField
     other_key_factory = partial(DjangoKeyValueStore.Key, Scope.user_info, 2, 'mock_problem')  # user_id=2, not 1
     existing_field_name = "existing_field"
+
+
+class TestCachedStudentModule(TestCase):
+    """Tests for FieldDataCache.student_module"""
+    def setUp(self):
+        self.student_module = StudentModuleFactory(grade=1, max_grade=2)
+        self.user = self.student_module.student
+        self.field_data_cache = FieldDataCache(
+            [mock_descriptor([mock_field(Scope.user_state, 'a_field')])], course_id, self.user
+        )
+
+    def test_cached(self):
+        with self.assertNumQueries(0):
+            student_module = self.field_data_cache.student_module(location('usage_id'))
+        self.assertEqual(student_module, self.student_module)
+        self.assertEqual((student_module.grade, student_module.max_grade), (1, 2))
+
+    def test_missing(self):
+        with self.assertNumQueries(0):
+            self.assertIsNone(self.field_data_cache.student_module(location('other_id')))
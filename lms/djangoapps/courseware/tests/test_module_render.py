@@ -768,6 +768,46 @@ class TestStaffDebugInfo(ModuleStoreTestCase):
             self.assertTrue(mock_grade_histogram.called)
 
 
+@override_settings(MODULESTORE=TEST_DATA_MIXED_MODULESTORE)
+class TestModuleSystemPrototype(ModuleStoreTestCase):
+    """
+    Tests that the user and course specific parts of the module systems are shared.
+    """
+    def setUp(self):
+        self.user = UserFactory.create()
+        self.course = CourseFactory.create()
+        self.descriptors = [
+            ItemFactory.create(parent_location=self.course.location, category='html', data='html {}'.format(index))
+            for index in range(3)
+        ]
+        self.field_data_cache = FieldDataCache(self.descriptors, self.course.id, self.user)
+
+    def _get_module(self, descriptor, field_data_cache):
+        """Bind `descriptor` to the user, using `field_data_cache`."""
+        return render.get_module_for_descriptor_internal(
+            self.user, descriptor, field_data_cache, self.course.id,
+            Mock(),  # Track Function
+            'http://xqueue.callback.prefix',
+        )
+
+    def test_prototype_shared_by_field_data_cache(self):
+        with patch('courseware.module_render.anonymous_id_for_user', return_value='anon_id') as mock_anonymous_id:
+            modules = [self._get_module(descriptor, self.field_data_cache) for descriptor in self.descriptors]
+
+        self.assertEquals(mock_anonymous_id.call_count, 1)
+        runtimes = [module.xmodule_runtime for module in modules]
+        for runtime in runtimes:
+            self.assertEquals(runtime.anonymous_student_id, 'anon_id')
+            self.assertEqual(runtime.replace_jump_to_id_urls, runtimes[0].replace_jump_to_id_urls)
+
+    def test_prototype_not_shared_across_field_data_caches(self):
+        other_field_data_cache = FieldDataCache(self.descriptors, self.course.id, self.user)
+        self.assertIsNot(
+            render.get_module_system_prototype(self.user, self.field_data_cache, self.course.id),
+            render.get_module_system_prototype(self.user, other_field_data_cache, self.course.id),
+        )
+
+
 PER_COURSE_ANONYMIZED_DESCRIPTORS = (LTIDescriptor, )
 
 PER_STUDENT_ANONYMIZED_DESCRIPTORS = [
@@ -1005,3 +1045,88 @@ class TestRebindModule(TestSubmittingProblems):
         self.assertEqual(module.system.anonymous_student_id, anonymous_id_for_user(user2, self.course.id))
         self.assertEqual(module.scope_ids.user_id, user2.id)
         self.assertEqual(module.descriptor.scope_ids.user_id, user2.id)
+
+
+def mock_unit_descriptor(name, children=(), has_score=False, weight=None, dynamic_children=None):
+    """
+    Returns a mock descriptor at location `name` for unit_progress. If `dynamic_children`
+    is given, the descriptor has dynamic children, and its module picks those.
+    """
+    descriptor = Mock(location=name, has_score=has_score, weight=weight, dynamic_children=dynamic_children)
+    descriptor.has_dynamic_children.return_value = dynamic_children is not None
+    descriptor.get_children.return_value = list(children)
+    return descriptor
+
+
+class TestUnitProgress(TestCase):
+    """
+    Tests for unit_progress, the progress of the units a lazy sequence doesn't render
+    """
+    def setUp(self):
+        self.student_modules = {}
+        self.field_data_cache = Mock()
+        self.field_data_cache.student_module.side_effect = self.student_modules.get
+        self.module_creator = Mock(side_effect=self.create_module)
+
+    def create_module(self, descriptor):
+        """ Returns a mock module of the descriptor, which picks its dynamic children. """
+        return Mock(**{'get_child_descriptors.return_value': descriptor.dynamic_children})
+
+    def graded(self, name, grade, max_grade):
+        """ Records that the user has been graded on the problem `name`. """
+        self.student_modules[name] = Mock(grade=grade, max_grade=max_grade)
+
+    def progress(self, unit):
+        """ Returns the (done, total) progress through the unit. """
+        progress = render.unit_progress(unit, self.module_creator, self.field_data_cache)
+        return progress.frac() if progress is not None else None
+
+    def test_unweighted(self):
+        self.graded('p1', 1, 2)
+        unit = mock_unit_descriptor('unit', [
+            mock_unit_descriptor('p1', has_score=True),
+            mock_unit_descriptor('p2', has_score=True),
+        ])
+        self.assertEqual(self.progress(unit), (1, 3))
+        self.assertFalse(self.module_creator.called)
+
+    def test_weighted(self):
+        self.graded('p1', 1, 4)
+        self.graded('p3', 5, 5)
+        unit = mock_unit_descriptor('unit', [
+            mock_unit_descriptor('p1', has_score=True, weight=2),
+            mock_unit_descriptor('p2', has_score=True, weight=3),
+            mock_unit_descriptor('p3', has_score=True, weight=0),
+        ])
+        self.assertEqual(self.progress(unit), (0.5, 5))
+
+    def test_ungraded(self):
+        unit = mock_unit_descriptor('unit', [
+            mock_unit_descriptor('html'),
+            mock_unit_descriptor('vertical', [mock_unit_descriptor('video')]),
+        ])
+        self.assertIsNone(self.progress(unit))
+
+    def test_not_yet_graded(self):
+        # a StudentModule without a max_grade, such as of a problem which was only viewed
+        self.graded('p1', None, None)
+        unit = mock_unit_descriptor('unit', [mock_unit_descriptor('p1', has_score=True)])
+        self.assertEqual(self.progress(unit), (0, 1))
+
+    def test_dynamic_children(self):
+        self.graded('p1', 1, 1)
+        self.graded('p2', 1, 2)
+        p1 = mock_unit_descriptor('p1', has_score=True)
+        p2 = mock_unit_descriptor('p2', has_score=True)
+        randomize = mock_unit_descriptor('randomize', [p1, p2], dynamic_children=[p2])
+        unit = mock_unit_descriptor('unit', [randomize])
+        self.assertEqual(self.progress(unit), (1, 2))
+        self.module_creator.assert_called_once_with(randomize)
+
+    def test_dynamic_children_not_loaded(self):
+        self.module_creator.side_effect = None
+        self.module_creator.return_value = None
+        unit = mock_unit_descriptor('unit', [
+            mock_unit_descriptor('randomize', [mock_unit_descriptor('p1', has_score=True)], dynamic_children=[]),
+        ])
+        self.assertIsNone(self.progress(unit))
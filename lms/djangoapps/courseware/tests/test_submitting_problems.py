@@ -17,7 +17,7 @@ from django.test.utils import override_settings
 
 # Need access to internal func to put users in the right group
 from courseware import grades
-from courseware.models import StudentModule
+from courseware.models import StudentModule, StudentSectionGrade
 
 from xmodule.modulestore.django import modulestore, editable_modulestore
 
@@ -479,6 +479,75 @@ class TestCourseGrader(TestSubmittingProblems):
         self.check_grade_percent(0.67)
         self.assertEqual(self.get_grade_summary()['grade'], 'B')
 
+    def test_persisted_section_grades(self):
+        """
+        Check that batch grading persists the grade of a section, that grading
+        reads it back, and that a new score on the section updates it.
+        """
+        self.basic_setup()
+        self.submit_question_answer('p1', {'2_1': 'Correct'})
+        fake_request = self.factory.get(
+            reverse('progress', kwargs={'course_id': self.course.id.to_deprecated_string()})
+        )
+
+        # Viewing a grade doesn't write to the store
+        self.assertEqual(self.get_grade_summary()['percent'], 0.33)
+        self.assertFalse(StudentSectionGrade.objects.filter(student=self.student_user).exists())
+
+        grade_summary = grades.grade(self.student_user, fake_request, self.course, persist_section_grades=True)
+        self.assertEqual(grade_summary['percent'], 0.33)
+        section_grade = StudentSectionGrade.objects.get(student=self.student_user, section_key=self.homework.location)
+
+        # Tamper with the persisted scores to show that they are what gets read
+        persisted_scores = section_grade.scores
+        scores = json.loads(persisted_scores)
+        for score in scores:
+            score[1] = score[2]
+        section_grade.scores = json.dumps(scores)
+        section_grade.save()
+        self.assertEqual(self.get_grade_summary()['percent'], 1.0)
+        section_grade.scores = persisted_scores
+        section_grade.save()
+
+        # A new score is written into the persisted grade, which is read rather than regraded
+        self.submit_question_answer('p2', {'2_1': 'Correct'})
+        section_grade = StudentSectionGrade.objects.get(student=self.student_user, section_key=self.homework.location)
+        scores = dict((score[0], score[1:3]) for score in json.loads(section_grade.scores))
+        earned, possible = scores[self.problem_location('p2').to_deprecated_string()]
+        self.assertGreater(possible, 0)
+        self.assertEqual(earned, possible)
+        with patch('courseware.grades.get_score') as get_score:
+            self.check_grade_percent(0.67)
+        self.assertFalse(get_score.called)
+
+    def test_persisted_section_grades_content_change(self):
+        """
+        Check that editing a problem invalidates the persisted grade of its section.
+        """
+        self.basic_setup()
+        self.submit_question_answer('p1', {'2_1': 'Correct'})
+        fake_request = self.factory.get(
+            reverse('progress', kwargs={'course_id': self.course.id.to_deprecated_string()})
+        )
+        grades.grade(self.student_user, fake_request, self.course, persist_section_grades=True)
+        section_grade = StudentSectionGrade.objects.get(student=self.student_user, section_key=self.homework.location)
+        section_grade.scores = json.dumps([])
+        section_grade.save()
+
+        store = editable_modulestore()
+        problem = store.get_item(self.problem_location('p3'))
+        problem.data = OptionResponseXMLFactory().build_xml(
+            question_text='The correct answer is Correct',
+            num_inputs=2,
+            weight=2,
+            options=['Correct', 'Incorrect'],
+            correct_option='Correct'
+        )
+        store.update_item(problem, '**replace_user**')
+        self.refresh_course()
+
+        self.check_grade_percent(0.25)
+
     def test_submissions_api_overrides_scores(self):
         """
         Check that answering incorrectly is graded properly.
@@ -7,6 +7,7 @@ import tempfile
 import textwrap
 import json
 from datetime import timedelta
+from django.core.cache import get_cache
 from webob import Request
 
 from xmodule.contentstore.content import StaticContent
@@ -19,6 +20,7 @@ from cache_toolbox.core import del_cached_content
 from xmodule.exceptions import NotFoundError
 
 from xmodule.video_module.transcripts_utils import (
+    Transcript,
     TranscriptException,
     TranscriptsGenerationException,
 )
@@ -261,6 +263,15 @@ class TestTranscriptDownloadDispatch(TestVideo):
         self.assertEqual(response.headers['Content-Type'], 'text/plain; charset=utf-8')
         self.assertEqual(response.headers['Content-Language'], 'en')
 
+    @patch('xmodule.video_module.VideoModule.get_transcript', return_value=('Subs!', 'test_filename.srt', 'application/x-subrip; charset=utf-8'))
+    def test_download_not_modified(self, __):
+        request = Request.blank('/download')
+        etag = self.item.transcript(request=request, dispatch='download').etag
+        request = Request.blank('/download', headers={'If-None-Match': '"{}"'.format(etag)})
+        response = self.item.transcript(request=request, dispatch='download')
+        self.assertEqual(response.status, '304 Not Modified')
+        self.assertEqual(response.body, '')
+
     def test_download_en_no_sub(self):
         request = Request.blank('/download')
         response = self.item.transcript(request=request, dispatch='download')
@@ -684,6 +695,33 @@ class TestGetTranscript(TestVideo):
         self.assertEqual(filename, self.item.sub + '.txt')
         self.assertEqual(mime_type, 'text/plain; charset=utf-8')
 
+    def test_cached_transcript(self):
+        good_sjson = _create_file(content=textwrap.dedent("""\
+                {
+                  "start": [
+                    270
+                  ],
+                  "end": [
+                    2720
+                  ],
+                  "text": [
+                    "Hi, welcome to Edx."
+                  ]
+                }
+            """))
+
+        _upload_sjson_file(good_sjson, self.item.location)
+        self.item.sub = _get_subs_id(good_sjson.name)
+        self.item.runtime.cache = get_cache('django.core.cache.backends.locmem.LocMemCache')
+
+        with patch.object(Transcript, 'convert', wraps=Transcript.convert) as convert:
+            self.assertEqual(self.item.get_transcript(), self.item.get_transcript())
+            self.assertEqual(convert.call_count, 1)
+
+            # the conversion to another format is cached separately
+            self.item.get_transcript('txt')
+            self.assertEqual(convert.call_count, 2)
+
     def test_en_with_empty_sub(self):
 
         # no self.sub, self.youttube_1_0 exist, but no file in assets
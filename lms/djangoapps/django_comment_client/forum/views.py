@@ -13,7 +13,8 @@ import newrelic.agent
 from edxmako.shortcuts import render_to_response
 from courseware.courses import get_course_with_access
 from course_groups.cohorts import (is_course_cohorted, get_cohort_id, is_commentable_cohorted,
-                                   get_cohorted_commentables, get_course_cohorts, get_cohort_by_id)
+                                   get_cohorted_commentables, get_course_cohorts, get_cohort_by_id,
+                                   get_cohort_names)
 from courseware.access import has_access
 
 from django_comment_client.permissions import cached_has_permission
@@ -30,6 +31,23 @@ escapedict = {'"': '&quot;'}
 log = logging.getLogger("edx.discussions")
 
 
+def get_group_names(course_id, threads):
+    """
+    Returns a dict of the names of the cohorts of `threads` by their ids,
+    looked up together rather than thread by thread.
+    """
+    group_ids = set(int(thread['group_id']) for thread in threads if thread.get('group_id'))
+    if not group_ids:
+        return {}
+
+    group_names = get_cohort_names(course_id)
+    # get_cohort_by_id raises CourseUserGroup.DoesNotExist for unknown cohorts, as
+    # looking the threads' cohorts up one at a time used to
+    for group_id in group_ids.difference(group_names):
+        group_names[group_id] = get_cohort_by_id(course_id, group_id).name
+    return group_names
+
+
 @newrelic.agent.function_trace()
 def get_threads(request, course_id, discussion_id=None, per_page=THREADS_PER_PAGE):
     """
@@ -47,18 +65,6 @@ def get_threads(request, course_id, discussion_id=None, per_page=THREADS_PER_PAG
         'user_id': request.user.id,
     }
 
-    if not request.GET.get('sort_key'):
-        # If the user did not select a sort key, use their last used sort key
-        cc_user = cc.User.from_django_user(request.user)
-        cc_user.retrieve()
-        # TODO: After the comment service is updated this can just be user.default_sort_key because the service returns the default value
-        default_query_params['sort_key'] = cc_user.get('default_sort_key') or default_query_params['sort_key']
-    else:
-        # If the user clicked a sort key, update their default sort key
-        cc_user = cc.User.from_django_user(request.user)
-        cc_user.default_sort_key = request.GET.get('sort_key')
-        cc_user.save()
-
     #there are 2 dimensions to consider when executing a search with respect to group id
     #is user a moderator
     #did the user request a group
@@ -79,19 +85,35 @@ def get_threads(request, course_id, discussion_id=None, per_page=THREADS_PER_PAG
 
     #so by default, a moderator sees all items, and a student sees his cohort
 
-    query_params = merge_dict(default_query_params,
-                              strip_none(extract(request.GET,
-                                                 ['page', 'sort_key',
-                                                  'sort_order', 'text',
-                                                  'commentable_ids', 'flagged'])))
+    request_params = strip_none(extract(request.GET,
+                                        ['page', 'sort_key',
+                                         'sort_order', 'text',
+                                         'commentable_ids', 'flagged']))
 
-    threads, page, num_pages = cc.Thread.search(query_params)
+    cc_user = cc.User.from_django_user(request.user)
+    if not request.GET.get('sort_key'):
+        # If the user did not select a sort key, use their last used sort key
+        cc_user.retrieve()
+        # TODO: After the comment service is updated this can just be user.default_sort_key because the service returns the default value
+        default_query_params['sort_key'] = cc_user.get('default_sort_key') or default_query_params['sort_key']
+        query_params = merge_dict(default_query_params, request_params)
+        threads, page, num_pages = cc.Thread.search(query_params)
+    else:
+        # If the user clicked a sort key, update their default sort key
+        # while searching with it
+        cc_user.default_sort_key = request.GET.get('sort_key')
+        query_params = merge_dict(default_query_params, request_params)
+        __, (threads, page, num_pages) = cc.utils.perform_concurrently(
+            cc_user.save,
+            lambda: cc.Thread.search(query_params)
+        )
 
     #now add the group name if the thread has a group id
+    group_names = get_group_names(course_id, threads)
     for thread in threads:
 
         if thread.get('group_id'):
-            thread['group_name'] = get_cohort_by_id(course_id, thread.get('group_id')).name
+            thread['group_name'] = group_names[int(thread['group_id'])]
             thread['group_string'] = "This post visible only to Group %s." % (thread['group_name'])
         else:
             thread['group_name'] = ""
@@ -237,17 +259,19 @@ def single_thread(request, course_id, discussion_id, thread_id):
 
     course = get_course_with_access(request.user, 'load_forum', course_id)
     cc_user = cc.User.from_django_user(request.user)
-    user_info = cc_user.to_dict()
 
     # Currently, the front end always loads responses via AJAX, even for this
     # page; it would be a nice optimization to avoid that extra round trip to
     # the comments service.
     try:
-        thread = cc.Thread.find(thread_id).retrieve(
-            recursive=request.is_ajax(),
-            user_id=request.user.id,
-            response_skip=request.GET.get("resp_skip"),
-            response_limit=request.GET.get("resp_limit")
+        user_info, thread = cc.utils.perform_concurrently(
+            cc_user.to_dict,
+            lambda: cc.Thread.find(thread_id).retrieve(
+                recursive=request.is_ajax(),
+                user_id=request.user.id,
+                response_skip=request.GET.get("resp_skip"),
+                response_limit=request.GET.get("resp_limit")
+            )
         )
     except cc.utils.CommentClientRequestError as e:
         if e.status_code == 404:
@@ -277,9 +301,10 @@ def single_thread(request, course_id, discussion_id, thread_id):
         with newrelic.agent.FunctionTrace(nr_transaction, "add_courseware_context"):
             add_courseware_context(threads, course)
 
+        group_names = get_group_names(course_id, [thread for thread in threads if not thread.get('group_name')])
         for thread in threads:
             if thread.get('group_id') and not thread.get('group_name'):
-                thread['group_name'] = get_cohort_by_id(course_id, thread.get('group_id')).name
+                thread['group_name'] = group_names[int(thread['group_id'])]
 
             #patch for backward compatibility with comments service
             if not "pinned" in thread:
@@ -0,0 +1,156 @@
+"""
+Tests for the connection pooling, concurrency and caching of the comments service client.
+"""
+import json
+from django.test import TestCase
+from django.test.utils import override_settings
+from django.utils import translation
+from mock import Mock, patch
+
+import lms.lib.comment_client as cc
+from lms.lib.comment_client.utils import (
+    perform_request, perform_concurrently, invalidate_user_cache, CommentClientRequestError
+)
+from terrain.stubs.comments import StubCommentsService
+
+
+def make_response(status_code=200, body=None):
+    """ Returns a mock comments service response with a JSON `body`. """
+    response = Mock(status_code=status_code)
+    response.text = json.dumps(body or {})
+    response.json.return_value = body or {}
+    return response
+
+
+class PerformConcurrentlyTestCase(TestCase):
+    def test_results_in_order(self):
+        results = perform_concurrently(*[lambda i=i: i * i for i in range(10)])
+        self.assertEqual(results, [i * i for i in range(10)])
+
+    def test_single_call(self):
+        self.assertEqual(perform_concurrently(lambda: 'only'), ['only'])
+
+    def test_first_exception_raised(self):
+        def fail(message):
+            raise CommentClientRequestError(message)
+
+        with self.assertRaisesRegexp(CommentClientRequestError, 'first'):
+            perform_concurrently(lambda: 1, lambda: fail('first'), lambda: fail('second'))
+
+    def test_language_propagated(self):
+        with translation.override('eo'):
+            languages = perform_concurrently(translation.get_language, translation.get_language)
+        self.assertEqual(languages, ['eo', 'eo'])
+
+
+@override_settings(COMMENTS_SERVICE_CACHE_TIMEOUT=60)
+@patch('requests.Session.request')
+class PerformRequestCacheTestCase(TestCase):
+    url = 'http://localhost:4567/api/v1/users/42'
+
+    def setUp(self):
+        invalidate_user_cache('42')
+
+    def test_get_cached(self, mock_request):
+        mock_request.return_value = make_response(body={'id': '42'})
+        self.assertEqual(perform_request('get', self.url, {'complete': True}, cache_user_id='42'), {'id': '42'})
+        self.assertEqual(perform_request('get', self.url, {'complete': True}, cache_user_id='42'), {'id': '42'})
+        self.assertEqual(mock_request.call_count, 1)
+
+    def test_params_distinguish(self, mock_request):
+        mock_request.return_value = make_response(body={'id': '42'})
+        perform_request('get', self.url, {'complete': True}, cache_user_id='42')
+        perform_request('get', self.url, {'complete': False}, cache_user_id='42')
+        self.assertEqual(mock_request.call_count, 2)
+
+    def test_uncached_without_user(self, mock_request):
+        mock_request.return_value = make_response(body={'id': '42'})
+        perform_request('get', self.url, {})
+        perform_request('get', self.url, {})
+        self.assertEqual(mock_request.call_count, 2)
+
+    def test_write_invalidates(self, mock_request):
+        mock_request.return_value = make_response(body={'id': '42'})
+        perform_request('get', self.url, {}, cache_user_id='42')
+        perform_request('post', self.url + '/subscriptions', {'source_type': 'thread'}, cache_user_id='42')
+        perform_request('get', self.url, {}, cache_user_id='42')
+        self.assertEqual(mock_request.call_count, 3)
+
+    def test_write_for_user_id_invalidates(self, mock_request):
+        mock_request.return_value = make_response(body={'id': '42'})
+        perform_request('get', self.url, {}, cache_user_id='42')
+        perform_request('post', 'http://localhost:4567/api/v1/threads', {'user_id': '42', 'body': 'b'})
+        perform_request('get', self.url, {}, cache_user_id='42')
+        self.assertEqual(mock_request.call_count, 3)
+
+    def test_errors_uncached(self, mock_request):
+        mock_request.return_value = make_response(status_code=404)
+        for __ in range(2):
+            with self.assertRaises(CommentClientRequestError):
+                perform_request('get', self.url, {}, cache_user_id='42')
+        self.assertEqual(mock_request.call_count, 2)
+
+    def test_user_retrieve_cached(self, mock_request):
+        mock_request.return_value = make_response(body={'id': '42', 'username': 'alice'})
+        cc.User(id='42', course_id='org/course/run').retrieve()
+        cc.User(id='42', course_id='org/course/run').retrieve()
+        self.assertEqual(mock_request.call_count, 1)
+
+
+@override_settings(COMMENTS_SERVICE_CACHE_TIMEOUT=60)
+class StubCommentsServiceTestCase(TestCase):
+    """
+    Makes requests over HTTP to the stub comments service, through the shared
+    session and thread pool.
+    """
+    def setUp(self):
+        self.server = StubCommentsService()
+        self.addCleanup(self.server.shutdown)
+        self.server.config['threads'] = {
+            thread_id: {'id': thread_id, 'title': 'Thread {}'.format(thread_id)}
+            for thread_id in ('t1', 't2', 't3')
+        }
+        self.base_url = 'http://127.0.0.1:{}/api/v1'.format(self.server.port)
+        invalidate_user_cache('42')
+
+    def thread_url(self, thread_id):
+        """ Returns the url of the thread in the stub service. """
+        return '{}/threads/{}'.format(self.base_url, thread_id)
+
+    def test_get(self):
+        user = perform_request('get', self.base_url + '/users/42', {'course_id': 'org/course/run'})
+        self.assertEqual(user['id'], '42')
+        self.assertEqual(user['threads_count'], 1)
+
+    def test_raw(self):
+        self.assertEqual(
+            json.loads(perform_request('get', self.thread_url('t1'), raw=True)),
+            {'id': 't1', 'title': 'Thread t1'}
+        )
+
+    def test_not_found(self):
+        with self.assertRaises(CommentClientRequestError) as context:
+            perform_request('get', self.thread_url('missing'))
+        self.assertEqual(context.exception.status_code, 404)
+
+    def test_cached_until_written(self):
+        self.assertEqual(perform_request('get', self.thread_url('t1'), cache_user_id='42')['title'], 'Thread t1')
+        self.server.config['threads']['t1']['title'] = 'Edited'
+        self.assertEqual(perform_request('get', self.thread_url('t1'), cache_user_id='42')['title'], 'Thread t1')
+        perform_request('delete', self.thread_url('t2'), cache_user_id='42')
+        self.assertEqual(perform_request('get', self.thread_url('t1'), cache_user_id='42')['title'], 'Edited')
+
+    def test_concurrently(self):
+        threads = perform_concurrently(
+            *[lambda thread_id=thread_id: perform_request('get', self.thread_url(thread_id))
+              for thread_id in ('t3', 't1', 't2', 't1')]
+        )
+        self.assertEqual([thread['id'] for thread in threads], ['t3', 't1', 't2', 't1'])
+
+    def test_concurrently_not_found(self):
+        with self.assertRaises(CommentClientRequestError) as context:
+            perform_concurrently(
+                lambda: perform_request('get', self.thread_url('t1')),
+                lambda: perform_request('get', self.thread_url('missing')),
+            )
+        self.assertEqual(context.exception.status_code, 404)
@@ -167,6 +167,21 @@ class CategoryMapTestCase(ModuleStoreTestCase):
             expected
         )
 
+    def test_cached_until_changed(self):
+        self.create_discussion("Chapter", "Discussion 1")
+        with mock.patch.object(utils, '_get_discussion_modules', wraps=utils._get_discussion_modules) as get_modules:
+            utils.get_discussion_category_map(self.course)
+            utils.get_discussion_category_map(self.course)
+            self.assertEqual(utils._get_discussion_id_map(self.course).keys(), ["discussion1"])
+            self.assertEqual(get_modules.call_count, 1)
+
+            self.create_discussion("Chapter", "Discussion 2")
+            self.assertEqual(
+                utils.get_discussion_category_map(self.course)["subcategories"]["Chapter"]["children"],
+                ["Discussion 1", "Discussion 2"]
+            )
+            self.assertEqual(get_modules.call_count, 2)
+
     def test_empty(self):
         self.assertEqual(
             utils.get_discussion_category_map(self.course),
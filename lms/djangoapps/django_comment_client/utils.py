@@ -4,6 +4,7 @@ import logging
 from datetime import datetime
 
 from django.contrib.auth.models import User
+from django.core.cache import cache
 from django.core.urlresolvers import reverse
 from django.db import connection
 from django.http import HttpResponse
@@ -21,6 +22,9 @@ import json
 
 log = logging.getLogger(__name__)
 
+# How long, in seconds, the discussion maps of a published version of a course are cached
+DISCUSSION_MAPS_CACHE_TIMEOUT = 24 * 60 * 60
+
 
 def extract(dic, keys):
     return {k: dic.get(k) for k in keys}
@@ -68,14 +72,44 @@ def _get_discussion_modules(course):
     return filter(has_required_keys, all_modules)
 
 
-def _get_discussion_id_map(course):
+def _build_discussion_id_map(modules):
     def get_entry(module):
         discussion_id = module.discussion_id
         title = module.discussion_target
         last_category = module.discussion_category.split("/")[-1].strip()
         return (discussion_id, {"location": module.location, "title": last_category + " / " + title})
 
-    return dict(map(get_entry, _get_discussion_modules(course)))
+    return dict(map(get_entry, modules))
+
+
+def _get_discussion_maps(course):
+    """
+    Returns the discussion category map of the course, with its unstarted
+    categories and entries still in it, and the map of its discussion ids.
+
+    Both are built from a single query for the course's discussion modules, and
+    cached for the published version of the course (so, until it's next changed
+    in Studio or reimported).
+    """
+    version = modulestore().get_course_published_version(course.id)
+    if version is None:
+        return _build_discussion_maps(course)
+
+    cache_key = u'django_comment_client.discussion_maps.{}.{}'.format(course.id, version)
+    maps = cache.get(cache_key)
+    if maps is None:
+        maps = _build_discussion_maps(course)
+        cache.set(cache_key, maps, DISCUSSION_MAPS_CACHE_TIMEOUT)
+    return maps
+
+
+def _build_discussion_maps(course):
+    modules = _get_discussion_modules(course)
+    return _build_category_map(course, modules), _build_discussion_id_map(modules)
+
+
+def _get_discussion_id_map(course):
+    return _get_discussion_maps(course)[1]
 
 
 def _filter_unstarted_categories(category_map):
@@ -128,13 +162,9 @@ def _sort_map_entries(category_map, sort_alpha):
     category_map["children"] = [x[0] for x in sorted(things, key=lambda x: x[1]["sort_key"])]
 
 
-def get_discussion_category_map(course):
-    course_id = course.id
-
+def _build_category_map(course, modules):
     unexpanded_category_map = defaultdict(list)
 
-    modules = _get_discussion_modules(course)
-
     for module in modules:
         id = module.discussion_id
         title = module.discussion_target
@@ -191,7 +221,15 @@ def get_discussion_category_map(course):
 
     _sort_map_entries(category_map, course.discussion_sort_alpha)
 
-    return _filter_unstarted_categories(category_map)
+    return category_map
+
+
+def get_discussion_category_map(course):
+    """
+    Returns the discussion category map of the course, leaving out the
+    categories and entries which haven't started yet.
+    """
+    return _filter_unstarted_categories(_get_discussion_maps(course)[0])
 
 
 class JsonResponse(HttpResponse):
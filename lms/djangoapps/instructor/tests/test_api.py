@@ -141,6 +141,7 @@ class TestInstructorAPIDenyLevels(ModuleStoreTestCase, LoginEnrollmentTestCase):
             ('list_background_email_tasks', {}),
             ('list_report_downloads', {}),
             ('calculate_grades_csv', {}),
+            ('calculate_answer_distribution_csv', {}),
         ]
         # Endpoints that only Instructors can access
         self.instructor_level_endpoints = [
@@ -1383,6 +1384,15 @@ class TestInstructorAPILevelsDataDump(ModuleStoreTestCase, LoginEnrollmentTestCa
         already_running_status = "A grade report generation task is already in progress. Check the 'Pending Instructor Tasks' table for the status of the task. When completed, the report will be available for download in the table below."
         self.assertIn(already_running_status, response.content)
 
+    def test_calculate_answer_distribution_csv_success(self):
+        url = reverse('calculate_answer_distribution_csv', kwargs={'course_id': self.course.id.to_deprecated_string()})
+
+        with patch('instructor_task.api.submit_calculate_answer_distribution_csv') as mock_answer_distribution:
+            mock_answer_distribution.return_value = True
+            response = self.client.get(url, {})
+        success_status = "Your answer distribution report is being generated! You can view the status of the generation task in the 'Pending Instructor Tasks' section."
+        self.assertIn(success_status, response.content)
+
     def test_get_students_features_csv(self):
         """
         Test that some minimum of information is formatted
@@ -17,7 +17,8 @@ from instructor_task.tasks import (rescore_problem,
                                    reset_problem_attempts,
                                    delete_problem_state,
                                    send_bulk_course_email,
-                                   calculate_grades_csv)
+                                   calculate_grades_csv,
+                                   calculate_answer_distribution_csv)
 
 from instructor_task.api_helper import (check_arguments_for_rescoring,
                                         encode_problem_and_student_input,
@@ -218,3 +219,15 @@ def submit_calculate_grades_csv(request, course_key):
     task_key = ""
 
     return submit_task(request, task_type, task_class, course_key, task_input, task_key)
+
+
+def submit_calculate_answer_distribution_csv(request, course_key):
+    """
+    AlreadyRunningError is raised if the course's answer distribution is already being computed.
+    """
+    task_type = 'answer_distribution'
+    task_class = calculate_answer_distribution_csv
+    task_input = {}
+    task_key = ""
+
+    return submit_task(request, task_type, task_class, course_key, task_input, task_key)
@@ -12,8 +12,8 @@ file and check it in at the same time as your model changes. To do that,
 ASSUMPTIONS: modules have unique IDs, even across different module_types
 
 """
-from cStringIO import StringIO
 from gzip import GzipFile
+from tempfile import TemporaryFile
 from uuid import uuid4
 import csv
 import json
@@ -197,17 +197,25 @@ class ReportStore(object):
     can simply be appended to for the sake of memory efficiency, rather than
     passing in the whole dataset. Doing that for now just because it's simpler.
     """
+    # Partial reports (e.g. the pieces of a report written by subtasks) are
+    # kept under this directory of the configured ROOT_PATH, so that they
+    # never show up in `links_for()` of the regular store.
+    PARTIAL_REPORTS_DIR = "partial"
+
     @classmethod
-    def from_config(cls):
+    def from_config(cls, partial=False):
         """
         Return one of the ReportStore subclasses depending on django
         configuration. Look at subclasses for expected configuration.
+
+        If `partial` is True, the returned store holds partial reports that
+        are not meant to be downloaded directly.
         """
         storage_type = settings.GRADES_DOWNLOAD.get("STORAGE_TYPE")
         if storage_type.lower() == "s3":
-            return S3ReportStore.from_config()
+            return S3ReportStore.from_config(partial)
         elif storage_type.lower() == "localfs":
-            return LocalFSReportStore.from_config()
+            return LocalFSReportStore.from_config(partial)
 
 
 class S3ReportStore(ReportStore):
@@ -232,7 +240,7 @@ class S3ReportStore(ReportStore):
         self.bucket = conn.get_bucket(bucket_name)
 
     @classmethod
-    def from_config(cls):
+    def from_config(cls, partial=False):
         """
         The expected configuration for an `S3ReportStore` is to have a
         `GRADES_DOWNLOAD` dict in settings with the following fields::
@@ -246,10 +254,10 @@ class S3ReportStore(ReportStore):
         Since S3 access relies on boto, you must also define `AWS_ACCESS_KEY_ID`
         and `AWS_SECRET_ACCESS_KEY` in settings.
         """
-        return cls(
-            settings.GRADES_DOWNLOAD['BUCKET'],
-            settings.GRADES_DOWNLOAD['ROOT_PATH']
-        )
+        root_path = settings.GRADES_DOWNLOAD['ROOT_PATH']
+        if partial:
+            root_path = "{}/{}".format(root_path, cls.PARTIAL_REPORTS_DIR)
+        return cls(settings.GRADES_DOWNLOAD['BUCKET'], root_path)
 
     def key_for(self, course_id, filename):
         """Return the S3 key we would use to store and retrieve the data for the
@@ -303,13 +311,45 @@ class S3ReportStore(ReportStore):
 
         Even though we store it in gzip format, browsers will transparently
         download and decompress it. Filenames should end in `.csv`, not `.gz`.
+
+        `rows` may be any iterable; it is compressed into a temporary file as
+        it is consumed, so the rows never have to be in memory all at once.
+        """
+        with TemporaryFile() as output_file:
+            gzip_file = GzipFile(fileobj=output_file, mode="wb")
+            csv.writer(gzip_file).writerows(rows)
+            gzip_file.close()
+
+            size = output_file.tell()
+            output_file.seek(0)
+
+            key = self.key_for(course_id, filename)
+            key.content_encoding = "gzip"
+            key.content_type = "text/csv"
+            key.set_contents_from_file(
+                output_file,
+                headers={
+                    "Content-Encoding": "gzip",
+                    "Content-Length": size,
+                    "Content-Type": "text/csv",
+                }
+            )
+
+    def read_rows(self, course_id, filename):
         """
-        output_buffer = StringIO()
-        gzip_file = GzipFile(fileobj=output_buffer, mode="wb")
-        csv.writer(gzip_file).writerows(rows)
-        gzip_file.close()
+        Yield the rows of a CSV file that was stored with `store_rows()`.
+        """
+        with TemporaryFile() as input_file:
+            self.key_for(course_id, filename).get_contents_to_file(input_file)
+            input_file.seek(0)
+            for row in csv.reader(GzipFile(fileobj=input_file, mode="rb")):
+                yield row
 
-        self.store(course_id, filename, output_buffer)
+    def delete(self, course_id, filename):
+        """
+        Delete the stored file `filename` of `course_id`.
+        """
+        self.key_for(course_id, filename).delete()
 
     def links_for(self, course_id):
         """
@@ -346,7 +386,7 @@ class LocalFSReportStore(ReportStore):
             os.makedirs(root_path)
 
     @classmethod
-    def from_config(cls):
+    def from_config(cls, partial=False):
         """
         Generate an instance of this object from Django settings. It assumes
         that there is a dict in settings named GRADES_DOWNLOAD and that it has
@@ -357,7 +397,10 @@ class LocalFSReportStore(ReportStore):
             STORAGE_TYPE : "localfs"
             ROOT_PATH : /tmp/edx/report-downloads/
         """
-        return cls(settings.GRADES_DOWNLOAD['ROOT_PATH'])
+        root_path = settings.GRADES_DOWNLOAD['ROOT_PATH']
+        if partial:
+            root_path = os.path.join(root_path, cls.PARTIAL_REPORTS_DIR)
+        return cls(root_path)
 
     def path_to(self, course_id, filename):
         """Return the full path to a given file for a given course."""
@@ -381,11 +424,30 @@ class LocalFSReportStore(ReportStore):
     def store_rows(self, course_id, filename, rows):
         """
         Given a course_id, filename, and rows (each row is an iterable of strings),
-        write this data out.
+        write this data out. `rows` may be any iterable, and is written out as
+        it is consumed.
+        """
+        full_path = self.path_to(course_id, filename)
+        directory = os.path.dirname(full_path)
+        if not os.path.exists(directory):
+            os.mkdir(directory)
+
+        with open(full_path, "wb") as f:
+            csv.writer(f).writerows(rows)
+
+    def read_rows(self, course_id, filename):
+        """
+        Yield the rows of a CSV file that was stored with `store_rows()`.
+        """
+        with open(self.path_to(course_id, filename), "rb") as f:
+            for row in csv.reader(f):
+                yield row
+
+    def delete(self, course_id, filename):
+        """
+        Delete the stored file `filename` of `course_id`.
         """
-        output_buffer = StringIO()
-        csv.writer(output_buffer).writerows(rows)
-        self.store(course_id, filename, output_buffer)
+        os.remove(self.path_to(course_id, filename))
 
     def links_for(self, course_id):
         """
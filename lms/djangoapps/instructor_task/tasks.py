@@ -27,10 +27,13 @@ from instructor_task.tasks_helper import (
     run_main_task,
     BaseInstructorTask,
     perform_module_state_update,
+    perform_module_state_update_chunk,
     rescore_problem_module_state,
     reset_attempts_module_state,
     delete_problem_module_state,
     push_grades_to_s3,
+    push_grades_chunk_to_s3,
+    push_answer_distribution_to_s3,
 )
 from bulk_email.tasks import perform_delegate_email_batches
 
@@ -53,6 +56,8 @@ def rescore_problem(entry_id, xmodule_instance_args):
 
     `xmodule_instance_args` provides information needed by _get_module_instance_for_task()
     to instantiate an xmodule instance.
+
+    When rescoring for many students, the rescoring is split up over `rescore_problem_chunk` subtasks.
     """
     # Translators: This is a past-tense verb that is inserted into task progress messages as {action}.
     action_name = ugettext_noop('rescored')
@@ -62,10 +67,31 @@ def rescore_problem(entry_id, xmodule_instance_args):
         """Filter that matches problems which are marked as being done"""
         return modules_to_update.filter(state__contains='"done": true')
 
-    visit_fcn = partial(perform_module_state_update, update_fcn, filter_fcn)
+    def create_subtask_fcn(module_ids, initial_subtask_status):
+        """Creates a subtask to rescore the StudentModules with ids `module_ids`."""
+        return rescore_problem_chunk.subtask(
+            (entry_id, xmodule_instance_args, module_ids, initial_subtask_status.to_dict()),
+            task_id=initial_subtask_status.task_id,
+        )
+
+    visit_fcn = partial(perform_module_state_update, update_fcn, filter_fcn, create_subtask_fcn=create_subtask_fcn)
     return run_main_task(entry_id, visit_fcn, action_name)
 
 
+@task  # pylint: disable=E1102
+def rescore_problem_chunk(entry_id, xmodule_instance_args, module_ids, subtask_status_dict):
+    """
+    Rescore one chunk of the submissions to a problem as a subtask of `rescore_problem`.
+
+    `entry_id` is the id value of the InstructorTask entry of the parent task.
+    `module_ids` are the ids of the StudentModules to rescore.
+    `subtask_status_dict` is the initial SubtaskStatus of this subtask, as a dict.
+    """
+    action_name = ugettext_noop('rescored')
+    update_fcn = partial(rescore_problem_module_state, xmodule_instance_args)
+    return perform_module_state_update_chunk(update_fcn, action_name, entry_id, module_ids, subtask_status_dict)
+
+
 @task(base=BaseInstructorTask)  # pylint: disable=E1102
 def reset_problem_attempts(entry_id, xmodule_instance_args):
     """Resets problem attempts to zero for a particular problem for all students in a course.
@@ -131,11 +157,39 @@ def send_bulk_course_email(entry_id, _xmodule_instance_args):
     return run_main_task(entry_id, visit_fcn, action_name)
 
 
+@task(routing_key=settings.GRADES_DOWNLOAD_ROUTING_KEY)  # pylint: disable=E1102
+def calculate_grades_csv_chunk(entry_id, student_ids, report_name, subtask_status_dict):
+    """
+    Grade one chunk of the students of a course as a subtask of `calculate_grades_csv`,
+    and store their rows as a partial grade report.
+
+    `entry_id` is the id value of the InstructorTask entry of the parent task.
+    `student_ids` are the ids of the users to grade.
+    `report_name` is the base filename of the grade report being generated.
+    `subtask_status_dict` is the initial SubtaskStatus of this subtask, as a dict.
+    """
+    return push_grades_chunk_to_s3(entry_id, student_ids, report_name, subtask_status_dict)
+
+
 @task(base=BaseInstructorTask, routing_key=settings.GRADES_DOWNLOAD_ROUTING_KEY)  # pylint: disable=E1102
 def calculate_grades_csv(entry_id, xmodule_instance_args):
     """
     Grade a course and push the results to an S3 bucket for download.
+
+    The grading itself is split up over `calculate_grades_csv_chunk` subtasks.
     """
     action_name = ugettext_noop('graded')
-    task_fn = partial(push_grades_to_s3, xmodule_instance_args)
+    task_fn = partial(push_grades_to_s3, calculate_grades_csv_chunk.subtask, xmodule_instance_args)
+    return run_main_task(entry_id, task_fn, action_name)
+
+
+@task(base=BaseInstructorTask, routing_key=settings.GRADES_DOWNLOAD_ROUTING_KEY)  # pylint: disable=E1102
+def calculate_answer_distribution_csv(entry_id, xmodule_instance_args):
+    """
+    Compute the distribution of the answers submitted to the problems of a
+    course and push it to an S3 bucket for download.
+    """
+    # Translators: This is a past-tense verb that is inserted into task progress messages as {action}.
+    action_name = ugettext_noop('tallied')
+    task_fn = partial(push_answer_distribution_to_s3, xmodule_instance_args)
     return run_main_task(entry_id, task_fn, action_name)
@@ -4,6 +4,7 @@ running state of a course.
 
 """
 import json
+import sys
 import urllib
 from datetime import datetime
 from time import time
@@ -11,6 +12,7 @@ from time import time
 from celery import Task, current_task
 from celery.utils.log import get_task_logger
 from celery.states import SUCCESS, FAILURE
+from django.conf import settings
 from django.contrib.auth.models import User
 from django.db import transaction, reset_queries
 from dogapi import dog_stats_api
@@ -18,12 +20,19 @@ from pytz import UTC
 
 from xmodule.modulestore.django import modulestore
 from track.views import task_track
+from util.query import iterate_in_chunks
 
-from courseware.grades import iterate_grades_for
+from courseware.grades import iterate_grades_for, answer_distributions
 from courseware.models import StudentModule
 from courseware.model_data import FieldDataCache
 from courseware.module_render import get_module_for_descriptor_internal
 from instructor_task.models import ReportStore, InstructorTask, PROGRESS
+from instructor_task.subtasks import (
+    SubtaskStatus,
+    check_subtask_is_valid,
+    queue_subtasks_for_query,
+    update_subtask_status,
+)
 from student.models import CourseEnrollment
 
 # define different loggers for use within tasks and on client side
@@ -207,7 +216,8 @@ def run_main_task(entry_id, task_fcn, action_name):
     return task_progress
 
 
-def perform_module_state_update(update_fcn, filter_fcn, _entry_id, course_id, task_input, action_name):
+def perform_module_state_update(update_fcn, filter_fcn, entry_id, course_id, task_input, action_name,
+                                create_subtask_fcn=None):
     """
     Performs generic update by visiting StudentModule instances with the update_fcn provided.
 
@@ -225,6 +235,11 @@ def perform_module_state_update(update_fcn, filter_fcn, _entry_id, course_id, ta
     the update is successful; False indicates the update on the particular student module failed.
     A raised exception indicates a fatal condition -- that no other student modules should be considered.
 
+    If a `create_subtask_fcn` is provided and there are more than settings.RESCORE_MODULES_PER_TASK
+    modules to update, the modules are instead split up among subtasks (see `perform_module_state_update_chunk`).
+    `create_subtask_fcn` is passed the list of StudentModule ids for a subtask and the subtask's initial
+    SubtaskStatus, and returns the subtask to queue.
+
     The return value is a dict containing the task's results, with the following keys:
 
           'attempted': number of attempts made
@@ -247,9 +262,6 @@ def perform_module_state_update(update_fcn, filter_fcn, _entry_id, course_id, ta
     usage_key = course_id.make_usage_key_from_deprecated_string(task_input.get('problem_url'))
     student_identifier = task_input.get('student')
 
-    # find the problem descriptor:
-    module_descriptor = modulestore().get_item(usage_key)
-
     # find the module in question
     modules_to_update = StudentModule.objects.filter(course_id=course_id, module_state_key=usage_key)
 
@@ -270,12 +282,39 @@ def perform_module_state_update(update_fcn, filter_fcn, _entry_id, course_id, ta
     if filter_fcn is not None:
         modules_to_update = filter_fcn(modules_to_update)
 
+    num_total = modules_to_update.count()
+
+    if create_subtask_fcn is not None and num_total > settings.RESCORE_MODULES_PER_TASK:
+        entry = InstructorTask.objects.get(pk=entry_id)
+
+        # If the subtasks have already been queued (e.g. this task was requeued by
+        # Celery after losing its connection to the broker), don't queue them again.
+        if len(entry.subtasks) > 0 and len(entry.task_output) > 0:
+            TASK_LOG.warning(u"Task %s has already queued subtasks for %s", entry.task_id, usage_key)
+            return json.loads(entry.task_output)
+
+        def _create_module_state_update_subtask(module_list, initial_subtask_status):
+            """Creates a subtask to update the StudentModules in `module_list`."""
+            return create_subtask_fcn([module['pk'] for module in module_list], initial_subtask_status)
+
+        return queue_subtasks_for_query(
+            entry,
+            action_name,
+            _create_module_state_update_subtask,
+            modules_to_update,
+            [],
+            settings.RESCORE_MODULES_PER_QUERY,
+            settings.RESCORE_MODULES_PER_TASK,
+        )
+
+    # find the problem descriptor:
+    module_descriptor = modulestore().get_item(usage_key)
+
     # perform the main loop
     num_attempted = 0
     num_succeeded = 0
     num_skipped = 0
     num_failed = 0
-    num_total = modules_to_update.count()
 
     def get_task_progress():
         """Return a dict containing info about current task"""
@@ -292,30 +331,81 @@ def perform_module_state_update(update_fcn, filter_fcn, _entry_id, course_id, ta
 
     task_progress = get_task_progress()
     _get_current_task().update_state(state=PROGRESS, meta=task_progress)
-    for module_to_update in modules_to_update:
+    last_progress_time = time()
+    for module_to_update in iterate_in_chunks(modules_to_update.select_related('student'),
+                                              settings.RESCORE_MODULES_PER_QUERY):
         num_attempted += 1
         # There is no try here:  if there's an error, we let it throw, and the task will
         # be marked as FAILED, with a stack trace.
-        with dog_stats_api.timer('instructor_tasks.module.time.step', tags=[u'action:{name}'.format(name=action_name)]):
-            update_status = update_fcn(module_descriptor, module_to_update)
-            if update_status == UPDATE_STATUS_SUCCEEDED:
-                # If the update_fcn returns true, then it performed some kind of work.
-                # Logging of failures is left to the update_fcn itself.
-                num_succeeded += 1
-            elif update_status == UPDATE_STATUS_FAILED:
-                num_failed += 1
-            elif update_status == UPDATE_STATUS_SKIPPED:
-                num_skipped += 1
-            else:
-                raise UpdateProblemModuleStateError("Unexpected update_status returned: {}".format(update_status))
+        update_status = _update_module_state(update_fcn, module_descriptor, module_to_update, action_name)
+        if update_status == UPDATE_STATUS_SUCCEEDED:
+            # If the update_fcn returns true, then it performed some kind of work.
+            # Logging of failures is left to the update_fcn itself.
+            num_succeeded += 1
+        elif update_status == UPDATE_STATUS_FAILED:
+            num_failed += 1
+        elif update_status == UPDATE_STATUS_SKIPPED:
+            num_skipped += 1
 
-        # update task status:
-        task_progress = get_task_progress()
-        _get_current_task().update_state(state=PROGRESS, meta=task_progress)
+        # update task status, but not so often that it slows the task down:
+        if time() - last_progress_time >= settings.INSTRUCTOR_TASK_PROGRESS_INTERVAL:
+            task_progress = get_task_progress()
+            _get_current_task().update_state(state=PROGRESS, meta=task_progress)
+            last_progress_time = time()
 
+    task_progress = get_task_progress()
+    _get_current_task().update_state(state=PROGRESS, meta=task_progress)
     return task_progress
 
 
+def perform_module_state_update_chunk(update_fcn, action_name, entry_id, module_ids, subtask_status_dict):
+    """
+    Performs the update of `perform_module_state_update` on the StudentModules with ids `module_ids`,
+    as one of the subtasks of InstructorTask `entry_id`.
+
+    The progress of the parent InstructorTask is updated through `update_subtask_status`.
+    """
+    subtask_status = SubtaskStatus.from_dict(subtask_status_dict)
+    current_task_id = subtask_status.task_id
+
+    # Reject subtasks that are unknown to the InstructorTask, or that have
+    # already been run (e.g. requeued by Celery).
+    check_subtask_is_valid(entry_id, current_task_id, subtask_status)
+
+    entry = InstructorTask.objects.get(pk=entry_id)
+    task_input = json.loads(entry.task_input)
+    usage_key = entry.course_id.make_usage_key_from_deprecated_string(task_input.get('problem_url'))
+    module_descriptor = modulestore().get_item(usage_key)
+
+    modules_to_update = StudentModule.objects.filter(id__in=module_ids).select_related('student')
+    try:
+        for module_to_update in modules_to_update:
+            update_status = _update_module_state(update_fcn, module_descriptor, module_to_update, action_name)
+            subtask_status.increment(**{update_status: 1})
+    except Exception:
+        TASK_LOG.exception(u"Subtask %s for instructor task %d: failed unexpectedly!", current_task_id, entry_id)
+        # Count every module we didn't get to as having failed, to keep the counts consistent.
+        subtask_status.increment(failed=len(module_ids) - subtask_status.attempted - subtask_status.skipped,
+                                 state=FAILURE)
+        update_subtask_status(entry_id, current_task_id, subtask_status)
+        raise
+
+    subtask_status.increment(state=SUCCESS)
+    update_subtask_status(entry_id, current_task_id, subtask_status)
+    return subtask_status.to_dict()
+
+
+def _update_module_state(update_fcn, module_descriptor, module_to_update, action_name):
+    """
+    Apply `update_fcn` to `module_to_update`, and return its update status.
+    """
+    with dog_stats_api.timer('instructor_tasks.module.time.step', tags=[u'action:{name}'.format(name=action_name)]):
+        update_status = update_fcn(module_descriptor, module_to_update)
+    if update_status not in (UPDATE_STATUS_SUCCEEDED, UPDATE_STATUS_FAILED, UPDATE_STATUS_SKIPPED):
+        raise UpdateProblemModuleStateError("Unexpected update_status returned: {}".format(update_status))
+    return update_status
+
+
 def _get_task_id_from_xmodule_args(xmodule_instance_args):
     """Gets task_id from `xmodule_instance_args` dict, or returns default value if missing."""
     return xmodule_instance_args.get('task_id', UNKNOWN_TASK_ID) if xmodule_instance_args is not None else UNKNOWN_TASK_ID
@@ -469,7 +559,7 @@ def delete_problem_module_state(xmodule_instance_args, _module_descriptor, stude
     return UPDATE_STATUS_SUCCEEDED
 
 
-def push_grades_to_s3(_xmodule_instance_args, _entry_id, course_id, _task_input, action_name):
+def push_grades_to_s3(create_subtask_fcn, _xmodule_instance_args, entry_id, course_id, _task_input, action_name):
     """
     For a given `course_id`, generate a grades CSV file for all students that
     are enrolled, and store using a `ReportStore`. Once created, the files can
@@ -478,96 +568,268 @@ def push_grades_to_s3(_xmodule_instance_args, _entry_id, course_id, _task_input,
     buffered, so we'll never write part of a CSV file to S3 -- i.e. any files
     that are visible in ReportStore will be complete ones.
 
-    As we start to add more CSV downloads, it will probably be worthwhile to
-    make a more general CSVDoc class instead of building out the rows like we
-    do here.
+    The enrolled students are split into chunks of
+    settings.GRADES_DOWNLOAD_STUDENTS_PER_TASK, and each chunk is graded by its
+    own subtask (created by `create_subtask_fcn`, see `push_grades_chunk_to_s3`).
+    Each subtask stores its rows as a partial report, and the subtask that
+    finishes last merges the partial reports into the final CSV files.
     """
-    start_time = datetime.now(UTC)
-    status_interval = 100
+    entry = InstructorTask.objects.get(pk=entry_id)
 
+    # If the subtasks have already been queued (e.g. this task was requeued by
+    # Celery after losing its connection to the broker), don't queue them again.
+    if len(entry.subtasks) > 0 and len(entry.task_output) > 0:
+        TASK_LOG.warning(u"Task %s has already queued subtasks for grade report of %s", entry.task_id, course_id)
+        return json.loads(entry.task_output)
+
+    start_time = datetime.now(UTC)
+    report_name = _grade_report_name(course_id, start_time)
     enrolled_students = CourseEnrollment.users_enrolled_in(course_id)
-    num_total = enrolled_students.count()
-    num_attempted = 0
-    num_succeeded = 0
-    num_failed = 0
-    curr_step = "Calculating Grades"
 
-    def update_task_progress():
-        """Return a dict containing info about current task"""
-        current_time = datetime.now(UTC)
-        progress = {
+    if not enrolled_students.exists():
+        # Nothing to split up, just store the empty report.
+        ReportStore.from_config().store_rows(course_id, u"{}.csv".format(report_name), [])
+        return {
             'action_name': action_name,
-            'attempted': num_attempted,
-            'succeeded': num_succeeded,
-            'failed': num_failed,
-            'total': num_total,
-            'duration_ms': int((current_time - start_time).total_seconds() * 1000),
-            'step': curr_step,
+            'attempted': 0,
+            'succeeded': 0,
+            'failed': 0,
+            'skipped': 0,
+            'total': 0,
+            'duration_ms': int((datetime.now(UTC) - start_time).total_seconds() * 1000),
         }
-        _get_current_task().update_state(state=PROGRESS, meta=progress)
 
-        return progress
+    def _create_grade_report_subtask(student_list, initial_subtask_status):
+        """Creates a subtask to grade the students in `student_list`."""
+        return create_subtask_fcn(
+            (
+                entry_id,
+                [student['pk'] for student in student_list],
+                report_name,
+                initial_subtask_status.to_dict(),
+            ),
+            task_id=initial_subtask_status.task_id,
+            routing_key=settings.GRADES_DOWNLOAD_ROUTING_KEY,
+        )
+
+    return queue_subtasks_for_query(
+        entry,
+        action_name,
+        _create_grade_report_subtask,
+        enrolled_students,
+        [],
+        settings.GRADES_DOWNLOAD_STUDENTS_PER_QUERY,
+        settings.GRADES_DOWNLOAD_STUDENTS_PER_TASK,
+    )
+
+
+def push_grades_chunk_to_s3(entry_id, student_ids, report_name, subtask_status_dict):
+    """
+    Grade the students with ids `student_ids` for the course of InstructorTask
+    `entry_id`, and store their rows as partial reports.
+
+    The progress of the parent InstructorTask is updated through
+    `update_subtask_status`. If this is the last subtask of the report to
+    finish, whether or not it failed, the partial reports are then merged into
+    the final report before the parent is marked as done.
+    """
+    subtask_status = SubtaskStatus.from_dict(subtask_status_dict)
+    current_task_id = subtask_status.task_id
+
+    # Reject subtasks that are unknown to the InstructorTask, or that have
+    # already been run (e.g. requeued by Celery).
+    check_subtask_is_valid(entry_id, current_task_id, subtask_status)
+
+    course_id = InstructorTask.objects.get(pk=entry_id).course_id
+    # Each partial report is named after the first student in it, so that
+    # the merged report keeps the students in order.
+    part_suffix = u"{:010d}.csv".format(student_ids[0] if student_ids else 0)
 
-    # Loop over all our students and build our CSV lists in memory
     header = None
     rows = []
-    err_rows = [["id", "username", "error_msg"]]
-    for student, gradeset, err_msg in iterate_grades_for(course_id, enrolled_students):
-        # Periodically update task status (this is a cache write)
-        if num_attempted % status_interval == 0:
-            update_task_progress()
-        num_attempted += 1
+    err_rows = []
+    graded_ids = set()
+    try:
+        students = User.objects.filter(id__in=student_ids).order_by('id')
+        for student, gradeset, err_msg in iterate_grades_for(course_id, students):
+            graded_ids.add(student.id)
+            if gradeset:
+                # We were able to successfully grade this student for this course.
+                subtask_status.increment(succeeded=1)
+                if not header:
+                    # Encode the header row in utf-8 encoding in case there are unicode characters
+                    header = [section['label'].encode('utf-8') for section in gradeset[u'section_breakdown']]
+                    rows.append(["id", "email", "username", "grade"] + header)
+
+                percents = {
+                    section['label']: section.get('percent', 0.0)
+                    for section in gradeset[u'section_breakdown']
+                    if 'label' in section
+                }
+
+                # Not everybody has the same gradable items. If the item is not
+                # found in the user's gradeset, just assume it's a 0. The aggregated
+                # grades for their sections and overall course will be calculated
+                # without regard for the item they didn't have access to, so it's
+                # possible for a student to have a 0.0 show up in their row but
+                # still have 100% for the course.
+                row_percents = [percents.get(label, 0.0) for label in header]
+                rows.append([student.id, student.email, student.username, gradeset['percent']] + row_percents)
+            else:
+                # An empty gradeset means we failed to grade a student.
+                subtask_status.increment(failed=1)
+                err_rows.append([student.id, student.username, err_msg])
+
+        _store_grade_report_parts(course_id, report_name, part_suffix, rows, err_rows)
+    except Exception as exc:  # pylint: disable=broad-except
+        exc_info = sys.exc_info()
+        TASK_LOG.exception(u"Grade report subtask %s for instructor task %d: failed unexpectedly!", current_task_id, entry_id)
+        # Count every student we didn't get to as having failed, to keep the
+        # counts consistent, and list them in the error report so that they
+        # don't silently go missing from the grade report.
+        ungraded_ids = [student_id for student_id in student_ids if student_id not in graded_ids]
+        subtask_status.increment(failed=len(ungraded_ids), state=FAILURE)
+        err_msg = u"Grade report subtask failed: {}".format(exc)
+        err_rows.extend([student_id, "", err_msg] for student_id in ungraded_ids)
+        try:
+            _store_grade_report_parts(course_id, report_name, part_suffix, rows, err_rows)
+        except Exception:  # pylint: disable=broad-except
+            TASK_LOG.exception(u"Grade report subtask %s for instructor task %d: could not store its rows", current_task_id, entry_id)
+        _finish_grade_report_subtask(entry_id, current_task_id, subtask_status, course_id, report_name)
+        raise exc_info[0], exc_info[1], exc_info[2]
 
-        if gradeset:
-            # We were able to successfully grade this student for this course.
-            num_succeeded += 1
-            if not header:
-                # Encode the header row in utf-8 encoding in case there are unicode characters
-                header = [section['label'].encode('utf-8') for section in gradeset[u'section_breakdown']]
-                rows.append(["id", "email", "username", "grade"] + header)
-
-            percents = {
-                section['label']: section.get('percent', 0.0)
-                for section in gradeset[u'section_breakdown']
-                if 'label' in section
-            }
-
-            # Not everybody has the same gradable items. If the item is not
-            # found in the user's gradeset, just assume it's a 0. The aggregated
-            # grades for their sections and overall course will be calculated
-            # without regard for the item they didn't have access to, so it's
-            # possible for a student to have a 0.0 show up in their row but
-            # still have 100% for the course.
-            row_percents = [percents.get(label, 0.0) for label in header]
-            rows.append([student.id, student.email, student.username, gradeset['percent']] + row_percents)
-        else:
-            # An empty gradeset means we failed to grade a student.
-            num_failed += 1
-            err_rows.append([student.id, student.username, err_msg])
+    subtask_status.increment(state=SUCCESS)
+    _finish_grade_report_subtask(entry_id, current_task_id, subtask_status, course_id, report_name)
+    return subtask_status.to_dict()
+
+
+def _store_grade_report_parts(course_id, report_name, part_suffix, rows, err_rows):
+    """
+    Store the grade rows and error rows of a grade report subtask as partial
+    reports, named with `part_suffix`.
+    """
+    partial_store = ReportStore.from_config(partial=True)
+    if rows:
+        partial_store.store_rows(course_id, u"{}_part_{}".format(report_name, part_suffix), rows)
+    if err_rows:
+        partial_store.store_rows(
+            course_id,
+            u"{}_err_part_{}".format(report_name, part_suffix),
+            [["id", "username", "error_msg"]] + err_rows
+        )
+
+
+def _finish_grade_report_subtask(entry_id, current_task_id, subtask_status, course_id, report_name):
+    """
+    Record the final `subtask_status` of a grade report subtask. If it was the
+    last one to finish, merge the partial reports into the final report and
+    only then mark the parent InstructorTask as done: SUCCESS, or FAILURE if
+    the merge failed.
+    """
+    if not update_subtask_status(entry_id, current_task_id, subtask_status, complete_parent=False):
+        return
+
+    task_state = FAILURE
+    try:
+        _merge_grade_report(course_id, report_name)
+        task_state = SUCCESS
+    except Exception:  # pylint: disable=broad-except
+        TASK_LOG.exception(u"Grade report for instructor task %d: could not merge the partial reports", entry_id)
+    finally:
+        entry = InstructorTask.objects.get(pk=entry_id)
+        entry.task_state = task_state
+        entry.save_now()
 
-    # By this point, we've got the rows we're going to stuff into our CSV files.
-    curr_step = "Uploading CSVs"
-    update_task_progress()
 
-    # Generate parts of the file name
+def _grade_report_name(course_id, start_time):
+    """
+    Return the base name (without extension) of the grade report files
+    generated for `course_id` by a task started at `start_time`.
+    """
+    return _report_name(course_id, u"grade_report", start_time)
+
+
+def _report_name(course_id, report_type, start_time):
+    """
+    Return the base name (without extension) of the `report_type` report
+    files generated for `course_id` by a task started at `start_time`.
+    """
     timestamp_str = start_time.strftime("%Y-%m-%d-%H%M")
     course_id_prefix = urllib.quote(course_id.to_deprecated_string().replace("/", "_"))
+    return u"{}_{}_{}".format(course_id_prefix, report_type, timestamp_str)
 
-    # Perform the actual upload
+
+def _merge_grade_report(course_id, report_name):
+    """
+    Merge the partial grade reports named `report_name` into the final grade
+    report (and error report), and delete the partial reports.
+    """
+    partial_store = ReportStore.from_config(partial=True)
     report_store = ReportStore.from_config()
-    report_store.store_rows(
-        course_id,
-        u"{}_grade_report_{}.csv".format(course_id_prefix, timestamp_str),
-        rows
-    )
+    grade_parts = []
+    err_parts = []
+    for filename, _ in sorted(partial_store.links_for(course_id)):
+        if filename.startswith(u"{}_part_".format(report_name)):
+            grade_parts.append(filename)
+        elif filename.startswith(u"{}_err_part_".format(report_name)):
+            err_parts.append(filename)
 
-    # If there are any error rows (don't count the header), write them out as well
-    if len(err_rows) > 1:
-        report_store.store_rows(
-            course_id,
-            u"{}_grade_report_{}_err.csv".format(course_id_prefix, timestamp_str),
-            err_rows
-        )
+    report_store.store_rows(course_id, u"{}.csv".format(report_name), _merged_rows(partial_store, course_id, grade_parts))
+    if err_parts:
+        report_store.store_rows(course_id, u"{}_err.csv".format(report_name), _merged_rows(partial_store, course_id, err_parts))
+
+    for filename in grade_parts + err_parts:
+        partial_store.delete(course_id, filename)
+
+
+def _merged_rows(report_store, course_id, filenames):
+    """
+    Yield the rows of the CSV files `filenames` of `course_id` in
+    `report_store` one after the other, keeping only the header row of the
+    first file.
+    """
+    for index, filename in enumerate(filenames):
+        rows = report_store.read_rows(course_id, filename)
+        if index > 0:
+            next(rows, None)
+        for row in rows:
+            yield row
 
-    # One last update before we close out...
-    return update_task_progress()
+
+def push_answer_distribution_to_s3(_xmodule_instance_args, entry_id, course_id, _task_input, action_name):
+    """
+    For a given `course_id`, generate a CSV file of the distribution of the
+    answers submitted to every problem of the course, and store it using a
+    `ReportStore`, alongside the grade reports.
+
+    The submissions are read in chunks from the read replica (see
+    `courseware.grades.answer_distributions`), and the rows are written out as
+    they are generated, so the report never has to be in memory all at once.
+    """
+    start_time = datetime.now(UTC)
+    distribution = answer_distributions(course_id)
+
+    def _rows():
+        """Yield the header row, then one row per (problem part, answer) pair."""
+        yield ['url_name', 'display name', 'answer id', 'answer', 'count']
+        for (url_name, display_name, answer_id) in sorted(distribution):
+            answers = distribution[(url_name, display_name, answer_id)]
+            for answer, count in sorted(answers.items()):
+                yield [
+                    unicode(value).encode('utf-8')
+                    for value in (url_name, display_name, answer_id, answer, count)
+                ]
+
+    report_name = _report_name(course_id, u"answer_distribution", start_time)
+    ReportStore.from_config().store_rows(course_id, u"{}.csv".format(report_name), _rows())
+
+    num_problem_parts = len(distribution)
+    return {
+        'action_name': action_name,
+        'attempted': num_problem_parts,
+        'succeeded': num_problem_parts,
+        'failed': 0,
+        'skipped': 0,
+        'total': num_problem_parts,
+        'duration_ms': int((datetime.now(UTC) - start_time).total_seconds() * 1000),
+    }
@@ -6,11 +6,14 @@ paths actually work.
 
 """
 import json
+import shutil
+from tempfile import mkdtemp
 from uuid import uuid4
 
 from mock import Mock, MagicMock, patch
 
 from celery.states import SUCCESS, FAILURE
+from django.test.utils import override_settings
 
 from xmodule.modulestore.exceptions import ItemNotFoundError
 from xmodule.modulestore.locations import i4xEncoder
@@ -19,10 +22,13 @@ from courseware.models import StudentModule
 from courseware.tests.factories import StudentModuleFactory
 from student.tests.factories import UserFactory, CourseEnrollmentFactory
 
-from instructor_task.models import InstructorTask
+from instructor_task.models import InstructorTask, ReportStore
 from instructor_task.tests.test_base import InstructorTaskModuleTestCase
 from instructor_task.tests.factories import InstructorTaskFactory
-from instructor_task.tasks import rescore_problem, reset_problem_attempts, delete_problem_state
+from instructor_task.tasks import (
+    rescore_problem, reset_problem_attempts, delete_problem_state, calculate_grades_csv,
+    calculate_answer_distribution_csv,
+)
 from instructor_task.tasks_helper import UpdateProblemModuleStateError
 
 PROBLEM_URL_NAME = "test_urlname"
@@ -258,6 +264,27 @@ class TestRescoreInstructorTask(TestInstructorTasks):
         self.assertEquals(output.get('action_name'), 'rescored')
         self.assertGreater(output.get('duration_ms'), 0)
 
+    def test_rescoring_subtasks(self):
+        input_state = json.dumps({'done': True})
+        num_students = 7
+        self._create_students_with_state(num_students, input_state)
+        task_entry = self._create_input_entry()
+        mock_instance = Mock()
+        mock_instance.rescore_problem = Mock(return_value={'success': 'correct'})
+        with override_settings(RESCORE_MODULES_PER_TASK=3):
+            with patch('instructor_task.tasks_helper.get_module_for_descriptor_internal') as mock_get_module:
+                mock_get_module.return_value = mock_instance
+                self._run_task_with_mock_celery(rescore_problem, task_entry.id, task_entry.task_id)
+        # the submissions are split over three subtasks, which together rescore all of them
+        entry = InstructorTask.objects.get(id=task_entry.id)
+        self.assertEquals(json.loads(entry.subtasks)['total'], 3)
+        self.assertEquals(entry.task_state, SUCCESS)
+        output = json.loads(entry.task_output)
+        self.assertEquals(output.get('attempted'), num_students)
+        self.assertEquals(output.get('succeeded'), num_students)
+        self.assertEquals(output.get('total'), num_students)
+        self.assertEquals(mock_instance.rescore_problem.call_count, num_students)
+
     def test_rescoring_bad_result(self):
         # Confirm that rescoring does not succeed if "success" key is not an expected value.
         input_state = json.dumps({'done': True})
@@ -438,3 +465,158 @@ class TestDeleteStateInstructorTask(TestInstructorTasks):
                 StudentModule.objects.get(course_id=self.course.id,
                                           student=student,
                                           module_state_key=self.location)
+
+
+class TestGradeReportTask(InstructorTaskModuleTestCase):
+    """
+    Tests generating a grade report with subtasks.
+    """
+    def setUp(self):
+        super(TestGradeReportTask, self).setUp()
+        self.initialize_course()
+        self.instructor = self.create_instructor('instructor')
+        self.report_root = mkdtemp()
+        self.addCleanup(shutil.rmtree, self.report_root)
+
+    def _run_grade_report_task(self):
+        """Run calculate_grades_csv eagerly, mocking how celery provides a current_task."""
+        task_id = str(uuid4())
+        task_entry = InstructorTaskFactory.create(
+            course_id=self.course.id,
+            requester=self.instructor,
+            task_input=json.dumps({}),
+            task_key='dummy value',
+            task_id=task_id,
+        )
+        current_task = Mock()
+        current_task.request.id = task_id
+        xmodule_instance_args = {'xqueue_callback_url_prefix': 'dummy_value', 'request_info': {}}
+        with patch('instructor_task.tasks_helper._get_current_task') as mock_get_task:
+            mock_get_task.return_value = current_task
+            calculate_grades_csv.apply([task_entry.id, xmodule_instance_args], task_id=task_id).get()
+        return InstructorTask.objects.get(id=task_entry.id)
+
+    def test_grade_report_subtasks(self):
+        for index in range(5):
+            self.create_student('student{}'.format(index))
+
+        grades_download = {'STORAGE_TYPE': 'localfs', 'ROOT_PATH': self.report_root}
+        with override_settings(GRADES_DOWNLOAD=grades_download, GRADES_DOWNLOAD_STUDENTS_PER_TASK=2):
+            entry = self._run_grade_report_task()
+
+            self.assertEquals(entry.task_state, SUCCESS)
+            # The instructor and the five students are split over three subtasks
+            self.assertEquals(json.loads(entry.subtasks)['total'], 3)
+            task_output = json.loads(entry.task_output)
+            self.assertEquals(task_output['succeeded'], 6)
+            self.assertEquals(task_output['failed'], 0)
+
+            report_store = ReportStore.from_config()
+            links = report_store.links_for(self.course.id)
+            self.assertEquals(len(links), 1)
+            rows = list(report_store.read_rows(self.course.id, links[0][0]))
+            self.assertEquals(rows[0][:4], ["id", "email", "username", "grade"])
+            self.assertEquals(len(rows), 7)
+
+            # The partial reports have been cleaned up
+            self.assertEquals(ReportStore.from_config(partial=True).links_for(self.course.id), [])
+
+    def test_grade_report_failed_subtask(self):
+        for index in range(5):
+            self.create_student('student{}'.format(index))
+
+        def iterate_grades_for(_course_id, students):
+            """Grade every student, except for failing the chunk with the last student."""
+            students = list(students)
+            if students[-1].username == 'student4':
+                raise Exception('Grading failed')
+            for student in students:
+                yield student, {'percent': 0.5, 'section_breakdown': [{'label': 'HW 01', 'percent': 0.5}]}, ''
+
+        grades_download = {'STORAGE_TYPE': 'localfs', 'ROOT_PATH': self.report_root}
+        with override_settings(GRADES_DOWNLOAD=grades_download, GRADES_DOWNLOAD_STUDENTS_PER_TASK=2):
+            with patch('instructor_task.tasks_helper.iterate_grades_for', iterate_grades_for):
+                entry = self._run_grade_report_task()
+
+            # The report is still merged once the failed subtask is done
+            self.assertEquals(entry.task_state, SUCCESS)
+            task_output = json.loads(entry.task_output)
+            self.assertEquals(task_output['succeeded'], 4)
+            self.assertEquals(task_output['failed'], 2)
+
+            report_store = ReportStore.from_config()
+            links = sorted(report_store.links_for(self.course.id))
+            self.assertEquals(len(links), 2)
+            grade_rows = list(report_store.read_rows(self.course.id, links[0][0]))
+            self.assertEquals(len(grade_rows), 5)
+            # The students of the failed chunk are listed in the error report
+            err_rows = list(report_store.read_rows(self.course.id, links[1][0]))
+            self.assertEquals(err_rows[0], ["id", "username", "error_msg"])
+            self.assertEquals(len(err_rows), 3)
+            self.assertEquals(ReportStore.from_config(partial=True).links_for(self.course.id), [])
+
+
+class TestAnswerDistributionReportTask(InstructorTaskModuleTestCase):
+    """
+    Tests generating an answer distribution report.
+    """
+    def setUp(self):
+        super(TestAnswerDistributionReportTask, self).setUp()
+        self.initialize_course()
+        self.instructor = self.create_instructor('instructor')
+        self.define_option_problem(PROBLEM_URL_NAME)
+        self.location = InstructorTaskModuleTestCase.problem_location(PROBLEM_URL_NAME)
+        self.report_root = mkdtemp()
+        self.addCleanup(shutil.rmtree, self.report_root)
+
+    def _run_answer_distribution_task(self):
+        """Run calculate_answer_distribution_csv eagerly, mocking how celery provides a current_task."""
+        task_id = str(uuid4())
+        task_entry = InstructorTaskFactory.create(
+            course_id=self.course.id,
+            requester=self.instructor,
+            task_input=json.dumps({}),
+            task_key='dummy value',
+            task_id=task_id,
+        )
+        current_task = Mock()
+        current_task.request.id = task_id
+        xmodule_instance_args = {'xqueue_callback_url_prefix': 'dummy_value', 'request_info': {}}
+        with patch('instructor_task.tasks_helper._get_current_task') as mock_get_task:
+            mock_get_task.return_value = current_task
+            calculate_answer_distribution_csv.apply([task_entry.id, xmodule_instance_args], task_id=task_id).get()
+        return InstructorTask.objects.get(id=task_entry.id)
+
+    def test_answer_distribution_report(self):
+        answer_id = 'i4x-{}-{}-problem-{}_2_1'.format(self.course.org, self.course.number, PROBLEM_URL_NAME)
+        for index, answer in enumerate(['Option 1', 'Option 2', 'Option 1']):
+            StudentModuleFactory.create(
+                course_id=self.course.id,
+                module_state_key=self.location,
+                module_type='problem',
+                student=self.create_student('student{}'.format(index)),
+                grade=1,
+                state=json.dumps({'student_answers': {answer_id: answer}}),
+            )
+
+        grades_download = {'STORAGE_TYPE': 'localfs', 'ROOT_PATH': self.report_root}
+        # Read the submissions a couple at a time, to go through more than one query
+        with override_settings(GRADES_DOWNLOAD=grades_download), \
+                patch('courseware.grades.ANSWER_DISTRIBUTION_MODULES_PER_QUERY', 2):
+            entry = self._run_answer_distribution_task()
+
+            self.assertEquals(entry.task_state, SUCCESS)
+            self.assertEquals(json.loads(entry.task_output)['succeeded'], 1)
+
+            report_store = ReportStore.from_config()
+            links = report_store.links_for(self.course.id)
+            self.assertEquals(len(links), 1)
+            self.assertIn('answer_distribution', links[0][0])
+            self.assertEquals(
+                list(report_store.read_rows(self.course.id, links[0][0])),
+                [
+                    ['url_name', 'display name', 'answer id', 'answer', 'count'],
+                    [PROBLEM_URL_NAME, PROBLEM_URL_NAME, answer_id, 'Option 1', '2'],
+                    [PROBLEM_URL_NAME, PROBLEM_URL_NAME, answer_id, 'Option 2', '1'],
+                ]
+            )
@@ -136,6 +136,8 @@ EMAIL_USE_TLS = ENV_TOKENS.get('EMAIL_USE_TLS', False)  # django default is Fals
 SITE_NAME = ENV_TOKENS['SITE_NAME']
 HTTPS = ENV_TOKENS.get('HTTPS', HTTPS)
 SESSION_ENGINE = ENV_TOKENS.get('SESSION_ENGINE', SESSION_ENGINE)
+MAKO_MODULE_DIR = ENV_TOKENS.get('MAKO_MODULE_DIR', MAKO_MODULE_DIR)
+MAKO_PRODUCTION_MODE = ENV_TOKENS.get('MAKO_PRODUCTION_MODE', MAKO_PRODUCTION_MODE)
 SESSION_COOKIE_DOMAIN = ENV_TOKENS.get('SESSION_COOKIE_DOMAIN')
 REGISTRATION_EXTRA_FIELDS = ENV_TOKENS.get('REGISTRATION_EXTRA_FIELDS', REGISTRATION_EXTRA_FIELDS)
 
@@ -228,6 +230,8 @@ VIRTUAL_UNIVERSITIES = ENV_TOKENS.get('VIRTUAL_UNIVERSITIES', [])
 META_UNIVERSITIES = ENV_TOKENS.get('META_UNIVERSITIES', {})
 COMMENTS_SERVICE_URL = ENV_TOKENS.get("COMMENTS_SERVICE_URL", '')
 COMMENTS_SERVICE_KEY = ENV_TOKENS.get("COMMENTS_SERVICE_KEY", '')
+COMMENTS_SERVICE_CACHE_TIMEOUT = ENV_TOKENS.get("COMMENTS_SERVICE_CACHE_TIMEOUT", COMMENTS_SERVICE_CACHE_TIMEOUT)
+COMMENTS_SERVICE_CONCURRENCY = ENV_TOKENS.get("COMMENTS_SERVICE_CONCURRENCY", COMMENTS_SERVICE_CONCURRENCY)
 CERT_QUEUE = ENV_TOKENS.get("CERT_QUEUE", 'test-pull')
 ZENDESK_URL = ENV_TOKENS.get("ZENDESK_URL")
 FEEDBACK_SUBMISSION_EMAIL = ENV_TOKENS.get("FEEDBACK_SUBMISSION_EMAIL")
@@ -368,6 +372,13 @@ VERIFY_STUDENT = AUTH_TOKENS.get("VERIFY_STUDENT", VERIFY_STUDENT)
 GRADES_DOWNLOAD_ROUTING_KEY = HIGH_MEM_QUEUE
 
 GRADES_DOWNLOAD = ENV_TOKENS.get("GRADES_DOWNLOAD", GRADES_DOWNLOAD)
+GRADES_DOWNLOAD_STUDENTS_PER_TASK = ENV_TOKENS.get('GRADES_DOWNLOAD_STUDENTS_PER_TASK', GRADES_DOWNLOAD_STUDENTS_PER_TASK)
+GRADES_DOWNLOAD_STUDENTS_PER_QUERY = ENV_TOKENS.get('GRADES_DOWNLOAD_STUDENTS_PER_QUERY', GRADES_DOWNLOAD_STUDENTS_PER_QUERY)
+
+# Problem rescoring
+RESCORE_MODULES_PER_TASK = ENV_TOKENS.get('RESCORE_MODULES_PER_TASK', RESCORE_MODULES_PER_TASK)
+RESCORE_MODULES_PER_QUERY = ENV_TOKENS.get('RESCORE_MODULES_PER_QUERY', RESCORE_MODULES_PER_QUERY)
+INSTRUCTOR_TASK_PROGRESS_INTERVAL = ENV_TOKENS.get('INSTRUCTOR_TASK_PROGRESS_INTERVAL', INSTRUCTOR_TASK_PROGRESS_INTERVAL)
 
 ##### ACCOUNT LOCKOUT DEFAULT PARAMETERS #####
 MAX_FAILED_LOGIN_ATTEMPTS_ALLOWED = ENV_TOKENS.get("MAX_FAILED_LOGIN_ATTEMPTS_ALLOWED", 5)
@@ -255,6 +255,10 @@ FEATURES = {
     # Show a "Download your certificate" on the Progress page if the lowest
     # nonzero grade cutoff is met
     'SHOW_PROGRESS_SUCCESS_BUTTON': False,
+
+    # Only render the unit being shown in a sequence (and LAZY_SEQUENCE_NEIGHBORS
+    # units either side of it) with the page; the rest are fetched when they're shown
+    'ENABLE_LAZY_SEQUENCE_TABS': False,
 }
 
 # Used for A/B testing
@@ -314,6 +318,13 @@ MAKO_TEMPLATES['main'] = [PROJECT_ROOT / 'templates',
                           COMMON_ROOT / 'lib' / 'capa' / 'capa' / 'templates',
                           COMMON_ROOT / 'djangoapps' / 'pipeline_mako' / 'templates']
 
+# In production mode, every mako template is compiled at startup, templates are
+# never checked for changes on disk, and microsite template overrides are only
+# looked for once. Run the compile_templates command at deploy time, with
+# MAKO_MODULE_DIR pointing at a directory which persists, to spare each process
+# the compiling.
+MAKO_PRODUCTION_MODE = False
+
 # This is where Django Template lookup is defined. There are a few of these
 # still left lying around.
 TEMPLATE_DIRS = [
@@ -487,6 +498,10 @@ XBLOCK_MIXINS = (LmsBlockMixin, InheritanceMixin, XModuleMixin)
 # Allow any XBlock in the LMS
 XBLOCK_SELECT_FUNCTION = prefer_xmodules
 
+# With ENABLE_LAZY_SEQUENCE_TABS, how many units either side of the one being
+# shown a sequence renders with the page
+LAZY_SEQUENCE_NEIGHBORS = 0
+
 #################### Python sandbox ############################################
 
 CODE_JAIL = {
@@ -1240,6 +1255,9 @@ INSTALLED_APPS = (
     # Different Course Modes
     'course_modes',
 
+    # Summaries of courses, for listing them
+    'course_summaries',
+
     # Student Identity Verification
     'verify_student',
 
@@ -1330,6 +1348,19 @@ GRADES_DOWNLOAD = {
     'ROOT_PATH': '/tmp/edx-s3/grades',
 }
 
+# Grade reports are generated by subtasks, each grading this many students
+GRADES_DOWNLOAD_STUDENTS_PER_TASK = 100
+GRADES_DOWNLOAD_STUDENTS_PER_QUERY = 1000
+
+###################### Problem Rescoring ######################
+# Rescoring a problem for more than this many students is split among subtasks,
+# each rescoring this many students' submissions
+RESCORE_MODULES_PER_TASK = 500
+RESCORE_MODULES_PER_QUERY = 5000
+
+# Minimum number of seconds between progress updates of a running instructor task
+INSTRUCTOR_TASK_PROGRESS_INTERVAL = 5
+
 ######################## PROGRESS SUCCESS BUTTON ##############################
 # The following fields are available in the URL: {course_id} {student_id}
 PROGRESS_SUCCESS_BUTTON_URL = 'http://<domain>/<path>/{course_id}'
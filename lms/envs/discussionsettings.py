@@ -3,3 +3,10 @@
 # pylint: disable=W0614
 
 DISCUSSION_ALLOWED_UPLOAD_FILE_TYPES = ('.jpg', '.jpeg', '.gif', '.bmp', '.png', '.tiff')
+
+# How long, in seconds, a user's profile from the comments service is cached
+# (it is discarded sooner if the user changes it); 0 disables caching
+COMMENTS_SERVICE_CACHE_TIMEOUT = 10
+
+# The most requests each process makes to the comments service at once
+COMMENTS_SERVICE_CONCURRENCY = 8
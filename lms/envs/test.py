@@ -55,6 +55,9 @@ SOUTH_TESTS_MIGRATE = False  # To disable migrations and use syncdb instead
 # Nose Test Runner
 TEST_RUNNER = 'django_nose.NoseTestSuiteRunner'
 
+# Tests mock the comments service, so its responses mustn't be cached from one test to the next
+COMMENTS_SERVICE_CACHE_TIMEOUT = 0
+
 _system = 'lms'
 
 _report_dir = REPO_ROOT / 'reports' / _system
@@ -173,6 +176,10 @@ CACHES = {
         'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
         'LOCATION': 'edx_location_mem_cache',
     },
+    # test databases are dropped and refilled; so, don't share split structures across tests
+    'course_structure_cache': {
+        'BACKEND': 'django.core.cache.backends.dummy.DummyCache',
+    },
 
 }
 
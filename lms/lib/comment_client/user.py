@@ -1,4 +1,4 @@
-from .utils import merge_dict, perform_request, CommentClientRequestError
+from .utils import merge_dict, perform_request, invalidate_user_cache, CommentClientRequestError
 
 import models
 import settings
@@ -36,6 +36,7 @@ class User(models.Model):
             params,
             metric_action='user.follow',
             metric_tags=self._metric_tags + ['target.type:{}'.format(source.type)],
+            cache_user_id=self.id,
         )
 
     def unfollow(self, source):
@@ -46,6 +47,7 @@ class User(models.Model):
             params,
             metric_action='user.unfollow',
             metric_tags=self._metric_tags + ['target.type:{}'.format(source.type)],
+            cache_user_id=self.id,
         )
 
     def vote(self, voteable, value):
@@ -114,6 +116,10 @@ class User(models.Model):
         )
         return response.get('collection', []), response.get('page', 1), response.get('num_pages', 1)
 
+    @classmethod
+    def after_save(cls, instance):
+        invalidate_user_cache(instance.id)
+
     def _retrieve(self, *args, **kwargs):
         url = self.url(action='get', params=self.attributes)
         retrieve_params = self.default_retrieve_params
@@ -126,6 +132,7 @@ class User(models.Model):
                 retrieve_params,
                 metric_action='model.retrieve',
                 metric_tags=self._metric_tags,
+                cache_user_id=self.id,
             )
         except CommentClientRequestError as e:
             if e.status_code == 404:
@@ -138,6 +145,7 @@ class User(models.Model):
                     retrieve_params,
                     metric_action='model.retrieve',
                     metric_tags=self._metric_tags,
+                    cache_user_id=self.id,
                 )
             else:
                 raise
@@ -1,14 +1,30 @@
 from contextlib import contextmanager
 from dogapi import dog_stats_api
+import hashlib
 import logging
+import os
 import requests
+import sys
 from django.conf import settings
+from django.core.cache import cache
+from django.utils import translation
+from multiprocessing.pool import ThreadPool
 from time import time
 from uuid import uuid4
 from django.utils.translation import get_language
 
 log = logging.getLogger(__name__)
 
+# The most requests to the comments service made at once, and the most
+# connections to it kept alive, by each process
+DEFAULT_CONCURRENCY = 8
+
+# The per-process session and thread pool, and the process they belong to:
+# neither survives a fork
+_session = None
+_pool = None
+_owner_pid = None
+
 
 def strip_none(dic):
     return dict([(k, v) for k, v in dic.iteritems() if v is not None])
@@ -50,8 +66,96 @@ def request_timer(request_id, method, url, tags=None):
     )
 
 
+def _process_local():
+    """
+    Returns the session that keeps connections to the comments service alive,
+    and the thread pool for making requests to it concurrently, creating them
+    if this process hasn't yet.
+    """
+    global _session, _pool, _owner_pid  # pylint: disable=global-statement
+    if _owner_pid != os.getpid():
+        concurrency = getattr(settings, "COMMENTS_SERVICE_CONCURRENCY", DEFAULT_CONCURRENCY)
+        session = requests.Session()
+        adapter = requests.adapters.HTTPAdapter(pool_connections=1, pool_maxsize=concurrency)
+        session.mount('http://', adapter)
+        session.mount('https://', adapter)
+        _session, _pool, _owner_pid = session, ThreadPool(concurrency), os.getpid()
+    return _session, _pool
+
+
+def perform_concurrently(*calls):
+    """
+    Calls each of `calls`, functions which take no arguments and make requests
+    to the comments service, at the same time, and returns their results in
+    order. If any of them raises an exception, the first to do so (in order)
+    is re-raised once they have all returned.
+
+    The calls run on other threads, in the caller's language. They mustn't
+    use the database, whose connections are per thread, nor call
+    perform_concurrently themselves.
+    """
+    if len(calls) < 2:
+        return [call() for call in calls]
+
+    language = get_language()
+
+    def run(call):
+        """ Returns whether `call` succeeded, and its result or exc_info. """
+        translation.activate(language)
+        try:
+            return True, call()
+        except Exception:  # pylint: disable=broad-except
+            return False, sys.exc_info()
+        finally:
+            translation.deactivate()
+
+    __, pool = _process_local()
+    results = pool.map(run, calls)
+    for succeeded, result in results:
+        if not succeeded:
+            raise result[0], result[1], result[2]
+    return [result for __, result in results]
+
+
+def _user_cache_generation_key(user_id):
+    return u'comment_client.user_generation.{}'.format(user_id)
+
+
+def invalidate_user_cache(user_id):
+    """
+    Discards the cached responses to requests made with `cache_user_id=user_id`.
+    """
+    key = _user_cache_generation_key(user_id)
+    try:
+        cache.incr(key)
+    except ValueError:
+        cache.set(key, 1)
+
+
+def _response_cache_key(user_id, url, params):
+    """
+    Returns the key the response to a GET request is cached under; it changes
+    whenever the cached responses for the user are invalidated.
+    """
+    generation = cache.get(_user_cache_generation_key(user_id), 0)
+    request = u'{}?{}'.format(url, sorted((key, unicode(value)) for key, value in params.iteritems()))
+    return u'comment_client.response.{}.{}.{}'.format(
+        user_id, generation, hashlib.md5(request.encode('utf-8')).hexdigest()
+    )
+
+
 def perform_request(method, url, data_or_params=None, raw=False,
-                    metric_action=None, metric_tags=None, paged_results=False):
+                    metric_action=None, metric_tags=None, paged_results=False,
+                    cache_user_id=None):
+    """
+    Makes a request to the comments service, and returns the decoded JSON
+    response (or its text, if `raw`).
+
+    If `cache_user_id` is given, the response to a GET request is cached for
+    COMMENTS_SERVICE_CACHE_TIMEOUT seconds, until a request that changes the
+    data of that user is made: any non-GET request with that `cache_user_id`,
+    or with it as the 'user_id' in its data.
+    """
 
     if metric_tags is None:
         metric_tags = []
@@ -62,6 +166,20 @@ def perform_request(method, url, data_or_params=None, raw=False,
 
     if data_or_params is None:
         data_or_params = {}
+
+    cache_timeout = getattr(settings, "COMMENTS_SERVICE_CACHE_TIMEOUT", 0)
+    cache_key = None
+    if method == 'get':
+        if cache_user_id is not None and cache_timeout:
+            cache_key = _response_cache_key(cache_user_id, url, data_or_params)
+            cached = cache.get(cache_key)
+            if cached is not None:
+                dog_stats_api.increment('comment_client.request.cached', tags=metric_tags)
+                return cached
+    else:
+        for user_id in set([cache_user_id, data_or_params.get('user_id')]) - set([None]):
+            invalidate_user_cache(user_id)
+
     headers = {
         'X-Edx-Api-Key': getattr(settings, "COMMENTS_SERVICE_KEY", None),
         'Accept-Language': get_language(),
@@ -75,8 +193,9 @@ def perform_request(method, url, data_or_params=None, raw=False,
     else:
         data = None
         params = merge_dict(data_or_params, request_id_dict)
+    session, __ = _process_local()
     with request_timer(request_id, method, url, metric_tags):
-        response = requests.request(
+        response = session.request(
             method,
             url,
             data=data,
@@ -102,7 +221,7 @@ def perform_request(method, url, data_or_params=None, raw=False,
         raise CommentClient500Error(response.text)
     else:
         if raw:
-            return response.text
+            data = response.text
         else:
             data = response.json()
             if paged_results:
@@ -121,7 +240,9 @@ def perform_request(method, url, data_or_params=None, raw=False,
                     value=data.get('num_pages', 1),
                     tags=metric_tags
                 )
-            return data
+        if cache_key is not None:
+            cache.set(cache_key, data, cache_timeout)
+        return data
 
 
 class CommentClientError(Exception):